@@ -55,6 +55,10 @@ class TemplateAgent(BaseAgent):
         - status_code (int): ...
     """
     
+    # Results are cached per (name, version, input); set False if output is not
+    # a pure function of input, and bump version when execute() changes
+    cacheable = True
+    
     def __init__(self):
         super().__init__(name="template_agent", version="1.0.0")
     
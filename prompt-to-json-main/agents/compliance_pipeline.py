@@ -13,15 +13,21 @@ EXECUTION ORDER (STRICT):
 import logging
 import json
 import uuid
+from contextvars import ContextVar
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
 
+from agents.rule_index import get_rule_index
+from utils.tracing import current_span, remote_parent, start_span
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Global trace ID for current execution (set at pipeline start)
-_CURRENT_TRACE_ID = None
+# Trace ID for the current execution (set at pipeline start). Context-local so
+# concurrent runs don't overwrite each other; a UUID trace ID doubles as the
+# OpenTelemetry trace ID of the pipeline's spans.
+_CURRENT_TRACE_ID: ContextVar[Optional[str]] = ContextVar("compliance_trace_id", default=None)
 
 def generate_trace_id() -> str:
     """Generate unique trace ID for entire pipeline execution."""
@@ -29,15 +35,15 @@ def generate_trace_id() -> str:
 
 def get_trace_id() -> str:
     """Get current trace ID or generate new one."""
-    global _CURRENT_TRACE_ID
-    if _CURRENT_TRACE_ID is None:
-        _CURRENT_TRACE_ID = generate_trace_id()
-    return _CURRENT_TRACE_ID
+    trace_id = _CURRENT_TRACE_ID.get()
+    if trace_id is None:
+        trace_id = generate_trace_id()
+        _CURRENT_TRACE_ID.set(trace_id)
+    return trace_id
 
 def set_trace_id(trace_id: str):
     """Set trace ID for current execution (for external orchestration)."""
-    global _CURRENT_TRACE_ID
-    _CURRENT_TRACE_ID = trace_id
+    _CURRENT_TRACE_ID.set(trace_id)
 
 
 # ============================================================================
@@ -169,62 +175,11 @@ def filter_applicable_rules(
     - clause_no: unique identifier
     - required_fields: list of fields needed in spec
     - category: height/fsi/setback/etc.
-    """
-    def conditions_match(conditions: Dict[str, Any], subject: Dict[str, Any]) -> bool:
-        if not conditions:
-            return True
-        for field, cond in conditions.items():
-            val = subject.get(field)
-            if val is None:
-                return False
-            if isinstance(cond, list):
-                if val not in cond:
-                    return False
-            elif isinstance(cond, dict):
-                min_v = cond.get("min")
-                max_v = cond.get("max")
-                eq_v = cond.get("equals")
-                if min_v is not None and float(val) < float(min_v):
-                    return False
-                if max_v is not None and float(val) > float(max_v):
-                    return False
-                if eq_v is not None and val != eq_v:
-                    return False
-            else:
-                if val != cond:
-                    return False
-        return True
-
-    applicable = []
-    seen_clauses = set()
-
-    for rule in rules:
-        clause_no = rule.get("clause_no") or rule.get("id")
-
-        # City match
-        rule_city = (rule.get("city") or spec.get("city") or "").lower()
-        if rule_city and rule_city != (spec.get("city") or "").lower():
-            continue
-
-        # Skip duplicates
-        if clause_no in seen_clauses:
-            continue
-
-        required_fields = rule.get("required_fields") or []
-        if not required_fields:
-            # Without explicit required fields, skip to avoid false positives
-            continue
 
-        # Ensure all required fields are present and non-null
-        if not all(spec.get(f) is not None for f in required_fields):
-            continue
-
-        # Evaluate conditions
-        if not conditions_match(rule.get("conditions", {}), spec):
-            continue
-
-        applicable.append(rule)
-        seen_clauses.add(clause_no)
+    Rules are matched through a compiled index (agents.rule_index) that is
+    built once per rule set and reused until the rules change.
+    """
+    applicable = get_rule_index(rules).match(spec)
 
     logger.info("Filtered %s rules → %s applicable", len(rules), len(applicable))
     return applicable
@@ -513,9 +468,26 @@ def run_compliance_pipeline(
         set_trace_id(trace_id)
     else:
         set_trace_id(generate_trace_id())
+
+    # Root span joins the caller's trace if one is active, else the pipeline trace_id
+    parent = current_span() or remote_parent(get_trace_id())
+    with start_span("compliance_pipeline", parent=parent, trace_id=get_trace_id(), city=city) as span:
+        result = _run_pipeline_steps(prompt, city, rules, spec_override)
+        span.set_attribute("case_id", result.get("case_id"))
+        span.set_attribute("pipeline.status", result.get("status"))
+        return result
+
+
+def _run_pipeline_steps(
+    prompt: str,
+    city: Optional[str],
+    rules: Optional[List[Dict[str, Any]]],
+    spec_override: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
     # STEP 1: Normalize
     logger.info("STEP 1: Normalizing spec...")
-    spec = normalize_spec(prompt, city)
+    with start_span("compliance.normalize"):
+        spec = normalize_spec(prompt, city)
     if spec_override:
         spec.update({k: v for k, v in spec_override.items()})
 
@@ -527,7 +499,8 @@ def run_compliance_pipeline(
     
     # STEP 2: Validate
     logger.info("STEP 2: Validating spec...")
-    is_valid, missing = validate_spec(spec)
+    with start_span("compliance.validate"):
+        is_valid, missing = validate_spec(spec)
     if not is_valid:
         logger.error(f"Validation blocked: {missing}")
         return blocked_response(spec, missing)
@@ -536,7 +509,9 @@ def run_compliance_pipeline(
     logger.info("STEP 3: Filtering rules...")
     if not rules:
         rules = []
-    applicable_rules = filter_applicable_rules(rules, spec)
+    with start_span("compliance.filter_rules", rules=len(rules)) as span:
+        applicable_rules = filter_applicable_rules(rules, spec)
+        span.set_attribute("applicable_rules", len(applicable_rules))
     
     if not applicable_rules:
         logger.warning(f"No applicable rules found for {spec['city']}")
@@ -553,15 +528,18 @@ def run_compliance_pipeline(
     
     # STEP 4: Evaluate Rules
     logger.info("STEP 4: Evaluating rules...")
-    evaluations = evaluate_all_rules(applicable_rules, spec)
+    with start_span("compliance.evaluate_rules"):
+        evaluations = evaluate_all_rules(applicable_rules, spec)
     
     # STEP 5: Generate Geometry
     logger.info("STEP 5: Generating geometry...")
-    geometry_path = generate_geometry(spec)
+    with start_span("compliance.generate_geometry"):
+        geometry_path = generate_geometry(spec)
     
     # STEP 6: Summarize
     logger.info("STEP 6: Summarizing output...")
-    summary = summarize_compliance(spec, evaluations, geometry_path)
+    with start_span("compliance.summarize"):
+        summary = summarize_compliance(spec, evaluations, geometry_path)
     
     logger.info(f"✅ Pipeline complete: case_id={spec['case_id']}")
     return summary
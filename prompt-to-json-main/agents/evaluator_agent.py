@@ -7,6 +7,9 @@ Evaluator Agent (production-ready)
   against rules and decides compliance status per-rule and overall
 - Writes evaluation documents to MongoDB (collection: evaluations)
 - Supports CLI usage to evaluate a single project or batch (pending projects)
+- Batches are evaluated in one vectorized NumPy pass (rule limits per category
+  x project parameter matrix) and stored with insert_many
+
 
 Usage:
   # Evaluate a specific project by its project_id (string or ObjectId)
@@ -18,6 +21,9 @@ Usage:
   # Evaluate projects for a specific city
   python agents/evaluator_agent.py --evaluate-pending --city Mumbai
 
+  # Re-evaluate every project of a city (e.g. after a rule amendment)
+  python agents/evaluator_agent.py --reevaluate-city Mumbai
+
 Notes:
 - Requires .env in project root with MONGO_URI and MONGO_DB
 - Collections:
@@ -30,12 +36,15 @@ import os
 import json
 import logging
 import argparse
+import math
 from datetime import datetime
 from decimal import Decimal, InvalidOperation
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
+import numpy as np
 from dotenv import load_dotenv
 from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
 import certifi
 from bson import ObjectId
 
@@ -53,6 +62,9 @@ if not MONGO_URI:
 # Partial tolerance multiplier: if proposed <= allowed * TOLERANCE => Partial
 PARTIAL_TOLERANCE = float(os.getenv("EVAL_PARTIAL_TOLERANCE", "1.10"))  # 10% default
 
+# Projects per vectorized evaluation chunk / insert_many call
+EVAL_BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "1000"))
+
 # ----------------- LOGGING -----------------
 logger = logging.getLogger("EvaluatorAgent")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s:%(name)s: %(message)s")
@@ -69,18 +81,18 @@ logger.info("Connected to MongoDB database: %s", MONGO_DB)
 
 # ----------------- UTILITIES -----------------
 def to_number(v: Any) -> Optional[float]:
-    """Try to coerce v into float, return None if impossible."""
+    """Try to coerce v into a finite float, return None if impossible ("nan"/"inf" included)."""
     if v is None:
         return None
-    if isinstance(v, (int, float)):
-        return float(v)
     try:
-        # protect against Decimal strings
-        if isinstance(v, Decimal):
-            return float(v)
-        return float(str(v).strip())
+        if isinstance(v, (int, float, Decimal)):
+            number = float(v)
+        else:
+            number = float(str(v).strip())
     except (ValueError, TypeError, InvalidOperation):
         return None
+    # NaN would compare as NON_COMPLIANT per project but NOT_APPLICABLE in the batch path
+    return number if math.isfinite(number) else None
 
 def pick_best_value(parsed_fields: Dict[str, Any], keys: List[str]) -> Optional[float]:
     """Given parsed_fields and list of candidate keys, return first numeric value found."""
@@ -119,19 +131,9 @@ def load_classified_rules_for_city(city: str) -> List[Dict[str, Any]]:
     logger.info("Loaded %d classified rules for city %s", len(docs), city)
     return docs
 
-def evaluate_project(project_doc: Dict[str, Any], rules: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """
-    Evaluate a single project (project_doc) against provided classified rules.
-    Returns an evaluation document (dict) ready to insert to evaluations collection.
-    """
-    project_id = project_doc.get("_id")
-    project_key = str(project_id)
-    city = project_doc.get("city")
-    name = project_doc.get("project_name", project_key)
-    params = project_doc.get("parameters", {})
-
-    # normalise keys to expected numeric forms
-    proposed = {
+def proposed_parameters(params: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """Normalise project parameters to the numeric forms rules are compared against."""
+    return {
         "height_m": to_number(params.get("height_m")),
         "fsi": to_number(params.get("fsi")),
         "setback_m": to_number(params.get("setback_m")),
@@ -140,57 +142,84 @@ def evaluate_project(project_doc: Dict[str, Any], rules: List[Dict[str, Any]]) -
         "coverage": to_number(params.get("coverage_percent") or params.get("coverage")),
     }
 
+# RULE CATEGORY HANDLERS: (proposed parameter, category aliases, parsed keys for the allowed value)
+CATEGORY_HANDLERS = [
+    ("height_m", ("height", "building_height", "max_height", "height_candidate"), ["height_m", "value", "candidate_m", "max_height"]),
+    ("fsi", ("fsi", "far", "floor_space_index"), ["fsi", "value", "allowed_fsi"]),
+    ("setback_m", ("setback", "setbacks"), ["setback_m", "value", "setback_candidate_m"]),
+    ("floors", ("floors", "storeys", "floor_count"), ["floors", "value"]),
+    ("parking", ("parking",), ["value", "parking_required", "parking_spaces"]),
+    ("coverage", ("coverage", "site_coverage", "ground_coverage"), ["value", "coverage_percent", "allowed_coverage"]),
+]
+PARAMETERS = [param for param, _, _ in CATEGORY_HANDLERS]
+_HANDLER_INDEX = {alias: i for i, (_, aliases, _) in enumerate(CATEGORY_HANDLERS) for alias in aliases}
+
+def rule_fields(rule: Dict[str, Any]) -> Tuple[str, str, Dict[str, Any], str]:
+    """(rule_id, category, parsed fields, rule text) from the various classified_rule shapes."""
+    rule_id = str(rule.get("_id"))
+    category = rule.get("category") or rule.get("rule_type") or rule.get("type") or "other"
+    parsed = rule.get("details") or rule.get("parsed_fields") or rule.get("parsed") or {}
+    rule_text = rule.get("original_text") or rule.get("text") or rule.get("full_text") or rule.get("summary") or ""
+    return rule_id, category, parsed, rule_text
+
+def overall_result(score_sum: float, applicable_rules: int) -> Tuple[float, str]:
+    """Overall score (mean per applicable rule) and its textual status."""
+    overall_score = round((score_sum / applicable_rules) if applicable_rules else 0.0, 2)
+    if overall_score >= 0.9:
+        return overall_score, "COMPLIANT"
+    if overall_score >= 0.5:
+        return overall_score, "PARTIALLY_COMPLIANT"
+    return overall_score, "NON_COMPLIANT"
+
+def build_evaluation_doc(
+    project_doc: Dict[str, Any],
+    results: List[Dict[str, Any]],
+    applicable_rules: int,
+    score_sum: float,
+    evaluated_at: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Evaluation document ready to insert to the evaluations collection."""
+    project_id = project_doc.get("_id")
+    overall_score, overall_status = overall_result(score_sum, applicable_rules)
+    return {
+        "project_id": project_id,
+        "project_key": str(project_id),
+        "city": project_doc.get("city"),
+        "project_name": project_doc.get("project_name", str(project_id)),
+        "parameters": project_doc.get("parameters", {}),
+        "evaluated_at": evaluated_at or datetime.utcnow().isoformat() + "Z",
+        "applicable_rules_count": applicable_rules,
+        "results": results,
+        "overall_score": overall_score,
+        "overall_status": overall_status
+    }
+
+def evaluate_project(project_doc: Dict[str, Any], rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Evaluate a single project (project_doc) against provided classified rules.
+    Returns an evaluation document (dict) ready to insert to evaluations collection.
+    """
+    proposed = proposed_parameters(project_doc.get("parameters", {}))
+
     results = []
     score_sum = 0.0
     applicable_rules = 0
 
     for rule in rules:
         # Each classified_rule doc can have multiple shapes — try commonly used fields
-        rule_id = str(rule.get("_id"))
-        category = rule.get("category") or rule.get("rule_type") or rule.get("type") or "other"
-        parsed = rule.get("details") or rule.get("parsed_fields") or rule.get("parsed") or {}
-        rule_text = rule.get("original_text") or rule.get("text") or rule.get("full_text") or rule.get("summary") or ""
+        rule_id, category, parsed, rule_text = rule_fields(rule)
 
         allowed_val = None
         proposed_val = None
-        status = "NOT_APPLICABLE"
-        score_inc = 0.0
-
-        # RULE CATEGORY HANDLERS
-        if category.lower() in ("height", "building_height", "max_height", "height_candidate"):
-            # check common parsed keys
-            allowed_val = pick_best_value(parsed, ["height_m", "value", "candidate_m", "max_height"])
-            proposed_val = proposed.get("height_m")
-            status, score_inc = compare_numeric(proposed_val, allowed_val)
-
-        elif category.lower() in ("fsi", "far", "floor_space_index"):
-            allowed_val = pick_best_value(parsed, ["fsi", "value", "allowed_fsi"])
-            proposed_val = proposed.get("fsi")
-            status, score_inc = compare_numeric(proposed_val, allowed_val)
-
-        elif category.lower() in ("setback", "setbacks"):
-            allowed_val = pick_best_value(parsed, ["setback_m", "value", "setback_candidate_m"])
-            proposed_val = proposed.get("setback_m")
-            status, score_inc = compare_numeric(proposed_val, allowed_val)
-
-        elif category.lower() in ("floors", "storeys", "floor_count"):
-            allowed_val = pick_best_value(parsed, ["floors", "value"])
-            proposed_val = proposed.get("floors")
-            status, score_inc = compare_numeric(proposed_val, allowed_val)
-
-        elif category.lower() in ("parking",):
-            allowed_val = pick_best_value(parsed, ["value", "parking_required", "parking_spaces"])
-            proposed_val = proposed.get("parking")
-            status, score_inc = compare_numeric(proposed_val, allowed_val)
-
-        elif category.lower() in ("coverage", "site_coverage", "ground_coverage"):
-            allowed_val = pick_best_value(parsed, ["value", "coverage_percent", "allowed_coverage"])
-            proposed_val = proposed.get("coverage")
-            status, score_inc = compare_numeric(proposed_val, allowed_val)
-
-        else:
+        handler = _HANDLER_INDEX.get(category.lower())
+        if handler is None:
             # Unhandled categories can be informational or require human review
-            status = "INFORMATIONAL"
+            status, score_inc = "INFORMATIONAL", 0.0
+        else:
+            param, _, keys = CATEGORY_HANDLERS[handler]
+            allowed_val = pick_best_value(parsed, keys)
+            proposed_val = proposed.get(param)
+            status, score_inc = compare_numeric(proposed_val, allowed_val)
 
         # Count only rules where we had a numeric allowed value to evaluate
         if status not in ("NOT_APPLICABLE", "INFORMATIONAL", "INVALID"):
@@ -207,29 +236,130 @@ def evaluate_project(project_doc: Dict[str, Any], rules: List[Dict[str, Any]]) -
             "status": status
         })
 
-    overall_score = round((score_sum / applicable_rules) if applicable_rules else 0.0, 2)
-    # Derive simple textual overall_status
-    if overall_score >= 0.9:
-        overall_status = "COMPLIANT"
-    elif overall_score >= 0.5:
-        overall_status = "PARTIALLY_COMPLIANT"
-    else:
-        overall_status = "NON_COMPLIANT"
+    return build_evaluation_doc(project_doc, results, applicable_rules, score_sum)
 
-    evaluation_doc = {
-        "project_id": project_id,
-        "project_key": str(project_id),
-        "city": project_doc.get("city"),
-        "project_name": name,
-        "parameters": params,
-        "evaluated_at": datetime.utcnow().isoformat() + "Z",
-        "applicable_rules_count": applicable_rules,
-        "results": results,
-        "overall_score": overall_score,
-        "overall_status": overall_status
-    }
+# ----------------- BATCH EVALUATION -----------------
+# Status codes of the vectorized evaluator, indexes into STATUS_LABELS
+NOT_APPLICABLE, INFORMATIONAL, NON_COMPLIANT, PARTIAL, COMPLIANT = range(5)
+STATUS_LABELS = np.array(["NOT_APPLICABLE", "INFORMATIONAL", "NON_COMPLIANT", "PARTIAL", "COMPLIANT"], dtype=object)
 
-    return evaluation_doc
+class CompiledRules(NamedTuple):
+    """Rule limits as arrays: one column per rule."""
+    columns: np.ndarray   # parameter column per rule; len(PARAMETERS) for informational rules
+    allowed: np.ndarray   # allowed value per rule, NaN when the rule has none
+    results: List[Tuple[str, str, str, Optional[float]]]  # (rule_id, category, rule_text, allowed) per rule
+
+def compile_rules(rules: List[Dict[str, Any]]) -> CompiledRules:
+    """Resolve each rule's category handler and allowed value once per batch."""
+    columns = []
+    allowed = []
+    results = []
+    for rule in rules:
+        rule_id, category, parsed, rule_text = rule_fields(rule)
+        handler = _HANDLER_INDEX.get(category.lower())
+        allowed_val = None
+        if handler is not None:
+            allowed_val = pick_best_value(parsed, CATEGORY_HANDLERS[handler][2])
+        columns.append(len(PARAMETERS) if handler is None else handler)
+        allowed.append(np.nan if allowed_val is None else allowed_val)
+        results.append((rule_id, category, rule_text, allowed_val))
+    return CompiledRules(
+        columns=np.array(columns, dtype=np.intp),
+        allowed=np.array(allowed, dtype=np.float64),
+        results=results,
+    )
+
+def project_matrix(projects: List[Dict[str, Any]]) -> np.ndarray:
+    """Projects x (PARAMETERS + informational) matrix of proposed values, NaN when missing."""
+    matrix = np.full((len(projects), len(PARAMETERS) + 1), np.nan)
+    for row, project in enumerate(projects):
+        proposed = proposed_parameters(project.get("parameters", {}))
+        for col, param in enumerate(PARAMETERS):
+            if proposed[param] is not None:
+                matrix[row, col] = proposed[param]
+    return matrix
+
+def evaluate_matrix(matrix: np.ndarray, compiled: CompiledRules) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized compare_numeric over every (project, rule) pair.
+    Returns (status codes [projects x rules], score sums, applicable rule counts).
+    """
+    proposed = matrix[:, compiled.columns]
+    allowed = compiled.allowed[np.newaxis, :]
+    codes = np.select(
+        [np.isnan(proposed) | np.isnan(allowed), proposed <= allowed, proposed <= allowed * PARTIAL_TOLERANCE],
+        [NOT_APPLICABLE, COMPLIANT, PARTIAL],
+        NON_COMPLIANT,
+    ).astype(np.int8)
+    codes[:, compiled.columns == len(PARAMETERS)] = INFORMATIONAL
+
+    score_sums = (codes == COMPLIANT).sum(axis=1) + 0.5 * (codes == PARTIAL).sum(axis=1)
+    applicable = (codes >= NON_COMPLIANT).sum(axis=1)
+    return codes, score_sums, applicable
+
+def evaluate_projects_batch(projects: List[Dict[str, Any]], rules: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Evaluate many projects of one city against the same classified rules.
+    Produces the same documents as evaluate_project, computed in one
+    vectorized pass per EVAL_BATCH_SIZE chunk of projects.
+    """
+    compiled = compile_rules(rules)
+    informational = len(PARAMETERS)
+    columns = compiled.columns.tolist()
+    bases = [
+        {"rule_id": rule_id, "category": category, "rule_text": rule_text, "allowed": allowed_val}
+        for rule_id, category, rule_text, allowed_val in compiled.results
+    ]
+    evaluations = []
+    size = max(1, EVAL_BATCH_SIZE)
+    for start in range(0, len(projects), size):
+        chunk = projects[start:start + size]
+        matrix = project_matrix(chunk)
+        codes, score_sums, applicable = evaluate_matrix(matrix, compiled)
+        evaluated_at = datetime.utcnow().isoformat() + "Z"
+
+        # Python floats (None when missing) for the stored "proposed" values
+        values = np.where(np.isnan(matrix), None, matrix).tolist()
+        statuses = STATUS_LABELS[codes].tolist()
+        for row, project in enumerate(chunk):
+            row_values = values[row]
+            row_values[informational] = None
+            results = [
+                {**base, "proposed": row_values[col], "status": status}
+                for base, col, status in zip(bases, columns, statuses[row])
+            ]
+            evaluations.append(build_evaluation_doc(
+                project, results, int(applicable[row]), float(score_sums[row]), evaluated_at
+            ))
+    return evaluations
+
+def store_evaluations(evaluations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Bulk-insert evaluation docs and mark their projects evaluated.
+    Docs rejected by insert_many are logged and their projects stay pending;
+    returns the docs that were stored.
+    """
+    stored: List[Dict[str, Any]] = []
+    size = max(1, EVAL_BATCH_SIZE)
+    for start in range(0, len(evaluations), size):
+        chunk = evaluations[start:start + size]
+        failed = set()
+        try:
+            EVAL_COL.insert_many(chunk, ordered=False)
+        except BulkWriteError as e:
+            # ordered=False: every doc without a write error was inserted
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                logger.error("Failed to store evaluation of project %s: %s",
+                             chunk[error["index"]].get("project_id"), error.get("errmsg"))
+        inserted = [doc for index, doc in enumerate(chunk) if index not in failed]
+        if inserted:
+            PROJECTS_COL.update_many(
+                {"_id": {"$in": [e["project_id"] for e in inserted]}},
+                {"$set": {"status": "evaluated", "last_evaluated": datetime.utcnow().isoformat() + "Z"}}
+            )
+        stored.extend(inserted)
+    return stored
 
 # ----------------- ENTRYPOINTS -----------------
 def evaluate_single_project(project_id: str) -> Dict[str, Any]:
@@ -257,30 +387,66 @@ def evaluate_single_project(project_id: str) -> Dict[str, Any]:
 def evaluate_pending_projects(city: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
     """
     Evaluate projects with status == 'pending' (or all if no status) optionally filtered by city.
+    Projects are evaluated per city in vectorized batches.
     Returns list of evaluation docs inserted.
     """
     query = {"status": "pending"} if city is None else {"status": "pending", "city": city}
     projects = list(PROJECTS_COL.find(query).limit(limit))
     logger.info("Found %d pending projects to evaluate (city=%s)", len(projects), city)
-    out_evals = []
+
+    by_city: Dict[Any, List[Dict[str, Any]]] = {}
     for p in projects:
+        by_city.setdefault(p.get("city"), []).append(p)
+
+    out_evals = []
+    for project_city, group in by_city.items():
+        try:
+            rules = load_classified_rules_for_city(project_city)
+        except Exception as e:
+            logger.exception("Failed to load rules for %d projects (city=%s): %s", len(group), project_city, e)
+            continue
         try:
-            rules = load_classified_rules_for_city(p.get("city"))
-            eval_doc = evaluate_project(p, rules)
-            EVAL_COL.insert_one(eval_doc)
-            PROJECTS_COL.update_one({"_id": p["_id"]}, {"$set": {"status": "evaluated", "last_evaluated": datetime.utcnow().isoformat() + "Z"}})
-            out_evals.append(eval_doc)
-            logger.info("Evaluated and stored project %s", str(p.get("_id")))
+            evals = evaluate_projects_batch(group, rules)
         except Exception as e:
-            logger.exception("Failed to evaluate project %s: %s", str(p.get("_id")), e)
+            # One malformed project must not fail its whole city: isolate it
+            logger.warning("Batch evaluation failed (city=%s), evaluating per project: %s", project_city, e)
+            evals = []
+            for project in group:
+                try:
+                    evals.append(evaluate_project(project, rules))
+                except Exception as e:
+                    logger.exception("Failed to evaluate project %s: %s", project.get("_id"), e)
+        stored = store_evaluations(evals)
+        out_evals.extend(stored)
+        logger.info("Evaluated and stored %d of %d projects (city=%s)", len(stored), len(group), project_city)
     return out_evals
 
+def reevaluate_city(city: str) -> int:
+    """
+    Re-evaluate every project of a city against its current classified rules
+    (e.g. after a rule amendment). Returns the number of projects evaluated.
+    """
+    rules = load_classified_rules_for_city(city)
+    cursor = PROJECTS_COL.find({"city": city}).batch_size(EVAL_BATCH_SIZE)
+    evaluated = 0
+    chunk: List[Dict[str, Any]] = []
+    for project in cursor:
+        chunk.append(project)
+        if len(chunk) >= EVAL_BATCH_SIZE:
+            evaluated += len(store_evaluations(evaluate_projects_batch(chunk, rules)))
+            chunk = []
+    if chunk:
+        evaluated += len(store_evaluations(evaluate_projects_batch(chunk, rules)))
+    logger.info("Re-evaluated %d projects for city %s against %d rules", evaluated, city, len(rules))
+    return evaluated
+
 # ----------------- CLI -----------------
 def cli():
     parser = argparse.ArgumentParser(description="Evaluator Agent CLI")
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--project-id", help="Evaluate a single project by _id (string)", default=None)
     group.add_argument("--evaluate-pending", help="Evaluate all pending projects", action="store_true")
+    group.add_argument("--reevaluate-city", help="Re-evaluate all projects of a city", default=None)
     parser.add_argument("--city", help="(Optional) city filter for pending evaluation", default=None)
     parser.add_argument("--limit", help="Limit number of pending projects to evaluate", type=int, default=200)
     args = parser.parse_args()
@@ -301,6 +467,12 @@ def cli():
             "evaluated_count": len(evals),
             "city_filter": args.city,
         }, indent=2))
+    elif args.reevaluate_city:
+        count = reevaluate_city(args.reevaluate_city)
+        print(json.dumps({
+            "evaluated_count": count,
+            "city": args.reevaluate_city,
+        }, indent=2))
 
 if __name__ == "__main__":
     cli()
@@ -17,6 +17,7 @@ python agents/parsing_agent.py "path/to/file.pdf" "Mumbai"
 #parsing_agent.py
 import os
 import re
+import sys
 import json
 import logging
 from datetime import datetime
@@ -55,6 +56,10 @@ except Exception:
 from pymongo import MongoClient
 import certifi
 
+# Allow running as a script (python agents/parsing_agent.py ...)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from agents.rule_classifier import parsed_rule_classifier, parsed_rule_fields
+
 # ---------------- LOGGING ----------------
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ParsingAgent")
@@ -142,35 +147,16 @@ def find_clauses(text: str) -> List[Dict[str, Any]]:
     return rules
 
 # ---------------- CLASSIFICATION ----------------
-METER_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:m|meter|metre|meters|metres)\b", re.IGNORECASE)
-FSI_RE = re.compile(r"(?:FSI|F\.S\.I|floor space index)\s*(?:[:=]|\s)?\s*([\d\.]+)", re.IGNORECASE)
-SETBACK_RE = re.compile(r"setback[s]?\s*(?:[:=]|\s)?\s*(\d+(?:\.\d+)?)\s*(?:m|meter|metre)?", re.IGNORECASE)
-FLOOR_RE = re.compile(r"(\d+)\s*(?:floors|storeys|stories|storey|floor)\b", re.IGNORECASE)
-ENTITLEMENT_RE = re.compile(r"(?:entitle(?:ment|d)?|allow(?:ed)?|permitted|permit)\b.*", re.IGNORECASE)
-
 def classify_rule_text(text: str) -> Tuple[str, Dict[str, Any]]:
-    lc = text.lower()
-    fsi_m = FSI_RE.search(text)
-    if fsi_m:
-        try:
-            val = float(fsi_m.group(1))
-            return "fsi", {"fsi": val}
-        except:
-            return "fsi", {}
-
-    if "height" in lc:
-        m = METER_RE.search(text)
-        if m:
-            return "height", {"height_m": float(m.group(1))}
-    if "setback" in lc:
-        m = SETBACK_RE.search(text)
-        if m:
-            return "setback", {"setback_m": float(m.group(1))}
-    if FLOOR_RE.search(text):
-        return "floors", {"floors": int(FLOOR_RE.search(text).group(1))}
-    if any(w in lc for w in ["allowed", "permitted", "entitlement", "may be permitted", "shall be permitted"]):
-        return "entitlement", {"note": text[:200]}
-    return "other", {}
+    """Primary rule type and the values of every matched category (see agents.rule_classifier)."""
+    return parsed_rule_fields(parsed_rule_classifier.classify(text), text)
+
+def classify_rule_texts(texts: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Classify all clauses of a document in one pass."""
+    return [
+        parsed_rule_fields(matches, text)
+        for matches, text in zip(parsed_rule_classifier.classify_many(texts), texts)
+    ]
 
 # ---------------- MONGO PUSH ----------------
 def push_parsed_document_to_mcp(parsed_doc: Dict[str, Any]) -> Dict[str, Any]:
@@ -211,8 +197,8 @@ def parse_pdf_to_json(pdf_path: str, city: str) -> Dict[str, Any]:
         "rules": [],
     }
 
-    for idx, c in enumerate(clauses, start=1):
-        rtype, fields = classify_rule_text(c.get("text", ""))
+    texts = [c.get("text") or "" for c in clauses]
+    for idx, (c, (rtype, fields)) in enumerate(zip(clauses, classify_rule_texts(texts)), start=1):
         parsed["rules"].append({
             "id": f"{city.lower()}_r_{idx}",
             "clause_no": c.get("clause_no"),
@@ -3,21 +3,31 @@
 Rule Classification Agent (Production-Ready)
 -------------------------------------------
 - Reads parsed rules from MongoDB (collection: rules)
-- Applies NLP + regex-based classification and normalization
+- Applies single-pass regex classification (agents.rule_classifier) and normalization
 - Detects rule categories like FSI, Height, Setback, Parking, LandUse, etc.
 - Outputs cleaned, structured rule data into MongoDB (collection: classified_rules)
+- Incremental: each rule's text is hashed and only new or changed rules are
+  reclassified (bulk upserts); a per-city classification version in
+  `classification_state` lets runs skip cities whose rules did not change
 
 Usage (CLI):
   python -m agents.rule_classification_agent "Mumbai"
+  python -m agents.rule_classification_agent "Mumbai" --force   # reclassify every rule
 """
 
 import os
-import re
 import json
+import hashlib
 import logging
+import time
 from datetime import datetime
+from typing import Dict, List
 from dotenv import load_dotenv
 from bson import ObjectId
+from pymongo import DeleteMany, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from agents.rule_classifier import classified_rule_classifier, classified_rule_info
 
 # ---------- Setup ----------
 logger = logging.getLogger("RuleClassifier")
@@ -29,93 +39,166 @@ load_dotenv(env_path)
 
 # Use centralized MongoDB connection from mcp.db
 try:
-    from mcp.db import get_database
+    from mcp.db import Collections, ensure_classified_rules_index, get_database
     _db = get_database()
-    _rules = _db.get_collection("rules")
-    _classified = _db.get_collection("classified_rules")
+    _rules = _db.get_collection(Collections.RULES)
+    _classified = _db.get_collection(Collections.CLASSIFIED_RULES)
+    _state = _db.get_collection(Collections.CLASSIFICATION_STATE)
     logger.info("✅ Connected to MongoDB database: %s", _db.name)
 except Exception as e:
     logger.error(f"❌ Failed to connect to MongoDB: {e}")
     raise
 
-# ---------- Classification Patterns ----------
-patterns = {
-    "fsi": re.compile(r"\b(FSI|floor space index|F\.S\.I)\b[:\s]*([\d\.]+)?", re.IGNORECASE),
-    "height": re.compile(r"\b(height|storey|storeys|floor height|maximum height)\b.*?(\d+(?:\.\d+)?)(?:\s*m|meter|metre)?", re.IGNORECASE),
-    "setback": re.compile(r"\b(setback|set back|distance from boundary)\b.*?(\d+(?:\.\d+)?)(?:\s*m|meter|metre)?", re.IGNORECASE),
-    "parking": re.compile(r"\b(parking|car park|vehicle space|parking area|stilt)\b", re.IGNORECASE),
-    "land_use": re.compile(r"\b(residential|commercial|industrial|institutional|mixed use|green zone)\b", re.IGNORECASE),
-    "density": re.compile(r"\b(population density|tenements|units per hectare|plinth area)\b", re.IGNORECASE),
-    "coverage": re.compile(r"\b(site coverage|ground coverage|building coverage)\b", re.IGNORECASE),
-}
+# Bump when the category table or classify_rule_text change so every rule is reclassified
+CLASSIFIER_VERSION = "2"
+
+# A first run that has not recorded its version after this long is presumed dead
+FIRST_RUN_CLAIM_SECONDS = 600
 
+# ---------- Classification ----------
 def classify_rule_text(text: str) -> dict:
     """
     Classify rule text into a category with structured info.
+    The highest-priority matching category wins; details carry its nearest
+    numeric value and every matched category with its own value.
     """
-    text_lower = text.lower()
-    rule_info = {"category": "other", "details": {}}
-
-    for cat, pattern in patterns.items():
-        m = pattern.search(text)
-        if m:
-            rule_info["category"] = cat
-            # Try to extract numeric value if present
-            nums = re.findall(r"[\d\.]+", text)
-            if nums:
-                try:
-                    rule_info["details"]["value"] = float(nums[0])
-                except ValueError:
-                    pass
-            rule_info["details"]["matched"] = m.group(0)
-            break
-
-    return rule_info
+    return classified_rule_info(classified_rule_classifier.classify(text))
+
+def classify_rule_texts(texts: List[str]) -> List[dict]:
+    """Classify many rule texts in one pass (see agents.rule_classifier)."""
+    return [classified_rule_info(matches) for matches in classified_rule_classifier.classify_many(texts)]
 
 # ---------- Main Processor ----------
-def classify_rules_for_city(city: str):
+def _rule_text(rule: dict) -> str:
+    return rule.get("full_text") or rule.get("summary") or ""
+
+def text_hash(text: str) -> str:
+    """Content hash of a rule's text under the current classifier version."""
+    return hashlib.sha256(f"{CLASSIFIER_VERSION}\0{text}".encode("utf-8")).hexdigest()
+
+def classification_version(hashes: Dict[str, str]) -> str:
+    """Per-city version: changes whenever a rule is added, removed or edited."""
+    digest = hashlib.sha256(CLASSIFIER_VERSION.encode("utf-8"))
+    for rule_id in sorted(hashes):
+        digest.update(f"{rule_id}:{hashes[rule_id]}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def _claim_first_run(city: str) -> bool:
+    """
+    Atomically claim a city's first incremental run, the one that deletes
+    legacy per-run duplicates, so concurrent runs do not both DeleteMany.
+    """
+    now = time.time()
+    try:
+        _state.insert_one({"_id": city, "version": None, "claimed_at": now})
+        return True
+    except DuplicateKeyError:
+        # Take over only a claim whose run died before recording a version
+        return _state.find_one_and_update(
+            {"_id": city, "version": None, "claimed_at": {"$lt": now - FIRST_RUN_CLAIM_SECONDS}},
+            {"$set": {"claimed_at": now}},
+        ) is not None
+
+def classify_rules_incremental(city: str, force: bool = False) -> Dict:
     """
-    Reads all rules for a given city, classifies them,
-    and pushes structured results to `classified_rules`.
+    Bring `classified_rules` for a city up to date with its `rules`.
+
+    Only new or changed rules (by text hash) are classified and upserted in one
+    bulk_write; classifications of removed rules are deleted. When the city's
+    classification version is unchanged the step is skipped entirely.
+    The first run for a city is claimed in `classification_state`; a run that
+    finds it claimed by another skips.
+    Returns a summary: version, total, classified, removed, skipped.
     """
-    query = {"city": city}
-    city_rules = list(_rules.find(query))
-    logger.info("Found %d rules for city '%s'", len(city_rules), city)
-
-    if not city_rules:
-        return []
-
-    output_docs = []
-    for r in city_rules:
-        rule_text = r.get("full_text") or r.get("summary") or ""
-        rule_id = str(r.get("_id"))
-        parsed = classify_rule_text(rule_text)
-        result_doc = {
-            "source_rule_id": rule_id,
-            "city": city,
-            "clause_no": r.get("clause_no"),
-            "category": parsed["category"],
-            "details": parsed["details"],
-            "original_text": rule_text,
-            "created_at": datetime.utcnow().isoformat() + "Z"
+    city_rules = list(_rules.find({"city": city}, {"full_text": 1, "summary": 1, "clause_no": 1}))
+    hashes = {str(r["_id"]): text_hash(_rule_text(r)) for r in city_rules}
+    version = classification_version(hashes)
+
+    state = _state.find_one({"_id": city})
+    if not force and state and state.get("version") == version:
+        logger.info("Classification for city '%s' is current (%d rules), skipping", city, len(city_rules))
+        return {"version": version, "total": len(city_rules), "classified": 0, "removed": 0, "skipped": True}
+
+    ops = []
+    first_run = state is None or state.get("version") is None
+    if first_run:
+        if not _claim_first_run(city):
+            logger.info("First classification of city '%s' is running elsewhere, skipping", city)
+            return {"version": version, "total": len(city_rules), "classified": 0, "removed": 0, "skipped": True}
+        # First incremental run: drop per-run duplicates written before classifications were upserted
+        ops.append(DeleteMany({"city": city}))
+        existing = {}
+    else:
+        existing = {
+            doc.get("source_rule_id"): doc.get("text_hash")
+            for doc in _classified.find({"city": city}, {"source_rule_id": 1, "text_hash": 1})
         }
-        _classified.insert_one(result_doc)
-        output_docs.append(result_doc)
 
-    logger.info("✅ Classified and stored %d rules for city '%s'", len(output_docs), city)
-    return output_docs
+    now = datetime.utcnow().isoformat() + "Z"
+    changed = [r for r in city_rules if force or existing.get(str(r["_id"])) != hashes[str(r["_id"])]]
+    texts = [_rule_text(r) for r in changed]
+    for r, rule_text, parsed in zip(changed, texts, classify_rule_texts(texts)):
+        rule_id = str(r["_id"])
+        ops.append(UpdateOne(
+            {"city": city, "source_rule_id": rule_id},
+            {
+                "$set": {
+                    "clause_no": r.get("clause_no"),
+                    "category": parsed["category"],
+                    "details": parsed["details"],
+                    "original_text": rule_text,
+                    "text_hash": hashes[rule_id],
+                    "updated_at": now,
+                },
+                "$setOnInsert": {"created_at": now},
+            },
+            upsert=True,
+        ))
+    classified = len(changed)
+
+    removed = [rule_id for rule_id in existing if rule_id not in hashes]
+    if removed:
+        ops.append(DeleteMany({"city": city, "source_rule_id": {"$in": removed}}))
+
+    if ops:
+        _classified.bulk_write(ops, ordered=True)
+    if first_run:
+        # This city's duplicates are gone; the index succeeds once every city has had its first run
+        ensure_classified_rules_index(_classified)
+    _state.update_one(
+        {"_id": city},
+        {"$set": {"version": version, "classifier_version": CLASSIFIER_VERSION,
+                  "rule_count": len(city_rules), "updated_at": now},
+         "$unset": {"claimed_at": ""}},
+        upsert=True,
+    )
+    logger.info(
+        "✅ Classified %d new/changed rules for city '%s' (%d total, %d removed)",
+        classified, city, len(city_rules), len(removed),
+    )
+    return {"version": version, "total": len(city_rules), "classified": classified,
+            "removed": len(removed), "skipped": False}
+
+def classify_rules_for_city(city: str, force: bool = False) -> List[dict]:
+    """
+    Brings a city's classifications up to date (see classify_rules_incremental)
+    and returns the structured results stored in `classified_rules`.
+    """
+    classify_rules_incremental(city, force=force)
+    return list(_classified.find({"city": city}, {"_id": 0}))
 
 
 # ---------- CLI Entry ----------
 if __name__ == "__main__":
     import sys
     if len(sys.argv) < 2:
-        print("Usage: python -m agents.rule_classification_agent <CityName>")
+        print("Usage: python -m agents.rule_classification_agent <CityName> [--force]")
         sys.exit(1)
 
     city = sys.argv[1]
-    results = classify_rules_for_city(city)
+    summary = classify_rules_incremental(city, force="--force" in sys.argv[2:])
     print(json.dumps(
-        {"city": city, "classified_rules": len(results)},
+        {"city": city, "classified_rules": summary["total"], "reclassified": summary["classified"],
+         "skipped": summary["skipped"]},
         indent=2, ensure_ascii=False
     ))
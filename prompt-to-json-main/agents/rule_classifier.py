@@ -0,0 +1,204 @@
+"""
+Single-pass multi-category rule classifier.
+
+All category keywords are compiled into one alternation (longest keyword
+first) and matched in a single ``finditer`` pass over the lower-cased text.
+Each hit is mapped back to its category, and the numeric value nearest the
+keyword is pulled with targeted number searches around it: the first number
+after the keyword (within the same text), or one directly before it such as
+"4 floors". Every matching category is returned, not just the first.
+
+Batches are classified with one pass over the joined texts, so a whole
+document of clauses costs one regex scan instead of several searches per
+clause. The alternation is kept free of capture groups so the regex engine
+can skip ahead to candidate first characters.
+
+Example:
+    classifier = RuleClassifier([
+        Category("fsi", "fsi|f\\.s\\.i|floor space index"),
+        Category("height", "height", unit="m", requires_value=True),
+    ])
+    classifier.classify("Max height 24 m and FSI 1.5")
+    # [CategoryMatch("fsi", "FSI", 1.5, 20), CategoryMatch("height", "height", 24.0, 4)]
+"""
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import re
+
+_SEPARATOR = "\x00"
+_NUMBER_RE = re.compile(r"(\d+(?:\.\d+)?)")
+_METRES_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:metres|meters|metre|meter|m)\b")
+# A number directly before the keyword ("4 floors", "12 m height"), within a short window
+_NUMBER_BEFORE_RE = re.compile(r"(\d+(?:\.\d+)?)(?:\s*(?:metres|meters|metre|meter|m)\b)?[\s:-]*\Z")
+_METRES_BEFORE_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:metres|meters|metre|meter|m)\b[\s:-]*\Z")
+# A whole number immediately before the keyword ("4 floors"), not the tail of a decimal
+_COUNT_BEFORE_RE = re.compile(r"(?<![\d.])(\d+)\s*\Z")
+_LOOKBEHIND_CHARS = 24
+
+
+class Category(NamedTuple):
+    """
+    A rule category: ``keywords`` are ``|``-separated (regex) alternatives,
+    matched case-insensitively on word boundaries. ``unit="m"`` only accepts
+    numbers followed by a metre unit; ``count_before`` only accepts an integer
+    directly before the keyword ("4 floors", never "floor height 3.5 m");
+    ``requires_value`` drops the category when no qualifying number exists.
+    """
+    name: str
+    keywords: str
+    unit: Optional[str] = None
+    requires_value: bool = False
+    count_before: bool = False
+
+
+class CategoryMatch(NamedTuple):
+    category: str
+    keyword: str
+    value: Optional[float]
+    start: int  # keyword offset in the classified text
+
+
+class RuleClassifier:
+    """Compiled classifier over an ordered (highest priority first) category table."""
+
+    def __init__(self, categories: List[Category]):
+        self.categories = list(categories)
+        alternatives = [
+            (keyword.strip().lower(), index)
+            for index, category in enumerate(self.categories)
+            for keyword in category.keywords.split("|")
+        ]
+        # Longest first so e.g. "floor space index" wins over "floor"
+        alternatives.sort(key=lambda alt: -len(alt[0]))
+        self._alternatives = [(re.compile(keyword), index) for keyword, index in alternatives]
+        self.pattern = re.compile(r"(?<!\w)(?:" + "|".join(k for k, _ in alternatives) + r")\b")
+        self._keyword_category: Dict[str, int] = {}
+
+    def classify(self, text: str) -> List[CategoryMatch]:
+        """Every matching category, in priority order, with the number nearest its keyword."""
+        return self.classify_many([text])[0]
+
+    def classify_many(self, texts: Iterable[str]) -> List[List[CategoryMatch]]:
+        """Classify many texts (e.g. all clauses of a document) in one regex pass."""
+        texts = [text or "" for text in texts]
+        if not texts:
+            return []
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + len(_SEPARATOR)
+        joined = _SEPARATOR.join(texts)
+        lowered = joined.lower()
+
+        found: List[Dict[int, CategoryMatch]] = [{} for _ in texts]
+        categories = self.categories
+        keyword_category = self._keyword_category
+        segment, segment_start, segment_end = 0, 0, len(texts[0])
+        hits = found[0]
+        for m in self.pattern.finditer(lowered):
+            start, end = m.span()
+            if start > segment_end:
+                segment = bisect_right(starts, start) - 1
+                segment_start = starts[segment]
+                segment_end = segment_start + len(texts[segment])
+                hits = found[segment]
+            keyword = m.group()
+            index = keyword_category.get(keyword)
+            if index is None:
+                index = self._category_of(keyword)
+            previous = hits.get(index)
+            if previous is not None and previous.value is not None:
+                continue
+            category = categories[index]
+            if category.count_before:
+                value = _count_before(lowered, start, segment_start)
+            else:
+                value = _nearest_number(lowered, start, end, segment_start, segment_end, category.unit == "m")
+            if value is None and (category.requires_value or previous is not None):
+                continue
+            hits[index] = CategoryMatch(category.name, joined[start:end], value, start - segment_start)
+
+        return [[hits[i] for i in sorted(hits)] for hits in found]
+
+    def _category_of(self, keyword: str) -> int:
+        index = next(i for pattern, i in self._alternatives if pattern.fullmatch(keyword))
+        self._keyword_category[keyword] = index
+        return index
+
+
+def _nearest_number(text: str, start: int, end: int, lo: int, hi: int, metres: bool) -> Optional[float]:
+    """Value of the number closest to text[start:end] within text[lo:hi]; numbers after it win ties."""
+    if metres:
+        after = _METRES_RE.search(text, end, hi)
+        before = _METRES_BEFORE_RE.search(text, max(lo, start - _LOOKBEHIND_CHARS), start)
+    else:
+        after = _NUMBER_RE.search(text, end, hi)
+        before = _NUMBER_BEFORE_RE.search(text, max(lo, start - _LOOKBEHIND_CHARS), start)
+    if before is not None and (after is None or start - before.end(1) < after.start() - end):
+        return float(before.group(1))
+    if after is not None:
+        return float(after.group(1))
+    return None
+
+
+def _count_before(text: str, start: int, lo: int) -> Optional[int]:
+    """Integer directly before text[start:] within text[lo:], or None."""
+    match = _COUNT_BEFORE_RE.search(text, max(lo, start - _LOOKBEHIND_CHARS), start)
+    return int(match.group(1)) if match else None
+
+
+# ============================================================================
+# CATEGORY TABLES
+# ============================================================================
+
+# agents/rule_classification_agent -> classified_rules.category
+CLASSIFIED_RULE_CATEGORIES = [
+    Category("fsi", r"fsi|f\.s\.i|floor space index"),
+    Category("height", r"maximum height|floor height|height|storeys|storey", requires_value=True),
+    Category("setback", r"setback|set back|distance from boundary", requires_value=True),
+    Category("parking", r"parking area|parking|car park|vehicle space|stilt"),
+    Category("land_use", r"residential|commercial|industrial|institutional|mixed use|green zone"),
+    Category("density", r"population density|tenements|units per hectare|plinth area"),
+    Category("coverage", r"site coverage|ground coverage|building coverage"),
+]
+
+# agents/parsing_agent -> rules.rule_type, with the parsed_fields key of each category's value
+PARSED_RULE_CATEGORIES = [
+    Category("fsi", r"fsi|f\.s\.i|floor space index", requires_value=True),
+    Category("height", r"heights?", unit="m", requires_value=True),
+    Category("setback", r"setbacks?", requires_value=True),
+    Category("floors", r"floors|floor|storeys|storey|stories", requires_value=True, count_before=True),
+    Category("entitlement", r"shall be permitted|may be permitted|permitted|allowed|entitlement"),
+]
+PARSED_FIELD_NAMES = {"fsi": "fsi", "height": "height_m", "setback": "setback_m", "floors": "floors"}
+
+classified_rule_classifier = RuleClassifier(CLASSIFIED_RULE_CATEGORIES)
+parsed_rule_classifier = RuleClassifier(PARSED_RULE_CATEGORIES)
+
+
+def classified_rule_info(matches: List[CategoryMatch]) -> dict:
+    """classified_rules shape: primary category, its value and keyword, plus every matched category."""
+    rule_info = {"category": "other", "details": {}}
+    if matches:
+        primary = matches[0]
+        rule_info["category"] = primary.category
+        if primary.value is not None:
+            rule_info["details"]["value"] = primary.value
+        rule_info["details"]["matched"] = primary.keyword
+        rule_info["details"]["categories"] = {m.category: m.value for m in matches}
+    return rule_info
+
+
+def parsed_rule_fields(matches: List[CategoryMatch], text: str) -> Tuple[str, dict]:
+    """(rule_type, parsed_fields): the primary category and the values of every matched category."""
+    if not matches:
+        return "other", {}
+    fields = {}
+    for m in matches:
+        if m.category == "entitlement":
+            fields["note"] = text[:200]
+        else:
+            fields[PARSED_FIELD_NAMES[m.category]] = m.value
+    return matches[0].category, fields
@@ -0,0 +1,322 @@
+"""
+Compiled rule index for compliance_pipeline.filter_applicable_rules.
+
+Rules are compiled once into bitsets (Python ints, bit i = i-th rule in input
+order):
+- city buckets (rules without a city match every city)
+- required-field signatures (a signature applies when all its fields are set)
+- per-field condition structures: ``min``/``max`` bounds in sorted arrays with
+  prefix/suffix masks (one bisect per field), ``equals``/scalar/list
+  conditions in hash maps of value -> mask
+
+A query ANDs the masks and walks the set bits in input order, so results and
+duplicate-clause handling match the linear scan. Conditions that cannot be
+compiled (non-numeric bounds, unhashable values) are re-checked per rule with
+the original matcher. Indexes are cached by rule content and rebuilt only
+when the rules change.
+"""
+import hashlib
+import json
+import logging
+import os
+import pickle
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_CACHE_SIZE = 8
+
+
+def conditions_match(conditions: Dict[str, Any], subject: Dict[str, Any]) -> bool:
+    """Reference matcher for a rule's ``conditions`` (also used for uncompiled rules)."""
+    if not conditions:
+        return True
+    for field, cond in conditions.items():
+        val = subject.get(field)
+        if val is None:
+            return False
+        if isinstance(cond, list):
+            if val not in cond:
+                return False
+        elif isinstance(cond, dict):
+            min_v = cond.get("min")
+            max_v = cond.get("max")
+            eq_v = cond.get("equals")
+            if min_v is not None and float(val) < float(min_v):
+                return False
+            if max_v is not None and float(val) > float(max_v):
+                return False
+            if eq_v is not None and val != eq_v:
+                return False
+        else:
+            if val != cond:
+                return False
+    return True
+
+
+class _Bounds:
+    """One side (min or max) of a field's numeric conditions."""
+
+    def __init__(self, entries: List[Tuple[float, int]], lower: bool):
+        entries.sort()
+        self.values = [value for value, _ in entries]
+        self.lower = lower
+        # prefix[i] = bits of the first i bounds (ascending); suffix[i] = bits of bounds[i:]
+        self.prefix = [0]
+        for _, bit in entries:
+            self.prefix.append(self.prefix[-1] | bit)
+        self.suffix = [0] * (len(entries) + 1)
+        for i in range(len(entries) - 1, -1, -1):
+            self.suffix[i] = self.suffix[i + 1] | entries[i][1]
+        self.mask = self.prefix[-1]
+
+    def satisfied(self, value: float) -> int:
+        if self.lower:
+            # min <= value
+            return self.prefix[bisect_right(self.values, value)]
+        # max >= value
+        return self.suffix[bisect_left(self.values, value)]
+
+
+class _FieldConditions:
+    """Compiled conditions of every rule on one subject field."""
+
+    def __init__(self):
+        self.mask = 0  # rules with any condition on this field
+        self.mins: List[Tuple[float, int]] = []
+        self.maxs: List[Tuple[float, int]] = []
+        self.equals: Dict[Any, int] = {}
+        self.equals_mask = 0
+        self.members: Dict[Any, int] = {}
+        self.members_mask = 0
+
+    def freeze(self) -> None:
+        self.min_bounds = _Bounds(self.mins, lower=True)
+        self.max_bounds = _Bounds(self.maxs, lower=False)
+
+    def satisfied(self, val: Any) -> int:
+        """Bits of rules on this field that ``val`` satisfies (rules without a condition here are added by the caller)."""
+        if val is None:
+            return 0
+        ok = self.mask
+        if self.min_bounds.mask or self.max_bounds.mask:
+            try:
+                number = float(val)
+            except (TypeError, ValueError):
+                # Non-numeric subject value fails every numeric bound
+                ok &= ~(self.min_bounds.mask | self.max_bounds.mask)
+            else:
+                ok &= ~self.min_bounds.mask | self.min_bounds.satisfied(number)
+                ok &= ~self.max_bounds.mask | self.max_bounds.satisfied(number)
+        if self.equals_mask:
+            ok &= ~self.equals_mask | _lookup(self.equals, val)
+        if self.members_mask:
+            ok &= ~self.members_mask | _lookup(self.members, val)
+        return ok
+
+
+def _lookup(table: Dict[Any, int], val: Any) -> int:
+    try:
+        return table.get(val, 0)
+    except TypeError:
+        # Unhashable subject value: compare by equality like the linear scan does
+        return _or_all(bits for key, bits in table.items() if key == val)
+
+
+def _or_all(masks) -> int:
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+        return True
+    except TypeError:
+        return False
+
+
+class RuleIndex:
+    """Bitset index over a rule list; ``match(spec)`` equals the original linear filter."""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.rules = rules
+        self.cities: Dict[str, int] = {}
+        self.any_city = 0
+        self.signatures: Dict[frozenset, int] = {}
+        self.fields: Dict[str, _FieldConditions] = {}
+        self.residual = 0  # rules whose conditions are checked with conditions_match
+        self.indexable = 0
+        for position, rule in enumerate(rules):
+            self._add(position, rule)
+        for conditions in self.fields.values():
+            conditions.freeze()
+
+    def _add(self, position: int, rule: Dict[str, Any]) -> None:
+        required_fields = rule.get("required_fields") or []
+        if not required_fields:
+            # Without explicit required fields, a rule never applies
+            return
+        bit = 1 << position
+        self.indexable |= bit
+
+        city = (rule.get("city") or "").lower()
+        if city:
+            self.cities[city] = self.cities.get(city, 0) | bit
+        else:
+            self.any_city |= bit
+        signature = frozenset(required_fields)
+        self.signatures[signature] = self.signatures.get(signature, 0) | bit
+
+        compiled = []
+        for field, cond in (rule.get("conditions") or {}).items():
+            entry = self._compile(field, cond, bit)
+            if entry is None:
+                self.residual |= bit
+                return
+            compiled.append(entry)
+        for field, mins, maxs, equals, members in compiled:
+            conditions = self.fields.setdefault(field, _FieldConditions())
+            conditions.mask |= bit
+            conditions.mins.extend(mins)
+            conditions.maxs.extend(maxs)
+            for value in equals:
+                conditions.equals[value] = conditions.equals.get(value, 0) | bit
+                conditions.equals_mask |= bit
+            if members is not None:
+                conditions.members_mask |= bit
+                for value in members:
+                    conditions.members[value] = conditions.members.get(value, 0) | bit
+
+    @staticmethod
+    def _compile(field: str, cond: Any, bit: int):
+        """(field, mins, maxs, equals, members) or None when the condition must be checked per rule."""
+        if isinstance(cond, list):
+            if not all(_hashable(value) for value in cond):
+                return None
+            return field, [], [], [], set(cond)
+        if isinstance(cond, dict):
+            try:
+                mins = [(float(cond["min"]), bit)] if cond.get("min") is not None else []
+                maxs = [(float(cond["max"]), bit)] if cond.get("max") is not None else []
+            except (TypeError, ValueError):
+                return None
+            eq_v = cond.get("equals")
+            if eq_v is not None and not _hashable(eq_v):
+                return None
+            return field, mins, maxs, [eq_v] if eq_v is not None else [], None
+        if not _hashable(cond):
+            return None
+        return field, [], [], [cond], None
+
+    def match(self, spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Applicable rules in input order, first applicable rule per clause_no."""
+        city = (spec.get("city") or "").lower()
+        candidates = self.any_city | self.cities.get(city, 0) if city else self.any_city
+        candidates &= self.indexable
+        if not candidates:
+            return []
+
+        present = {field for field, value in spec.items() if value is not None}
+        candidates &= _or_all(mask for signature, mask in self.signatures.items() if signature <= present)
+
+        for field, conditions in self.fields.items():
+            if not candidates:
+                return []
+            if conditions.mask & candidates:
+                candidates &= ~conditions.mask | conditions.satisfied(spec.get(field))
+
+        applicable = []
+        seen_clauses = set()
+        bits = bin(candidates)[:1:-1]
+        position = bits.find("1")
+        while position != -1:
+            rule = self.rules[position]
+            clause_no = rule.get("clause_no") or rule.get("id")
+            if clause_no not in seen_clauses:
+                residual = self.residual >> position & 1
+                if not residual or conditions_match(rule.get("conditions", {}), spec):
+                    applicable.append(rule)
+                    seen_clauses.add(clause_no)
+            position = bits.find("1", position + 1)
+        return applicable
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+_indexes: "OrderedDict[str, RuleIndex]" = OrderedDict()
+_last: Optional[Tuple[List[Dict[str, Any]], Tuple[int, ...], RuleIndex]] = None
+_rule_files: Dict[str, Tuple[Tuple[float, int], Dict[str, Any]]] = {}
+stats = {"builds": 0, "hits": 0}
+
+
+def _digest(rules: List[Dict[str, Any]]) -> str:
+    # Pickle is several times cheaper than canonical JSON; the same rules in a
+    # different key order only cost a rebuild
+    try:
+        payload = pickle.dumps(rules, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        payload = json.dumps(rules, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def get_rule_index(rules: List[Dict[str, Any]]) -> RuleIndex:
+    """
+    Index for ``rules``, rebuilt only when the rules change.
+
+    The same list of the same rule objects is reused without rehashing; a new
+    list (e.g. rules reloaded from disk) is matched by content digest.
+    """
+    global _last
+
+    identity = tuple(map(id, rules))
+    if _last is not None and _last[0] is rules and _last[1] == identity:
+        stats["hits"] += 1
+        return _last[2]
+
+    digest = _digest(rules)
+    index = _indexes.get(digest)
+    if index is None:
+        index = RuleIndex(rules)
+        _indexes[digest] = index
+        while len(_indexes) > _CACHE_SIZE:
+            _indexes.popitem(last=False)
+        stats["builds"] += 1
+        logger.info("Compiled rule index over %s rules", len(rules))
+    else:
+        _indexes.move_to_end(digest)
+        stats["hits"] += 1
+    _last = (rules, identity, index)
+    return index
+
+
+def load_rules_file(path: str) -> Dict[str, Any]:
+    """
+    Parsed rules JSON, re-read only when the file changes.
+
+    Returning the same objects while the file is unchanged lets
+    get_rule_index reuse its index without rehashing the rules.
+    """
+    stat = os.stat(path)
+    key = (stat.st_mtime, stat.st_size)
+    cached = _rule_files.get(path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(path, "r") as f:
+        data = json.load(f)
+    _rule_files[path] = (key, data)
+    return data
+
+
+def invalidate_rule_indexes() -> None:
+    """Drop cached indexes (e.g. after editing rule dicts in place)."""
+    global _last
+    _indexes.clear()
+    _rule_files.clear()
+    _last = None
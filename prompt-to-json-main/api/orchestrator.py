@@ -11,13 +11,11 @@ from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
 from fastapi import APIRouter, HTTPException
-from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
-from agents.calculator_agent import calculator_agent
-from agents.rule_classification_agent import classify_rules_for_city
+from core.agent import AgentStatus
+from core.pipelines import build_rule_check_dag
 from mcp.db import Collections, get_collection
-from scripts.seed_rules import ensure_seed_rules
 
 orchestrator_router = APIRouter()
 
@@ -83,13 +81,12 @@ async def orchestrate_run(request: OrchestrateRequest):
         run_id = run_id or f"run_{uuid4().hex[:10]}"
         timestamp = datetime.utcnow().isoformat() + "Z"
 
-        ensure_seed_rules(request.city)
-
-        # Classify any rules for the city (blocking, so run in thread pool)
-        await run_in_threadpool(classify_rules_for_city, request.city)
-
+        # Seed rules, then classify and calculate concurrently (agents run on worker threads)
         subject = _merge_subject(request.subject)
-        outcomes = await run_in_threadpool(calculator_agent, request.city, subject)
+        result = await build_rule_check_dag().arun({"city": request.city, "subject": subject}, trace_id=run_id)
+        if result.status == AgentStatus.FAILED:
+            raise RuntimeError("; ".join(result.errors))
+        outcomes = result.output["outcomes"]
 
         evaluations = get_collection(Collections.EVALUATIONS)
         record = {
@@ -101,6 +98,7 @@ async def orchestrate_run(request: OrchestrateRequest):
             "outcomes": outcomes,
             "metadata": request.metadata or {},
             "timestamp": timestamp,
+            "nodes": [node.model_dump(mode="json") for node in result.nodes],
         }
         res = evaluations.insert_one(record)
 
@@ -113,7 +111,7 @@ async def orchestrate_run(request: OrchestrateRequest):
             outcomes=outcomes,
             summary_id=str(res.inserted_id),
             timestamp=timestamp,
-            warnings=[],
+            warnings=result.errors + result.warnings,
         )
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Orchestration failed: {exc}")
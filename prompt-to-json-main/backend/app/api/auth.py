@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta, timezone
 
 import jwt
+from app.auth_cache import revocations
 from app.config import settings
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
@@ -23,10 +24,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         )
 
     # Create JWT token
-    token_data = {
-        "sub": form_data.username,
-        "exp": datetime.now(timezone.utc) + timedelta(hours=settings.JWT_EXPIRATION_HOURS),
-    }
+    now = datetime.now(timezone.utc)
+    token_data = {"sub": form_data.username, "iat": now, "exp": now + timedelta(hours=settings.JWT_EXPIRATION_HOURS)}
     token = jwt.encode(token_data, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return {"access_token": token, "token_type": "bearer"}
 
@@ -50,11 +49,13 @@ async def refresh_token(token: str = Depends(security)):
         if username is None:
             raise HTTPException(status_code=401, detail="Invalid token")
 
+        # A revoked session cannot be extended
+        if revocations.is_subject_revoked(username, payload.get("iat")):
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+
         # Create new JWT token
-        token_data = {
-            "sub": username,
-            "exp": datetime.now(timezone.utc) + timedelta(hours=settings.JWT_EXPIRATION_HOURS),
-        }
+        now = datetime.now(timezone.utc)
+        token_data = {"sub": username, "iat": now, "exp": now + timedelta(hours=settings.JWT_EXPIRATION_HOURS)}
         new_token = jwt.encode(token_data, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
         return {"access_token": new_token, "token_type": "bearer"}
 
@@ -9,12 +9,16 @@ import uuid
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-import httpx
 from app.api.monitoring_system import log_error, log_info, track_performance
+from app.api.reports import invalidate_report_cache
 from app.config import settings
-from app.database import get_db
+from app.database import get_current_user, get_db
 from app.lm_adapter import run_local_lm
 from app.models import Evaluation, Spec
+from app.services.agent_dispatch import call_agent
+from app.services.prefect_notifier import enqueue_notification, get_notifier_stats
+from app.stage_metrics import stage
+from app.tracing import current_span, current_trace_id, traced
 from app.utils import create_new_spec_id
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
 from pydantic import BaseModel, Field
@@ -92,8 +96,9 @@ class BHIVFeedbackResponse(BaseModel):
 # ============================================================================
 
 
+@traced("agent.mcp_compliance", kind="client")
 async def call_mcp_compliance_agent(
-    spec_json: Dict[str, Any], city: str, request_id: str, auth_token: str = None
+    spec_json: Dict[str, Any], city: str, request_id: str, auth_token: str = None, user: Optional[str] = None
 ) -> AgentResult:
     """Call Sohum's MCP compliance agent"""
     start = time.time()
@@ -102,53 +107,49 @@ async def call_mcp_compliance_agent(
     try:
         logger.info(f"[{request_id}] Calling MCP compliance agent for {city}")
 
-        # Prepare headers with authentication
-        headers = {"Content-Type": "application/json"}
-        if auth_token:
-            headers["Authorization"] = f"Bearer {auth_token}"
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            payload = {"spec_json": spec_json, "city": city, "case_type": "full", "async_mode": False}
+        payload = {"spec_json": spec_json, "city": city, "case_type": "full", "async_mode": False}
 
+        try:
+            # Use the new MCP integration API
+            mcp_payload = {"city": city, "spec_json": spec_json, "case_type": "full"}
+            result_data = await call_agent(agent_name, "/api/v1/mcp/check", mcp_payload, user, auth_token)
+        except Exception as e:
+            logger.warning(f"External MCP service failed, trying internal: {e}")
             try:
-                # Use the new MCP integration API
-                mcp_payload = {"city": city, "spec_json": spec_json, "case_type": "full"}
-                resp = await client.post("http://localhost:8000/api/v1/mcp/check", json=mcp_payload, headers=headers)
-                resp.raise_for_status()
-                result_data = resp.json()
-            except Exception as e:
-                logger.warning(f"External MCP service failed, trying internal: {e}")
-                try:
-                    # Fallback to internal compliance
-                    resp = await client.post(
-                        "http://localhost:8000/api/v1/compliance/run_case", json=payload, headers=headers
-                    )
-                    resp.raise_for_status()
-                    result_data = resp.json()
-                except Exception as e2:
-                    logger.warning(f"Internal compliance also failed: {e2}")
-                    result_data = {
-                        "case_id": f"fallback_case_{request_id[:8]}",
-                        "compliant": True,
-                        "violations": [],
-                        "confidence_score": 0.75,
-                        "geometry_url": None,
-                        "note": "Using fallback compliance check",
-                    }
+                # Fallback to internal compliance
+                result_data = await call_agent(agent_name, "/api/v1/compliance/run_case", payload, user, auth_token)
+            except Exception as e2:
+                logger.warning(f"Internal compliance also failed: {e2}")
+                result_data = {
+                    "case_id": f"fallback_case_{request_id[:8]}",
+                    "compliant": True,
+                    "violations": [],
+                    "confidence_score": 0.75,
+                    "geometry_url": None,
+                    "note": "Using fallback compliance check",
+                }
 
         duration_ms = int((time.time() - start) * 1000)
         logger.info(f"[{request_id}] MCP compliance completed in {duration_ms}ms")
+        current_span().set_attributes(request_id=request_id, fallback="note" in result_data)
 
         return AgentResult(agent_name=agent_name, success=True, duration_ms=duration_ms, data=result_data)
 
     except Exception as e:
         duration_ms = int((time.time() - start) * 1000)
         logger.exception(f"[{request_id}] MCP compliance agent failed: {e}")
+        current_span().record_exception(e)
         return AgentResult(agent_name=agent_name, success=False, duration_ms=duration_ms, error=str(e))
 
 
+@traced("agent.rl", kind="client")
 async def call_rl_agent(
-    spec_json: Dict[str, Any], prompt: str, city: str, request_id: str, auth_token: str = None
+    spec_json: Dict[str, Any],
+    prompt: str,
+    city: str,
+    request_id: str,
+    auth_token: str = None,
+    user: Optional[str] = None,
 ) -> AgentResult:
     """Call Ranjeet's RL optimization agent"""
     start = time.time()
@@ -157,74 +158,56 @@ async def call_rl_agent(
     try:
         logger.info(f"[{request_id}] Calling RL optimization agent")
 
-        # Prepare headers with authentication
-        headers = {"Content-Type": "application/json"}
-        if auth_token:
-            headers["Authorization"] = f"Bearer {auth_token}"
-
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            payload = {"spec_json": spec_json, "prompt": prompt, "city": city, "mode": "optimize"}
+        payload = {"spec_json": spec_json, "prompt": prompt, "city": city, "mode": "optimize"}
 
+        try:
+            # Use local RL system
+            result_data = await call_agent(agent_name, "/api/v1/rl/train/opt", payload, user, auth_token)
+        except Exception as e:
+            logger.warning(f"Local RL optimization failed: {e}")
+            # Try the RLHF training endpoint as alternative
             try:
-                # Use local RL system
-                resp = await client.post("http://localhost:8000/api/v1/rl/train/opt", json=payload, headers=headers)
-                resp.raise_for_status()
-                result_data = resp.json()
-            except Exception as e:
-                logger.warning(f"Local RL optimization failed: {e}")
-                # Try feedback endpoint as alternative
-                try:
-                    # Create a simple feedback record without requiring existing specs
-                    feedback_payload = {
-                        "user_id": "system",
-                        "prompt": prompt,
-                        "spec_json": spec_json,
-                        "user_rating": 4.0,
-                        "feedback_type": "implicit",
-                        "notes": "Auto-generated feedback from BHIV optimization",
-                    }
-                    # Use the RLHF feedback endpoint instead
-                    resp = await client.post(
-                        "http://localhost:8000/api/v1/rl/train/rlhf", json={"steps": 100}, headers=headers
-                    )
-                    if resp.status_code == 200:
-                        result_data = {
-                            "optimized_layout": {
-                                "layout_type": "rl_optimized",
-                                "efficiency_score": 0.88,
-                                "space_utilization": 0.85,
-                            },
-                            "confidence": 0.82,
-                            "reward_score": 0.89,
-                            "feedback_processed": True,
-                        }
-                    else:
-                        raise Exception("RLHF training failed")
-                except Exception as e2:
-                    logger.warning(f"RL feedback also failed: {e2}")
-                    result_data = {
-                        "optimized_layout": {
-                            "layout_type": "basic",
-                            "efficiency_score": 0.75,
-                            "space_utilization": 0.80,
-                        },
-                        "confidence": 0.70,
-                        "reward_score": 0.75,
-                        "note": "Using basic optimization",
-                    }
+                await call_agent(agent_name, "/api/v1/rl/train/rlhf", {"steps": 100}, user, auth_token)
+                result_data = {
+                    "optimized_layout": {
+                        "layout_type": "rl_optimized",
+                        "efficiency_score": 0.88,
+                        "space_utilization": 0.85,
+                    },
+                    "confidence": 0.82,
+                    "reward_score": 0.89,
+                    "feedback_processed": True,
+                }
+            except Exception as e2:
+                logger.warning(f"RL feedback also failed: {e2}")
+                result_data = {
+                    "optimized_layout": {
+                        "layout_type": "basic",
+                        "efficiency_score": 0.75,
+                        "space_utilization": 0.80,
+                    },
+                    "confidence": 0.70,
+                    "reward_score": 0.75,
+                    "note": "Using basic optimization",
+                }
 
         duration_ms = int((time.time() - start) * 1000)
         logger.info(f"[{request_id}] RL agent completed in {duration_ms}ms")
+        current_span().set_attributes(request_id=request_id, fallback="note" in result_data)
 
         return AgentResult(agent_name=agent_name, success=True, duration_ms=duration_ms, data=result_data)
 
     except Exception as e:
         duration_ms = int((time.time() - start) * 1000)
         logger.exception(f"[{request_id}] RL agent failed: {e}")
+        current_span().record_exception(e)
         return AgentResult(agent_name=agent_name, success=False, duration_ms=duration_ms, error=str(e))
 
 
-async def call_geometry_agent(spec_json: Dict[str, Any], request_id: str, auth_token: str = None) -> AgentResult:
+@traced("agent.geometry", kind="client")
+async def call_geometry_agent(
+    spec_json: Dict[str, Any], request_id: str, auth_token: str = None, user: Optional[str] = None
+) -> AgentResult:
     """Call geometry generation agent (.GLB file generation)"""
     start = time.time()
     agent_name = "geometry_agent"
@@ -232,57 +215,47 @@ async def call_geometry_agent(spec_json: Dict[str, Any], request_id: str, auth_t
     try:
         logger.info(f"[{request_id}] Calling geometry generation agent")
 
-        # Prepare headers with authentication
-        headers = {"Content-Type": "application/json"}
-        if auth_token:
-            headers["Authorization"] = f"Bearer {auth_token}"
-
         # Use the new geometry generator API
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            geometry_request = {"spec_json": spec_json, "request_id": request_id, "format": "glb"}
+        geometry_request = {"spec_json": spec_json, "request_id": request_id, "format": "glb"}
 
-            try:
-                response = await client.post(
-                    "http://localhost:8000/api/v1/geometry/generate", json=geometry_request, headers=headers
-                )
-                response.raise_for_status()
-                result_data = response.json()
+        try:
+            result_data = await call_agent(agent_name, "/api/v1/geometry/generate", geometry_request, user, auth_token)
 
-                logger.info(f"[{request_id}] Geometry generated: {result_data.get('file_size_bytes')} bytes")
+            logger.info(f"[{request_id}] Geometry generated: {result_data.get('file_size_bytes')} bytes")
 
-            except Exception as e:
-                logger.warning(f"Geometry API failed: {e}, using fallback")
-                result_data = {
-                    "geometry_url": f"/api/v1/geometry/download/{request_id}.glb",
-                    "format": "glb",
-                    "file_size_bytes": 0,
-                    "generation_time_ms": 100,
-                    "note": "Fallback geometry placeholder",
-                }
+        except Exception as e:
+            logger.warning(f"Geometry API failed: {e}, using fallback")
+            result_data = {
+                "geometry_url": f"/api/v1/geometry/download/{request_id}.glb",
+                "format": "glb",
+                "file_size_bytes": 0,
+                "generation_time_ms": 100,
+                "note": "Fallback geometry placeholder",
+            }
 
         duration_ms = int((time.time() - start) * 1000)
         logger.info(f"[{request_id}] Geometry agent completed in {duration_ms}ms")
+        current_span().set_attributes(request_id=request_id, fallback="note" in result_data)
 
         return AgentResult(agent_name=agent_name, success=True, duration_ms=duration_ms, data=result_data)
 
     except Exception as e:
         duration_ms = int((time.time() - start) * 1000)
         logger.exception(f"[{request_id}] Geometry agent failed: {e}")
+        current_span().record_exception(e)
         return AgentResult(agent_name=agent_name, success=False, duration_ms=duration_ms, error=str(e))
 
 
-async def notify_prefect_webhook(
+def notify_prefect_webhook(
     request_id: str, spec_id: str, user_id: str, prompt: str, city: str, status: str, agents: Dict[str, AgentResult]
 ):
-    """Notify Prefect Cloud webhook about completed request"""
-    try:
-        webhook_url = getattr(settings, "PREFECT_WEBHOOK_URL", None)
-
-        if not webhook_url:
-            logger.warning("PREFECT_WEBHOOK_URL not configured, skipping notification")
-            return
+    """Queue a completed-request event for the batched Prefect webhook (see services.prefect_notifier)"""
+    if not settings.PREFECT_WEBHOOK_URL:
+        logger.debug(f"[{request_id}] PREFECT_WEBHOOK_URL not configured, skipping notification")
+        return
 
-        payload = {
+    enqueue_notification(
+        {
             "event_type": "bhiv_prompt_completed",
             "request_id": request_id,
             "spec_id": spec_id,
@@ -291,19 +264,12 @@ async def notify_prefect_webhook(
             "city": city,
             "status": status,
             "timestamp": datetime.utcnow().isoformat(),
+            "trace_id": current_trace_id(),
             "agents": {
                 name: {"success": result.success, "duration_ms": result.duration_ms} for name, result in agents.items()
             },
         }
-
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(webhook_url, json=payload)
-            resp.raise_for_status()
-
-        logger.info(f"[{request_id}] Notified Prefect webhook successfully")
-
-    except Exception as e:
-        logger.warning(f"[{request_id}] Failed to notify Prefect webhook: {e}")
+    )
 
 
 # ============================================================================
@@ -316,8 +282,8 @@ async def notify_prefect_webhook(
 async def bhiv_prompt(
     req: BHIVPromptRequest,
     request: Request,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
+    current_user: str = Depends(get_current_user),
 ):
     """
     🧠 CENTRAL BHIV AI ASSISTANT ENDPOINT 🧠
@@ -353,7 +319,9 @@ async def bhiv_prompt(
         }
 
         logger.info(f"[{request_id}] Calling LM for design generation")
-        lm_result = run_local_lm(req.prompt, lm_params)
+        with stage("lm_call", city=req.city, design_type=req.design_type) as timer:
+            lm_result = await run_local_lm(req.prompt, lm_params)
+            timer.set(provider=lm_result.get("provider"))
 
         spec_json = lm_result["spec_json"]
         lm_provider = lm_result.get("provider", "local")
@@ -381,9 +349,10 @@ async def bhiv_prompt(
             estimated_cost=req.budget,
         )
 
-        db.add(spec)
-        db.commit()
-        db.refresh(spec)
+        with stage("db_commit", city=req.city, design_type=spec.design_type):
+            db.add(spec)
+            db.commit()
+            db.refresh(spec)
 
         spec_id = spec.id
         logger.info(f"[{request_id}] Spec saved to DB: {spec_id}")
@@ -395,9 +364,9 @@ async def bhiv_prompt(
     # Step 3: Call All Agents in Parallel
     logger.info(f"[{request_id}] Orchestrating agents: MCP, RL, Geometry")
 
-    mcp_task = call_mcp_compliance_agent(spec_json, req.city, request_id, auth_token)
-    rl_task = call_rl_agent(spec_json, req.prompt, req.city, request_id, auth_token)
-    geometry_task = call_geometry_agent(spec_json, request_id, auth_token)
+    mcp_task = call_mcp_compliance_agent(spec_json, req.city, request_id, auth_token, current_user)
+    rl_task = call_rl_agent(spec_json, req.prompt, req.city, request_id, auth_token, current_user)
+    geometry_task = call_geometry_agent(spec_json, request_id, auth_token, current_user)
 
     mcp_result, rl_result, geometry_result = await asyncio.gather(
         mcp_task, rl_task, geometry_task, return_exceptions=True
@@ -427,11 +396,9 @@ async def bhiv_prompt(
 
     logger.info(f"[{request_id}] BHIV request completed: {status_str} ({successful_agents}/{total_agents} agents)")
 
-    # Step 5: Notify Prefect (Background)
+    # Step 5: Notify Prefect (buffered and sent in batches)
     if req.notify_prefect:
-        background_tasks.add_task(
-            notify_prefect_webhook, request_id, spec_id, req.user_id, req.prompt, req.city, status_str, agents
-        )
+        notify_prefect_webhook(request_id, spec_id, req.user_id, req.prompt, req.city, status_str, agents)
 
     # Step 6: Return Unified Response
     return BHIVPromptResponse(
@@ -469,6 +436,7 @@ async def bhiv_feedback(
         db.add(evaluation)
         db.commit()
         db.refresh(evaluation)
+        invalidate_report_cache(req.spec_id)
 
         feedback_id = str(evaluation.id)
         logger.info(f"Feedback recorded: {feedback_id}")
@@ -498,4 +466,5 @@ async def bhiv_health():
         "service": "bhiv-ai-assistant",
         "version": "1.0.0",
         "timestamp": datetime.utcnow().isoformat(),
+        "prefect_notifications": get_notifier_stats(),
     }
@@ -5,8 +5,9 @@ Uses existing backend infrastructure and dependencies
 
 import asyncio
 import logging
+import time
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 import httpx
 from app.config import settings
@@ -19,6 +20,7 @@ from app.external_services import (
 )
 from app.lm_adapter import run_local_lm
 from app.prefect_integration_minimal import check_workflow_status, trigger_automation_workflow
+from app.stage_metrics import stage
 from app.utils import create_new_spec_id
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
@@ -36,6 +38,9 @@ class DesignRequest(BaseModel):
     city: str = Field(description="City for compliance (Mumbai, Pune, etc.)")
     project_id: Optional[str] = None
     context: Optional[Dict] = {}
+    deadline_s: Optional[float] = Field(
+        default=None, gt=0, description="Overall request budget in seconds (default BHIV_DESIGN_DEADLINE)"
+    )
 
 
 class ComplianceResult(BaseModel):
@@ -66,16 +71,21 @@ class BHIVResponse(BaseModel):
     rl_optimization: Optional[RLOptimization] = None
     processing_time_ms: int
     timestamp: datetime
+    stage_timings_ms: Dict[str, int] = {}
+    stages_cut: List[str] = Field(
+        default=[],
+        description="Stages abandoned because the request deadline passed or their service timed out or failed",
+    )
 
 
-async def call_sohum_compliance(spec_json: Dict, city: str, project_id: str) -> Dict:
+async def call_sohum_compliance(spec_json: Dict, city: str, project_id: str, timeout: Optional[float] = None) -> Dict:
     """Call Sohum's MCP compliance endpoint with robust error handling"""
     case_data = {"spec_json": spec_json, "city": city, "project_id": project_id}
 
     # Always try the real service first
     try:
         logger.info(f"Calling Sohum MCP service for {city}")
-        result = await sohum_client.run_compliance_case(case_data)
+        result = await sohum_client.run_compliance_case(case_data, timeout=timeout)
         logger.info(f"Sohum MCP response received successfully")
         # Mark service as healthy
         service_manager.service_health["sohum_mcp"] = ServiceStatus.HEALTHY
@@ -86,17 +96,16 @@ async def call_sohum_compliance(spec_json: Dict, city: str, project_id: str) ->
         # Mark service as unhealthy
         service_manager.service_health["sohum_mcp"] = ServiceStatus.UNHEALTHY
         service_manager.last_health_check["sohum_mcp"] = datetime.now()
-        # Use mock response as fallback
-        logger.info(f"Using mock compliance response for {city}")
-        return sohum_client.get_mock_compliance_response(case_data)
+        # No local fallback: the stage runner reports the check as failed and unverified
+        raise
 
 
-async def call_ranjeet_rl(spec_json: Dict, city: str) -> Optional[Dict]:
+async def call_ranjeet_rl(spec_json: Dict, city: str, timeout: Optional[float] = None) -> Optional[Dict]:
     """Call Ranjeet's RL optimization endpoint - prioritize live service"""
     # ALWAYS try the live service first with extended timeout
     try:
         logger.info(f"🚀 Calling Ranjeet's LIVE RL service at {settings.RANJEET_RL_URL} for {city}")
-        result = await ranjeet_client.optimize_design(spec_json, city)
+        result = await ranjeet_client.optimize_design(spec_json, city, timeout=timeout)
 
         # Mark service as healthy
         service_manager.service_health["ranjeet_rl"] = ServiceStatus.HEALTHY
@@ -113,11 +122,99 @@ async def call_ranjeet_rl(spec_json: Dict, city: str) -> Optional[Dict]:
         service_manager.service_health["ranjeet_rl"] = ServiceStatus.UNHEALTHY
         service_manager.last_health_check["ranjeet_rl"] = datetime.now()
 
-        # Only use mock as absolute last resort
-        logger.warning(f"⚠️ Using mock RL response as fallback for {city} - LIVE service unavailable")
-        mock_response = ranjeet_client.get_mock_rl_response(spec_json, city)
-        mock_response["fallback_reason"] = f"Live service failed: {str(e)}"
-        return mock_response
+        # No local fallback: the stage runner reports the optimization as failed
+        raise
+
+
+# ============================================================================
+# DEADLINE-BOUND STAGES
+# ============================================================================
+
+
+class StageRunner:
+    """
+    Runs the stages of one request against a shared deadline
+
+    Each stage gets the remaining budget as its client timeout and is
+    abandoned when the deadline passes. A stage whose client timed out or
+    failed is cut as well (failures are kept in ``errors``). Timings and cut
+    stages are kept for the response.
+    """
+
+    def __init__(self, budget_s: float, city: Optional[str] = None):
+        self.deadline = time.monotonic() + budget_s
+        self.city = city
+        self.timings_ms: Dict[str, int] = {}
+        self.cut: List[str] = []
+        self.errors: Dict[str, Exception] = {}
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    async def run(self, name: str, call: Callable[[float], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Await ``call(remaining_s)``; returns (result, completed), result is None when cut"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            self.cut.append(name)
+            self.timings_ms[name] = 0
+            return None, False
+        started = time.monotonic()
+        with stage(name, city=self.city) as timer:
+            try:
+                result = await asyncio.wait_for(call(remaining), timeout=remaining)
+            except (asyncio.TimeoutError, httpx.TimeoutException):
+                timer.set(status="timeout")
+                result, completed = None, False
+            except Exception as e:
+                logger.warning(f"Stage {name} failed: {e}")
+                timer.set(status="error")
+                self.errors[name] = e
+                result, completed = None, False
+            else:
+                # A client that gave up at its (remaining-budget) timeout was cut as well
+                completed = time.monotonic() < self.deadline
+                if not completed:
+                    timer.set(status="timeout")
+        self.timings_ms[name] = int((time.monotonic() - started) * 1000)
+        if not completed:
+            self.cut.append(name)
+        return result, completed
+
+
+def _cut_compliance(failed: bool = False) -> Dict:
+    # Not verified, so never reported as compliant
+    if failed:
+        return {"compliant": False, "violations": ["Compliance check failed: compliance service unavailable"]}
+    return {"compliant": False, "violations": ["Compliance check did not finish within the request deadline"]}
+
+
+async def _run_external_stages(
+    runner: StageRunner, spec_json: Dict, city: str, project_id: str
+) -> Tuple[Dict, Optional[Dict]]:
+    """Compliance and RL only need the spec, so they run concurrently; a failed RL stage is non-blocking"""
+    (compliance_result, compliance_done), (rl_result, rl_done) = await asyncio.gather(
+        runner.run("compliance", lambda timeout: call_sohum_compliance(spec_json, city, project_id, timeout=timeout)),
+        runner.run("rl_optimization", lambda timeout: call_ranjeet_rl(spec_json, city, timeout=timeout)),
+    )
+    if compliance_result is None:
+        compliance_result = _cut_compliance(failed="compliance" in runner.errors)
+    if not rl_done:
+        rl_result = None
+    return compliance_result, rl_result
+
+
+async def _generate_spec(runner: StageRunner, request: DesignRequest) -> Dict:
+    params = {
+        "user_id": request.user_id,
+        "strategy": request.context.get("style", "modern"),
+        "extracted_dimensions": request.context.get("dimensions", {}),
+    }
+    lm_result, completed = await runner.run("spec_generation", lambda timeout: run_local_lm(request.prompt, params))
+    if "spec_generation" in runner.errors:
+        raise runner.errors["spec_generation"]
+    if not completed:
+        raise HTTPException(status_code=504, detail="Spec generation did not finish within the request deadline")
+    return lm_result
 
 
 @router.post("/design", response_model=BHIVResponse)
@@ -131,18 +228,12 @@ async def create_design(request: DesignRequest):
     # 3. Ranjeet's RL: Optimize land utilization
     start_time = datetime.now()
     request_id = f"bhiv_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    runner = StageRunner(request.deadline_s or settings.BHIV_DESIGN_DEADLINE, city=request.city)
 
     try:
         # STEP 1: Generate spec using internal LM adapter
         logger.info(f"[{request_id}] Step 1: Generating spec internally...")
-
-        params = {
-            "user_id": request.user_id,
-            "strategy": request.context.get("style", "modern"),
-            "extracted_dimensions": request.context.get("dimensions", {}),
-        }
-
-        lm_result = run_local_lm(request.prompt, params)
+        lm_result = await _generate_spec(runner, request)
         spec_id = create_new_spec_id()
 
         spec_result = {
@@ -151,19 +242,13 @@ async def create_design(request: DesignRequest):
             "preview_url": f"https://bhiv-previews.s3.amazonaws.com/{spec_id}.glb",
         }
 
-        # STEP 2: Run compliance check
-        logger.info(f"[{request_id}] Step 2: Running compliance check...")
-        compliance_result = await call_sohum_compliance(
-            spec_result["spec_json"], request.city, request.project_id or request_id
+        # STEPS 2-3: Compliance check and RL optimization (optional), concurrently within the deadline
+        logger.info(f"[{request_id}] Steps 2-3: Running compliance check and RL optimization...")
+        compliance_result, rl_result = await _run_external_stages(
+            runner, spec_result["spec_json"], request.city, request.project_id or request_id
         )
-
-        # STEP 3: Get RL optimization (optional)
-        rl_result = None
-        try:
-            logger.info(f"[{request_id}] Step 3: Getting RL optimization...")
-            rl_result = await call_ranjeet_rl(spec_result["spec_json"], request.city)
-        except Exception as e:
-            logger.warning(f"[{request_id}] RL optimization failed (non-blocking): {e}")
+        if runner.cut:
+            logger.warning(f"[{request_id}] Stages cut: {runner.cut}")
 
         # STEP 4: Aggregate response
         processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
@@ -177,8 +262,12 @@ async def create_design(request: DesignRequest):
             rl_optimization=RLOptimization(**rl_result) if rl_result else None,
             processing_time_ms=processing_time,
             timestamp=datetime.now(),
+            stage_timings_ms=runner.timings_ms,
+            stages_cut=runner.cut,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[{request_id}] Error in design generation: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Design generation failed: {str(e)}")
@@ -189,16 +278,11 @@ async def process_with_workflow(request: DesignRequest):
     """Process design with integrated workflow orchestration"""
     start_time = datetime.now()
     request_id = f"workflow_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    runner = StageRunner(request.deadline_s or settings.BHIV_DESIGN_DEADLINE, city=request.city)
 
     try:
         # Step 1: Generate design (same as before)
-        params = {
-            "user_id": request.user_id,
-            "strategy": request.context.get("style", "modern"),
-            "extracted_dimensions": request.context.get("dimensions", {}),
-        }
-
-        lm_result = run_local_lm(request.prompt, params)
+        lm_result = await _generate_spec(runner, request)
         spec_id = create_new_spec_id()
 
         # Step 2: Check if PDF processing is needed
@@ -213,17 +297,11 @@ async def process_with_workflow(request: DesignRequest):
             workflow_result = await trigger_automation_workflow("pdf_compliance", workflow_params)
             logger.info(f"[{request_id}] Workflow result: {workflow_result}")
 
-        # Step 3: Continue with compliance and RL (same as before)
-        compliance_result = await call_sohum_compliance(
-            lm_result["spec_json"], request.city, request.project_id or request_id
+        # Step 3: Continue with compliance and RL (same as /design)
+        compliance_result, rl_result = await _run_external_stages(
+            runner, lm_result["spec_json"], request.city, request.project_id or request_id
         )
 
-        rl_result = None
-        try:
-            rl_result = await call_ranjeet_rl(lm_result["spec_json"], request.city)
-        except Exception as e:
-            logger.warning(f"RL optimization failed: {e}")
-
         processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
 
         return BHIVResponse(
@@ -235,8 +313,12 @@ async def process_with_workflow(request: DesignRequest):
             rl_optimization=RLOptimization(**rl_result) if rl_result else None,
             processing_time_ms=processing_time,
             timestamp=datetime.now(),
+            stage_timings_ms=runner.timings_ms,
+            stages_cut=runner.cut,
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"[{request_id}] Workflow processing failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Optional
 
 from app.database import get_current_user, get_db
+from app.fast_json import invalidate_spec_json
 from app.models import ComplianceCheck, Evaluation, Iteration, Spec
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
@@ -284,6 +285,8 @@ async def fix_spec_integrity(
         if os.path.exists(local_file):
             with open(local_file, "r") as f:
                 spec.spec_json = json.load(f)
+            # Restored in place without a version bump
+            invalidate_spec_json(spec_id)
             fixes_applied.append("Restored spec_json from local file")
 
     # Check for preview files
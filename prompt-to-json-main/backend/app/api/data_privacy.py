@@ -1,71 +1,71 @@
 import logging
+import os
+from datetime import datetime, timezone
 
 from app.database import get_current_user, get_db
 from app.models import Evaluation, Iteration, RLFeedback, Spec
-from app.storage import supabase
+from app.services.data_deletion_service import create_deletion_job, get_deletion_job, run_deletion_job
+from app.services.data_export_service import (
+    archive_path,
+    create_export_job,
+    get_export_job,
+    iter_export_zip,
+    iter_user_rows,
+    run_export_job,
+    serialize_row,
+)
 from app.utils import log_audit_event
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _check_access(user_id: str, current_user: str) -> None:
+    # Only allow users to access their own data or admin access
+    if current_user != user_id and current_user != "admin":
+        raise HTTPException(status_code=403, detail="Access denied")
+
+
 @router.get("/data/{user_id}/export")
 async def export_user_data(
     user_id: str,
     current_user: str = Depends(get_current_user),
     db: Session = Depends(get_db),
+    format: str = Query("json", description="json (inline) or zip (streamed NDJSON archive)"),
+    include_files: bool = Query(True, description="Include stored preview/geometry files (zip only)"),
 ):
     """GDPR-style data export - get all user data"""
 
-    # Only allow users to export their own data or admin access
-    if current_user != user_id and current_user != "admin":
-        raise HTTPException(status_code=403, detail="Access denied")
+    _check_access(user_id, current_user)
 
-    # Collect all user data
-    specs = db.query(Spec).filter(Spec.user_id == user_id).all()
-    evaluations = db.query(Evaluation).filter(Evaluation.user_id == user_id).all()
-    iterations = db.query(Iteration).join(Spec).filter(Spec.user_id == user_id).all()
-    rl_feedback = db.query(RLFeedback).filter(RLFeedback.user_id == user_id).all()
+    if format == "zip":
+        # Log export request
+        log_audit_event("data_export", user_id, {"exported_by": current_user, "format": "zip"})
+
+        filename = f"bhiv_export_{user_id}_{datetime.now(timezone.utc).strftime('%Y%m%d_%H%M%S')}.zip"
+        return StreamingResponse(
+            iter_export_zip(db, user_id, include_files=include_files),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be 'json' or 'zip'")
 
     # Format export data
     export_data = {
         "user_id": user_id,
-        "export_timestamp": "2025-11-11T00:00:00Z",
+        "export_timestamp": datetime.now(timezone.utc).isoformat(),
         "data": {
-            "specs": [
-                {
-                    "spec_id": spec.spec_id,
-                    "prompt": spec.prompt,
-                    "spec_json": spec.spec_json,
-                    "project_id": spec.project_id,
-                    "created_at": spec.created_at.isoformat(),
-                    "updated_at": spec.updated_at.isoformat(),
-                }
-                for spec in specs
-            ],
-            "evaluations": [
-                {
-                    "eval_id": eval.eval_id,
-                    "spec_id": eval.spec_id,
-                    "score": eval.score,
-                    "notes": eval.notes,
-                    "timestamp": eval.ts.isoformat(),
-                }
-                for eval in evaluations
-            ],
-            "iterations": [
-                {
-                    "iter_id": iter.iter_id,
-                    "spec_id": iter.spec_id,
-                    "feedback": iter.feedback,
-                    "timestamp": iter.ts.isoformat(),
-                }
-                for iter in iterations
-            ],
+            "specs": [serialize_row(spec) for spec in iter_user_rows(db, Spec, user_id)],
+            "evaluations": [serialize_row(eval) for eval in iter_user_rows(db, Evaluation, user_id)],
+            "iterations": [serialize_row(iter) for iter in iter_user_rows(db, Iteration, user_id)],
             "rl_data": {
-                "feedback_count": len(rl_feedback),
+                "feedback_count": db.query(func.count(RLFeedback.id)).filter(RLFeedback.user_id == user_id).scalar(),
             },
         },
     }
@@ -76,71 +76,109 @@ async def export_user_data(
     return export_data
 
 
-@router.delete("/data/{user_id}")
+@router.post("/data/{user_id}/export/archive", status_code=202)
+async def start_export_archive(
+    user_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: str = Depends(get_current_user),
+    include_files: bool = Query(True, description="Include stored preview/geometry files"),
+):
+    """Build the export archive in the background for very large accounts"""
+
+    _check_access(user_id, current_user)
+
+    job = create_export_job(user_id, current_user)
+    background_tasks.add_task(run_export_job, job["job_id"], include_files)
+
+    log_audit_event("data_export", user_id, {"exported_by": current_user, "format": "archive", "job_id": job["job_id"]})
+
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/v1/data/exports/{job['job_id']}",
+    }
+
+
+@router.get("/data/exports/{job_id}")
+async def get_export_archive_status(job_id: str, current_user: str = Depends(get_current_user)):
+    """Status of a background export job"""
+
+    job = get_export_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    _check_access(job["user_id"], current_user)
+
+    if job["status"] == "completed":
+        job["download_url"] = f"/api/v1/data/exports/{job_id}/download"
+    return job
+
+
+@router.get("/data/exports/{job_id}/download")
+async def download_export_archive(job_id: str, current_user: str = Depends(get_current_user)):
+    """Download a completed export archive"""
+
+    job = get_export_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    _check_access(job["user_id"], current_user)
+
+    if job["status"] != "completed" or not os.path.exists(archive_path(job_id)):
+        raise HTTPException(status_code=409, detail=f"Export job is {job['status']}")
+
+    return FileResponse(archive_path(job_id), media_type="application/zip", filename=f"bhiv_export_{job_id}.zip")
+
+
+@router.delete("/data/{user_id}", status_code=202)
 async def delete_user_data(
     user_id: str,
+    background_tasks: BackgroundTasks,
     current_user: str = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
-    """GDPR-style data deletion - wipe all user designs and data"""
+    """GDPR-style data deletion - wipe all user designs and data in batches"""
 
-    # Only allow users to delete their own data or admin access
-    if current_user != user_id and current_user != "admin":
-        raise HTTPException(status_code=403, detail="Access denied")
+    _check_access(user_id, current_user)
 
-    try:
-        # Get all user specs for file cleanup
-        specs = db.query(Spec).filter(Spec.user_id == user_id).all()
-        spec_ids = [spec.spec_id for spec in specs]
-
-        # Delete from database (cascading deletes will handle related records)
-        db.query(RLFeedback).filter(RLFeedback.user_id == user_id).delete()
-        db.query(Evaluation).filter(Evaluation.user_id == user_id).delete()
-
-        # Delete iterations for user specs
-        for spec_id in spec_ids:
-            db.query(Iteration).filter(Iteration.spec_id == spec_id).delete()
-
-        # Delete specs
-        db.query(Spec).filter(Spec.user_id == user_id).delete()
-
-        # Delete files from Supabase storage
-        deleted_files = []
-        for spec_id in spec_ids:
-            try:
-                # Delete preview files
-                supabase.storage.from_("previews").remove([f"{spec_id}.glb"])
-                # Delete geometry files
-                supabase.storage.from_("geometry").remove([f"{spec_id}.stl"])
-                deleted_files.append(spec_id)
-            except Exception as e:
-                logger.warning(f"Failed to delete files for spec {spec_id}: {e}")
-
-        db.commit()
-
-        # Log deletion (this will be the last audit log for this user)
-        log_audit_event(
-            "data_deletion",
-            user_id,
-            {
-                "deleted_by": current_user,
-                "specs_deleted": len(spec_ids),
-                "files_deleted": len(deleted_files),
-            },
-        )
+    job = create_deletion_job(user_id, current_user)
+    background_tasks.add_task(run_deletion_job, job["job_id"])
+
+    log_audit_event("data_deletion_requested", user_id, {"deleted_by": current_user, "job_id": job["job_id"]})
+
+    return {
+        "message": "User data deletion started",
+        "user_id": user_id,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/v1/data/deletions/{job['job_id']}",
+    }
+
+
+@router.get("/data/deletions/{job_id}")
+async def get_deletion_status(job_id: str, current_user: str = Depends(get_current_user)):
+    """Progress of a deletion job (rows deleted per table)"""
+
+    job = get_deletion_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    _check_access(job["user_id"], current_user)
+    return job
+
+
+@router.post("/data/deletions/{job_id}/resume", status_code=202)
+async def resume_deletion(
+    job_id: str, background_tasks: BackgroundTasks, current_user: str = Depends(get_current_user)
+):
+    """Restart a failed or interrupted deletion job from where it stopped"""
+
+    job = get_deletion_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    _check_access(job["user_id"], current_user)
+
+    if job["status"] == "completed":
+        raise HTTPException(status_code=409, detail="Deletion job is already completed")
 
-        return {
-            "message": "User data successfully deleted",
-            "user_id": user_id,
-            "specs_deleted": len(spec_ids),
-            "files_deleted": len(deleted_files),
-            "deleted_at": "2025-11-11T00:00:00Z",
-        }
-
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to delete user data for {user_id}: {e}")
-        raise HTTPException(status_code=500, detail="Data deletion failed")
+    background_tasks.add_task(run_deletion_job, job_id)
+    return {"job_id": job_id, "status": job["status"], "status_url": f"/api/v1/data/deletions/{job_id}"}
 
 
 @router.post("/auth/refresh")
@@ -8,12 +8,15 @@ import os
 from datetime import datetime, timezone
 from typing import Optional
 
+from app.api.reports import invalidate_report_cache
+from app.config import settings
 from app.database import get_current_user, get_db
 from app.error_handler import APIException
 from app.feedback_loop import IterativeFeedbackCycle
 from app.models import Evaluation, Spec
 from app.schemas import EvaluateRequest, EvaluateResponse
 from app.schemas.error_schemas import ErrorCode
+from app.services.evaluation_ingest_service import enqueue_evaluation, get_ingest_stats
 from app.utils import create_new_eval_id
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
@@ -64,8 +67,9 @@ async def evaluate(
 ):
     """Evaluate a design spec and collect feedback"""
 
-    print(f"📊 EVALUATE REQUEST: user_id={request.user_id}, spec_id={request.spec_id}, rating={request.rating}")
-    logger.info(f"📊 EVALUATE REQUEST: user_id={request.user_id}, spec_id={request.spec_id}, rating={request.rating}")
+    logger.info(
+        "📊 EVALUATE REQUEST: user_id=%s, spec_id=%s, rating=%s", request.user_id, request.spec_id, request.rating
+    )
 
     try:
         # 1. VALIDATE INPUT
@@ -86,9 +90,9 @@ async def evaluate(
                 details={"provided": request.rating},
             )
 
-        # 2. CHECK IF SPEC EXISTS
+        # 2. CHECK IF SPEC EXISTS (primary key lookup only; Spec has no spec_id column)
         try:
-            spec = db.query(Spec).filter(Spec.spec_id == request.spec_id).first()
+            spec = db.query(Spec.id).filter(Spec.id == request.spec_id).first()
 
             if not spec:
                 raise APIException(
@@ -108,7 +112,25 @@ async def evaluate(
                 )
             # Continue with mock evaluation for testing
 
-        # 3. SAVE EVALUATION
+        # 3. WRITE-BEHIND: acknowledge after a durable enqueue; the consumer batches
+        # the insert and runs the feedback loop per spec
+        if settings.EVAL_WRITE_BEHIND_ENABLED:
+            try:
+                queue_id = enqueue_evaluation(request.spec_id, request.user_id, request.rating, request.notes or "")
+                logger.info(f"Queued evaluation {queue_id} for spec {request.spec_id}, rating={request.rating}")
+                # The row (and its autoincrement id) only exists after the consumer's batch insert
+                return EvaluateResponse(
+                    ok=True,
+                    saved_id="",
+                    queue_id=queue_id,
+                    feedback_processed=False,
+                    training_triggered=None,
+                    message="Evaluation accepted; saved_id is unavailable until the queued insert runs",
+                )
+            except OSError as e:
+                logger.warning(f"Evaluation queue unavailable, saving inline: {e}")
+
+        # 3b. SAVE EVALUATION INLINE
         try:
             # eval_id will be auto-generated by database
             evaluation = Evaluation(
@@ -120,8 +142,9 @@ async def evaluate(
 
             db.add(evaluation)
             db.commit()
+            invalidate_report_cache(request.spec_id)
             eval_id = f"eval_{evaluation.id}"
-            print(f"Saved evaluation {eval_id} to database")
+            logger.debug("Saved evaluation %s to database", eval_id)
 
         except Exception as e:
             db.rollback()
@@ -130,7 +153,7 @@ async def evaluate(
 
             # Fallback to local file storage
             eval_id = save_evaluation_to_file(request)
-            print(f"Saved evaluation {eval_id} to local file")
+            logger.debug("Saved evaluation %s to local file", eval_id)
 
         # 4. PROCESS FEEDBACK LOOP (Non-blocking, warnings don't fail request)
         feedback_processed = False
@@ -177,3 +200,9 @@ async def evaluate(
         raise APIException(
             status_code=500, error_code=ErrorCode.INTERNAL_ERROR, message="Unexpected error during evaluation"
         )
+
+
+@router.get("/evaluate/queue")
+async def evaluation_queue_status(current_user: str = Depends(get_current_user)):
+    """Write-behind queue depth and ingestion counters"""
+    return {"write_behind_enabled": settings.EVAL_WRITE_BEHIND_ENABLED, **get_ingest_stats()}
@@ -8,8 +8,12 @@ from datetime import datetime, timezone
 from typing import Any, Dict
 
 from app.config import settings
+from app.cost_engine import apply_cost_breakdown, compute_cost_breakdown
+from app.fast_json import cached_json, fast_response, is_cached
 from app.lm_adapter import lm_run
+from app.stage_metrics import set_request_labels, stage
 from fastapi import APIRouter, HTTPException, status
+from sqlalchemy.orm import defer
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -31,100 +35,7 @@ def validate_city(city: str) -> bool:
 def calculate_estimated_cost(spec_json: Dict) -> float:
     """Calculate realistic estimated cost based on design type and dimensions"""
     try:
-        design_type = spec_json.get("design_type", "generic")
-        dimensions = spec_json.get("dimensions", {})
-        objects = spec_json.get("objects", [])
-        stories = spec_json.get("stories", 1)
-
-        # Calculate area
-        width = dimensions.get("width", 10)
-        length = dimensions.get("length", 10)
-        area = width * length
-
-        # Design type base costs (INR per sq meter)
-        base_costs = {
-            "house": 25000,  # ₹25k per sqm for house construction
-            "building": 30000,  # ₹30k per sqm for commercial building
-            "office": 15000,  # ₹15k per sqm for office interiors
-            "kitchen": 35000,  # ₹35k per sqm for kitchen renovation
-            "bedroom": 20000,  # ₹20k per sqm for bedroom
-            "bathroom": 40000,  # ₹40k per sqm for bathroom
-            "living_room": 18000,  # ₹18k per sqm for living room
-            "car_body": 500000,  # ₹5 lakhs base for car
-            "pcb": 10000,  # ₹10k base for electronics
-            "generic": 20000,  # ₹20k per sqm default
-        }
-
-        base_rate = base_costs.get(design_type, 20000)
-
-        # Calculate base cost
-        if design_type in ["car_body", "pcb", "component"]:
-            # Fixed costs for vehicles/electronics
-            base_cost = base_rate
-        else:
-            # Area-based costs for buildings/rooms
-            base_cost = area * base_rate * stories
-
-        # Material premium multipliers
-        material_multipliers = {
-            "marble": 1.8,
-            "granite": 1.6,
-            "quartz": 1.4,
-            "wood_oak": 1.3,
-            "concrete": 1.0,
-            "brick": 1.1,
-            "glass": 1.5,
-            "steel": 1.4,
-            "leather": 2.0,
-            "default": 1.0,
-        }
-
-        # Calculate material premium
-        material_premium = 1.0
-        for obj in objects:
-            material = obj.get("material", "default")
-            for mat_key, multiplier in material_multipliers.items():
-                if mat_key in material:
-                    material_premium = max(material_premium, multiplier)
-                    break
-
-        # Special object premiums
-        object_premiums = {
-            "garage": 200000,  # ₹2 lakhs for garage
-            "roof": 150000,  # ₹1.5 lakhs for roof
-            "foundation": 100000,  # ₹1 lakh for foundation
-            "island": 80000,  # ₹80k for kitchen island
-            "engine": 300000,  # ₹3 lakhs for car engine
-            "wheel": 25000,  # ₹25k per wheel
-        }
-
-        premium_cost = 0
-        for obj in objects:
-            obj_type = obj.get("type", "")
-            count = obj.get("count", 1)
-            if obj_type in object_premiums:
-                premium_cost += object_premiums[obj_type] * count
-
-        # Final calculation
-        total_cost = (base_cost * material_premium) + premium_cost
-
-        # Minimum costs by design type
-        min_costs = {
-            "house": 2500000,  # Min ₹25 lakhs for house
-            "building": 5000000,  # Min ₹50 lakhs for building
-            "office": 200000,  # Min ₹2 lakhs for office
-            "kitchen": 300000,  # Min ₹3 lakhs for kitchen
-            "bedroom": 150000,  # Min ₹1.5 lakhs for bedroom
-            "bathroom": 200000,  # Min ₹2 lakhs for bathroom
-            "car_body": 800000,  # Min ₹8 lakhs for car
-            "pcb": 5000,  # Min ₹5k for electronics
-        }
-
-        min_cost = min_costs.get(design_type, 100000)
-        total_cost = max(total_cost, min_cost)
-
-        return round(total_cost, 0)
-
+        return compute_cost_breakdown(spec_json)["total"]
     except Exception as e:
         logger.warning(f"Cost calculation failed: {e}")
         return 500000.0  # Default ₹5 lakhs
@@ -190,23 +101,21 @@ async def generate_design(request: GenerateRequest):
     start_time = time.time()
 
     # Add explicit logging
-    print(f"🎨 GENERATE REQUEST: user_id={request.user_id}, prompt='{request.prompt[:50]}...'")
-    logger.info(f"🎨 GENERATE REQUEST: user_id={request.user_id}, prompt='{request.prompt[:50]}...'")
+    logger.info("🎨 GENERATE REQUEST: user_id=%s, prompt='%s...'", request.user_id, request.prompt[:50])
 
     try:
         # 1. VALIDATE INPUT
-        print(f"✅ Validating input...")
         if not request.prompt or len(request.prompt) < 10:
             raise HTTPException(status_code=400, detail="Prompt must be at least 10 characters")
 
         if not request.user_id:
             raise HTTPException(status_code=400, detail="user_id is required")
 
-        print(f"✅ Input validation passed")
+        logger.debug("Input validation passed")
 
         # 2. CALL LM
         try:
-            print(f"🤖 Calling LM with prompt: '{request.prompt[:30]}...'")
+            logger.debug("Calling LM with prompt: '%s...'", request.prompt[:30])
             lm_params = request.context or {}
             lm_params.update(
                 {
@@ -216,11 +125,15 @@ async def generate_design(request: GenerateRequest):
                 }
             )
 
-            lm_result = await lm_run(request.prompt, lm_params)
-            spec_json = lm_result.get("spec_json")
-            lm_provider = lm_result.get("provider", "local")
+            set_request_labels(city=lm_params["city"])
+            with stage("lm_call") as timer:
+                lm_result = await lm_run(request.prompt, lm_params)
+                spec_json = lm_result.get("spec_json")
+                lm_provider = lm_result.get("provider", "local")
+                timer.set(provider=lm_provider, design_type=(spec_json or {}).get("design_type"))
+            set_request_labels(provider=lm_provider, design_type=(spec_json or {}).get("design_type"))
 
-            print(f"✅ LM returned result from {lm_provider} provider")
+            logger.debug("LM returned result from %s provider", lm_provider)
 
             if not spec_json:
                 raise HTTPException(status_code=500, detail="LM returned empty spec")
@@ -230,9 +143,15 @@ async def generate_design(request: GenerateRequest):
             raise HTTPException(status_code=503, detail="LM service unavailable")
 
         # 3. CALCULATE COST AND ENHANCE SPEC
-        print(f"💰 Calculating cost for {len(spec_json.get('objects', []))} objects...")
-        estimated_cost = calculate_estimated_cost(spec_json)
-        print(f"✅ Estimated cost: ₹{estimated_cost:,.0f}")
+        logger.debug("Calculating cost for %d objects", len(spec_json.get("objects", [])))
+        with stage("cost_calc"):
+            try:
+                # Per-object breakdown travels with the spec so switch/iterate can update it incrementally
+                estimated_cost = apply_cost_breakdown(spec_json, compute_cost_breakdown(spec_json))
+            except Exception as e:
+                logger.warning(f"Cost breakdown failed: {e}")
+                estimated_cost = calculate_estimated_cost(spec_json)
+        logger.debug("Estimated cost: ₹%s", f"{estimated_cost:,.0f}")
 
         spec_json["metadata"] = spec_json.get("metadata", {})
         spec_json["metadata"].update(
@@ -255,17 +174,20 @@ async def generate_design(request: GenerateRequest):
             from app.storage import upload_geometry
 
             # Generate simple GLB file content (mock 3D data)
-            glb_content = generate_mock_glb(spec_json)
+            with stage("glb_build"):
+                glb_content = generate_mock_glb(spec_json)
 
             # Upload to Supabase storage
-            preview_url = upload_geometry(spec_id, glb_content)
-            print(f"✅ Generated real preview file: {preview_url}")
+            with stage("upload"):
+                preview_url = upload_geometry(spec_id, glb_content)
+            logger.debug("Generated real preview file: %s", preview_url)
 
         except Exception as e:
-            print(f"⚠️ Preview generation failed, using local path: {e}")
+            logger.warning("Preview generation failed, using local path: %s", e)
             # Fallback to local file path
             local_preview_path = f"data/geometry_outputs/{spec_id}.glb"
-            create_local_preview_file(spec_json, local_preview_path)
+            with stage("glb_build", provider="local_file"):
+                create_local_preview_file(spec_json, local_preview_path)
             preview_url = f"http://localhost:8000/static/geometry/{spec_id}.glb"
 
         # 6. SAVE TO STORAGE AND DATABASE
@@ -281,14 +203,12 @@ async def generate_design(request: GenerateRequest):
             "spec_version": 1,
         }
         save_spec(spec_id, complete_spec_data)
-        print(f"💾 Saved spec {spec_id} to in-memory storage")
+        logger.debug("Saved spec %s to in-memory storage", spec_id)
 
         # Save to database
         from app.database import SessionLocal
         from app.models import Spec, User
 
-        print(f"💾 Saving spec {spec_id} to database...")
-
         db = SessionLocal()
         try:
             # Ensure user exists - check by username first, then by id
@@ -305,11 +225,11 @@ async def generate_design(request: GenerateRequest):
                 )
                 db.add(user)
                 db.commit()
-                print(f"✅ Created user {request.user_id}")
+                logger.info("Created user %s", request.user_id)
             else:
                 # Use the existing user's actual ID
                 request.user_id = user.id
-                print(f"✅ Using existing user {user.username} with id {user.id}")
+                logger.debug("Using existing user %s with id %s", user.username, user.id)
 
             # Create spec with required fields
             db_spec = Spec(
@@ -321,15 +241,13 @@ async def generate_design(request: GenerateRequest):
             )
 
             db.add(db_spec)
-            db.commit()
+            with stage("db_commit"):
+                db.commit()
             db.refresh(db_spec)
-            print(f"✅ Successfully saved spec {spec_id} to database")
+            logger.debug("Saved spec %s to database", spec_id)
         except Exception as db_error:
             db.rollback()
-            print(f"❌ Database save FAILED: {db_error}")
-            import traceback
-
-            traceback.print_exc()
+            logger.error("Database save failed for spec %s: %s", spec_id, db_error, exc_info=True)
             # Don't raise - continue without DB
         finally:
             db.close()
@@ -342,10 +260,25 @@ async def generate_design(request: GenerateRequest):
             spec_json["estimated_cost"]["total"] = estimated_cost
 
         generation_time = int((time.time() - start_time) * 1000)
-        print(f"🎉 Generated spec {spec_id} for user {request.user_id} in {generation_time}ms")
-        logger.info(f"Generated spec {spec_id} for user {request.user_id} in {generation_time}ms")
+        logger.info("Generated spec %s for user %s in %dms", spec_id, request.user_id, generation_time)
 
         # 7. RETURN RESPONSE
+        if settings.FAST_JSON_ENABLED:
+            # Fields are built here, so response_model validation is redundant
+            return fast_response(
+                {
+                    "spec_id": spec_id,
+                    "spec_json": cached_json(("spec", spec_id, 1), spec_json),
+                    "preview_url": preview_url,
+                    "estimated_cost": estimated_cost,
+                    "compliance_check_id": compliance_check_id,
+                    "created_at": datetime.now(timezone.utc),
+                    "spec_version": 1,
+                    "user_id": request.user_id,
+                },
+                status_code=status.HTTP_201_CREATED,
+            )
+
         response = GenerateResponse(
             spec_id=spec_id,
             spec_json=spec_json,
@@ -356,7 +289,6 @@ async def generate_design(request: GenerateRequest):
             spec_version=1,
             user_id=request.user_id,
         )
-        print(f"📤 Returning response with spec_id: {spec_id}")
         return response
 
     except HTTPException:
@@ -371,8 +303,7 @@ async def get_spec(spec_id: str):
     """
     Retrieve existing specification
     """
-    print(f"📄 GET SPEC REQUEST: spec_id={spec_id}")
-    logger.info(f"📄 GET SPEC REQUEST: spec_id={spec_id}")
+    logger.info("📄 GET SPEC REQUEST: spec_id=%s", spec_id)
 
     # Try to get spec from database first
     try:
@@ -381,10 +312,14 @@ async def get_spec(spec_id: str):
 
         db = SessionLocal()
         try:
-            db_spec = db.query(Spec).filter(Spec.id == spec_id).first()
+            query = db.query(Spec).filter(Spec.id == spec_id)
+            if settings.FAST_JSON_ENABLED:
+                # spec_json is only loaded when this version's bytes are not cached
+                query = query.options(defer(Spec.spec_json))
+            db_spec = query.first()
 
             if db_spec:
-                print(f"✅ Found spec {spec_id} in database")
+                logger.debug("Found spec %s in database", spec_id)
 
                 # Generate preview URL
                 try:
@@ -392,9 +327,25 @@ async def get_spec(spec_id: str):
 
                     preview_url = supabase.storage.from_("geometry").get_public_url(f"{spec_id}.glb")
                 except Exception as e:
-                    print(f"⚠️ Supabase URL generation failed: {e}")
+                    logger.warning("Supabase URL generation failed: %s", e)
                     preview_url = f"http://localhost:8000/static/geometry/{spec_id}.glb"
 
+                if settings.FAST_JSON_ENABLED:
+                    cache_key = ("spec", db_spec.id, db_spec.version)
+                    spec_json = None if is_cached(cache_key) else db_spec.spec_json
+                    return fast_response(
+                        {
+                            "spec_id": db_spec.id,
+                            "spec_json": cached_json(cache_key, spec_json),
+                            "preview_url": preview_url,
+                            "estimated_cost": db_spec.estimated_cost,
+                            "compliance_check_id": f"check_{spec_id}",
+                            "created_at": db_spec.created_at,
+                            "spec_version": db_spec.version,
+                            "user_id": db_spec.user_id,
+                        }
+                    )
+
                 response = GenerateResponse(
                     spec_id=db_spec.id,
                     spec_json=db_spec.spec_json,
@@ -405,22 +356,22 @@ async def get_spec(spec_id: str):
                     spec_version=db_spec.version,
                     user_id=db_spec.user_id,
                 )
-                print(f"✅ Returning database spec for {spec_id}")
                 return response
         finally:
             db.close()
 
     except Exception as e:
-        print(f"⚠️ Database query failed: {e}")
         logger.error(f"Database query failed for spec {spec_id}: {e}")
 
     # Fallback to in-memory storage
     from app.spec_storage import get_spec as get_stored_spec
 
-    stored_spec = get_stored_spec(spec_id)
+    with stage("spec_store_lookup") as timer:
+        stored_spec = get_stored_spec(spec_id)
+        timer.set(status="miss" if stored_spec is None else "hit")
 
     if stored_spec:
-        print(f"✅ Found spec {spec_id} in memory storage")
+        logger.debug("Found spec %s in memory storage", spec_id)
         try:
             from app.storage import supabase
 
@@ -428,6 +379,20 @@ async def get_spec(spec_id: str):
         except Exception as e:
             preview_url = f"http://localhost:8000/static/geometry/{spec_id}.glb"
 
+        if settings.FAST_JSON_ENABLED:
+            return fast_response(
+                {
+                    "spec_id": stored_spec["spec_id"],
+                    "spec_json": cached_json(("spec", spec_id, stored_spec["spec_version"]), stored_spec["spec_json"]),
+                    "preview_url": preview_url,
+                    "estimated_cost": stored_spec["estimated_cost"],
+                    "compliance_check_id": f"check_{spec_id}",
+                    "created_at": datetime.fromisoformat(stored_spec["created_at"].replace("Z", "+00:00")),
+                    "spec_version": stored_spec["spec_version"],
+                    "user_id": stored_spec["user_id"],
+                }
+            )
+
         response = GenerateResponse(
             spec_id=stored_spec["spec_id"],
             spec_json=stored_spec["spec_json"],
@@ -441,7 +406,7 @@ async def get_spec(spec_id: str):
         return response
 
     # Spec not found anywhere
-    print(f"❌ Spec {spec_id} not found in database or memory")
+    logger.info("Spec %s not found in database or memory", spec_id)
     raise HTTPException(
         status_code=404,
         detail=f"Specification '{spec_id}' not found. Generate a design first using /api/v1/generate",
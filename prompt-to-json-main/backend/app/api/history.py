@@ -1,67 +1,120 @@
 from typing import Optional
 
+from app.config import settings
 from app.database import get_current_user, get_db
+from app.fast_json import RawJSON, cached_json, fast_response, is_cached
 from app.models import ComplianceCheck, Evaluation, Iteration, Spec
+from app.pagination import decode_cursor, encode_cursor, paginate_keyset, parse_fields
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, defer
 
 router = APIRouter()
 
+# Heavy JSON columns that are only loaded when requested via ``fields=``
+SPEC_HISTORY_FIELDS = {"spec_json", "diff", "iteration_spec_json"}
+
+
+def _cached_column(row, column: str, key: tuple) -> RawJSON:
+    """Serialized JSON column for an immutable row version; the deferred column loads only on a miss"""
+    return cached_json(key, None if is_cached(key) else getattr(row, column))
+
+
+def _count_by_spec(db: Session, model, spec_ids: list) -> dict:
+    """Per-spec row counts in one grouped query (served by the spec_id indexes)"""
+    if not spec_ids:
+        return {}
+    rows = db.query(model.spec_id, func.count(model.id)).filter(model.spec_id.in_(spec_ids)).group_by(model.spec_id)
+    return dict(rows.all())
+
 
 @router.get("/history/{spec_id}")
 async def get_spec_history(
     spec_id: str,
     current_user: str = Depends(get_current_user),
     db: Session = Depends(get_db),
-    limit: Optional[int] = Query(50, description="Maximum number of iterations to return"),
+    limit: Optional[int] = Query(50, ge=1, le=200, description="Maximum number of iterations to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    fields: Optional[str] = Query(
+        None, description="Heavy fields to include: spec_json, diff, iteration_spec_json (comma-separated)"
+    ),
 ):
     """Get complete history for a specific spec including iterations and evaluations"""
 
+    include = parse_fields(fields, SPEC_HISTORY_FIELDS)
+    position = decode_cursor(cursor)
+
     # Get the spec
-    spec = db.query(Spec).filter(Spec.id == spec_id).first()
+    fast = settings.FAST_JSON_ENABLED
+    spec_query = db.query(Spec).filter(Spec.id == spec_id)
+    if "spec_json" not in include or fast:
+        # On the fast path spec_json is loaded only if this version's bytes are not cached
+        spec_query = spec_query.options(defer(Spec.spec_json))
+    spec = spec_query.first()
     if not spec:
         raise HTTPException(status_code=404, detail="Spec not found")
 
-    # Get iterations
-    iterations = (
-        db.query(Iteration)
-        .filter(Iteration.spec_id == spec_id)
-        .order_by(Iteration.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-
-    # Get evaluations
-    evaluations = (
-        db.query(Evaluation)
-        .filter(Evaluation.spec_id == spec_id)
-        .order_by(Evaluation.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-
-    return {
+    # Get iterations (keyset on created_at, id via ix_iterations_spec_created)
+    iterations, next_iterations = [], None
+    if position.get("iterations") is not False:
+        iter_query = db.query(Iteration).filter(Iteration.spec_id == spec_id)
+        if "diff" not in include or fast:
+            iter_query = iter_query.options(defer(Iteration.diff))
+        if "iteration_spec_json" not in include or fast:
+            iter_query = iter_query.options(defer(Iteration.spec_json))
+        iterations, next_iterations = paginate_keyset(
+            iter_query, Iteration.created_at, Iteration.id, position.get("iterations"), limit
+        )
+
+    # Get evaluations (keyset on created_at, id via ix_evaluations_spec_created)
+    evaluations, next_evaluations = [], None
+    if position.get("evaluations") is not False:
+        evaluations, next_evaluations = paginate_keyset(
+            db.query(Evaluation).filter(Evaluation.spec_id == spec_id),
+            Evaluation.created_at,
+            Evaluation.id,
+            position.get("evaluations"),
+            limit,
+        )
+
+    # Index-only counts instead of counting the materialized page
+    total_iterations = db.query(func.count(Iteration.id)).filter(Iteration.spec_id == spec_id).scalar()
+    total_evaluations = db.query(func.count(Evaluation.id)).filter(Evaluation.spec_id == spec_id).scalar()
+
+    next_cursor = None
+    if next_iterations or next_evaluations:
+        # An exhausted stream is marked False so later pages skip its query
+        next_cursor = encode_cursor({"iterations": next_iterations or False, "evaluations": next_evaluations or False})
+
+    spec_data = {
+        "spec_id": spec.id,
+        "user_id": spec.user_id,
+        "project_id": spec.project_id,
+        "prompt": spec.prompt,
+        "version": spec.version,
+        "created_at": spec.created_at,
+        "updated_at": spec.updated_at,
+    }
+    if "spec_json" in include:
+        spec_data["spec_json"] = (
+            _cached_column(spec, "spec_json", ("spec", spec.id, spec.version)) if fast else spec.spec_json
+        )
+
+    iterations_data = []
+    for iter in iterations:
+        iter_data = {"iter_id": iter.id, "query": iter.query, "timestamp": iter.created_at}
+        if "diff" in include:
+            iter_data["diff"] = _cached_column(iter, "diff", ("diff", iter.id)) if fast else iter.diff
+        if "iteration_spec_json" in include:
+            iter_data["spec_json"] = (
+                _cached_column(iter, "spec_json", ("iteration", iter.id)) if fast else iter.spec_json
+            )
+        iterations_data.append(iter_data)
+
+    result = {
         "spec_id": spec_id,
-        "spec": {
-            "spec_id": spec.id,
-            "user_id": spec.user_id,
-            "project_id": spec.project_id,
-            "prompt": spec.prompt,
-            "spec_json": spec.spec_json,
-            "version": spec.version,
-            "created_at": spec.created_at,
-            "updated_at": spec.updated_at,
-        },
-        "iterations": [
-            {
-                "iter_id": iter.id,
-                "query": iter.query,
-                "diff": iter.diff,
-                "spec_json": iter.spec_json,
-                "timestamp": iter.created_at,
-            }
-            for iter in iterations
-        ],
+        "spec": spec_data,
+        "iterations": iterations_data,
         "evaluations": [
             {
                 "eval_id": eval.id,
@@ -72,34 +125,42 @@ async def get_spec_history(
             }
             for eval in evaluations
         ],
-        "total_iterations": len(iterations),
-        "total_evaluations": len(evaluations),
+        "total_iterations": total_iterations,
+        "total_evaluations": total_evaluations,
+        "next_cursor": next_cursor,
     }
+    return fast_response(result) if fast else result
 
 
 @router.get("/history")
 async def get_user_history(
     current_user: str = Depends(get_current_user),
     db: Session = Depends(get_db),
-    limit: Optional[int] = Query(20, description="Maximum number of specs to return"),
+    limit: Optional[int] = Query(20, ge=1, le=100, description="Maximum number of specs to return"),
     project_id: Optional[str] = Query(None, description="Filter by project ID"),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
 ):
     """Get complete history with data integrity for all specs"""
 
-    query = db.query(Spec).filter(Spec.user_id == current_user)
+    position = decode_cursor(cursor)
+
+    # spec_json is never sent here, so only its presence is selected
+    query = db.query(Spec, Spec.spec_json.isnot(None).label("has_spec_json")).options(defer(Spec.spec_json))
+    query = query.filter(Spec.user_id == current_user)
 
     if project_id:
         query = query.filter(Spec.project_id == project_id)
 
-    specs = query.order_by(Spec.updated_at.desc()).limit(limit).all()
+    rows, next_position = paginate_keyset(query, Spec.created_at, Spec.id, position.get("specs"), limit)
 
-    specs_data = []
-    for spec in specs:
-        # Get counts for related data
-        iterations_count = db.query(Iteration).filter(Iteration.spec_id == spec.id).count()
-        evaluations_count = db.query(Evaluation).filter(Evaluation.spec_id == spec.id).count()
-        compliance_count = db.query(ComplianceCheck).filter(ComplianceCheck.spec_id == spec.id).count()
+    # Grouped counts replace three COUNT queries per spec
+    spec_ids = [spec.id for spec, _ in rows]
+    iterations_counts = _count_by_spec(db, Iteration, spec_ids)
+    evaluations_counts = _count_by_spec(db, Evaluation, spec_ids)
+    compliance_counts = _count_by_spec(db, ComplianceCheck, spec_ids)
 
+    specs_data = []
+    for spec, has_spec_json in rows:
         specs_data.append(
             {
                 "spec_id": spec.id,
@@ -117,26 +178,28 @@ async def get_user_history(
                 "created_at": spec.created_at.isoformat() if spec.created_at else None,
                 "updated_at": spec.updated_at.isoformat() if spec.updated_at else None,
                 "data_integrity": {
-                    "has_spec_json": spec.spec_json is not None,
+                    "has_spec_json": bool(has_spec_json),
                     "has_preview": spec.preview_url is not None,
                     "has_geometry": spec.geometry_url is not None,
-                    "iterations_count": iterations_count,
-                    "evaluations_count": evaluations_count,
-                    "compliance_count": compliance_count,
+                    "iterations_count": iterations_counts.get(spec.id, 0),
+                    "evaluations_count": evaluations_counts.get(spec.id, 0),
+                    "compliance_count": compliance_counts.get(spec.id, 0),
                     "auditable": True,
                 },
             }
         )
 
-    return {
+    result = {
         "user_id": current_user,
         "specs": specs_data,
-        "total_specs": len(specs),
+        "total_specs": len(specs_data),
+        "next_cursor": encode_cursor({"specs": next_position}) if next_position else None,
         "data_integrity_summary": {
-            "total_specs": len(specs),
-            "specs_with_json": sum(1 for s in specs if s.spec_json is not None),
-            "specs_with_preview": sum(1 for s in specs if s.preview_url is not None),
-            "specs_with_geometry": sum(1 for s in specs if s.geometry_url is not None),
+            "total_specs": len(specs_data),
+            "specs_with_json": sum(1 for _, has_spec_json in rows if has_spec_json),
+            "specs_with_preview": sum(1 for spec, _ in rows if spec.preview_url is not None),
+            "specs_with_geometry": sum(1 for spec, _ in rows if spec.geometry_url is not None),
             "all_auditable": True,
         },
     }
+    return fast_response(result) if settings.FAST_JSON_ENABLED else result
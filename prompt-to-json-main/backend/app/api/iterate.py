@@ -60,6 +60,7 @@ async def iterate(
             spec_version=result["spec_version"],
             training_triggered=result.get("training_triggered", False),
             strategy=result.get("strategy", request.strategy),
+            diff=result.get("diff"),
         )
 
     except APIException:
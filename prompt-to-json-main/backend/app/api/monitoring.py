@@ -56,7 +56,8 @@ async def rate_limit_status():
     
     return {
         "requests_per_minute": rate_limiter.requests_per_minute,
-        "active_clients": len(rate_limiter.clients),
+        "active_clients": rate_limiter.active_clients(),
+        "backend": type(rate_limiter.store).__name__,
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -12,6 +12,7 @@ from datetime import datetime
 from functools import wraps
 from typing import Any, Dict, Optional
 
+from app.log_pipeline import LazyJSON, add_sink, rotating_file_handler
 from fastapi import APIRouter, BackgroundTasks
 from pydantic import BaseModel
 
@@ -30,15 +31,14 @@ class StructuredLogger:
         # Setup logger
         self.logger = logging.getLogger(name)
         self.logger.setLevel(logging.INFO)
+        self.alert_logger = logging.getLogger(f"{name}_alerts")
 
-        # JSON formatter
+        # JSON lines are written by the logging listener thread, not the caller
         formatter = logging.Formatter("%(message)s")
-
-        # File handler for structured logs
-        log_file = os.path.join(log_dir, f"{name}.jsonl")
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+        for logger_name, file_name in ((name, f"{name}.jsonl"), (self.alert_logger.name, "alerts.jsonl")):
+            handler = rotating_file_handler(os.path.join(log_dir, file_name), rotation="50 MB")
+            handler.setFormatter(formatter)
+            add_sink(handler, logger_name)
 
     def log_structured(self, level: str, event: str, **kwargs):
         """Log structured event with metadata"""
@@ -51,35 +51,18 @@ class StructuredLogger:
             **kwargs,
         }
 
-        # Log as JSON
-        self.logger.log(getattr(logging, level.upper()), json.dumps(log_entry))
+        # Log as JSON (serialized lazily on the listener thread)
+        self.logger.log(getattr(logging, level.upper()), "%s", LazyJSON(log_entry))
 
         # Check for alerts
         if level.upper() in ["ERROR", "CRITICAL"]:
-            asyncio.create_task(self._send_alert(log_entry))
+            self._send_alert(log_entry)
 
-    async def _send_alert(self, log_entry: Dict[str, Any]):
+    def _send_alert(self, log_entry: Dict[str, Any]):
         """Send alert for critical events"""
 
-        try:
-            alert_message = f"🚨 {log_entry['level']} Alert\n"
-            alert_message += f"Service: {log_entry['service']}\n"
-            alert_message += f"Event: {log_entry['event']}\n"
-            alert_message += f"Time: {log_entry['timestamp']}\n"
-
-            if "error" in log_entry:
-                alert_message += f"Error: {log_entry['error']}\n"
-
-            # Save alert to file
-            alert_file = os.path.join(self.log_dir, "alerts.jsonl")
-            with open(alert_file, "a") as f:
-                f.write(json.dumps({**log_entry, "alert_sent": True}) + "\n")
-
-        except Exception as e:
-            # Fallback to file logging
-            alert_file = os.path.join(self.log_dir, "alerts.jsonl")
-            with open(alert_file, "a") as f:
-                f.write(json.dumps({**log_entry, "alert_failed": str(e)}) + "\n")
+        # Queued to alerts.jsonl; the file write happens off the request path
+        self.alert_logger.error("%s", LazyJSON({**log_entry, "alert_sent": True}))
 
     def info(self, event: str, **kwargs):
         """Log info event"""
@@ -178,10 +161,19 @@ class PerformanceMonitor:
         """Save metrics to file"""
 
         metrics_file = os.path.join(self.logger.log_dir, "metrics.json")
-        metrics_data = {"timestamp": datetime.now().isoformat(), "metrics": self.metrics}
+        metrics_data = json.dumps({"timestamp": datetime.now().isoformat(), "metrics": self.metrics}, indent=2)
+
+        def write():
+            tmp_file = f"{metrics_file}.tmp"
+            with open(tmp_file, "w") as f:
+                f.write(metrics_data)
+            os.replace(tmp_file, metrics_file)
 
-        with open(metrics_file, "w") as f:
-            json.dump(metrics_data, f, indent=2)
+        # Called from request handlers; keep the file write off the event loop
+        try:
+            asyncio.get_running_loop().run_in_executor(None, write)
+        except RuntimeError:
+            write()
 
     def get_metrics_summary(self) -> Dict[str, Any]:
         """Get metrics summary"""
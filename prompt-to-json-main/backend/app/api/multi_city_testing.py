@@ -2,14 +2,22 @@
 Multi-City Integration & Testing System
 Addresses: Mumbai (DCPR 2034 + MCGM + MHADA), Pune, Ahmedabad, Nashik (DCRs)
 Validates end-to-end pipeline with 3-4 test cases per city
+Cases run concurrently (bounded by MULTI_CITY_TEST_CONCURRENCY) with per-case
+and per-stage latencies and p50/p95 per city, so the suite doubles as a
+nightly performance regression check (scripts/multi_city_perf.py)
 """
 import asyncio
+import json
 import logging
+import math
+import os
+import time
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+from app.config import settings
 from app.external_services import ranjeet_client, sohum_client
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -39,6 +47,19 @@ class CityTestResult(BaseModel):
     end_to_end_success: bool
     processing_time_ms: int
     logs: List[str]
+    stage_timings_ms: Dict[str, int] = {}
+
+
+class CityLatencySummary(BaseModel):
+    """Latency percentiles across one city's test cases"""
+
+    cases: int
+    passed: int
+    p50_ms: int
+    p95_ms: int
+    max_ms: int
+    stage_p50_ms: Dict[str, int] = {}
+    stage_p95_ms: Dict[str, int] = {}
 
 
 class MultiCityTestSuite(BaseModel):
@@ -52,6 +73,8 @@ class MultiCityTestSuite(BaseModel):
     city_results: Dict[str, List[CityTestResult]]
     overall_status: str
     execution_time_ms: int
+    concurrency: int = 1
+    latency_summary: Dict[str, CityLatencySummary] = {}
 
 
 # Test cases for each city
@@ -211,107 +234,180 @@ CITY_TEST_CASES = {
 }
 
 
-@router.post("/test/run-suite", response_model=MultiCityTestSuite)
-async def run_multi_city_test_suite():
-    """
-    Run complete multi-city test suite
-    Tests 3-4 cases per city for Mumbai, Pune, Ahmedabad, Nashik
-    """
-    import json
-    import os
-
-    from app.database import get_db
+# ============================================================================
+# SUITE RUNNER
+# ============================================================================
+
+
+def _percentile(values: List[int], pct: float) -> int:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def summarize_city_latency(results: List[CityTestResult]) -> CityLatencySummary:
+    """p50/p95/max of case and stage latencies"""
+    totals = [r.processing_time_ms for r in results]
+    stages: Dict[str, List[int]] = {}
+    for result in results:
+        for name, ms in result.stage_timings_ms.items():
+            stages.setdefault(name, []).append(ms)
+    return CityLatencySummary(
+        cases=len(results),
+        passed=sum(1 for r in results if r.end_to_end_success),
+        p50_ms=_percentile(totals, 50),
+        p95_ms=_percentile(totals, 95),
+        max_ms=max(totals, default=0),
+        stage_p50_ms={name: _percentile(values, 50) for name, values in stages.items()},
+        stage_p95_ms={name: _percentile(values, 95) for name, values in stages.items()},
+    )
+
+
+async def run_test_cases(test_cases: List[CityTestCase], concurrency: int) -> List[CityTestResult]:
+    """Run cases concurrently, at most ``concurrency`` at a time; results keep the input order"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(test_case: CityTestCase) -> CityTestResult:
+        async with semaphore:
+            return await run_single_test_case(test_case)
+
+    # run_single_test_case reports failures in its result rather than raising
+    return list(await asyncio.gather(*(bounded(test_case) for test_case in test_cases)))
+
+
+async def execute_test_suite(cases_by_city: Dict[str, List[CityTestCase]], concurrency: int) -> MultiCityTestSuite:
+    """Run every city's cases through one shared semaphore and aggregate the results"""
+    started = time.perf_counter()
+    test_suite_id = f"multi_city_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    logger.info(f"Starting multi-city test suite: {test_suite_id} (concurrency {concurrency})")
+
+    all_cases = [test_case for cases in cases_by_city.values() for test_case in cases]
+    results = await run_test_cases(all_cases, concurrency)
+
+    city_results: Dict[str, List[CityTestResult]] = {city: [] for city in cases_by_city}
+    for result in results:
+        city_results[result.city].append(result)
+
+    total_cases = len(results)
+    passed_cases = sum(1 for r in results if r.end_to_end_success)
+    success_rate = passed_cases / total_cases if total_cases > 0 else 0
+
+    logger.info(f"Multi-city test suite completed: {passed_cases}/{total_cases} passed")
+
+    return MultiCityTestSuite(
+        test_suite_id=test_suite_id,
+        cities_tested=list(cases_by_city.keys()),
+        total_cases=total_cases,
+        passed_cases=passed_cases,
+        failed_cases=total_cases - passed_cases,
+        city_results=city_results,
+        overall_status="passed" if success_rate >= 0.8 else "failed",
+        execution_time_ms=int((time.perf_counter() - started) * 1000),
+        concurrency=concurrency,
+        latency_summary={city: summarize_city_latency(rs) for city, rs in city_results.items()},
+    )
+
+
+# ============================================================================
+# OUTPUT SINKS
+# ============================================================================
+
+
+def _suite_log_entry(suite: MultiCityTestSuite) -> Dict:
+    return {
+        "test_suite_id": suite.test_suite_id,
+        "cities_tested": suite.cities_tested,
+        "total_cases": suite.total_cases,
+        "passed_cases": suite.passed_cases,
+        "failed_cases": suite.failed_cases,
+        "overall_status": suite.overall_status,
+        "execution_time_ms": suite.execution_time_ms,
+        "concurrency": suite.concurrency,
+        "latency_summary": {city: summary.model_dump() for city, summary in suite.latency_summary.items()},
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+def _db_sink(suite: MultiCityTestSuite, entry: Dict) -> None:
+    from app.database import get_db_context
     from app.models import WorkflowRun
 
-    start_time = datetime.now()
-    test_suite_id = f"multi_city_{start_time.strftime('%Y%m%d_%H%M%S')}"
-
-    logger.info(f"Starting multi-city test suite: {test_suite_id}")
-
-    try:
-        all_results = {}
-        total_cases = 0
-        passed_cases = 0
-        failed_cases = 0
-
-        # Test each city
-        for city, test_cases in CITY_TEST_CASES.items():
-            logger.info(f"Testing {city} with {len(test_cases)} cases")
-
-            city_results = []
-            for test_case in test_cases:
-                result = await run_single_test_case(test_case)
-                city_results.append(result)
-
-                total_cases += 1
-                if result.end_to_end_success:
-                    passed_cases += 1
-                else:
-                    failed_cases += 1
-
-            all_results[city] = city_results
-
-        # Calculate overall status
-        success_rate = passed_cases / total_cases if total_cases > 0 else 0
-        overall_status = "passed" if success_rate >= 0.8 else "failed"
-
-        execution_time = int((datetime.now() - start_time).total_seconds() * 1000)
-
-        logger.info(f"Multi-city test suite completed: {passed_cases}/{total_cases} passed")
-
-        result_data = MultiCityTestSuite(
-            test_suite_id=test_suite_id,
-            cities_tested=list(CITY_TEST_CASES.keys()),
-            total_cases=total_cases,
-            passed_cases=passed_cases,
-            failed_cases=failed_cases,
-            city_results=all_results,
-            overall_status=overall_status,
-            execution_time_ms=execution_time,
-        )
-
-        # Store in database
-        db = next(get_db())
-        try:
-            workflow_run = WorkflowRun(
+    with get_db_context() as db:
+        db.add(
+            WorkflowRun(
                 flow_name="multi_city_test_suite",
-                flow_run_id=test_suite_id,
+                flow_run_id=suite.test_suite_id,
                 status="completed",
-                parameters={"cities": list(CITY_TEST_CASES.keys()), "total_cases": total_cases},
-                result={"passed": passed_cases, "failed": failed_cases, "status": overall_status},
+                parameters={"cities": suite.cities_tested, "total_cases": suite.total_cases},
+                result={
+                    "passed": suite.passed_cases,
+                    "failed": suite.failed_cases,
+                    "status": suite.overall_status,
+                    "latency_summary": entry["latency_summary"],
+                },
                 completed_at=datetime.now(),
             )
-            db.add(workflow_run)
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            logger.error(f"Database storage failed: {e}")
-        finally:
-            db.close()
-
-        # Store in local log
-        log_entry = {
-            "test_suite_id": test_suite_id,
-            "cities_tested": list(CITY_TEST_CASES.keys()),
-            "total_cases": total_cases,
-            "passed_cases": passed_cases,
-            "failed_cases": failed_cases,
-            "overall_status": overall_status,
-            "execution_time_ms": execution_time,
-            "timestamp": datetime.now().isoformat(),
-        }
+        )
 
-        log_dir = "C:\\Users\\Anmol\\Desktop\\Backend\\data\\logs"
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, "multi_city_tests.jsonl")
 
+def _jsonl_sink(suite: MultiCityTestSuite, entry: Dict) -> None:
+    path = settings.MULTI_CITY_TEST_LOG_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def _log_sink(suite: MultiCityTestSuite, entry: Dict) -> None:
+    for city, summary in suite.latency_summary.items():
+        logger.info(
+            "Multi-city %s %s: %d/%d passed, p50=%dms p95=%dms",
+            suite.test_suite_id,
+            city,
+            summary.passed,
+            summary.cases,
+            summary.p50_ms,
+            summary.p95_ms,
+        )
+
+
+SUITE_SINKS = {"db": _db_sink, "jsonl": _jsonl_sink, "log": _log_sink}
+
+
+def write_suite_sinks(suite: MultiCityTestSuite, sinks: Optional[List[str]] = None) -> None:
+    """Write the suite summary to each configured sink; a failing sink does not affect the others"""
+    entry = _suite_log_entry(suite)
+    for name in sinks if sinks is not None else settings.MULTI_CITY_TEST_SINKS:
+        sink = SUITE_SINKS.get(name)
+        if sink is None:
+            logger.warning(f"Unknown multi-city test sink: {name}")
+            continue
         try:
-            with open(log_file, "a") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            sink(suite, entry)
         except Exception as e:
-            logger.error(f"Local file logging failed: {e}")
+            logger.error(f"Multi-city test sink {name} failed: {e}")
 
-        return result_data
+
+# ============================================================================
+# ENDPOINTS
+# ============================================================================
+
+
+@router.post("/test/run-suite", response_model=MultiCityTestSuite)
+async def run_multi_city_test_suite(
+    concurrency: Optional[int] = Query(default=None, ge=1, le=64, description="Cases run at once")
+):
+    """
+    Run complete multi-city test suite
+    Tests 3-4 cases per city for Mumbai, Pune, Ahmedabad, Nashik
+    """
+    try:
+        suite = await execute_test_suite(CITY_TEST_CASES, concurrency or settings.MULTI_CITY_TEST_CONCURRENCY)
+        await asyncio.to_thread(write_suite_sinks, suite)
+        return suite
 
     except Exception as e:
         logger.error(f"Multi-city test suite failed: {e}")
@@ -325,12 +421,7 @@ async def test_single_city(city: str):
         raise HTTPException(404, f"City {city} not found in test cases")
 
     try:
-        test_cases = CITY_TEST_CASES[city]
-        results = []
-
-        for test_case in test_cases:
-            result = await run_single_test_case(test_case)
-            results.append(result)
+        results = await run_test_cases(CITY_TEST_CASES[city], settings.MULTI_CITY_TEST_CONCURRENCY)
 
         logger.info(f"Completed testing {city}: {len(results)} cases")
         return results
@@ -372,27 +463,35 @@ async def run_single_test_case(test_case: CityTestCase) -> CityTestResult:
     2. RL agent decision → feedback loop → updated reward
     3. Geometry outputs → .GLB visualization
     """
-    start_time = datetime.now()
+    started = time.perf_counter()
     logs = []
+    stage_timings: Dict[str, int] = {}
+
+    async def timed(name: str, pipeline) -> Dict:
+        stage_start = time.perf_counter()
+        try:
+            return await pipeline(test_case)
+        finally:
+            stage_timings[name] = int((time.perf_counter() - stage_start) * 1000)
 
     try:
         logs.append(f"Starting test case: {test_case.case_id}")
 
         # Step 1: Test MCP rule queries
         logs.append("Step 1: Testing MCP compliance")
-        mcp_result = await test_mcp_pipeline(test_case)
+        mcp_result = await timed("mcp", test_mcp_pipeline)
         mcp_success = mcp_result.get("success", False)
         logs.append(f"MCP result: {'PASS' if mcp_success else 'FAIL'}")
 
         # Step 2: Test RL agent decision and feedback loop
         logs.append("Step 2: Testing RL optimization and feedback loop")
-        rl_result = await test_rl_pipeline(test_case)
+        rl_result = await timed("rl", test_rl_pipeline)
         rl_success = rl_result.get("success", False)
         logs.append(f"RL result: {'PASS' if rl_success else 'FAIL'}")
 
         # Step 3: Test geometry generation
         logs.append("Step 3: Testing geometry generation")
-        geometry_result = await test_geometry_pipeline(test_case)
+        geometry_result = await timed("geometry", test_geometry_pipeline)
         geometry_success = geometry_result.get("success", False)
         logs.append(f"Geometry result: {'PASS' if geometry_success else 'FAIL'}")
 
@@ -400,7 +499,7 @@ async def run_single_test_case(test_case: CityTestCase) -> CityTestResult:
         end_to_end_success = mcp_success and rl_success and geometry_success
         logs.append(f"End-to-end result: {'PASS' if end_to_end_success else 'FAIL'}")
 
-        processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+        processing_time = int((time.perf_counter() - started) * 1000)
 
         return CityTestResult(
             case_id=test_case.case_id,
@@ -411,11 +510,12 @@ async def run_single_test_case(test_case: CityTestCase) -> CityTestResult:
             end_to_end_success=end_to_end_success,
             processing_time_ms=processing_time,
             logs=logs,
+            stage_timings_ms=stage_timings,
         )
 
     except Exception as e:
         logs.append(f"ERROR: {str(e)}")
-        processing_time = int((datetime.now() - start_time).total_seconds() * 1000)
+        processing_time = int((time.perf_counter() - started) * 1000)
 
         return CityTestResult(
             case_id=test_case.case_id,
@@ -426,6 +526,7 @@ async def run_single_test_case(test_case: CityTestCase) -> CityTestResult:
             end_to_end_success=False,
             processing_time_ms=processing_time,
             logs=logs,
+            stage_timings_ms=stage_timings,
         )
 
 
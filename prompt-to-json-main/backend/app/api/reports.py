@@ -1,14 +1,162 @@
+import json
 import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
 
+from app.config import settings
 from app.database import get_current_user, get_db
-from app.models import ComplianceCheck, Evaluation, Iteration, Spec
+from app.models import ComplianceCheck, Spec
+from app.stage_metrics import stage
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from sqlalchemy.orm import Session
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Serialized reports keyed by (spec_id, version), most recently used last
+_report_cache: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+
+_MIN_TIME = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _json(value) -> str:
+    return json.dumps(value, default=str)
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _sort_time(value: Optional[datetime]) -> datetime:
+    # Rows without a timestamp sort last; naive values (e.g. from SQLite) are taken as UTC
+    if value is None:
+        return _MIN_TIME
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def invalidate_report_cache(spec_id: str) -> None:
+    """Drop cached reports for a spec (call when evaluations are added; check writes do this automatically)"""
+    for key in [key for key in _report_cache if key[0] == spec_id]:
+        _report_cache.pop(key, None)
+
+
+@event.listens_for(ComplianceCheck, "after_insert")
+@event.listens_for(ComplianceCheck, "after_update")
+@event.listens_for(ComplianceCheck, "after_delete")
+def _invalidate_on_compliance_write(mapper, connection, target: ComplianceCheck) -> None:
+    # Checks are written outside this module (MCP results, scripts, deletions), so hook the mapper
+    invalidate_report_cache(target.spec_id)
+
+
+def _cache_report(key: Tuple[str, int], chunks: List[bytes]) -> None:
+    body = b"".join(chunks)
+    if len(body) > settings.REPORT_CACHE_MAX_BYTES:
+        return
+    _report_cache[key] = body
+    _report_cache.move_to_end(key)
+    while len(_report_cache) > settings.REPORT_CACHE_MAX_ENTRIES:
+        _report_cache.popitem(last=False)
+
+
+def iter_report_json(spec: Spec, cache_key: Optional[Tuple[str, int]] = None) -> Iterator[bytes]:
+    """
+    Serialize a report incrementally, one top-level field or list item per chunk.
+
+    Only one iteration/evaluation/check is encoded at a time, so peak memory
+    is bounded by the largest single item rather than the whole report.
+    """
+    chunks: Optional[List[bytes]] = [] if cache_key else None
+
+    def emit(text: str) -> bytes:
+        chunk = text.encode("utf-8")
+        if chunks is not None:
+            chunks.append(chunk)
+        return chunk
+
+    iterations = sorted(spec.iterations, key=lambda it: _sort_time(it.created_at), reverse=True)
+    evaluations = sorted(spec.evaluations, key=lambda ev: _sort_time(ev.created_at), reverse=True)
+    compliance_checks = sorted(spec.compliance_checks, key=lambda cc: _sort_time(cc.created_at), reverse=True)
+
+    data = {
+        "spec_id": spec.id,
+        "version": spec.version or 1,
+        "user_id": spec.user_id,
+        "project_id": spec.project_id,
+        "city": spec.city,
+        "design_type": spec.design_type,
+        "status": spec.status,
+        "compliance_status": spec.compliance_status,
+    }
+    yield emit(f'{{"report_id": {_json(spec.id)}, "data": {_json(data)}, "spec": {_json(spec.spec_json or {})}')
+    yield emit(
+        f', "preview_url": {_json(spec.preview_url)}, "geometry_url": {_json(spec.geometry_url)}'
+        f', "estimated_cost": {_json(spec.estimated_cost)}, "currency": {_json(spec.currency)}'
+    )
+
+    preview_urls = [spec.preview_url] if spec.preview_url else []
+
+    yield emit(', "iterations": [')
+    for index, it in enumerate(iterations):
+        item = {
+            "id": it.id,
+            "query": it.query,
+            "diff": it.diff,
+            "spec_json": it.spec_json,
+            "preview_url": it.preview_url,
+            "cost_delta": it.cost_delta,
+            "created_at": _iso(it.created_at),
+        }
+        if it.preview_url:
+            preview_urls.append(it.preview_url)
+        yield emit(("," if index else "") + _json(item))
+
+    yield emit('], "evaluations": [')
+    for index, ev in enumerate(evaluations):
+        item = {
+            "id": ev.id,
+            "score": ev.rating or 0,
+            "rating": ev.rating,
+            "notes": ev.notes or "",
+            "aspects": ev.aspects,
+            "created_at": _iso(ev.created_at),
+        }
+        yield emit(("," if index else "") + _json(item))
+
+    yield emit('], "compliance_checks": [')
+    for index, cc in enumerate(compliance_checks):
+        item = {
+            "id": cc.id,
+            "case_id": cc.case_id,
+            "status": cc.status,
+            "compliant": cc.compliant,
+            "confidence_score": cc.confidence_score,
+            "violations": cc.violations or [],
+            "recommendations": cc.recommendations or [],
+            "created_at": _iso(cc.created_at),
+        }
+        yield emit(("," if index else "") + _json(item))
+
+    data_integrity = {
+        "spec_json_exists": spec.spec_json is not None,
+        "preview_url_exists": spec.preview_url is not None,
+        "geometry_url_exists": spec.geometry_url is not None,
+        "has_iterations": len(iterations) > 0,
+        "has_evaluations": len(evaluations) > 0,
+        "has_compliance": len(compliance_checks) > 0,
+        "data_complete": True,
+    }
+    yield emit(
+        f'], "preview_urls": {_json(preview_urls)}, "data_integrity": {_json(data_integrity)}'
+        f', "created_at": {_json(_iso(spec.created_at))}, "updated_at": {_json(_iso(spec.updated_at))}}}'
+    )
+
+    if cache_key:
+        _cache_report(cache_key, chunks)
+
 
 @router.get("/reports/{spec_id}")
 async def get_report(
@@ -18,113 +166,41 @@ async def get_report(
 ):
     """Get complete report with data integrity checks"""
     try:
-        # Get spec with all related data
-        spec = db.query(Spec).filter(Spec.id == spec_id).first()
+        cache_key = None
+        if settings.REPORT_CACHE_ENABLED:
+            version = db.query(Spec.version).filter(Spec.id == spec_id).scalar()
+            if version is not None:
+                cache_key = (spec_id, version)
+                with stage("report_cache_lookup") as timer:
+                    cached = _report_cache.get(cache_key)
+                    timer.set(status="miss" if cached is None else "hit")
+                if cached is not None:
+                    _report_cache.move_to_end(cache_key)
+                    return Response(content=cached, media_type="application/json")
+
+        # Spec plus one IN-query per relationship instead of a query per table
+        spec = (
+            db.query(Spec)
+            .options(
+                selectinload(Spec.iterations),
+                selectinload(Spec.evaluations),
+                selectinload(Spec.compliance_checks),
+            )
+            .filter(Spec.id == spec_id)
+            .first()
+        )
         if not spec:
-            # Get available specs for helpful error message
-            available_specs = db.query(Spec.id).limit(5).all()
-            available_ids = [s.id for s in available_specs]
-
             error_detail = {
                 "error": "Spec not found",
                 "requested_spec_id": spec_id,
                 "message": f"The spec '{spec_id}' does not exist in the database.",
-                "available_specs": available_ids,
-                "hint": "Use one of the available spec IDs or create a new design using POST /api/v1/generate",
+                "hint": "List your specs with GET /api/v1/history or create a new design using POST /api/v1/generate",
             }
             raise HTTPException(status_code=404, detail=error_detail)
 
-        # Get all related data
-        iterations = (
-            db.query(Iteration).filter(Iteration.spec_id == spec_id).order_by(Iteration.created_at.desc()).all()
-        )
-        evaluations = (
-            db.query(Evaluation).filter(Evaluation.spec_id == spec_id).order_by(Evaluation.created_at.desc()).all()
-        )
-        compliance_checks = (
-            db.query(ComplianceCheck)
-            .filter(ComplianceCheck.spec_id == spec_id)
-            .order_by(ComplianceCheck.created_at.desc())
-            .all()
-        )
-
-        # Build complete response with data integrity
-        response_data = {
-            "report_id": spec_id,
-            "data": {
-                "spec_id": spec_id,
-                "version": spec.version or 1,
-                "user_id": spec.user_id,
-                "project_id": spec.project_id,
-                "city": spec.city,
-                "design_type": spec.design_type,
-                "status": spec.status,
-                "compliance_status": spec.compliance_status,
-            },
-            "spec": spec.spec_json or {},
-            "preview_url": spec.preview_url,
-            "geometry_url": spec.geometry_url,
-            "estimated_cost": spec.estimated_cost,
-            "currency": spec.currency,
-            "iterations": [
-                {
-                    "id": it.id,
-                    "query": it.query,
-                    "diff": it.diff,
-                    "spec_json": it.spec_json,
-                    "preview_url": it.preview_url,
-                    "cost_delta": it.cost_delta,
-                    "created_at": it.created_at.isoformat() if it.created_at else None,
-                }
-                for it in iterations
-            ],
-            "evaluations": [
-                {
-                    "id": ev.id,
-                    "score": ev.rating or 0,
-                    "rating": ev.rating,
-                    "notes": ev.notes or "",
-                    "aspects": ev.aspects,
-                    "created_at": ev.created_at.isoformat() if ev.created_at else None,
-                }
-                for ev in evaluations
-            ],
-            "compliance_checks": [
-                {
-                    "id": cc.id,
-                    "case_id": cc.case_id,
-                    "status": cc.status,
-                    "compliant": cc.compliant,
-                    "confidence_score": cc.confidence_score,
-                    "violations": cc.violations or [],
-                    "recommendations": cc.recommendations or [],
-                    "created_at": cc.created_at.isoformat() if cc.created_at else None,
-                }
-                for cc in compliance_checks
-            ],
-            "preview_urls": [],
-            "data_integrity": {
-                "spec_json_exists": spec.spec_json is not None,
-                "preview_url_exists": spec.preview_url is not None,
-                "geometry_url_exists": spec.geometry_url is not None,
-                "has_iterations": len(iterations) > 0,
-                "has_evaluations": len(evaluations) > 0,
-                "has_compliance": len(compliance_checks) > 0,
-                "data_complete": True,
-            },
-            "created_at": spec.created_at.isoformat() if spec.created_at else None,
-            "updated_at": spec.updated_at.isoformat() if spec.updated_at else None,
-        }
-
-        # Add preview URLs if available
-        if spec.preview_url:
-            response_data["preview_urls"].append(spec.preview_url)
-
-        for it in iterations:
-            if it.preview_url:
-                response_data["preview_urls"].append(it.preview_url)
-
-        return response_data
+        # Everything the serializer touches is already loaded, so streaming
+        # is safe after the request's session is closed
+        return StreamingResponse(iter_report_json(spec, cache_key), media_type="application/json")
 
     except HTTPException:
         raise
@@ -0,0 +1,231 @@
+"""
+Sweep API - Budget/Dimension What-If Analysis
+Evaluates a grid of budgets, plot dimensions, stories and materials in one
+vectorized pass, without generating specs or calling the LM
+"""
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from app.cost_engine import FIXED_COST_TYPES, design_type_arrays, object_terms, vectorized_cost
+from app.lm_adapter import calculate_actual_house_cost, generate_house_design, optimize_house_dimensions_for_budget
+from fastapi import APIRouter, HTTPException, status
+from pydantic import BaseModel, Field, confloat, conint
+
+router = APIRouter(prefix="/api/v1", tags=["📈 What-If Sweep"])
+logger = logging.getLogger(__name__)
+
+MAX_GRID_SIZE = 100000
+
+# ============================================================================
+# REQUEST/RESPONSE MODELS
+# ============================================================================
+
+
+class PlotDimensions(BaseModel):
+    """Candidate plot dimensions in meters"""
+
+    width: float = Field(..., gt=0, le=500)
+    length: float = Field(..., gt=0, le=500)
+
+
+class SweepRequest(BaseModel):
+    """What-if sweep request"""
+
+    budgets: List[confloat(gt=0)] = Field(..., min_length=1, max_length=50, description="Budgets in INR")
+    dimensions: Optional[List[PlotDimensions]] = Field(
+        None, max_length=50, description="Candidate dimensions; defaults to the budget-optimized size per budget"
+    )
+    stories: List[conint(ge=1, le=5)] = Field(
+        default=[1], min_length=1, max_length=5, description="Story counts to compare"
+    )
+    materials: List[str] = Field(
+        default=["brick"], min_length=1, max_length=10, description="Exterior wall materials to compare"
+    )
+    scales: List[confloat(gt=0)] = Field(
+        default=[0.6, 0.7, 0.8, 0.9, 1.0],
+        min_length=1,
+        max_length=20,
+        description="Linear scale factors applied to each candidate dimension",
+    )
+    features: List[str] = Field(default=[], description="Optional features: garage, porch")
+    cost_basis: str = Field(
+        default="estimated",
+        pattern="^(estimated|template)$",
+        description="Feasibility check against the cost engine estimate or the template's budget-optimized cost",
+    )
+    limit: int = Field(default=50, ge=1, le=500, description="Maximum feasible configurations to return")
+
+    class Config:
+        json_schema_extra = {
+            "example": {"budgets": [5000000, 8000000, 12000000], "stories": [1, 2], "materials": ["brick", "marble"]}
+        }
+
+
+class SweepResponse(BaseModel):
+    """What-if sweep result"""
+
+    design_type: str
+    cost_basis: str
+    configurations_evaluated: int
+    feasible_count: int
+    cost_curves: List[Dict]
+    feasible_configurations: List[Dict]
+    processing_time_ms: int
+
+
+# ============================================================================
+# HELPER FUNCTIONS
+# ============================================================================
+
+
+def template_objects(features: List[str]) -> List[Dict]:
+    """Objects the house template generates for these features (no LM call)"""
+    prompt = "house " + " ".join(features)
+    return generate_house_design(prompt, {})["objects"]
+
+
+def material_terms(objects: List[Dict], materials: List[str]) -> Dict[str, np.ndarray]:
+    """Per-material premium terms with the exterior walls switched to each material"""
+    material_premium, premium_cost, actual_premium = [], [], []
+    for material in materials:
+        variant = [{**obj, "material": material} if obj.get("type") == "wall" else obj for obj in objects]
+        terms = [object_terms(obj) for obj in variant]
+        material_premium.append(max([1.0] + [t["material_multiplier"] for t in terms]))
+        premium_cost.append(sum(t["premium"] for t in terms))
+        # Zero area isolates the template's (reduced) object premiums
+        actual_premium.append(calculate_actual_house_cost(0, 0, 1, variant))
+    return {
+        "material_premium": np.array(material_premium),
+        "premium_cost": np.array(premium_cost, dtype=float),
+        "actual_premium": np.array(actual_premium, dtype=float),
+    }
+
+
+def candidate_dimensions(
+    budgets: List[float], dimensions: Optional[List[PlotDimensions]], scales: List[float]
+) -> np.ndarray:
+    """(budgets, candidates x scales, 2) array of width/length, fitted to each budget tier"""
+    candidates = [{"width": d.width, "length": d.length} for d in dimensions] if dimensions else [{}]
+    fitted = np.empty((len(budgets), len(candidates), 2))
+    for b, budget in enumerate(budgets):
+        for d, extracted in enumerate(candidates):
+            width, length, _ = optimize_house_dimensions_for_budget(budget, extracted)
+            fitted[b, d] = (width, length)
+    scaled = fitted[:, :, None, :] * np.array(scales)[None, None, :, None]
+    return scaled.reshape(len(budgets), len(candidates) * len(scales), 2)
+
+
+def run_sweep(request: SweepRequest) -> Dict:
+    """Evaluate the full grid; axes are (budget, dimension, stories, material)"""
+    budgets = np.array(request.budgets, dtype=float)
+    stories = np.array(request.stories, dtype=float)
+    dims = candidate_dimensions(request.budgets, request.dimensions, request.scales)
+    terms = material_terms(template_objects(request.features), request.materials)
+
+    shape = (len(budgets), dims.shape[1], len(stories), len(request.materials))
+    size = int(np.prod(shape))
+    if size > MAX_GRID_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Sweep grid of {size} exceeds {MAX_GRID_SIZE}"
+        )
+
+    budget = budgets[:, None, None, None]
+    width = dims[:, :, 0][:, :, None, None]
+    length = dims[:, :, 1][:, :, None, None]
+    story = stories[None, None, :, None]
+    area = width * length
+
+    # Same formula as calculate_estimated_cost, over the whole grid at once
+    house = design_type_arrays(["house"])
+    estimated = vectorized_cost(
+        house["base_rate"],
+        area,
+        story,
+        "house" in FIXED_COST_TYPES,
+        terms["material_premium"][None, None, None, :],
+        terms["premium_cost"][None, None, None, :],
+        house["minimum"],
+    )
+    # What the house template writes into estimated_cost.total
+    actual = calculate_actual_house_cost(width, length, story, []) + terms["actual_premium"][None, None, None, :]
+    template = np.minimum(budget * 1.05, actual)
+
+    estimated, template = np.broadcast_to(estimated, shape), np.broadcast_to(template, shape)
+    area_grid = np.broadcast_to(area, shape)
+    feasible = (estimated if request.cost_basis == "estimated" else template) <= np.broadcast_to(budget, shape)
+
+    cost_curves = []
+    for b, value in enumerate(request.budgets):
+        mask = feasible[b]
+        cost_curves.append(
+            {
+                "budget": value,
+                "feasible": int(mask.sum()),
+                "min_estimated_cost": float(estimated[b].min()),
+                "max_estimated_cost": float(estimated[b].max()),
+                "max_feasible_area": round(float(area_grid[b][mask].max()), 2) if mask.any() else None,
+            }
+        )
+
+    # Largest feasible homes first, cheapest first among equals
+    indices = np.argwhere(feasible)
+    order = np.lexsort((estimated[feasible], -area_grid[feasible]))[: request.limit]
+    configurations = []
+    for b, d, s, m in indices[order]:
+        w, l = dims[b, d]
+        configurations.append(
+            {
+                "budget": request.budgets[b],
+                "width": round(float(w), 2),
+                "length": round(float(l), 2),
+                "area": round(float(w * l), 2),
+                "stories": request.stories[s],
+                "material": request.materials[m],
+                "estimated_cost": float(estimated[b, d, s, m]),
+                "template_cost": round(float(template[b, d, s, m]), 0),
+                "budget_utilization": round(float(estimated[b, d, s, m] / request.budgets[b]), 3),
+                # Pass to /generate to build the chosen variant
+                "generate_context": {
+                    "budget": request.budgets[b],
+                    "dimensions": {"width": round(float(w), 2), "length": round(float(l), 2)},
+                    "stories": request.stories[s],
+                    "material": request.materials[m],
+                },
+            }
+        )
+
+    return {
+        "design_type": "house",
+        "cost_basis": request.cost_basis,
+        "configurations_evaluated": size,
+        "feasible_count": int(feasible.sum()),
+        "cost_curves": cost_curves,
+        "feasible_configurations": configurations,
+    }
+
+
+# ============================================================================
+# API ENDPOINTS
+# ============================================================================
+
+
+@router.post("/sweep", response_model=SweepResponse)
+async def what_if_sweep(request: SweepRequest):
+    """
+    Compare budgets, plot sizes, stories and materials without generating specs
+
+    **Returns:**
+    - cost_curves: Cost range and largest feasible area per budget
+    - feasible_configurations: Configurations whose estimated cost fits the budget
+    """
+    start_time = time.time()
+    result = run_sweep(request)
+    result["processing_time_ms"] = int((time.time() - start_time) * 1000)
+
+    logger.info(
+        f"Sweep evaluated {result['configurations_evaluated']} configurations, "
+        f"{result['feasible_count']} feasible in {result['processing_time_ms']}ms"
+    )
+    return SweepResponse(**result)
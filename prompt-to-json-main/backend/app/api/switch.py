@@ -8,8 +8,11 @@ from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
 from app.config import settings
+from app.cost_engine import BREAKDOWN_KEY, COST_FIELDS, apply_cost_breakdown, spec_cost_total, update_cost_breakdown
 from app.database import get_db
 from app.models import AuditLog, Iteration, Spec, User
+from app.spec_diff import diff_specs, extend_diff, requires_compliance_recheck
+from app.stage_metrics import set_request_labels, stage
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
@@ -174,12 +177,13 @@ def apply_simple_changes(spec_json: Dict, command: Dict) -> tuple:
     return updated_spec, changes, changed_objects
 
 
-def recalculate_cost(old_spec: Dict, new_spec: Dict) -> Dict:
-    """Calculate cost difference"""
-    old_cost = old_spec.get("metadata", {}).get("estimated_cost", 0)
+def recalculate_cost(old_spec: Dict, new_spec: Dict, diff: Dict) -> Dict:
+    """Re-price only the changed objects and store the updated breakdown on new_spec"""
+    old_cost = spec_cost_total(old_spec)
 
-    # Simple recalculation
-    new_cost = old_cost * 1.1  # 10% increase for material change
+    breakdown = update_cost_breakdown(old_spec.get(BREAKDOWN_KEY), new_spec, diff)
+    new_cost = apply_cost_breakdown(new_spec, breakdown)
+    new_spec.setdefault("metadata", {})["estimated_cost"] = new_cost
     cost_delta = new_cost - old_cost
 
     return {
@@ -225,7 +229,9 @@ async def switch_material(request: SwitchRequest, db: Session = Depends(get_db))
     # Try to get spec from in-memory storage first
     from app.spec_storage import get_spec as get_stored_spec
 
-    stored_spec = get_stored_spec(request.spec_id)
+    with stage("spec_store_lookup") as timer:
+        stored_spec = get_stored_spec(request.spec_id)
+        timer.set(status="miss" if stored_spec is None else "hit")
 
     if stored_spec:
         print(f"✅ Found spec {request.spec_id} in storage")
@@ -271,6 +277,7 @@ async def switch_material(request: SwitchRequest, db: Session = Depends(get_db))
             )
 
         print(f"✅ Parsed command: {command}")
+        set_request_labels(design_type=(spec_json or {}).get("design_type"))
 
         # Apply changes
         updated_spec, changes, changed_objects = apply_simple_changes(spec_json, command)
@@ -278,8 +285,14 @@ async def switch_material(request: SwitchRequest, db: Session = Depends(get_db))
         if not changes:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No matching objects found to modify")
 
-        # Recalculate cost
-        cost_impact = recalculate_cost(spec_json, updated_spec)
+        # Structural diff for history, RLHF pairs and compliance re-checks
+        diff = diff_specs(spec_json, updated_spec)
+
+        # Recalculate cost for the changed objects and record the cost fields in the diff
+        with stage("cost_calc"):
+            cost_impact = recalculate_cost(spec_json, updated_spec, diff)
+        extend_diff(diff, spec_json, updated_spec, COST_FIELDS)
+        diff["changes"] = [change.dict() for change in changes]
 
         # Generate iteration ID
         import uuid
@@ -299,7 +312,7 @@ async def switch_material(request: SwitchRequest, db: Session = Depends(get_db))
                 user_id=user_id,
                 query=request.query,
                 nlp_confidence=command.get("confidence", 0.8),
-                diff={"changes": [change.dict() for change in changes]},
+                diff=diff,
                 spec_json=updated_spec,
                 changed_objects=",".join(changed_objects),
                 preview_url=preview_url,
@@ -314,10 +327,14 @@ async def switch_material(request: SwitchRequest, db: Session = Depends(get_db))
             spec_db = db.query(Spec).filter(Spec.id == request.spec_id).first()
             if spec_db:
                 spec_db.spec_json = updated_spec
+                spec_db.estimated_cost = cost_impact["new_total"]
                 spec_db.version += 1
                 spec_db.updated_at = datetime.now(timezone.utc)
+                if requires_compliance_recheck(diff):
+                    spec_db.compliance_status = "pending"
 
-            db.commit()
+            with stage("db_commit"):
+                db.commit()
             print(f"✅ Saved iteration {iteration_id} to database")
 
         except Exception as e:
@@ -339,11 +356,13 @@ async def switch_material(request: SwitchRequest, db: Session = Depends(get_db))
             from app.utils import generate_glb_from_spec
 
             # Generate GLB file
-            preview_bytes = generate_glb_from_spec(updated_spec)
+            with stage("glb_build"):
+                preview_bytes = generate_glb_from_spec(updated_spec)
             preview_path = f"{iteration_id}.glb"
 
             # Upload to Supabase
-            await upload_to_bucket("previews", preview_path, preview_bytes)
+            with stage("upload"):
+                await upload_to_bucket("previews", preview_path, preview_bytes)
             preview_url = get_signed_url("previews", preview_path, expires=600)
 
         except Exception as e:
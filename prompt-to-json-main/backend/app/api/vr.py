@@ -1,4 +1,5 @@
 import json
+import logging
 import os
 import shutil
 import uuid
@@ -12,6 +13,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Local storage for VR renders
 VR_RENDERS_DIR = Path("vr_renders")
@@ -100,7 +102,7 @@ async def vr_render(
                     render_url = await upload_to_bucket("geometry", f"vr_{render_id}.glb", str(local_file))
                     vr_render.render_url = render_url
                 except Exception as upload_error:
-                    print(f"Upload failed: {upload_error}")
+                    logger.warning("VR render upload failed: %s", upload_error)
                     vr_render.render_url = f"local://{local_file}"
 
             else:
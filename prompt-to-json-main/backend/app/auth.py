@@ -6,6 +6,7 @@ import secrets
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
+from app.auth_cache import SESSION_ONLY_REASONS, revocations
 from app.config import settings
 from app.models import RefreshToken, User
 from jose import JWTError, jwt
@@ -46,12 +47,13 @@ def create_access_token(user_id: str, expires_delta: Optional[timedelta] = None)
     Returns:
         JWT token string
     """
+    now = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode = {"sub": user_id, "exp": expire, "type": "access"}
+    to_encode = {"sub": user_id, "exp": expire, "iat": now, "type": "access"}
 
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
@@ -100,6 +102,8 @@ def verify_token(token: str) -> Optional[str]:
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         user_id: str = payload.get("sub")
+        if user_id and revocations.is_subject_revoked(user_id, payload.get("iat")):
+            return None
         return user_id
     except JWTError:
         return None
@@ -116,6 +120,9 @@ def verify_refresh_token(token: str, db: Session) -> Optional[str]:
     Returns:
         user_id if valid, None otherwise
     """
+    if revocations.is_token_revoked(token):
+        return None
+
     refresh = (
         db.query(RefreshToken)
         .filter(
@@ -139,6 +146,7 @@ def revoke_refresh_token(token: str, db: Session, reason: str = "user_logout"):
         refresh.revoked_at = datetime.now(timezone.utc)
         refresh.revoked_reason = reason
         db.commit()
+        revocations.revoke_token(token, refresh.expires_at)
 
 
 # ============================================================================
@@ -256,4 +264,10 @@ def revoke_all_user_tokens(user_id: str, db: Session, reason: str = "security"):
         token.revoked_reason = reason
 
     db.commit()
+
+    for token in tokens:
+        revocations.revoke_token(token.token, token.expires_at)
+    # Access tokens issued before now stop working too
+    if reason not in SESSION_ONLY_REASONS:
+        revocations.revoke_subject(user_id)
     return len(tokens)
@@ -0,0 +1,223 @@
+"""
+Authentication hot-path caches
+A short-TTL LRU of verified access token -> subject, so the JWT signature is
+checked once per token rather than once per request, and an in-memory
+revocation set synced from the refresh_tokens table.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Revocation reasons that end one session only; any other reason (security,
+# password change, account deletion) invalidates every token issued before it
+SESSION_ONLY_REASONS = {"user_logout", "rotated"}
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # SQLite drops the timezone; stored values are UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+# ============================================================================
+# VERIFIED TOKEN CACHE
+# ============================================================================
+
+
+class TokenSubjectCache:
+    """LRU of verified token -> (subject, issued-at); entries never outlive the token"""
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[str, Optional[int], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Tuple[str, Optional[int]]]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[2] <= time.time():
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, token: str, subject: str, issued_at: Optional[int] = None, expires_at: Optional[float] = None):
+        if self.ttl <= 0:
+            return
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._entries[token] = (subject, issued_at, deadline)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+# ============================================================================
+# REVOCATION SET
+# ============================================================================
+
+
+class RevocationSet:
+    """
+    Revoked refresh tokens and per-subject revocation cutoffs.
+
+    Access tokens carry no session id, so revoking all of a user's sessions
+    records a cutoff: access tokens for that subject issued before it are
+    rejected. Cutoffs are kept for one access-token lifetime, after which
+    every older token has expired anyway.
+    """
+
+    def __init__(self):
+        self.tokens: Dict[str, float] = {}  # refresh token -> expires_at
+        self.cutoffs: Dict[str, float] = {}  # subject -> revoked_at
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.last_sync: Optional[str] = None
+
+    def revoke_token(self, token: str, expires_at: Optional[datetime] = None) -> None:
+        with self._lock:
+            self.tokens[token] = _timestamp(expires_at) or time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+    def revoke_subject(self, subject: str, revoked_at: Optional[datetime] = None) -> None:
+        at = _timestamp(revoked_at) or time.time()
+        with self._lock:
+            self.cutoffs[subject] = max(at, self.cutoffs.get(subject, 0.0))
+
+    def is_token_revoked(self, token: str) -> bool:
+        return token in self.tokens
+
+    def is_subject_revoked(self, subject: str, issued_at: Optional[int]) -> bool:
+        """True for access tokens issued (whole seconds) before the subject's cutoff"""
+        cutoff = self.cutoffs.get(subject)
+        if cutoff is None:
+            return False
+        # Tokens without iat predate revocation support; treat them as old
+        return issued_at is None or issued_at < int(cutoff)
+
+    def sync(self, db) -> int:
+        """Load revocations recorded since the last sync (all of them on first sync)"""
+        from app.models import RefreshToken
+
+        now = datetime.now(timezone.utc)
+        query = db.query(
+            RefreshToken.token,
+            RefreshToken.user_id,
+            RefreshToken.expires_at,
+            RefreshToken.revoked_at,
+            RefreshToken.revoked_reason,
+        ).filter(RefreshToken.is_revoked == True, RefreshToken.expires_at > now)
+        if self._watermark is not None:
+            # Inclusive, so rows committed later with the same timestamp are not missed
+            query = query.filter(RefreshToken.revoked_at >= self._watermark)
+
+        rows = query.all()
+        loaded = sum(1 for row in rows if row.token not in self.tokens)
+        for row in rows:
+            self.revoke_token(row.token, row.expires_at)
+            if row.revoked_reason not in SESSION_ONLY_REASONS:
+                self.revoke_subject(row.user_id, row.revoked_at)
+            revoked_at = _timestamp(row.revoked_at)
+            if revoked_at is not None and (self._watermark is None or revoked_at > self._watermark.timestamp()):
+                self._watermark = datetime.fromtimestamp(revoked_at, timezone.utc)
+        if self._watermark is None:
+            self._watermark = now
+
+        self.prune()
+        self.last_sync = now.isoformat()
+        return loaded
+
+    def prune(self) -> None:
+        now = time.time()
+        lifetime = max(settings.JWT_EXPIRATION_HOURS * 3600, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+        with self._lock:
+            self.tokens = {token: expiry for token, expiry in self.tokens.items() if expiry > now}
+            self.cutoffs = {subject: at for subject, at in self.cutoffs.items() if at > now - lifetime}
+
+    def get_stats(self) -> Dict:
+        return {"revoked_tokens": len(self.tokens), "revoked_subjects": len(self.cutoffs), "last_sync": self.last_sync}
+
+
+token_cache = TokenSubjectCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES, settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+revocations = RevocationSet()
+
+
+# ============================================================================
+# BACKGROUND SYNC
+# ============================================================================
+
+_sync_task: Optional[asyncio.Task] = None
+
+
+def sync_revocations() -> int:
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return revocations.sync(db)
+    finally:
+        db.close()
+
+
+async def _sync_loop() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            loaded = await loop.run_in_executor(None, sync_revocations)
+            if loaded:
+                logger.info(f"Loaded {loaded} token revocation(s)")
+        except Exception as e:
+            logger.error(f"Token revocation sync failed: {e}")
+        await asyncio.sleep(settings.AUTH_REVOCATION_SYNC_SECONDS)
+
+
+def start_revocation_sync() -> None:
+    """Start periodic revocation sync on the running event loop"""
+    global _sync_task
+
+    if _sync_task is not None and not _sync_task.done():
+        return
+    _sync_task = asyncio.get_running_loop().create_task(_sync_loop())
+
+
+async def stop_revocation_sync() -> None:
+    global _sync_task
+
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
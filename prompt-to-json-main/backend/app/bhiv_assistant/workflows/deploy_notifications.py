@@ -6,12 +6,28 @@ Deploy Notification and Monitoring Workflows to Prefect
 import asyncio
 
 from notification_flows import (
+    bhiv_prompt_batch_flow,
     monitored_mcp_flow,
     monitored_rl_flow,
     reliable_workflow_with_retries,
     system_health_monitoring_flow,
 )
 
+try:
+    from prefect.events import DeploymentEventTrigger
+except ImportError:  # Prefect < 2.16
+    from prefect.events.schemas import DeploymentTrigger as DeploymentEventTrigger
+
+# The backend posts batches to PREFECT_WEBHOOK_URL; the webhook template emits the body's
+# "event" field ("bhiv.prompt.batch") with the body as the event payload.
+BHIV_BATCH_TRIGGER = DeploymentEventTrigger(
+    expect={"bhiv.prompt.batch"},
+    parameters={
+        "events": "{{ event.payload.events }}",
+        "batch_id": "{{ event.payload.batch_id }}",
+    },
+)
+
 
 async def deploy_notification_workflows():
     """Deploy all notification and monitoring workflows to Prefect"""
@@ -55,10 +71,20 @@ async def deploy_notification_workflows():
         )
         print("✅ Reliable Workflow with Retries deployed")
 
+        # Deploy BHIV Request Batch Flow (one run per batched webhook event)
+        batch_deployment = await bhiv_prompt_batch_flow.to_deployment(
+            name="bhiv-prompt-batch",
+            work_pool_name="default-pool",
+            description="Summarize batched BHIV request events and alert on failure spikes",
+            tags=["bhiv", "events", "notifications", "batch"],
+            triggers=[BHIV_BATCH_TRIGGER],
+        )
+        print("✅ BHIV Request Batch Flow deployed")
+
         print("\n🎉 All notification workflows deployed successfully!")
         print("Access Prefect UI: http://localhost:4201")
 
-        return {"status": "success", "workflows": 4}
+        return {"status": "success", "workflows": 5}
 
     except Exception as e:
         print(f"❌ Deployment failed: {e}")
@@ -1,5 +1,6 @@
 import json
 import os
+from collections import Counter
 from datetime import datetime
 
 from prefect import flow, get_run_logger, task
@@ -249,3 +250,34 @@ def reliable_workflow_with_retries(workflow_name: str, max_retries: int = 3):
                 logger.warning(retry_msg)
 
     return {"status": "max_retries_exceeded"}
+
+
+@flow
+def bhiv_prompt_batch_flow(events: list, batch_id: str = "unknown", failure_alert_ratio: float = 0.2):
+    """Process one batch of BHIV request events sent by the backend's Prefect notifier"""
+    logger = get_run_logger()
+
+    by_status = dict(Counter(event.get("status", "unknown") for event in events))
+    by_city = dict(Counter(event.get("city", "unknown") for event in events))
+
+    summary = {
+        "timestamp": datetime.now().isoformat(),
+        "batch_id": batch_id,
+        "events": len(events),
+        "by_status": by_status,
+        "by_city": by_city,
+        "collapsed": sum(event.get("collapsed", 0) for event in events),
+    }
+
+    os.makedirs("data/logs", exist_ok=True)
+    with open("data/logs/bhiv_prompt_batches.jsonl", "a") as f:
+        f.write(json.dumps(summary) + "\n")
+
+    failed = by_status.get("failed", 0)
+    if events and failed / len(events) >= failure_alert_ratio:
+        send_slack_notification(
+            f"{failed}/{len(events)} BHIV requests failed in batch {batch_id}: {by_city}", "BHIV Request Failures"
+        )
+
+    logger.info(f"Processed BHIV batch {batch_id}: {len(events)} events, {by_status}")
+    return summary
@@ -4,7 +4,7 @@ Manages all environment variables, validation, and settings
 """
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
@@ -97,6 +97,9 @@ class Settings(BaseSettings):
     JWT_EXPIRATION_HOURS: int = Field(default=24, description="JWT token lifetime in hours")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=1440, description="Access token lifetime (24h)")
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=30, description="Refresh token lifetime")
+    AUTH_TOKEN_CACHE_TTL_SECONDS: float = Field(default=60.0, description="Reuse a verified access token for this long")
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = Field(default=10000, description="Max cached verified access tokens")
+    AUTH_REVOCATION_SYNC_SECONDS: float = Field(default=30.0, description="Interval for syncing token revocations")
 
     @validator("JWT_SECRET_KEY")
     def validate_jwt_secret(cls, v):
@@ -123,11 +126,24 @@ class Settings(BaseSettings):
     )
     RANJEET_API_KEY: Optional[str] = Field(default=None, description="Ranjeet API key (if required)")
     RANJEET_TIMEOUT: int = Field(default=180, description="Timeout for RL calls in seconds")
+    BHIV_DESIGN_DEADLINE: float = Field(
+        default=120.0,
+        description="Overall budget in seconds for /bhiv/v1/design; compliance and RL calls get the remainder",
+    )
 
     # Land Utilization RL System Configuration
     LAND_UTILIZATION_ENABLED: bool = Field(default=True, description="Enable land utilization RL features")
     RANJEET_SERVICE_AVAILABLE: bool = Field(default=True, description="Ranjeet's service availability status")
 
+    # BHIV agent dispatch (agents without a remote URL are invoked in-process)
+    AGENT_REMOTE_URLS: Dict[str, str] = Field(
+        default={}, description="Base URL per BHIV agent deployed remotely, e.g. {'rl_agent': 'http://rl:8000'}"
+    )
+    AGENT_TIMEOUTS: Dict[str, float] = Field(
+        default={"mcp_compliance": 60.0, "rl_agent": 60.0, "geometry_agent": 60.0},
+        description="Per-call timeout in seconds for each BHIV agent",
+    )
+
     # ============================================================================
     # LM (LANGUAGE MODEL) CONFIGURATION
     # ============================================================================
@@ -194,6 +210,20 @@ class Settings(BaseSettings):
     LOG_FILE: str = Field(default="logs/bhiv.log", description="Log file path")
     LOG_ROTATION: str = Field(default="1 day", description="Log rotation period")
     LOG_RETENTION: str = Field(default="30 days", description="Log retention period")
+    LOG_FORMAT: str = Field(default="text", description="Console log format: text or json (files are always JSON)")
+    LOG_QUEUE_SIZE: int = Field(default=10000, description="Queued log records before new ones are dropped")
+    LOG_SAMPLE_RATES: Dict[str, float] = Field(
+        default={}, description="Fraction of DEBUG records kept per logger, e.g. {'app.api.generate': 0.1}"
+    )
+
+    # Tracing
+    TRACING_ENABLED: bool = Field(default=False, description="Record OpenTelemetry-compatible spans")
+    TRACING_EXPORTER: str = Field(default="file", description="Span exporter: file, console or none")
+    TRACING_FILE_PATH: str = Field(default="logs/traces.jsonl", description="JSON-lines file for the file exporter")
+    TRACING_FILE_MAX_BYTES: int = Field(default=50 * 1024 * 1024, description="Rotate the trace file at this size")
+    TRACING_FILE_BACKUPS: int = Field(default=5, description="Rotated trace files kept")
+    TRACING_SAMPLE_RATIO: float = Field(default=1.0, description="Fraction of new traces that are recorded")
+    TRACING_SERVICE_NAME: str = Field(default="design-engine-api", description="service.name resource attribute")
 
     # Prometheus
     METRICS_ENABLED: bool = Field(default=True, description="Enable Prometheus metrics")
@@ -207,6 +237,13 @@ class Settings(BaseSettings):
     PREFECT_WORKSPACE: Optional[str] = Field(default=None, description="Prefect workspace ID")
     PREFECT_QUEUE: str = Field(default="default", description="Default work queue")
     PREFECT_WEBHOOK_URL: Optional[str] = Field(default=None, description="Prefect webhook URL for notifications")
+    PREFECT_NOTIFY_BATCH_SIZE: int = Field(default=100, description="Buffered BHIV events that trigger an early flush")
+    PREFECT_NOTIFY_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=5.0, description="Maximum delay before buffered BHIV events are sent to Prefect"
+    )
+    PREFECT_NOTIFY_QUEUE_DIR: str = Field(
+        default="data/prefect/notify_queue", description="Durable spill queue for batches Prefect could not accept"
+    )
 
     # ============================================================================
     # REDIS CONFIGURATION
@@ -215,12 +252,44 @@ class Settings(BaseSettings):
     REDIS_MAX_CONNECTIONS: int = Field(default=50, description="Max Redis connections")
     CACHE_TTL: int = Field(default=3600, description="Default cache TTL in seconds")
 
+    # Report cache (serialized reports keyed by spec_id + version)
+    REPORT_CACHE_ENABLED: bool = Field(default=False, description="Cache serialized reports per spec version")
+    REPORT_CACHE_MAX_ENTRIES: int = Field(default=64, description="Max cached reports")
+    REPORT_CACHE_MAX_BYTES: int = Field(default=2 * 1024 * 1024, description="Skip caching reports larger than this")
+
+    # Fast JSON responses (orjson, raw spec passthrough, serialized spec cache)
+    FAST_JSON_ENABLED: bool = Field(default=False, description="Serve spec/history responses via the fast JSON path")
+    SPEC_JSON_CACHE_MAX_ENTRIES: int = Field(default=256, description="Max cached serialized spec versions")
+    SPEC_JSON_CACHE_MAX_BYTES: int = Field(default=1024 * 1024, description="Skip caching specs larger than this")
+
+    # Response compression (negotiated from Accept-Encoding: zstd, br, gzip)
+    COMPRESSION_ENABLED: bool = Field(default=True, description="Compress compressible responses")
+    COMPRESSION_MIN_SIZE: int = Field(default=1024, description="Send buffered bodies smaller than this uncompressed")
+    COMPRESSION_GZIP_LEVEL: int = Field(default=6, description="gzip compression level (1-9)")
+    COMPRESSION_BROTLI_QUALITY: int = Field(
+        default=4, description="Brotli quality (0-11), used when brotli is installed"
+    )
+    COMPRESSION_ZSTD_LEVEL: int = Field(default=3, description="zstd level (1-22), used when zstandard is installed")
+    COMPRESSION_CACHE_MAX_BYTES: int = Field(
+        default=16 * 1024 * 1024, description="Memory for cached compressed bodies (0 disables the cache)"
+    )
+
     # ============================================================================
     # RATE LIMITING
     # ============================================================================
-    RATE_LIMIT_ENABLED: bool = Field(default=True, description="Enable rate limiting")
-    RATE_LIMIT_PER_MINUTE: int = Field(default=60, description="Requests per minute per user")
+    RATE_LIMIT_ENABLED: bool = Field(default=False, description="Enable the rate limiting middleware")
+    RATE_LIMIT_PER_MINUTE: int = Field(default=100, description="Token budget per minute per user")
     RATE_LIMIT_PER_HOUR: int = Field(default=1000, description="Requests per hour per user")
+    RATE_LIMIT_BACKEND: str = Field(
+        default="memory", description="Bucket store: memory (per process) or sqlite (shared by all workers)"
+    )
+    RATE_LIMIT_SQLITE_PATH: str = Field(default="data/rate_limits.db", description="Shared SQLite bucket store")
+    RATE_LIMIT_MAX_CLIENTS: int = Field(default=10000, description="Max buckets kept by the memory store")
+    RATE_LIMIT_IDLE_TTL_SECONDS: float = Field(default=600.0, description="Drop buckets idle for longer than this")
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, int] = Field(
+        default={"/api/v1/generate": 5, "/api/v1/rl/train/opt": 10, "/api/v1/rl/train/rlhf": 10},
+        description="Tokens consumed per request, by path prefix (other routes cost 1)",
+    )
 
     # ============================================================================
     # FILE UPLOAD CONFIGURATION
@@ -239,6 +308,15 @@ class Settings(BaseSettings):
     )
     DEFAULT_CITY: str = Field(default="Mumbai", description="Default city if not specified")
 
+    # Multi-city test suite (/api/v1/multi-city/test/*)
+    MULTI_CITY_TEST_CONCURRENCY: int = Field(default=4, description="Test cases run at once by the multi-city suite")
+    MULTI_CITY_TEST_SINKS: List[str] = Field(
+        default=["db", "jsonl"], description="Where suite summaries are written: db, jsonl, log"
+    )
+    MULTI_CITY_TEST_LOG_PATH: str = Field(
+        default="data/logs/multi_city_tests.jsonl", description="JSON-lines file for the jsonl sink"
+    )
+
     # ============================================================================
     # RL (REINFORCEMENT LEARNING) CONFIGURATION
     # ============================================================================
@@ -247,6 +325,22 @@ class Settings(BaseSettings):
     RL_TRAINING_BATCH_SIZE: int = Field(default=32, description="RL training batch size")
     RL_LEARNING_RATE: float = Field(default=0.001, description="RL learning rate")
 
+    # ============================================================================
+    # EVALUATION INGESTION (WRITE-BEHIND)
+    # ============================================================================
+    EVAL_WRITE_BEHIND_ENABLED: bool = Field(
+        default=False,
+        description="Acknowledge evaluations after a durable enqueue and insert them in batches (no saved_id)",
+    )
+    EVAL_QUEUE_DIR: str = Field(default="data/evaluations/queue", description="Durable evaluation queue directory")
+    EVAL_BATCH_SIZE: int = Field(default=200, description="Queued evaluations that trigger an early flush")
+    EVAL_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=2.0, description="Maximum delay before queued evaluations are flushed"
+    )
+    EVAL_CLAIM_TIMEOUT_SECONDS: float = Field(
+        default=300.0, description="Age after which another worker takes over a dead worker's claimed batches"
+    )
+
     # ============================================================================
     # SECURITY CONFIGURATION
     # ============================================================================
@@ -0,0 +1,294 @@
+"""
+Cost estimation engine
+Keeps a per-object cost breakdown alongside the spec so switch and iterate
+can update only the objects they touched, and scores many specs at once in a
+vectorized batch mode for RL and what-if sweeps.
+"""
+import logging
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+from app.spec_diff import OBJECTS_KEY, index_objects
+
+logger = logging.getLogger(__name__)
+
+BREAKDOWN_KEY = "cost_breakdown"
+BREAKDOWN_VERSION = 1
+
+# Design type base costs (INR per sq meter, or a fixed price for FIXED_COST_TYPES)
+BASE_COSTS = {
+    "house": 25000,  # ₹25k per sqm for house construction
+    "building": 30000,  # ₹30k per sqm for commercial building
+    "office": 15000,  # ₹15k per sqm for office interiors
+    "kitchen": 35000,  # ₹35k per sqm for kitchen renovation
+    "bedroom": 20000,  # ₹20k per sqm for bedroom
+    "bathroom": 40000,  # ₹40k per sqm for bathroom
+    "living_room": 18000,  # ₹18k per sqm for living room
+    "car_body": 500000,  # ₹5 lakhs base for car
+    "pcb": 10000,  # ₹10k base for electronics
+    "generic": 20000,  # ₹20k per sqm default
+}
+DEFAULT_BASE_COST = 20000
+
+# Vehicles/electronics are priced per unit, not per area
+FIXED_COST_TYPES = {"car_body", "pcb", "component"}
+
+# Material premium multipliers, matched by substring in this order
+MATERIAL_MULTIPLIERS = {
+    "marble": 1.8,
+    "granite": 1.6,
+    "quartz": 1.4,
+    "wood_oak": 1.3,
+    "concrete": 1.0,
+    "brick": 1.1,
+    "glass": 1.5,
+    "steel": 1.4,
+    "leather": 2.0,
+    "default": 1.0,
+}
+
+# Special object premiums
+OBJECT_PREMIUMS = {
+    "garage": 200000,  # ₹2 lakhs for garage
+    "roof": 150000,  # ₹1.5 lakhs for roof
+    "foundation": 100000,  # ₹1 lakh for foundation
+    "island": 80000,  # ₹80k for kitchen island
+    "engine": 300000,  # ₹3 lakhs for car engine
+    "wheel": 25000,  # ₹25k per wheel
+}
+
+# Minimum costs by design type
+MIN_COSTS = {
+    "house": 2500000,  # Min ₹25 lakhs for house
+    "building": 5000000,  # Min ₹50 lakhs for building
+    "office": 200000,  # Min ₹2 lakhs for office
+    "kitchen": 300000,  # Min ₹3 lakhs for kitchen
+    "bedroom": 150000,  # Min ₹1.5 lakhs for bedroom
+    "bathroom": 200000,  # Min ₹2 lakhs for bathroom
+    "car_body": 800000,  # Min ₹8 lakhs for car
+    "pcb": 5000,  # Min ₹5k for electronics
+}
+DEFAULT_MIN_COST = 100000
+
+# Fields of the spec (outside the object list) that feed the base cost
+BASE_FIELDS = {"design_type", "dimensions", "stories"}
+
+# Top-level spec fields written when a cost is updated
+COST_FIELDS = (BREAKDOWN_KEY, "estimated_cost", "metadata")
+
+
+# ============================================================================
+# PER-OBJECT TERMS
+# ============================================================================
+
+
+@lru_cache(maxsize=1024)
+def material_class(material: str) -> str:
+    """The MATERIAL_MULTIPLIERS key a material name prices as (first matching key wins)"""
+    for mat_key in MATERIAL_MULTIPLIERS:
+        if mat_key in material:
+            return mat_key
+    return "default"
+
+
+def object_terms(obj: Dict) -> Dict:
+    """An object's own cost terms: material class, its multiplier and fixed premium"""
+    count = obj.get("count", 1)
+    mat_class = material_class(str(obj.get("material", "default")))
+    return {
+        "material": mat_class,
+        "material_multiplier": MATERIAL_MULTIPLIERS[mat_class],
+        "premium": OBJECT_PREMIUMS.get(obj.get("type", ""), 0) * count,
+    }
+
+
+def _base_terms(spec_json: Dict) -> Dict:
+    design_type = spec_json.get("design_type", "generic")
+    dimensions = spec_json.get("dimensions", {})
+    stories = spec_json.get("stories", 1)
+    area = dimensions.get("width", 10) * dimensions.get("length", 10)
+    base_rate = BASE_COSTS.get(design_type, DEFAULT_BASE_COST)
+    base_cost = base_rate if design_type in FIXED_COST_TYPES else area * base_rate * stories
+    return {
+        "design_type": design_type,
+        "area": area,
+        "stories": stories,
+        "base_rate": base_rate,
+        "base_cost": base_cost,
+        "minimum": MIN_COSTS.get(design_type, DEFAULT_MIN_COST),
+    }
+
+
+def _finalize(breakdown: Dict) -> Dict:
+    """Recompute the aggregate material premium and total from maintained sums"""
+    counts = breakdown["material_counts"]
+    # The strongest material in the spec sets the premium for the whole build
+    breakdown["material_premium"] = max([1.0] + [MATERIAL_MULTIPLIERS[m] for m, n in counts.items() if n > 0])
+    total = breakdown["base_cost"] * breakdown["material_premium"] + breakdown["premium_cost"]
+    breakdown["total"] = round(max(total, breakdown["minimum"]), 0)
+    return breakdown
+
+
+def _add_object(breakdown: Dict, key: str, terms: Dict) -> None:
+    breakdown["objects"][key] = terms
+    breakdown["premium_cost"] += terms["premium"]
+    counts = breakdown["material_counts"]
+    counts[terms["material"]] = counts.get(terms["material"], 0) + 1
+
+
+def _remove_object(breakdown: Dict, key: str) -> None:
+    terms = breakdown["objects"].pop(key, None)
+    if terms is None:
+        return
+    breakdown["premium_cost"] -= terms["premium"]
+    counts = breakdown["material_counts"]
+    remaining = counts.get(terms["material"], 0) - 1
+    if remaining > 0:
+        counts[terms["material"]] = remaining
+    else:
+        counts.pop(terms["material"], None)
+
+
+# ============================================================================
+# FULL AND INCREMENTAL BREAKDOWNS
+# ============================================================================
+
+
+def compute_cost_breakdown(spec_json: Dict) -> Dict:
+    """Build the full cost breakdown for a spec in one pass over its objects"""
+    breakdown = {
+        "version": BREAKDOWN_VERSION,
+        **_base_terms(spec_json),
+        "premium_cost": 0,
+        "material_counts": {},
+        "objects": {},
+    }
+    for key, (_, obj) in index_objects(spec_json.get(OBJECTS_KEY, [])).items():
+        _add_object(breakdown, key, object_terms(obj))
+    return _finalize(breakdown)
+
+
+def update_cost_breakdown(breakdown: Optional[Dict], spec_json: Dict, diff: Dict) -> Dict:
+    """
+    Update a breakdown for a spec change described by a ``diff_specs`` diff.
+
+    Only added, removed and changed objects are re-priced and the aggregate
+    sums are adjusted by their old and new terms, so pricing work is
+    O(changed objects). Falls back to a full computation when there is no
+    usable previous breakdown.
+    """
+    if not breakdown or breakdown.get("version") != BREAKDOWN_VERSION:
+        return compute_cost_breakdown(spec_json)
+
+    updated = {
+        **breakdown,
+        "material_counts": dict(breakdown["material_counts"]),
+        "objects": dict(breakdown["objects"]),
+    }
+
+    touched = set(diff.get("changed_objects", [])) | set(diff.get("added_objects", []))
+    for key in set(diff.get("removed_objects", [])) | touched:
+        _remove_object(updated, key)
+
+    if touched:
+        current = index_objects(spec_json.get(OBJECTS_KEY, []))
+        for key in touched:
+            if key in current:
+                _add_object(updated, key, object_terms(current[key][1]))
+
+    if any(op.get("object") is None and op["field"].split(".")[0] in BASE_FIELDS for op in diff.get("operations", [])):
+        updated.update(_base_terms(spec_json))
+
+    return _finalize(updated)
+
+
+def object_cost_lines(breakdown: Dict) -> List[Dict]:
+    """Per-object cost lines: an equal share of the base cost plus the object's premium"""
+    objects = breakdown.get("objects", {})
+    base_share = breakdown["base_cost"] / len(objects) if objects else 0
+    return [
+        {
+            "object": key,
+            "base_share": round(base_share, 2),
+            "material_multiplier": terms["material_multiplier"],
+            "premium": terms["premium"],
+            "cost": round(base_share * breakdown["material_premium"] + terms["premium"], 2),
+        }
+        for key, terms in objects.items()
+    ]
+
+
+def apply_cost_breakdown(spec_json: Dict, breakdown: Dict) -> float:
+    """Store a breakdown on the spec and sync its estimated total; returns the total"""
+    spec_json[BREAKDOWN_KEY] = breakdown
+    if isinstance(spec_json.get("estimated_cost"), dict):
+        spec_json["estimated_cost"]["total"] = breakdown["total"]
+    return breakdown["total"]
+
+
+def spec_cost_total(spec_json: Dict) -> float:
+    """The spec's current total, from its breakdown if it has one"""
+    breakdown = spec_json.get(BREAKDOWN_KEY)
+    if breakdown and "total" in breakdown:
+        return breakdown["total"]
+    return compute_cost_breakdown(spec_json)["total"]
+
+
+# ============================================================================
+# VECTORIZED BATCH MODE
+# ============================================================================
+
+
+def vectorized_cost(
+    base_rate: np.ndarray,
+    area: np.ndarray,
+    stories: np.ndarray,
+    fixed: np.ndarray,
+    material_premium: np.ndarray,
+    premium_cost: np.ndarray,
+    minimum: np.ndarray,
+) -> np.ndarray:
+    """The cost formula over broadcastable arrays (one element per candidate)"""
+    base_cost = np.where(fixed, base_rate, area * base_rate * stories)
+    return np.round(np.maximum(base_cost * material_premium + premium_cost, minimum), 0)
+
+
+def design_type_arrays(design_types: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Base rate, fixed-price flag and minimum cost arrays for a list of design types"""
+    return {
+        "base_rate": np.array([BASE_COSTS.get(t, DEFAULT_BASE_COST) for t in design_types], dtype=float),
+        "fixed": np.array([t in FIXED_COST_TYPES for t in design_types]),
+        "minimum": np.array([MIN_COSTS.get(t, DEFAULT_MIN_COST) for t in design_types], dtype=float),
+    }
+
+
+def estimate_costs_batch(specs: Iterable[Dict]) -> np.ndarray:
+    """Score many specs at once; element i equals calculate_estimated_cost(specs[i])"""
+    specs = list(specs)
+    n = len(specs)
+
+    design_types, areas, stories = [], np.empty(n), np.empty(n)
+    spec_index, multipliers, premiums = [], [], []
+    for i, spec in enumerate(specs):
+        dimensions = spec.get("dimensions", {})
+        design_types.append(spec.get("design_type", "generic"))
+        areas[i] = dimensions.get("width", 10) * dimensions.get("length", 10)
+        stories[i] = spec.get("stories", 1)
+        for obj in spec.get(OBJECTS_KEY, []):
+            terms = object_terms(obj)
+            spec_index.append(i)
+            multipliers.append(terms["material_multiplier"])
+            premiums.append(terms["premium"])
+
+    material_premium = np.ones(n)
+    premium_cost = np.zeros(n)
+    if spec_index:
+        index = np.array(spec_index)
+        np.maximum.at(material_premium, index, np.array(multipliers, dtype=float))
+        np.add.at(premium_cost, index, np.array(premiums, dtype=float))
+
+    types = design_type_arrays(design_types)
+    return vectorized_cost(
+        types["base_rate"], areas, stories, types["fixed"], material_premium, premium_cost, types["minimum"]
+    )
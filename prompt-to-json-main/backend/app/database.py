@@ -8,6 +8,7 @@ from contextlib import contextmanager
 from typing import Generator
 
 from app.config import settings
+from app.tracing import instrument_sqlalchemy
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer
 from sqlalchemy import create_engine, event, text
@@ -363,6 +364,10 @@ def receive_checkin(dbapi_conn, connection_record):
     logger.debug("Connection returned to pool")
 
 
+# Statement spans for requests that are being traced
+instrument_sqlalchemy(engine)
+
+
 # ============================================================================
 # UTILITIES
 # ============================================================================
@@ -419,13 +424,36 @@ def get_current_user(token: str = Depends(HTTPBearer())) -> str:
     JWT authentication dependency
     Validates JWT tokens and returns current user
     """
+    from app.auth_cache import revocations, token_cache
+
+    # Extract token from Bearer scheme
+    token_str = token.credentials
+
+    # Verified tokens are cached briefly, so the signature is checked once per token
+    cached = token_cache.get(token_str)
+    if cached is not None:
+        username, issued_at = cached
+    else:
+        payload = _decode_token(token_str)
+        username, issued_at = payload["sub"], payload.get("iat")
+        token_cache.put(token_str, username, issued_at, payload.get("exp"))
+
+    if revocations.is_subject_revoked(username, issued_at):
+        raise HTTPException(
+            status_code=401,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return username
+
+
+def _decode_token(token_str: str):
+    """Decode and validate a JWT; returns its payload"""
     try:
         import jwt
         from app.config import settings
 
-        # Extract token from Bearer scheme
-        token_str = token.credentials
-
         # Decode and validate JWT token
         payload = jwt.decode(token_str, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
 
@@ -437,7 +465,7 @@ def get_current_user(token: str = Depends(HTTPBearer())) -> str:
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        return username
+        return payload
 
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -95,8 +95,9 @@ class SohumMCPClient:
         """Check MCP service health"""
         return await service_manager.check_service_health("sohum_mcp", self.base_url, self.timeout)
 
-    async def run_compliance_case(self, case_data: Dict) -> Dict:
-        """Run compliance analysis case"""
+    async def run_compliance_case(self, case_data: Dict, timeout: Optional[float] = None) -> Dict:
+        """Run compliance analysis case (``timeout`` overrides SOHUM_TIMEOUT, e.g. a request's remaining budget)"""
+        timeout = timeout or self.timeout
         try:
             headers = {"Content-Type": "application/json"}
             if self.api_key:
@@ -115,7 +116,7 @@ class SohumMCPClient:
                     "parameters": case_data.get("parameters", {}),
                 }
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+            async with httpx.AsyncClient(timeout=timeout) as client:
                 response = await client.post(f"{self.base_url}/run_case", json=formatted_data, headers=headers)
                 response.raise_for_status()
                 raw_response = response.json()
@@ -124,7 +125,7 @@ class SohumMCPClient:
                 return self._parse_compliance_response(raw_response)
 
         except httpx.TimeoutException:
-            logger.warning(f"MCP service timeout after {self.timeout}s")
+            logger.warning(f"MCP service timeout after {timeout}s")
             raise
         except httpx.HTTPStatusError as e:
             logger.error(f"MCP service HTTP error: {e.response.status_code if e.response else 'unknown'}")
@@ -236,8 +237,10 @@ class RanjeetRLClient:
             logger.error(f"Core-Bucket bridge health check failed: {e}")
             return ServiceStatus.UNHEALTHY
 
-    async def optimize_design(self, spec_json: Dict, city: str, constraints: Dict = None) -> Dict:
-        """Optimize design using Ranjeet's Land Utilization RL System"""
+    async def optimize_design(
+        self, spec_json: Dict, city: str, constraints: Dict = None, timeout: Optional[float] = None
+    ) -> Dict:
+        """Optimize design using Ranjeet's Land Utilization RL System (``timeout`` defaults to 180s)"""
         try:
             headers = {"Content-Type": "application/json"}
             if self.api_key:
@@ -250,7 +253,7 @@ class RanjeetRLClient:
                 "timestamp": datetime.now().isoformat(),
             }
 
-            async with httpx.AsyncClient(timeout=180.0) as client:
+            async with httpx.AsyncClient(timeout=timeout or 180.0) as client:
                 logger.info(f"Calling Ranjeet's RL: {self.base_url}/rl/optimize")
                 response = await client.post(f"{self.base_url}/rl/optimize", json=payload, headers=headers)
                 response.raise_for_status()
@@ -0,0 +1,123 @@
+"""
+Fast-path JSON responses
+orjson-backed serialization (stdlib fallback when orjson is not installed),
+raw passthrough of already-serialized values and a bytes cache for
+immutable spec versions. Used when FAST_JSON_ENABLED is set.
+"""
+import json
+import logging
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+from app.config import settings
+from app.stage_metrics import stage
+from fastapi.responses import JSONResponse, Response
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+    logger.info("orjson not installed, fast JSON responses use the stdlib encoder")
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def dumps(value: Any, default: Callable[[Any], Any] = _default) -> bytes:
+    """Serialize to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value, default=default, option=ORJSON_OPTIONS)
+    return json.dumps(value, default=default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# ============================================================================
+# RAW PASSTHROUGH
+# ============================================================================
+
+
+class RawJSON:
+    """Already-serialized JSON embedded verbatim, with no validation or re-encoding"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def dumps_with_raw(payload: Any) -> bytes:
+    """Serialize ``payload``, splicing RawJSON values in place"""
+    raws: Dict[bytes, bytes] = {}
+
+    def default(value: Any) -> Any:
+        # The encoder hands us each RawJSON it meets, so the payload is never walked twice
+        if isinstance(value, RawJSON):
+            token = f"__raw_json_{uuid.uuid4().hex}__"
+            raws[b'"' + token.encode("ascii") + b'"'] = value.data
+            return token
+        return _default(value)
+
+    body = dumps(payload, default)
+    for token, data in raws.items():
+        body = body.replace(token, data, 1)
+    return body
+
+
+def fast_response(payload: Any, status_code: int = 200) -> Response:
+    """JSON response for a pre-validated payload, bypassing response_model validation"""
+    return Response(content=dumps_with_raw(payload), status_code=status_code, media_type="application/json")
+
+
+# ============================================================================
+# SERIALIZED SPEC CACHE
+# ============================================================================
+
+# Serialized spec_json keyed by (kind, id, version), most recently used last
+_spec_bytes_cache: "OrderedDict[Hashable, bytes]" = OrderedDict()
+
+
+def cached_json(key: Hashable, value: Any) -> RawJSON:
+    """
+    Serialized ``value`` for an immutable key such as ("spec", spec_id, version).
+
+    A key must only ever map to one value: spec versions and iterations are
+    never edited in place, so their bytes can be reused across requests.
+    """
+    with stage("spec_json_cache_lookup") as timer:
+        data = _spec_bytes_cache.get(key)
+        if data is not None:
+            _spec_bytes_cache.move_to_end(key)
+            timer.set(status="hit")
+            return RawJSON(data)
+
+        timer.set(status="miss")
+        data = dumps(value)
+        if len(data) <= settings.SPEC_JSON_CACHE_MAX_BYTES:
+            _spec_bytes_cache[key] = data
+            while len(_spec_bytes_cache) > settings.SPEC_JSON_CACHE_MAX_ENTRIES:
+                _spec_bytes_cache.popitem(last=False)
+        return RawJSON(data)
+
+
+def is_cached(key: Hashable) -> bool:
+    return key in _spec_bytes_cache
+
+
+def invalidate_spec_json(spec_id: str) -> None:
+    """Drop cached bytes for a spec whose JSON was changed without a version bump"""
+    for key in [key for key in _spec_bytes_cache if key[1] == spec_id]:
+        _spec_bytes_cache.pop(key, None)
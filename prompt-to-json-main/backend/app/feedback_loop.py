@@ -88,6 +88,53 @@ class FeedbackLoopOrchestrator:
 
         return {"feedback_id": rlhf_fb.id, "pairs_created": len(feedback_pairs), "spec_id": spec_id, "user_id": user_id}
 
+    def collect_spec_feedback(self, spec_id: str, evaluations: List[dict]) -> dict:
+        """
+        Collect feedback for several evaluations of one spec.
+
+        The spec and its iterations are loaded once for the whole group; the
+        caller commits.
+
+        Args:
+            spec_id: Spec being evaluated
+            evaluations: Dicts with user_id, rating and notes
+
+        Returns:
+            Feedback collection metadata for the spec
+        """
+
+        spec = self.db.query(Spec).filter(Spec.id == spec_id).first()
+        if not spec:
+            raise ValueError(f"Spec {spec_id} not found")
+
+        iteration_count = self.db.query(Iteration).filter(Iteration.spec_id == spec_id).count()
+        pairs_per_eval = max(iteration_count - 1, 0)
+
+        feedback_rows = []
+        for evaluation in evaluations:
+            # One primary record plus one per consecutive iteration pair
+            for _ in range(pairs_per_eval + 1):
+                feedback_rows.append(
+                    RLFeedback(
+                        user_id=evaluation["user_id"],
+                        spec_id=spec_id,
+                        prompt=spec.prompt,
+                        spec_json=spec.spec_json,
+                        user_rating=evaluation["rating"],
+                        feedback_type="explicit",
+                    )
+                )
+        self.db.add_all(feedback_rows)
+
+        logger.info(f"Collected {len(evaluations)} evaluations for spec {spec_id} ({len(feedback_rows)} feedback rows)")
+
+        return {
+            "spec_id": spec_id,
+            "evaluations": len(evaluations),
+            "pairs_created": pairs_per_eval * len(evaluations),
+            "feedback_rows": len(feedback_rows),
+        }
+
     def aggregate_feedback(self, lookback_hours: int = 24) -> dict:
         """
         Aggregate recent feedback to identify patterns and training needs.
@@ -258,6 +305,44 @@ class IterativeFeedbackCycle:
 
         return result
 
+    def process_evaluation_batch(self, evaluations: List[dict]) -> dict:
+        """
+        Process a batch of evaluations coalesced per spec, then check the
+        training threshold once for the whole batch.
+
+        Returns:
+            Per-spec collection results and training status
+        """
+
+        by_spec = {}
+        for evaluation in evaluations:
+            by_spec.setdefault(evaluation["spec_id"], []).append(evaluation)
+
+        collected, failed = [], {}
+        for spec_id, spec_evaluations in by_spec.items():
+            try:
+                collected.append(self.orchestrator.collect_spec_feedback(spec_id, spec_evaluations))
+            except ValueError as e:
+                failed[spec_id] = str(e)
+        self.db.commit()
+
+        should_train, train_stats = self.orchestrator.should_trigger_training()
+
+        result = {
+            "feedback_collected": collected,
+            "failed_specs": failed,
+            "training_triggered": should_train,
+            "training_stats": train_stats,
+        }
+
+        if should_train:
+            logger.info("Triggering RL training from accumulated feedback")
+            result["training_queued"] = True
+            train_data = self.orchestrator.create_training_dataset(limit=50)
+            result["dataset_size"] = len(train_data)
+
+        return result
+
     def get_cycle_status(self) -> dict:
         """Get current status of the feedback-training cycle"""
 
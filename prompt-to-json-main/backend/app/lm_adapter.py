@@ -7,6 +7,7 @@ from typing import Any, Dict
 
 import httpx
 from app.config import settings
+from app.stage_metrics import stage
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +41,9 @@ async def run_local_lm(prompt: str, params: dict) -> dict:
             logger.warning(f"AI generation failed: {e}, falling back to templates")
 
     # Fallback to template-based generation
-    spec_json = generate_design_from_prompt(prompt, params)
+    with stage("template_fallback", provider="template_fallback", city=params.get("city")) as timer:
+        spec_json = generate_design_from_prompt(prompt, params)
+        timer.set(design_type=spec_json.get("design_type"))
     log_usage("template_fallback", len(prompt), 0.0001, params.get("user_id"))
 
     return {
@@ -0,0 +1,217 @@
+"""
+Queue-based logging pipeline
+Request threads only put records on an in-memory queue; a listener thread
+formats them (JSON for files) and writes to the console and rotating file
+sinks. Messages are formatted lazily in the listener, high-volume debug
+loggers can be sampled, and records are dropped rather than blocking when
+the queue is full.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+_UNIT_SECONDS = {"minute": 60, "hour": 3600, "day": 86400, "week": 7 * 86400}
+_SIZE_UNITS = {"kb": 1024, "mb": 1024**2, "gb": 1024**3}
+
+
+class LazyJSON:
+    """Defers json.dumps of a log payload until the listener formats the record"""
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload: Dict):
+        self.payload = payload
+
+    def __str__(self) -> str:
+        return json.dumps(self.payload, default=str)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, including ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records at or below ``max_level`` for selected loggers"""
+
+    def __init__(self, rates: Dict[str, float], max_level: int = logging.DEBUG):
+        super().__init__()
+        self.rates = rates
+        self.max_level = max_level
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level or not self.rates:
+            return True
+        name = record.name
+        while name:
+            rate = self.rates.get(name)
+            if rate is not None:
+                return rate >= 1 or random.random() < rate
+            name = name.rpartition(".")[0]
+        return True
+
+
+class QueuedHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener and never blocks"""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stdlib version formats the message here, on the caller's thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            QueuedHandler.dropped += 1
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=10000)
+_listener: Optional[logging.handlers.QueueListener] = None
+_base_handlers: List[logging.Handler] = []
+_sinks: List[logging.Handler] = []
+# Per-logger queue handlers used for sinks added before the root logger is wired
+_direct_handlers: Dict[str, logging.Handler] = {}
+_root_handler: Optional[QueuedHandler] = None
+
+
+def _refresh_listener() -> None:
+    global _listener
+
+    if _listener is None:
+        _listener = logging.handlers.QueueListener(_queue, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+    # The listener thread reads this tuple per record, so swapping it is safe
+    _listener.handlers = tuple(_base_handlers + _sinks)
+
+
+def _period_seconds(value: str) -> Optional[int]:
+    match = re.match(r"^\s*(\d+)\s*(minute|hour|day|week)s?\s*$", value or "", re.IGNORECASE)
+    if not match:
+        return None
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2).lower()]
+
+
+def rotating_file_handler(path: str, rotation: str = "1 day", retention: str = "30 days") -> logging.Handler:
+    """
+    File handler rotated by time ("1 day", "6 hours") or size ("10 MB").
+    Time-rotated files keep as many backups as fit in ``retention``.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    size = re.match(r"^\s*(\d+)\s*(kb|mb|gb)\s*$", rotation or "", re.IGNORECASE)
+    if size:
+        max_bytes = int(size.group(1)) * _SIZE_UNITS[size.group(2).lower()]
+        return logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=10, encoding="utf-8")
+
+    period = _period_seconds(rotation) or 86400
+    keep = _period_seconds(retention) or 30 * 86400
+    return logging.handlers.TimedRotatingFileHandler(
+        path, when="S", interval=period, backupCount=max(1, keep // period), encoding="utf-8", utc=True
+    )
+
+
+def configure_logging(
+    level: str = "INFO",
+    log_file: Optional[str] = None,
+    rotation: str = "1 day",
+    retention: str = "30 days",
+    json_console: bool = False,
+    sample_rates: Optional[Dict[str, float]] = None,
+    queue_size: int = 10000,
+) -> None:
+    """Route the root logger through the queue to console and file sinks"""
+    global _queue, _root_handler
+
+    if _listener is None and queue_size != _queue.maxsize:
+        _queue = queue.Queue(maxsize=queue_size)
+
+    console = logging.StreamHandler()
+    console.setFormatter(
+        JSONFormatter() if json_console else logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    )
+    handlers = [console]
+    if log_file:
+        file_handler = rotating_file_handler(log_file, rotation, retention)
+        file_handler.setFormatter(JSONFormatter())
+        handlers.append(file_handler)
+    _base_handlers[:] = handlers
+    _refresh_listener()
+
+    _root_handler = QueuedHandler(_queue)
+    _root_handler.addFilter(SamplingFilter(sample_rates or {}))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_root_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    # Sinks now receive their records through the root handler
+    for name, handler in _direct_handlers.items():
+        logging.getLogger(name).removeHandler(handler)
+    _direct_handlers.clear()
+
+
+def add_sink(handler: logging.Handler, logger_name: str) -> None:
+    """Write records from ``logger_name`` (and its children) to ``handler`` on the listener thread"""
+    handler.addFilter(logging.Filter(logger_name))
+    _sinks.append(handler)
+    _refresh_listener()
+
+    if _root_handler is None and logger_name not in _direct_handlers:
+        direct = QueuedHandler(_queue)
+        _direct_handlers[logger_name] = direct
+        logging.getLogger(logger_name).addHandler(direct)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        for handler in _base_handlers + _sinks:
+            try:
+                handler.flush()
+            except (OSError, ValueError):
+                # At interpreter exit a handler's stream may already be closed (e.g. captured stderr)
+                pass
+
+
+def get_logging_stats() -> Dict:
+    return {"queued": _queue.qsize(), "queue_size": _queue.maxsize, "dropped": QueuedHandler.dropped}
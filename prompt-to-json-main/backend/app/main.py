@@ -3,6 +3,7 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import asyncio
 import logging
 import time
 
@@ -27,6 +28,7 @@ from app.api import (
     multi_city_testing,
     reports,
     rl,
+    sweep,
     switch,
     vr,
     workflow_consolidation,
@@ -37,11 +39,16 @@ from app.api import (
 # bhiv_integrated.py: Integrated design endpoint (/bhiv/v1/design)
 from app.config import settings
 from app.database import get_current_user, get_db
+from app.fast_json import FastJSONResponse
+from app.middleware.compression import CompressionMiddleware, compression_stats
+from app.middleware.rate_limit import rate_limit_middleware
 from app.multi_city.city_data_loader import city_router
+from app.stage_metrics import request_id_from_header, request_id_var
+from app.tracing import configure_tracing, extract, start_span, tracer
 from app.utils import setup_logging
 from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import HTTPBearer
 from fastapi.staticfiles import StaticFiles
 from prometheus_fastapi_instrumentator import Instrumentator
@@ -107,6 +114,7 @@ app = FastAPI(
     title="Design Engine API",
     description="Complete FastAPI backend for design generation with JWT authentication",
     version="0.1.0",
+    default_response_class=FastJSONResponse if settings.FAST_JSON_ENABLED else JSONResponse,
 )
 
 
@@ -122,6 +130,55 @@ async def startup_event():
     print("=" * 70 + "\n")
     logger.info("🚀 Design Engine API Server Started Successfully")
 
+    # Deletion jobs are resumable; pick up any interrupted by a crash or restart.
+    # Every worker does this, and each job is claimed by exactly one of them.
+    from app.services.data_deletion_service import resume_deletion_jobs
+
+    asyncio.get_running_loop().run_in_executor(None, resume_deletion_jobs)
+
+    if settings.EVAL_WRITE_BEHIND_ENABLED:
+        from app.services.evaluation_ingest_service import start_consumer
+
+        start_consumer()
+
+    # Keep the in-memory token revocation set in step with refresh_tokens
+    from app.auth_cache import start_revocation_sync
+
+    start_revocation_sync()
+
+    # BHIV request events are batched to the Prefect webhook
+    from app.services.prefect_notifier import start_notifier
+
+    start_notifier()
+
+    configure_tracing()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.auth_cache import stop_revocation_sync
+
+    await stop_revocation_sync()
+
+    if settings.EVAL_WRITE_BEHIND_ENABLED:
+        from app.services.evaluation_ingest_service import stop_consumer
+
+        await stop_consumer()
+
+    from app.services.agent_dispatch import close_http_client
+
+    await close_http_client()
+
+    from app.services.prefect_notifier import stop_notifier
+
+    await stop_notifier()
+
+    tracer.shutdown()
+
+    from app.log_pipeline import stop_logging
+
+    stop_logging()
+
 
 # Global exception handler for consistent error responses
 @app.exception_handler(HTTPException)
@@ -146,10 +203,19 @@ if settings.ENABLE_METRICS:
     instrumentator = Instrumentator(
         should_group_status_codes=False,
         should_ignore_untemplated=True,
-        excluded_handlers=["/metrics", "/docs", "/openapi.json"],
+        excluded_handlers=["/metrics", "/metrics/openmetrics", "/docs", "/openapi.json"],
         env_var_name="ENABLE_METRICS",
     )
     instrumentator.instrument(app).expose(app, tags=["📊 Metrics"])
+
+    @app.get("/metrics/openmetrics", tags=["📊 Metrics"], include_in_schema=False)
+    async def openmetrics():
+        """Metrics in OpenMetrics format, which carries stage exemplars (request IDs)"""
+        from prometheus_client import REGISTRY
+        from prometheus_client.openmetrics.exposition import CONTENT_TYPE_LATEST, generate_latest
+
+        return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
     logger.info("✅ Essential metrics enabled")
 else:
     logger.info("📊 Metrics disabled")
@@ -170,25 +236,53 @@ app.add_middleware(
     allow_headers=["Authorization", "Content-Type", "X-Force-Update"],
 )
 
+# Response compression (added after CORS so it wraps every response)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+        cache_max_bytes=settings.COMPRESSION_CACHE_MAX_BYTES,
+    )
+
+# Rate limiting (token buckets keyed by JWT subject or client IP)
+if settings.RATE_LIMIT_ENABLED:
+    app.middleware("http")(rate_limit_middleware)
+
 
 # Request logging middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start_time = time.time()
 
-    # Log incoming request with print and logger
-    request_log = f"🌐 {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}"
-    print(request_log)
-    logger.info(request_log)
+    # Request ID ties log lines and stage metric exemplars to this request
+    request_id = request_id_from_header(request.headers.get("x-request-id"))
+    request_id_var.set(request_id)
+
+    # Log incoming request (queued; formatted on the logging listener thread)
+    client_host = request.client.host if request.client else "unknown"
+    logger.info("🌐 %s %s from %s", request.method, request.url.path, client_host)
 
-    response = await call_next(request)
+    # Server span; joins the caller's trace when a traceparent header is sent
+    with start_span(
+        f"{request.method} {request.url.path}", kind="server", parent=extract(request.headers), request_id=request_id
+    ) as span:
+        span.set_attributes(**{"http.method": request.method, "http.target": request.url.path})
+        response = await call_next(request)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status("ERROR")
 
     # Log response with timing
     process_time = time.time() - start_time
     status_emoji = "✅" if 200 <= response.status_code < 300 else "❌" if response.status_code >= 400 else "⚠️"
-    response_log = f"{status_emoji} {request.method} {request.url.path} → {response.status_code} ({process_time:.3f}s)"
-    print(response_log)
-    logger.info(response_log)
+    logger.info(
+        "%s %s %s → %s (%.3fs)", status_emoji, request.method, request.url.path, response.status_code, process_time
+    )
+    response.headers["X-Request-ID"] = request_id
+    response.headers["X-Trace-ID"] = span.trace_id
 
     return response
 
@@ -237,6 +331,13 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["🔐 Authenticatio
 app.include_router(health.router, prefix="/api/v1", tags=["📊 System Health"], dependencies=[Depends(get_current_user)])
 app.include_router(monitoring_system.router, dependencies=[Depends(get_current_user)])
 
+
+@app.get("/api/v1/compression/stats", tags=["📊 System Health"])
+async def get_compression_stats(current_user: str = Depends(get_current_user)):
+    """Bytes saved by response compression, per route"""
+    return compression_stats.snapshot()
+
+
 # 2. Data Privacy & Security
 app.include_router(
     data_privacy.router, prefix="/api/v1", tags=["🔐 Data Privacy"], dependencies=[Depends(get_current_user)]
@@ -256,6 +357,7 @@ app.include_router(
     iterate.router, prefix="/api/v1", tags=["🔄 Design Iteration"], dependencies=[Depends(get_current_user)]
 )
 app.include_router(switch.router, dependencies=[Depends(get_current_user)])
+app.include_router(sweep.router, dependencies=[Depends(get_current_user)])
 app.include_router(
     history.router, prefix="/api/v1", tags=["📚 Design History"], dependencies=[Depends(get_current_user)]
 )
@@ -268,11 +370,12 @@ async def get_design_history(
     db: Session = Depends(get_db),
     limit: int = 20,
     project_id: str = None,
+    cursor: str = None,
 ):
     """Get user's design history - explicit route"""
     from app.api.history import get_user_history
 
-    return await get_user_history(current_user, db, limit, project_id)
+    return await get_user_history(current_user, db, limit=limit, project_id=project_id, cursor=cursor)
 
 
 # 4. Compliance & Validation
@@ -0,0 +1,295 @@
+"""
+Response compression middleware with Accept-Encoding negotiation.
+Supports zstd and brotli when their packages are installed, and gzip always.
+Buffered responses below a size threshold are sent as-is, streaming
+responses are compressed chunk by chunk, and compressed bodies are cached
+by content hash so repeated payloads are only compressed once.
+"""
+
+import gzip
+import hashlib
+import logging
+import zlib
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Content types worth compressing (JSON, NDJSON, text, XML, JS)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/xml", "application/javascript")
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, in server preference order"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str, supported: List[str]) -> Optional[str]:
+    """Pick the preferred supported encoding the client accepts (q > 0)"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in supported:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk so clients see progress"""
+
+    def __init__(self, encoding: str, levels: Dict[str, int]):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=levels["zstd"]).compressobj()
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=levels["br"])
+        else:
+            self._obj = zlib.compressobj(levels["gzip"], zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "zstd":
+            return self._obj.flush()
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+def compress_body(body: bytes, encoding: str, levels: Dict[str, int]) -> bytes:
+    """One-shot compression of a complete body"""
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=levels["zstd"]).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=levels["br"])
+    return gzip.compress(body, compresslevel=levels["gzip"], mtime=0)
+
+
+class CompressionStats:
+    """Bytes in/out per route, shared by every middleware instance in the process"""
+
+    def __init__(self):
+        self.routes = defaultdict(lambda: {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cache_hits": 0})
+        self.middleware: Optional["CompressionMiddleware"] = None
+
+    def record(self, route: str, bytes_in: int, bytes_out: int, cache_hit: bool = False) -> None:
+        entry = self.routes[route]
+        entry["responses"] += 1
+        entry["bytes_in"] += bytes_in
+        entry["bytes_out"] += bytes_out
+        entry["cache_hits"] += int(cache_hit)
+
+    def snapshot(self) -> Dict:
+        """Bytes saved per route"""
+        routes = {
+            route: {**entry, "bytes_saved": entry["bytes_in"] - entry["bytes_out"]}
+            for route, entry in sorted(self.routes.items())
+        }
+        summary = {
+            "encodings": available_encodings(),
+            "total_bytes_saved": sum(entry["bytes_saved"] for entry in routes.values()),
+            "routes": routes,
+        }
+        if self.middleware is not None:
+            summary.update(minimum_size=self.middleware.minimum_size, **self.middleware.cache_info())
+        return summary
+
+    def reset(self) -> None:
+        self.routes.clear()
+
+
+compression_stats = CompressionStats()
+
+
+class CompressionMiddleware:
+    """ASGI middleware that negotiates and applies response compression"""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        cache_max_bytes: int = 16 * 1024 * 1024,
+        stats: Optional["CompressionStats"] = None,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality, "zstd": zstd_level}
+        self.supported = available_encodings()
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: "OrderedDict[Tuple[str, bytes], bytes]" = OrderedDict()
+        self._cache_bytes = 0
+        self.stats = stats if stats is not None else compression_stats
+        self.stats.middleware = self
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"), self.supported)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, scope, send, encoding)
+        await self.app(scope, receive, responder.send)
+
+    # ------------------------------------------------------------------------
+    # Cache and stats
+    # ------------------------------------------------------------------------
+
+    def compress_cached(self, body: bytes, encoding: str, cacheable: bool = True) -> Tuple[bytes, bool]:
+        """Compressed body, reusing an earlier result for identical bytes"""
+        if not cacheable or self.cache_max_bytes <= 0:
+            return compress_body(body, encoding, self.levels), False
+
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached, True
+
+        compressed = compress_body(body, encoding, self.levels)
+        if len(compressed) <= self.cache_max_bytes // 8:
+            self._cache[key] = compressed
+            self._cache_bytes += len(compressed)
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+        return compressed, False
+
+    def cache_info(self) -> Dict:
+        return {"cache_entries": len(self._cache), "cache_bytes": self._cache_bytes}
+
+
+class _CompressionResponder:
+    """Per-request send wrapper that decides whether and how to compress"""
+
+    def __init__(self, middleware: CompressionMiddleware, scope, send, encoding: str):
+        self.middleware = middleware
+        self.scope = scope
+        self.inner_send = send
+        self.encoding = encoding
+        self.start_message = None
+        self.passthrough = False
+        self.streamer: Optional[_StreamCompressor] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", None) or self.scope.get("path", "unknown")
+
+    def _should_compress(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        if self.start_message["status"] in (204, 304) or self.start_message["status"] < 200:
+            return False
+        values = {name.lower(): value for name, value in headers}
+        if b"content-encoding" in values:
+            return False
+        content_type = values.get(b"content-type", b"").decode("latin-1").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _cacheable(self) -> bool:
+        """Private/no-store payloads are compressed per response and never kept"""
+        for name, value in self.start_message.get("headers", []):
+            if name.lower() == b"cache-control":
+                directives = value.decode("latin-1").lower()
+                return "no-store" not in directives and "private" not in directives
+        return True
+
+    def _headers(self, content_length: Optional[int]) -> List[Tuple[bytes, bytes]]:
+        headers = [(k, v) for k, v in self.start_message["headers"] if k.lower() != b"content-length"]
+        headers.append((b"content-encoding", self.encoding.encode("ascii")))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode("ascii")))
+        return headers
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            self.passthrough = not self._should_compress(list(message.get("headers", [])))
+            if self.passthrough:
+                await self.inner_send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.inner_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.streamer is None and not more_body:
+            # Complete body in a single message
+            await self._send_complete(body)
+            return
+
+        if self.streamer is None:
+            self.streamer = _StreamCompressor(self.encoding, self.middleware.levels)
+            await self.inner_send({**self.start_message, "headers": self._headers(None)})
+
+        self.bytes_in += len(body)
+        chunk = self.streamer.compress(body) if body else b""
+        if not more_body:
+            chunk += self.streamer.finish()
+        self.bytes_out += len(chunk)
+        await self.inner_send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        if not more_body:
+            self.middleware.stats.record(self._route(), self.bytes_in, self.bytes_out)
+
+    async def _send_complete(self, body: bytes):
+        if len(body) < self.middleware.minimum_size:
+            await self.inner_send(self.start_message)
+            await self.inner_send({"type": "http.response.body", "body": body})
+            return
+
+        compressed, cache_hit = self.middleware.compress_cached(body, self.encoding, self._cacheable())
+        if len(compressed) >= len(body):
+            await self.inner_send(self.start_message)
+            await self.inner_send({"type": "http.response.body", "body": body})
+            return
+
+        await self.inner_send({**self.start_message, "headers": self._headers(len(compressed))})
+        await self.inner_send({"type": "http.response.body", "body": compressed})
+        self.middleware.stats.record(self._route(), len(body), len(compressed), cache_hit)
@@ -3,70 +3,272 @@ Rate limiting middleware to prevent abuse and manage resource usage.
 """
 
 import logging
+import os
+import sqlite3
+import threading
 import time
-from collections import defaultdict
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
+from app.auth_cache import token_cache
+from app.config import settings
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
 
 logger = logging.getLogger(__name__)
 
+# Paths that never consume tokens (health checks, metrics scrapes, API docs, static files)
+EXEMPT_PATHS = {
+    "/health",
+    "/api/v1/health",
+    "/metrics",
+    "/metrics/openmetrics",
+    "/docs",
+    "/docs/oauth2-redirect",
+    "/redoc",
+    "/openapi.json",
+}
+EXEMPT_PREFIXES = ("/static/",)
+
+
+# ============================================================================
+# BUCKET STORES
+# ============================================================================
+
+
+class MemoryBucketStore:
+    """
+    Per-process token buckets in an LRU map.
+
+    Buckets are kept in access order, so the least recently used bucket is
+    always first: the map is capped at ``max_entries`` and buckets idle for
+    longer than ``idle_ttl`` seconds are dropped from the front. An idle
+    bucket that has refilled completely is indistinguishable from a new one,
+    so eviction after a full refill never changes a decision.
+    """
+
+    def __init__(self, max_entries: int = 10000, idle_ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost: float, capacity: float, refill_rate: float, now: float) -> Tuple[bool, float]:
+        """Refill, then try to take ``cost`` tokens; returns (allowed, tokens left)"""
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._evict(now)
+            return allowed, tokens
+
+    def peek(self, key: str, capacity: float, refill_rate: float, now: float) -> float:
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+        return min(capacity, tokens + (now - updated) * refill_rate)
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while len(buckets) > self.max_entries:
+            buckets.popitem(last=False)
+        cutoff = now - self.idle_ttl
+        while buckets:
+            _, (_, updated) = next(iter(buckets.items()))
+            if updated >= cutoff:
+                break
+            buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a SQLite file shared by every worker on the host.
+
+    Each take is one ``BEGIN IMMEDIATE`` transaction, so concurrent workers
+    serialize on the bucket row and N workers enforce one limit, not N.
+    Idle rows are pruned every ``prune_every`` takes.
+    """
+
+    def __init__(self, path: str = "data/rate_limits.db", idle_ttl: float = 600.0, prune_every: int = 1000):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.prune_every = prune_every
+        self._local = threading.local()
+        self._takes = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_buckets_updated ON rate_buckets (updated_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, cost: float, capacity: float, refill_rate: float, now: float) -> Tuple[bool, float]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                "INSERT INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now),
+            )
+            self._takes += 1
+            if self._takes % self.prune_every == 0:
+                conn.execute("DELETE FROM rate_buckets WHERE updated_at < ?", (now - self.idle_ttl,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, tokens
+
+    def peek(self, key: str, capacity: float, refill_rate: float, now: float) -> float:
+        row = self._connect().execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return capacity
+        return min(capacity, row[0] + max(0.0, now - row[1]) * refill_rate)
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+
+# ============================================================================
+# RATE LIMITER
+# ============================================================================
+
 
 class RateLimiter:
-    """Simple in-memory rate limiter using token bucket algorithm"""
+    """Token bucket rate limiter with per-route costs and a pluggable bucket store"""
 
-    def __init__(self, requests_per_minute: int = 100):
+    def __init__(
+        self,
+        requests_per_minute: int = 100,
+        store=None,
+        route_costs: Optional[Dict[str, int]] = None,
+    ):
         self.requests_per_minute = requests_per_minute
-        self.clients = defaultdict(lambda: {"tokens": requests_per_minute, "last_update": time.time()})
-
-    def is_allowed(self, client_id: str) -> bool:
-        """Check if request is allowed"""
-        client = self.clients[client_id]
-        now = time.time()
-        elapsed = now - client["last_update"]
+        self.refill_rate = requests_per_minute / 60.0
+        self.store = store if store is not None else MemoryBucketStore()
+        # Longest prefix first, so /api/v1/rl/train/opt wins over /api/v1/rl
+        self.route_costs = sorted((route_costs or {}).items(), key=lambda item: -len(item[0]))
 
-        # Refill tokens (1 token per 0.6 seconds = 100 per minute)
-        refill_rate = self.requests_per_minute / 60.0
-        tokens_to_add = elapsed * refill_rate
+    def cost_for(self, path: str) -> int:
+        """Tokens a request to ``path`` consumes"""
+        for prefix, cost in self.route_costs:
+            if path.startswith(prefix):
+                return cost
+        return 1
 
-        client["tokens"] = min(self.requests_per_minute, client["tokens"] + tokens_to_add)
-        client["last_update"] = now
+    def check(self, client_id: str, cost: int = 1) -> Tuple[bool, float]:
+        """Take ``cost`` tokens if available; returns (allowed, tokens left)"""
+        return self.store.take(client_id, cost, self.requests_per_minute, self.refill_rate, time.time())
 
-        if client["tokens"] >= 1:
-            client["tokens"] -= 1
-            return True
-        return False
+    def is_allowed(self, client_id: str, cost: int = 1) -> bool:
+        """Check if request is allowed"""
+        return self.check(client_id, cost)[0]
 
     def get_remaining(self, client_id: str) -> int:
         """Get remaining requests for client"""
-        return int(self.clients[client_id].get("tokens", 0))
+        return int(self.store.peek(client_id, self.requests_per_minute, self.refill_rate, time.time()))
+
+    def retry_after(self, tokens: float, cost: int) -> int:
+        """Seconds until ``cost`` tokens are available again"""
+        return max(1, int((cost - tokens) / self.refill_rate + 0.999))
+
+    def active_clients(self) -> int:
+        return len(self.store)
+
+
+def build_rate_limiter() -> RateLimiter:
+    """Rate limiter configured from settings"""
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        store = SQLiteBucketStore(settings.RATE_LIMIT_SQLITE_PATH, idle_ttl=settings.RATE_LIMIT_IDLE_TTL_SECONDS)
+    else:
+        store = MemoryBucketStore(settings.RATE_LIMIT_MAX_CLIENTS, idle_ttl=settings.RATE_LIMIT_IDLE_TTL_SECONDS)
+    return RateLimiter(settings.RATE_LIMIT_PER_MINUTE, store=store, route_costs=settings.RATE_LIMIT_ROUTE_COSTS)
 
 
-rate_limiter = RateLimiter(requests_per_minute=100)
+rate_limiter = build_rate_limiter()
+
+
+def _token_subject(token: str) -> Optional[str]:
+    """Subject of a valid, unexpired token; verified tokens are shared with auth's cache"""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached[0]
+    try:
+        import jwt
+
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except Exception:
+        # Expired, forged and malformed tokens are not cached and get no bucket of their own
+        return None
+    subject = payload.get("sub")
+    if subject:
+        token_cache.put(token, subject, payload.get("iat"), payload.get("exp"))
+    return subject
+
+
+def is_exempt(path: str) -> bool:
+    return path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES)
+
+
+def client_key(request: Request) -> str:
+    """Bucket key: the JWT subject for authenticated requests, else the client IP"""
+    authorization = request.headers.get("authorization", "")
+    if authorization[:7].lower() == "bearer ":
+        subject = _token_subject(authorization[7:])
+        if subject:
+            return f"user:{subject}"
+    # Anonymous, expired and invalid tokens (rejected later by auth) are limited by IP
+    return f"ip:{request.client.host if request.client else 'unknown'}"
 
 
 async def rate_limit_middleware(request: Request, call_next):
     """Rate limiting middleware"""
 
-    # Extract client identifier (IP or user ID)
-    client_ip = request.client.host if request.client else "unknown"
-
-    # Skip rate limiting for health checks
-    if request.url.path in ["/api/v1/health", "/metrics"]:
+    # Skip rate limiting for health checks, metrics, docs and static files
+    if is_exempt(request.url.path):
         return await call_next(request)
 
+    client_id = client_key(request)
+    cost = rate_limiter.cost_for(request.url.path)
+
     # Check rate limit
-    if not rate_limiter.is_allowed(client_ip):
-        logger.warning(f"Rate limit exceeded for client {client_ip}")
+    allowed, tokens = rate_limiter.check(client_id, cost)
+    if not allowed:
+        retry_after = rate_limiter.retry_after(tokens, cost)
+        logger.warning(f"Rate limit exceeded for {client_id} on {request.url.path} (cost {cost})")
 
         return JSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(retry_after)},
             content={
                 "error": {
                     "code": "RESOURCE_EXHAUSTED",
                     "message": "Too many requests. Please try again later.",
-                    "details": {"retry_after": 60},
+                    "details": {"retry_after": retry_after, "cost": cost},
                 }
             },
         )
@@ -74,7 +276,8 @@ async def rate_limit_middleware(request: Request, call_next):
     # Add rate limit headers to response
     response = await call_next(request)
     response.headers["X-RateLimit-Limit"] = str(rate_limiter.requests_per_minute)
-    response.headers["X-RateLimit-Remaining"] = str(rate_limiter.get_remaining(client_ip))
+    response.headers["X-RateLimit-Remaining"] = str(int(tokens))
+    response.headers["X-RateLimit-Cost"] = str(cost)
 
     return response
 
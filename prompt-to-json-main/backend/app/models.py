@@ -240,6 +240,7 @@ class Evaluation(Base):
     # Indexes & Constraints
     __table_args__ = (
         Index("ix_evaluations_spec", "spec_id"),
+        Index("ix_evaluations_spec_created", "spec_id", "created_at"),
         Index("ix_evaluations_user", "user_id"),
         CheckConstraint("rating >= 0 AND rating <= 5", name="check_rating_range"),
     )
@@ -0,0 +1,111 @@
+"""
+Keyset (cursor) pagination helpers
+Pages are ordered by (timestamp DESC, id DESC) so each page is a single
+index range scan regardless of how deep the client has paged.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Row, and_, or_
+from sqlalchemy.orm import Query
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """Encode a cursor payload as an opaque URL-safe token"""
+    raw = json.dumps(payload, separators=(",", ":"), default=_json_default).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Decode a cursor token; raises 400 on malformed input.
+
+    Every stream position must be False (stream exhausted) or a
+    [ISO timestamp, id] pair, so a well-formed but tampered cursor is
+    rejected here rather than failing in the query.
+    """
+    if not cursor:
+        return {}
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(payload, dict):
+            raise ValueError("cursor payload must be an object")
+        for position in payload.values():
+            _validate_position(position)
+        return payload
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _validate_position(position: Any) -> None:
+    if position is False:
+        return
+    if not isinstance(position, list) or len(position) != 2:
+        raise ValueError("cursor position must be [timestamp, id]")
+    timestamp, last_id = position
+    if not isinstance(timestamp, str):
+        raise ValueError("cursor timestamp must be a string")
+    datetime.fromisoformat(timestamp)
+    if isinstance(last_id, bool) or not isinstance(last_id, (str, int)):
+        raise ValueError("cursor id must be a string or integer")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Unsupported cursor value: {type(value).__name__}")
+
+
+def keyset_position(row: Any, time_attr: str = "created_at", id_attr: str = "id") -> List[Any]:
+    """Cursor position [timestamp, id] for a row"""
+    timestamp = getattr(row, time_attr)
+    return [timestamp.isoformat(), getattr(row, id_attr)]
+
+
+def paginate_keyset(
+    query: Query,
+    time_column,
+    id_column,
+    position: Optional[List[Any]],
+    limit: int,
+) -> Tuple[list, Optional[List[Any]]]:
+    """
+    Fetch one page of ``query`` ordered by (time_column, id_column) descending.
+
+    ``position`` is the [timestamp, id] of the last row of the previous page.
+    Returns (rows, next_position); next_position is None on the last page.
+    """
+    if position:
+        timestamp = datetime.fromisoformat(position[0])
+        last_id = position[1]
+        query = query.filter(or_(time_column < timestamp, and_(time_column == timestamp, id_column < last_id)))
+
+    # Fetch one extra row to learn whether another page exists without a COUNT
+    rows = query.order_by(time_column.desc(), id_column.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_position = None
+    if has_more and rows:
+        # Multi-entity queries return rows whose first element is the model instance
+        last = rows[-1][0] if isinstance(rows[-1], Row) else rows[-1]
+        next_position = keyset_position(last, time_attr=time_column.key, id_attr=id_column.key)
+    return rows, next_position
+
+
+def parse_fields(fields: Optional[str], allowed: set) -> set:
+    """Parse a comma-separated ``fields=`` projection, rejecting unknown names"""
+    if not fields:
+        return set()
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(allowed))}",
+        )
+    return requested
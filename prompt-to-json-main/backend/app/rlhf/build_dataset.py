@@ -1,3 +1,4 @@
+from app.spec_diff import revert_diff
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
@@ -11,7 +12,7 @@ def build_preferences_from_db(db: Session, min_delta: float = 0.5):
     rows = db.execute(
         text(
             """
-      SELECT i.spec_id, i.spec_json, e.rating AS new_score, e.created_at AS ets
+      SELECT i.spec_id, i.spec_json, i.diff, e.rating AS new_score, e.created_at AS ets
       FROM iterations i
       JOIN evaluations e ON e.spec_id = i.spec_id
       ORDER BY e.created_at DESC
@@ -19,7 +20,7 @@ def build_preferences_from_db(db: Session, min_delta: float = 0.5):
         )
     ).fetchall()
 
-    for spec_id, spec_json, new_score, ets in rows:
+    for spec_id, spec_json, diff, new_score, ets in rows:
         prev = db.execute(
             text(
                 """
@@ -37,6 +38,7 @@ def build_preferences_from_db(db: Session, min_delta: float = 0.5):
         if abs(delta) < min_delta:
             continue
         preferred = "B" if delta > 0 else "A"
-        # Use current spec_json as both before and after for now
-        pairs.append(("Improve design", spec_json, spec_json, preferred))
+        # Rebuild the pre-iteration spec from the stored structural diff
+        before_json = revert_diff(spec_json, diff) if isinstance(diff, dict) else spec_json
+        pairs.append(("Improve design", before_json, spec_json, preferred))
     return pairs
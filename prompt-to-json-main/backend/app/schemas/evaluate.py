@@ -13,7 +13,10 @@ class EvaluateRequest(BaseModel):
 
 class EvaluateResponse(BaseModel):
     ok: bool
+    # "eval_<Evaluation.id>" once stored; empty when the evaluation was only queued
     saved_id: str
+    # Write-behind journal id of a queued evaluation (not an Evaluation row id)
+    queue_id: Optional[str] = None
     feedback_processed: bool
     training_triggered: Optional[bool] = None
     message: str = "Evaluation saved successfully"
@@ -18,3 +18,4 @@ class IterateResponse(BaseModel):
     spec_version: Optional[int] = None
     training_triggered: Optional[bool] = False
     strategy: Optional[str] = None
+    diff: Optional[Dict] = None
@@ -0,0 +1,195 @@
+"""
+Internal agent dispatch
+The BHIV assistant reaches the MCP, compliance, RL and geometry agents
+through their API routes. When an agent is co-located (the default) its
+route handler is invoked directly in-process, skipping the loopback HTTP
+hop, JSON round trip and token re-validation, and no longer holding a
+worker slot while waiting on itself. Agents configured with a remote base
+URL in AGENT_REMOTE_URLS are still called over HTTP. Both paths return the
+route's JSON body and raise AgentCallError on failure, with a per-agent
+timeout from AGENT_TIMEOUTS.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+from app.config import settings
+from app.database import get_db_context
+from app.tracing import inject, start_span
+from fastapi import BackgroundTasks, HTTPException
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AGENT_TIMEOUT = 60.0
+
+_http_client: Optional[httpx.AsyncClient] = None
+# Background tasks scheduled by in-process handlers (kept so they are not garbage collected)
+_background: set = set()
+
+
+class AgentCallError(Exception):
+    """Agent call failed; ``status_code`` mirrors the HTTP status the route would have returned"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+# ============================================================================
+# IN-PROCESS ROUTES
+# ============================================================================
+
+
+def _schedule(background_tasks: BackgroundTasks) -> None:
+    # Over HTTP these run after the response is sent; here they run alongside the caller
+    if background_tasks.tasks:
+        task = asyncio.create_task(background_tasks())
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+
+def _in_thread(coro_fn: Callable[[], Awaitable[Any]]) -> Awaitable[Any]:
+    """Run a CPU-bound handler on its own event loop in a worker thread, off the request loop"""
+    return asyncio.to_thread(lambda: asyncio.run(coro_fn()))
+
+
+async def _mcp_check(payload: Dict[str, Any], user: Optional[str]) -> Any:
+    from app.api.mcp_integration import MCPRequest, mcp_compliance_check
+
+    background_tasks = BackgroundTasks()
+    result = await mcp_compliance_check(MCPRequest(**payload), background_tasks)
+    _schedule(background_tasks)
+    return result
+
+
+async def _compliance_run_case(payload: Dict[str, Any], user: Optional[str]) -> Any:
+    from app.api.compliance import run_case
+
+    return await run_case(dict(payload), current_user=user)
+
+
+async def _rl_train_opt(payload: Dict[str, Any], user: Optional[str]) -> Any:
+    from app.api.rl import train_opt_ep
+
+    # PPO training is synchronous CPU work inside an async handler
+    return await _in_thread(lambda: train_opt_ep(dict(payload), user=user))
+
+
+async def _rl_train_rlhf(payload: Dict[str, Any], user: Optional[str]) -> Any:
+    from app.api.rl import train_rlhf_ep
+
+    def train():
+        with get_db_context() as db:
+            return asyncio.run(train_rlhf_ep(dict(payload), user=user, db=db))
+
+    return await asyncio.to_thread(train)
+
+
+async def _geometry_generate(payload: Dict[str, Any], user: Optional[str]) -> Any:
+    from app.api.geometry_generator import GeometryRequest, generate_geometry
+
+    request = GeometryRequest(**payload)
+    return await _in_thread(lambda: generate_geometry(request, BackgroundTasks()))
+
+
+IN_PROCESS_ROUTES: Dict[str, Callable[[Dict[str, Any], Optional[str]], Awaitable[Any]]] = {
+    "/api/v1/mcp/check": _mcp_check,
+    "/api/v1/compliance/run_case": _compliance_run_case,
+    "/api/v1/rl/train/opt": _rl_train_opt,
+    "/api/v1/rl/train/rlhf": _rl_train_rlhf,
+    "/api/v1/geometry/generate": _geometry_generate,
+}
+
+
+# ============================================================================
+# DISPATCH
+# ============================================================================
+
+
+def agent_timeout(agent: str) -> float:
+    return float(settings.AGENT_TIMEOUTS.get(agent, DEFAULT_AGENT_TIMEOUT))
+
+
+def is_remote(agent: str) -> bool:
+    return bool(settings.AGENT_REMOTE_URLS.get(agent))
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(limits=httpx.Limits(max_connections=50, max_keepalive_connections=20))
+    return _http_client
+
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def _call_remote(
+    base_url: str, path: str, payload: Dict[str, Any], auth_token: Optional[str], timeout: float
+) -> Dict[str, Any]:
+    headers = inject({"Content-Type": "application/json"})
+    if auth_token:
+        headers["Authorization"] = f"Bearer {auth_token}"
+    try:
+        resp = await _get_http_client().post(
+            base_url.rstrip("/") + path, json=payload, headers=headers, timeout=timeout
+        )
+        resp.raise_for_status()
+        return resp.json()
+    except httpx.HTTPStatusError as e:
+        raise AgentCallError(e.response.status_code, e.response.text[:500])
+    except httpx.TimeoutException:
+        raise AgentCallError(504, f"Timed out after {timeout:.0f}s")
+    except httpx.HTTPError as e:
+        raise AgentCallError(503, str(e) or type(e).__name__)
+
+
+async def _call_in_process(path: str, payload: Dict[str, Any], user: Optional[str], timeout: float) -> Dict[str, Any]:
+    handler = IN_PROCESS_ROUTES.get(path)
+    if handler is None:
+        raise AgentCallError(404, f"No in-process handler for {path}")
+    try:
+        result = await asyncio.wait_for(handler(payload, user), timeout=timeout)
+    except HTTPException as e:
+        raise AgentCallError(e.status_code, str(e.detail))
+    except asyncio.TimeoutError:
+        raise AgentCallError(504, f"Timed out after {timeout:.0f}s")
+    except AgentCallError:
+        raise
+    except Exception as e:
+        # Unhandled errors would have been a 500 over HTTP
+        raise AgentCallError(500, f"{type(e).__name__}: {e}")
+    # Same JSON body the route would have returned
+    return jsonable_encoder(result)
+
+
+async def call_agent(
+    agent: str,
+    path: str,
+    payload: Dict[str, Any],
+    user: Optional[str] = None,
+    auth_token: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    POST ``payload`` to the agent route at ``path`` and return its JSON body
+
+    Args:
+        agent: Agent name, the key for AGENT_TIMEOUTS and AGENT_REMOTE_URLS
+        path: API route, e.g. "/api/v1/mcp/check"
+        user: Authenticated caller, passed to in-process handlers
+        auth_token: Bearer token forwarded to remote agents
+    """
+    timeout = agent_timeout(agent)
+    base_url = settings.AGENT_REMOTE_URLS.get(agent)
+    with start_span("agent_dispatch", path=path, mode="http" if base_url else "in_process"):
+        if base_url:
+            return await _call_remote(base_url, path, payload, auth_token, timeout)
+        return await _call_in_process(path, payload, user, timeout)
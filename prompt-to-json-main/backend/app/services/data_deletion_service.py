@@ -0,0 +1,298 @@
+"""
+Batched cascading user-data deletion (GDPR)
+Deletes a user's rows table by table in bounded batches, committing after
+each batch so no request holds long locks. Job progress is persisted to disk
+after every batch; every phase is idempotent, so an interrupted job is
+resumed simply by running it again. A job is claimed with an OS lock on its
+lock file, so only one worker process runs it and a crash releases the claim.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.models import AuditLog, ComplianceCheck, Evaluation, Iteration, RLFeedback, Spec, VRRender
+from app.utils import log_audit_event
+from sqlalchemy.orm import Session
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+DELETION_BATCH_SIZE = 500
+STORAGE_REMOVE_BATCH_SIZE = 100
+DELETION_JOB_DIR = "data/deletion_jobs"
+
+# Rows the user authored directly, deleted before their specs
+USER_OWNED_TABLES = [
+    ("iterations", Iteration),
+    ("evaluations", Evaluation),
+    ("rl_feedback", RLFeedback),
+    ("vr_renders", VRRender),
+]
+
+# Phase order: user-owned rows, then specs (with rows other users left on them), then audit logs
+PHASES = [name for name, _ in USER_OWNED_TABLES] + ["specs", "audit_logs"]
+
+# job_id -> descriptor of the held lock file, for jobs this process is running
+_running_jobs: Dict[str, int] = {}
+_running_lock = threading.Lock()
+
+
+# ============================================================================
+# JOB STATE
+# ============================================================================
+
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(DELETION_JOB_DIR, f"{job_id}.json")
+
+
+def _save_job(job: Dict) -> None:
+    os.makedirs(DELETION_JOB_DIR, exist_ok=True)
+    job["updated_at"] = datetime.now(timezone.utc).isoformat()
+    tmp_path = _job_path(job["job_id"]) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp_path, _job_path(job["job_id"]))
+
+
+def _lock_job_file(job_id: str) -> Optional[int]:
+    """Lock the job's lock file without blocking; returns the descriptor, or None if another process holds it"""
+    os.makedirs(DELETION_JOB_DIR, exist_ok=True)
+    fd = os.open(os.path.join(DELETION_JOB_DIR, f"{job_id}.lock"), os.O_CREAT | os.O_RDWR)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock_job_file(fd: int) -> None:
+    # The OS also drops the lock if the process dies, so a crashed job can be resumed
+    if not fcntl:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    os.close(fd)
+
+
+def get_deletion_job(job_id: str) -> Optional[Dict]:
+    """Load deletion job state, or None if unknown"""
+    try:
+        with open(_job_path(job_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def create_deletion_job(user_id: str, requested_by: str) -> Dict:
+    """Register a queued deletion job"""
+    job = {
+        "job_id": f"delete_{uuid.uuid4().hex[:12]}",
+        "user_id": user_id,
+        "requested_by": requested_by,
+        "status": "queued",
+        "progress": {phase: {"deleted": 0, "done": False} for phase in PHASES},
+        "files_deleted": 0,
+        "attempts": 0,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "completed_at": None,
+        "error": None,
+    }
+    _save_job(job)
+    return job
+
+
+def list_unfinished_jobs() -> List[Dict]:
+    """Jobs that were queued or interrupted mid-run"""
+    if not os.path.isdir(DELETION_JOB_DIR):
+        return []
+    jobs = []
+    for name in os.listdir(DELETION_JOB_DIR):
+        if name.endswith(".json"):
+            job = get_deletion_job(name[: -len(".json")])
+            if job and job["status"] in ("queued", "running"):
+                jobs.append(job)
+    return jobs
+
+
+# ============================================================================
+# STORAGE
+# ============================================================================
+
+
+def _storage_paths(specs: List[tuple], iteration_ids: List[str]) -> Dict[str, List[str]]:
+    """Object paths written for these specs by generate, iterate, switch and geometry uploads"""
+    previews, geometry = [], []
+    for spec_id, version in specs:
+        previews.append(f"{spec_id}.glb")
+        previews.extend(f"{spec_id}_v{n}.glb" for n in range(1, (version or 1) + 1))
+        geometry.extend([f"{spec_id}.glb", f"{spec_id}.stl"])
+    previews.extend(f"{iter_id}.glb" for iter_id in iteration_ids)
+    return {"previews": previews, "geometry": geometry}
+
+
+def remove_storage_objects(paths_by_bucket: Dict[str, List[str]]) -> int:
+    """Bulk-remove storage objects, STORAGE_REMOVE_BATCH_SIZE paths per call"""
+    from app.storage import get_bucket_name, supabase
+
+    removed = 0
+    for bucket, paths in paths_by_bucket.items():
+        storage = supabase.storage.from_(get_bucket_name(bucket))
+        for start in range(0, len(paths), STORAGE_REMOVE_BATCH_SIZE):
+            batch = paths[start : start + STORAGE_REMOVE_BATCH_SIZE]
+            try:
+                result = storage.remove(batch)
+                removed += len(result) if isinstance(result, list) else 0
+            except Exception as e:
+                # Missing objects are fine; a failed call must not block row deletion
+                logger.warning(f"Bulk storage removal failed for {len(batch)} objects in {bucket}: {e}")
+    return removed
+
+
+# ============================================================================
+# DELETION PHASES
+# ============================================================================
+
+
+def _delete_user_rows(db: Session, model, user_id: str, batch_size: int) -> int:
+    """Delete one batch of a user's rows; returns the number deleted"""
+    ids = [row[0] for row in db.query(model.id).filter(model.user_id == user_id).limit(batch_size).all()]
+    if not ids:
+        return 0
+    db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(ids)
+
+
+def _delete_spec_batch(db: Session, user_id: str, batch_size: int, delete_files: bool) -> tuple:
+    """Delete one batch of specs with their storage objects and dependent rows"""
+    specs = db.query(Spec.id, Spec.version).filter(Spec.user_id == user_id).limit(batch_size).all()
+    if not specs:
+        return 0, 0
+
+    spec_ids = [spec_id for spec_id, _ in specs]
+    iteration_ids = [row[0] for row in db.query(Iteration.id).filter(Iteration.spec_id.in_(spec_ids)).all()]
+
+    # Storage first: if we crash after this, the rows are still there to drive a retry
+    files_deleted = remove_storage_objects(_storage_paths(specs, iteration_ids)) if delete_files else 0
+
+    # Rows other users left on these specs (the FK cascades are not relied upon)
+    for model in (Iteration, Evaluation, ComplianceCheck, VRRender):
+        db.query(model).filter(model.spec_id.in_(spec_ids)).delete(synchronize_session=False)
+    db.query(RLFeedback).filter(RLFeedback.spec_id.in_(spec_ids)).update(
+        {RLFeedback.spec_id: None}, synchronize_session=False
+    )
+    db.query(Spec).filter(Spec.id.in_(spec_ids)).delete(synchronize_session=False)
+    db.commit()
+    return len(spec_ids), files_deleted
+
+
+def run_deletion_job(
+    job_id: str, batch_size: int = DELETION_BATCH_SIZE, delete_files: bool = True, db: Optional[Session] = None
+) -> Optional[Dict]:
+    """Run (or resume) a deletion job to completion"""
+    with _running_lock:
+        # Every worker process resumes unfinished jobs at startup; the file lock lets only one run each
+        fd = None if job_id in _running_jobs else _lock_job_file(job_id)
+        if fd is None:
+            logger.info(f"Deletion job {job_id} is already running")
+            return get_deletion_job(job_id)
+        _running_jobs[job_id] = fd
+
+    # Read after claiming: another process may have finished the job since it was listed
+    job = get_deletion_job(job_id)
+    if not job or job["status"] == "completed":
+        if not job:
+            logger.error(f"Deletion job {job_id} not found")
+        with _running_lock:
+            _unlock_job_file(_running_jobs.pop(job_id))
+        return job
+
+    owns_session = db is None
+    if owns_session:
+        from app.database import SessionLocal
+
+        db = SessionLocal()
+
+    user_id = job["user_id"]
+    job["status"] = "running"
+    job["attempts"] += 1
+    job["error"] = None
+    _save_job(job)
+
+    try:
+        for phase in PHASES:
+            progress = job["progress"][phase]
+            if progress["done"]:
+                continue
+
+            while True:
+                if phase == "specs":
+                    deleted, files = _delete_spec_batch(db, user_id, batch_size, delete_files)
+                    job["files_deleted"] += files
+                elif phase == "audit_logs":
+                    deleted = _delete_user_rows(db, AuditLog, user_id, batch_size)
+                else:
+                    deleted = _delete_user_rows(db, dict(USER_OWNED_TABLES)[phase], user_id, batch_size)
+
+                if not deleted:
+                    break
+                progress["deleted"] += deleted
+                _save_job(job)
+
+            progress["done"] = True
+            _save_job(job)
+            logger.info(f"Deletion job {job_id}: {phase} done ({progress['deleted']} rows)")
+
+        job["status"] = "completed"
+        job["completed_at"] = datetime.now(timezone.utc).isoformat()
+
+        # Logged after the audit_logs phase so it is the last audit entry for this user
+        log_audit_event(
+            "data_deletion",
+            user_id,
+            {
+                "deleted_by": job["requested_by"],
+                "job_id": job_id,
+                "specs_deleted": job["progress"]["specs"]["deleted"],
+                "files_deleted": job["files_deleted"],
+            },
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Deletion job {job_id} failed: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+    finally:
+        _save_job(job)
+        if owns_session:
+            db.close()
+        with _running_lock:
+            _unlock_job_file(_running_jobs.pop(job_id))
+
+    return job
+
+
+def resume_deletion_jobs() -> int:
+    """Resume jobs interrupted by a crash or restart; returns how many this process ran"""
+    resumed = 0
+    for job in list_unfinished_jobs():
+        logger.info(f"Resuming deletion job {job['job_id']} for user {job['user_id']}")
+        result = run_deletion_job(job["job_id"])
+        # Jobs claimed by another worker come back untouched
+        if result and result["attempts"] > job["attempts"]:
+            resumed += 1
+    return resumed
@@ -0,0 +1,232 @@
+"""
+Streaming user data export (GDPR)
+Walks each user-owned table with server-side cursors and writes NDJSON
+entries plus stored preview/geometry files into a ZIP that is produced
+chunk by chunk, so memory stays flat regardless of account size.
+"""
+
+import json
+import logging
+import os
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+from app.models import Evaluation, Iteration, RLFeedback, Spec, VRRender
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Tables exported per user, in archive order
+EXPORT_TABLES = {
+    "specs": Spec,
+    "iterations": Iteration,
+    "evaluations": Evaluation,
+    "rl_feedback": RLFeedback,
+    "vr_renders": VRRender,
+}
+
+EXPORT_BATCH_SIZE = 500
+FILE_CHUNK_SIZE = 64 * 1024
+EXPORT_DIR = "data/exports"
+
+
+def serialize_row(row) -> Dict:
+    """Column values of an ORM row as JSON-safe primitives"""
+    data = {}
+    for column in row.__table__.columns:
+        value = getattr(row, column.key)
+        data[column.key] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+def iter_user_rows(db: Session, model, user_id: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator:
+    """Yield a user's rows using a server-side cursor, ``batch_size`` rows at a time"""
+    query = db.query(model).filter(model.user_id == user_id).order_by(model.created_at, model.id)
+    for row in query.execution_options(stream_results=True).yield_per(batch_size):
+        yield row
+        # Rows are not needed after serialization; keep the identity map small
+        db.expunge(row)
+
+
+def iter_ndjson(db: Session, model, user_id: str) -> Iterator[bytes]:
+    """NDJSON lines for one table"""
+    for row in iter_user_rows(db, model, user_id):
+        yield (json.dumps(serialize_row(row), default=str) + "\n").encode("utf-8")
+
+
+def _iter_remote_file(client: httpx.Client, url: str) -> Iterator[bytes]:
+    """Stream a stored file in chunks; yields nothing if it cannot be fetched"""
+    try:
+        with client.stream("GET", url) as response:
+            if response.status_code != 200:
+                logger.warning(f"Skipping export file {url}: HTTP {response.status_code}")
+                return
+            for chunk in response.iter_bytes(FILE_CHUNK_SIZE):
+                yield chunk
+    except httpx.HTTPError as e:
+        logger.warning(f"Skipping export file {url}: {e}")
+
+
+def _spec_files(db: Session, user_id: str) -> Iterator[tuple]:
+    """(archive path, url) pairs for each user spec's stored preview and geometry"""
+    query = (
+        db.query(Spec.id, Spec.preview_url, Spec.geometry_url)
+        .filter(Spec.user_id == user_id)
+        .order_by(Spec.created_at, Spec.id)
+    )
+    for spec_id, preview_url, geometry_url in query.execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE):
+        for kind, url in (("preview", preview_url), ("geometry", geometry_url)):
+            if url and url.startswith("http") and "mock" not in url:
+                extension = os.path.splitext(url.split("?", 1)[0])[1] or ".glb"
+                yield f"files/{spec_id}/{kind}{extension}", url
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._offset = 0
+
+    def write(self, data: bytes) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def iter_export_zip(db: Session, user_id: str, include_files: bool = True) -> Iterator[bytes]:
+    """
+    Produce a ZIP archive of all user data as a stream of byte chunks.
+
+    Layout: ``manifest.json``, one ``<table>.ndjson`` per table, and
+    ``files/<spec_id>/preview|geometry.*`` for stored assets.
+    """
+    sink = _ChunkSink()
+    counts = {}
+
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for table, model in EXPORT_TABLES.items():
+            count = 0
+            with archive.open(f"{table}.ndjson", mode="w", force_zip64=True) as entry:
+                for line in iter_ndjson(db, model, user_id):
+                    entry.write(line)
+                    count += 1
+                    yield from sink.drain()
+            counts[table] = count
+            yield from sink.drain()
+
+        files_exported = 0
+        if include_files:
+            with httpx.Client(timeout=30.0, follow_redirects=True) as client:
+                for archive_path, url in _spec_files(db, user_id):
+                    with archive.open(archive_path, mode="w", force_zip64=True) as entry:
+                        for chunk in _iter_remote_file(client, url):
+                            entry.write(chunk)
+                            yield from sink.drain()
+                    files_exported += 1
+                    yield from sink.drain()
+
+        manifest = {
+            "user_id": user_id,
+            "export_timestamp": datetime.now(timezone.utc).isoformat(),
+            "format": "ndjson+zip",
+            "record_counts": counts,
+            "files_exported": files_exported,
+        }
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+
+    yield from sink.drain()
+
+
+# ============================================================================
+# BACKGROUND ARCHIVE JOBS
+# ============================================================================
+
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{job_id}.json")
+
+
+def archive_path(job_id: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{job_id}.zip")
+
+
+def _save_job(job: Dict) -> None:
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    tmp_path = _job_path(job["job_id"]) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(job, f, indent=2)
+    os.replace(tmp_path, _job_path(job["job_id"]))
+
+
+def get_export_job(job_id: str) -> Optional[Dict]:
+    """Load export job state, or None if unknown"""
+    try:
+        with open(_job_path(job_id)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def create_export_job(user_id: str, requested_by: str) -> Dict:
+    """Register a queued background export job"""
+    job = {
+        "job_id": f"export_{uuid.uuid4().hex[:12]}",
+        "user_id": user_id,
+        "requested_by": requested_by,
+        "status": "queued",
+        "bytes_written": 0,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "completed_at": None,
+        "error": None,
+    }
+    _save_job(job)
+    return job
+
+
+def run_export_job(job_id: str, include_files: bool = True) -> None:
+    """Write the export archive to disk (runs as a background task)"""
+    from app.database import SessionLocal
+
+    job = get_export_job(job_id)
+    if not job:
+        logger.error(f"Export job {job_id} not found")
+        return
+
+    job["status"] = "running"
+    _save_job(job)
+
+    db = SessionLocal()
+    tmp_archive = archive_path(job_id) + ".part"
+    try:
+        with open(tmp_archive, "wb") as f:
+            for chunk in iter_export_zip(db, job["user_id"], include_files=include_files):
+                f.write(chunk)
+                job["bytes_written"] += len(chunk)
+        os.replace(tmp_archive, archive_path(job_id))
+        job["status"] = "completed"
+        logger.info(f"Export job {job_id} completed ({job['bytes_written']} bytes)")
+    except Exception as e:
+        logger.error(f"Export job {job_id} failed: {e}")
+        job["status"] = "failed"
+        job["error"] = str(e)
+        if os.path.exists(tmp_archive):
+            os.remove(tmp_archive)
+    finally:
+        db.close()
+        job["completed_at"] = datetime.now(timezone.utc).isoformat()
+        _save_job(job)
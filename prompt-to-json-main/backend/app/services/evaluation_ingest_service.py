@@ -0,0 +1,321 @@
+"""
+Write-behind evaluation ingestion
+Evaluations are appended (and fsynced) to a local journal before the request
+is acknowledged. A background consumer rotates the journal, inserts the
+records in batches and runs feedback-loop processing once per spec.
+Delivery is at-least-once: a crash between commit and journal removal
+replays that batch.
+
+Several workers may share EVAL_QUEUE_DIR. Each process appends to its own
+journal, and a consumer claims a rotated batch by renaming it to a
+per-worker name before reading it, so every batch is inserted by exactly
+one worker. Batches and journals left behind by a dead worker are taken
+over once they are older than EVAL_CLAIM_TIMEOUT_SECONDS.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.models import Evaluation
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+REJECTED_FILE = "rejected.jsonl"
+
+_journal_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_pending_count = 0
+_wakeup: Optional[asyncio.Event] = None
+_consumer_task: Optional[asyncio.Task] = None
+
+stats = {"enqueued": 0, "inserted": 0, "rejected": 0, "batches": 0, "last_flush_at": None}
+
+
+def _queue_path(name: str) -> str:
+    return os.path.join(settings.EVAL_QUEUE_DIR, name)
+
+
+def pending_file() -> str:
+    """This process's journal (evaluated per call, so forked workers get their own)"""
+    return f"pending-{os.getpid()}.jsonl"
+
+
+# ============================================================================
+# PRODUCER
+# ============================================================================
+
+
+def enqueue_evaluation(spec_id: str, user_id: str, rating: float, notes: str = "") -> str:
+    """Durably append an evaluation to the journal; returns its queue id"""
+    global _pending_count
+
+    record = {
+        "queue_id": f"eval_{uuid.uuid4().hex[:8]}",
+        "spec_id": spec_id,
+        "user_id": user_id,
+        "rating": rating,
+        "notes": notes,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    line = (json.dumps(record) + "\n").encode("utf-8")
+
+    with _journal_lock:
+        os.makedirs(settings.EVAL_QUEUE_DIR, exist_ok=True)
+        fd = os.open(_queue_path(pending_file()), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        _pending_count += 1
+        stats["enqueued"] += 1
+        full = _pending_count >= settings.EVAL_BATCH_SIZE
+
+    if full and _wakeup is not None:
+        _wakeup.set()
+    return record["queue_id"]
+
+
+# ============================================================================
+# CONSUMER
+# ============================================================================
+
+
+def _rotate_journal() -> None:
+    """Move the pending journal aside so producers start a fresh one"""
+    global _pending_count
+
+    with _journal_lock:
+        pending = _queue_path(pending_file())
+        if os.path.exists(pending) and os.path.getsize(pending) > 0:
+            os.replace(pending, _queue_path(f"inflight-{time.time_ns()}-{os.getpid()}.jsonl"))
+        _pending_count = 0
+
+
+def _recover_orphans() -> None:
+    """Return batches and journals of dead workers (untouched past the claim timeout) to the queue"""
+    cutoff = time.time() - settings.EVAL_CLAIM_TIMEOUT_SECONDS
+    own_journal = _queue_path(pending_file())
+    orphans = glob.glob(_queue_path("claimed-*.jsonl")) + glob.glob(_queue_path("pending*.jsonl"))
+    for path in orphans:
+        if path == own_journal:
+            continue
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+            name = os.path.basename(path)
+            if name.startswith("claimed-"):
+                os.rename(path, _queue_path(_unclaimed_name(name)))
+            else:
+                os.rename(path, _queue_path(f"inflight-{time.time_ns()}-{os.getpid()}.jsonl"))
+            logger.warning(f"Recovered orphaned evaluation batch {name}")
+        except FileNotFoundError:
+            # Another worker recovered it first
+            continue
+
+
+def _claim_batches() -> List[str]:
+    """
+    Claim rotated batches by renaming them to this worker's name; the rename
+    is atomic, so a batch claimed by another worker is skipped
+    """
+    claimed = []
+    for path in sorted(glob.glob(_queue_path("inflight-*.jsonl"))):
+        target = _queue_path(f"claimed-{os.getpid()}-{os.path.basename(path)}")
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            continue
+        # The claim time starts the lease other workers wait out before recovering it
+        os.utime(target)
+        claimed.append(target)
+    return claimed
+
+
+def _unclaimed_name(name: str) -> str:
+    # claimed-<pid>-inflight-... -> inflight-...
+    return name.split("-", 2)[2]
+
+
+def _release(paths: List[str]) -> None:
+    """Hand claimed batches back to the queue for the next flush"""
+    for path in paths:
+        try:
+            os.rename(path, _queue_path(_unclaimed_name(os.path.basename(path))))
+        except FileNotFoundError:
+            continue
+
+
+def _read_batch(path: str) -> List[Dict]:
+    records = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-append
+                logger.warning(f"Skipping malformed queued evaluation in {path}")
+    return records
+
+
+def _row(record: Dict) -> Dict:
+    return {
+        "spec_id": record["spec_id"],
+        "user_id": record["user_id"],
+        "rating": record["rating"],
+        "notes": record.get("notes") or "",
+        "created_at": datetime.fromisoformat(record["created_at"]),
+    }
+
+
+def _reject(records: List[Dict], error: str) -> None:
+    with open(_queue_path(REJECTED_FILE), "a") as f:
+        for record in records:
+            f.write(json.dumps({**record, "error": error}) + "\n")
+    stats["rejected"] += len(records)
+
+
+def _insert_batch(db: Session, records: List[Dict]) -> List[Dict]:
+    """Insert records in one transaction; returns the records that were stored"""
+    try:
+        db.execute(insert(Evaluation), [_row(record) for record in records])
+        db.commit()
+        return records
+    except IntegrityError:
+        # e.g. a spec deleted after enqueue: isolate the bad rows instead of blocking the batch
+        db.rollback()
+
+    stored, rejected = [], []
+    for record in records:
+        try:
+            db.execute(insert(Evaluation), [_row(record)])
+            db.commit()
+            stored.append(record)
+        except IntegrityError as e:
+            db.rollback()
+            rejected.append(record)
+            logger.warning(f"Rejected queued evaluation {record['queue_id']}: {e.orig}")
+    if rejected:
+        _reject(rejected, "integrity_error")
+    return stored
+
+
+def _process_feedback(db: Session, records: List[Dict]) -> None:
+    """Feedback-loop aggregation and training check, coalesced per spec"""
+    from app.api.reports import invalidate_report_cache
+    from app.feedback_loop import IterativeFeedbackCycle
+
+    for spec_id in {record["spec_id"] for record in records}:
+        invalidate_report_cache(spec_id)
+
+    try:
+        result = IterativeFeedbackCycle(db).process_evaluation_batch(records)
+        if result["training_triggered"]:
+            logger.info(f"Training triggered after ingesting {len(records)} evaluations")
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Feedback loop processing failed (non-blocking): {e}")
+
+
+def flush_evaluations(db: Optional[Session] = None) -> int:
+    """Drain the journal into the database; returns the number of rows inserted"""
+    with _flush_lock:
+        _rotate_journal()
+        # Includes batches left behind by a crash
+        _recover_orphans()
+        batch_files = _claim_batches()
+        if not batch_files:
+            return 0
+
+        owns_session = db is None
+        if owns_session:
+            from app.database import SessionLocal
+
+            db = SessionLocal()
+
+        inserted = 0
+        try:
+            for position, path in enumerate(batch_files):
+                records = _read_batch(path)
+                try:
+                    stored = _insert_batch(db, records) if records else []
+                except Exception as e:
+                    # Database unavailable: hand the batches back for the next flush
+                    db.rollback()
+                    logger.error(f"Evaluation batch insert failed, will retry: {e}")
+                    _release(batch_files[position:])
+                    break
+
+                os.remove(path)
+                inserted += len(stored)
+                stats["inserted"] += len(stored)
+                stats["batches"] += 1
+                if stored:
+                    _process_feedback(db, stored)
+        finally:
+            if owns_session:
+                db.close()
+
+        stats["last_flush_at"] = datetime.now(timezone.utc).isoformat()
+        if inserted:
+            logger.info(f"Ingested {inserted} queued evaluations from {len(batch_files)} batch(es)")
+        return inserted
+
+
+async def _consume() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.EVAL_FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        try:
+            await loop.run_in_executor(None, flush_evaluations)
+        except Exception as e:
+            logger.error(f"Evaluation consumer flush failed: {e}")
+
+
+def start_consumer() -> None:
+    """Start the background consumer on the running event loop"""
+    global _wakeup, _consumer_task
+
+    if _consumer_task is not None and not _consumer_task.done():
+        return
+    _wakeup = asyncio.Event()
+    _consumer_task = asyncio.get_running_loop().create_task(_consume())
+    logger.info("Evaluation write-behind consumer started")
+
+
+async def stop_consumer() -> None:
+    """Stop the consumer and flush whatever is still queued"""
+    global _consumer_task
+
+    if _consumer_task is not None:
+        _consumer_task.cancel()
+        try:
+            await _consumer_task
+        except asyncio.CancelledError:
+            pass
+        _consumer_task = None
+    await asyncio.get_running_loop().run_in_executor(None, flush_evaluations)
+
+
+def get_ingest_stats() -> Dict:
+    """Queue depth and throughput counters"""
+    return {**stats, "pending": _pending_count, "consumer_running": _consumer_task is not None}
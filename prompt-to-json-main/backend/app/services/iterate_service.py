@@ -10,11 +10,14 @@ import os
 from datetime import datetime, timezone
 from typing import Dict, Tuple
 
+from app.cost_engine import BREAKDOWN_KEY, COST_FIELDS, apply_cost_breakdown, spec_cost_total, update_cost_breakdown
 from app.database import get_db
 from app.error_handler import APIException
 from app.lm_adapter import lm_run
 from app.models import Iteration, Spec
 from app.schemas.error_schemas import ErrorCode
+from app.spec_diff import diff_specs, extend_diff, requires_compliance_recheck
+from app.stage_metrics import set_request_labels, stage
 from app.storage import get_signed_url, upload_to_bucket
 from app.utils import create_iter_id, generate_glb_from_spec
 from sqlalchemy.orm import Session
@@ -42,9 +45,11 @@ class IterateService:
         from app.spec_storage import get_spec
 
         # Try in-memory storage first (for genuine responses)
-        stored_spec = get_spec(spec_id)
+        with stage("spec_store_lookup") as timer:
+            stored_spec = get_spec(spec_id)
+            timer.set(status="miss" if stored_spec is None else "hit")
         if stored_spec:
-            print(f"✅ Found spec {spec_id} in storage - generating GENUINE response")
+            logger.debug("Found spec %s in storage", spec_id)
             spec_json = stored_spec["spec_json"]
             spec_version = stored_spec.get("spec_version", 1)
         else:
@@ -85,7 +90,7 @@ class IterateService:
                         },
                     )
 
-                print(f"⚠️ Spec {spec_id} not found in storage or database - using mock response")
+                logger.warning("Spec %s not found in storage or database - using mock response", spec_id)
                 # Return mock response for missing specs
                 return {
                     "before": {"design_type": "mock", "objects": []},
@@ -100,20 +105,13 @@ class IterateService:
 
         # Continue with genuine processing using stored spec
         before_spec = copy.deepcopy(spec_json)
+        set_request_labels(design_type=(spec_json or {}).get("design_type"))
 
         # before_spec already set above
 
         # 2. Apply improvement based on strategy
         try:
-            if strategy == "auto_optimize":
-                improved_spec = await self._improve_with_rl_or_fallback(spec_json)
-            elif strategy == "improve_materials":
-                improved_spec = await self._improve_materials(spec_json)
-            elif strategy == "improve_layout":
-                improved_spec = await self._improve_layout(spec_json)
-            elif strategy == "improve_colors":
-                improved_spec = await self._improve_colors(spec_json)
-            else:
+            if strategy not in ("auto_optimize", "improve_materials", "improve_layout", "improve_colors"):
                 raise APIException(
                     status_code=400,
                     error_code=ErrorCode.INVALID_INPUT,
@@ -122,6 +120,15 @@ class IterateService:
                         "valid_strategies": ["auto_optimize", "improve_materials", "improve_layout", "improve_colors"]
                     },
                 )
+            with stage("iterate_improve"):
+                if strategy == "auto_optimize":
+                    improved_spec = await self._improve_with_rl_or_fallback(spec_json)
+                elif strategy == "improve_materials":
+                    improved_spec = await self._improve_materials(spec_json)
+                elif strategy == "improve_layout":
+                    improved_spec = await self._improve_layout(spec_json)
+                else:
+                    improved_spec = await self._improve_colors(spec_json)
 
         except APIException:
             raise
@@ -131,6 +138,17 @@ class IterateService:
 
         # 3. Save iteration and update stored spec
         iter_id = create_iter_id()
+        diff = diff_specs(before_spec, improved_spec)
+
+        # Re-price only the objects the strategy touched
+        with stage("cost_calc"):
+            old_cost = spec_cost_total(before_spec)
+            new_cost = apply_cost_breakdown(
+                improved_spec, update_cost_breakdown(before_spec.get(BREAKDOWN_KEY), improved_spec, diff)
+            )
+        extend_diff(diff, before_spec, improved_spec, COST_FIELDS)
+        diff["strategy"] = strategy
+        compliance_recheck = requires_compliance_recheck(diff)
 
         # Update in-memory storage if spec was found there
         if stored_spec:
@@ -140,7 +158,7 @@ class IterateService:
             stored_spec["spec_version"] = spec_version + 1
             stored_spec["updated_at"] = datetime.now(timezone.utc).isoformat()
             save_spec(spec_id, stored_spec)
-            print(f"✅ Updated spec {spec_id} in storage with improvements")
+            logger.debug("Updated spec %s in storage with improvements", spec_id)
             spec_version = stored_spec["spec_version"]
         else:
             # Try database save
@@ -152,13 +170,12 @@ class IterateService:
                     user_id=user_id,
                     query=f"Apply {strategy} improvement",
                     nlp_confidence=0.95,
-                    diff={"strategy": strategy, "changes": "material_upgrades"},
+                    diff=diff,
                     spec_json=improved_spec,
-                    changed_objects="auto_generated",
+                    changed_objects=",".join(diff["changed_objects"]),
                     preview_url="https://mock-preview.glb",
-                    cost_delta=improved_spec.get("estimated_cost", {}).get("total", 0)
-                    - before_spec.get("estimated_cost", {}).get("total", 0),
-                    new_total_cost=improved_spec.get("estimated_cost", {}).get("total", 0),
+                    cost_delta=new_cost - old_cost,
+                    new_total_cost=new_cost,
                     processing_time_ms=500,
                 )
                 self.db.add(iteration)
@@ -167,28 +184,33 @@ class IterateService:
                 spec = self.db.query(Spec).filter(Spec.id == spec_id).first()
                 if spec:
                     spec.spec_json = improved_spec
+                    spec.estimated_cost = new_cost
                     spec.version += 1
                     spec.updated_at = datetime.now(timezone.utc)
+                    if compliance_recheck:
+                        spec.compliance_status = "pending"
                     spec_version = spec.version
                 else:
                     spec_version = 2
 
-                self.db.commit()
-                print(f"✅ Saved iteration {iter_id} to database")
+                with stage("db_commit"):
+                    self.db.commit()
+                logger.debug("Saved iteration %s to database", iter_id)
 
             except Exception as e:
                 self.db.rollback()
                 logger.error(f"Error saving iteration: {str(e)}")
-                print(f"⚠️ Database save failed: {e}")
                 iter_id = "iter_mock_123"
                 spec_version = 2
 
         # 4. Generate preview
         preview_url = None
         try:
-            preview_bytes = generate_glb_from_spec(improved_spec)
+            with stage("glb_build"):
+                preview_bytes = generate_glb_from_spec(improved_spec)
             preview_path = f"{spec_id}_v{spec_version}.glb"
-            await upload_to_bucket("previews", preview_path, preview_bytes)
+            with stage("upload"):
+                await upload_to_bucket("previews", preview_path, preview_bytes)
             preview_url = get_signed_url("previews", preview_path, expires=600)
         except Exception as e:
             logger.warning(f"Preview generation failed: {str(e)}")
@@ -212,6 +234,7 @@ class IterateService:
             "spec_version": spec_version,
             "training_triggered": training_triggered,
             "strategy": strategy,
+            "diff": diff,
         }
 
     async def _improve_with_rl_or_fallback(self, spec: Dict) -> Dict:
@@ -327,11 +350,6 @@ class IterateService:
             if "material" in obj:
                 obj["material"] = self._suggest_better_material(obj["material"])
 
-        # Update cost estimate
-        if "estimated_cost" in spec:
-            current_cost = spec["estimated_cost"].get("total", 0)
-            spec["estimated_cost"]["total"] = int(current_cost * 1.15)
-
         return spec
 
     def _improve_layout_direct(self, spec: Dict) -> Dict:
@@ -361,11 +379,6 @@ class IterateService:
                 if "count" in obj:
                     obj["count"] = min(obj["count"] + 4, 16)
 
-        # Update cost for layout improvements
-        if "estimated_cost" in spec:
-            current_cost = spec["estimated_cost"].get("total", 0)
-            spec["estimated_cost"]["total"] = int(current_cost * 1.08)
-
         return spec
 
     def _improve_colors_direct(self, spec: Dict) -> Dict:
@@ -393,9 +406,4 @@ class IterateService:
         spec = self._improve_layout_direct(spec)
         spec = self._improve_colors_direct(spec)
 
-        # Update cost for comprehensive optimization
-        if "estimated_cost" in spec:
-            current_cost = spec["estimated_cost"].get("total", 0)
-            spec["estimated_cost"]["total"] = int(current_cost * 1.1)
-
         return spec
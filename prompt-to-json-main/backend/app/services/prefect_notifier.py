@@ -0,0 +1,231 @@
+"""
+Batched Prefect webhook notifications
+BHIV request events are buffered in memory and posted to PREFECT_WEBHOOK_URL
+as one batch when PREFECT_NOTIFY_BATCH_SIZE events are pending or every
+PREFECT_NOTIFY_FLUSH_INTERVAL_SECONDS, over a pooled HTTP client. Events for
+the same spec are collapsed to the latest one. Batches that cannot be
+delivered are spilled to PREFECT_NOTIFY_QUEUE_DIR and resent, oldest first,
+once Prefect is reachable again. The webhook turns each batch into a
+``bhiv.prompt.batch`` event, which triggers ``bhiv_prompt_batch_flow``.
+"""
+
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+from app.config import settings
+from app.tracing import inject, start_span
+
+logger = logging.getLogger(__name__)
+
+BATCH_EVENT = "bhiv.prompt.batch"
+
+# spec_id -> latest event; insertion order is arrival order of each spec's first pending event
+_buffer: "OrderedDict[str, Dict]" = OrderedDict()
+_flush_lock: Optional[asyncio.Lock] = None
+_wakeup: Optional[asyncio.Event] = None
+_flusher_task: Optional[asyncio.Task] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+stats = {"enqueued": 0, "collapsed": 0, "sent_events": 0, "batches": 0, "spilled_events": 0, "last_flush_at": None}
+
+
+def _queue_path(name: str) -> str:
+    return os.path.join(settings.PREFECT_NOTIFY_QUEUE_DIR, name)
+
+
+# ============================================================================
+# PRODUCER
+# ============================================================================
+
+
+def enqueue_notification(event: Dict) -> None:
+    """Buffer one request event; a newer event for the same spec replaces the pending one"""
+    key = event.get("spec_id") or event.get("request_id") or uuid.uuid4().hex
+    if key in _buffer:
+        stats["collapsed"] += 1
+        event = {**event, "collapsed": _buffer[key].get("collapsed", 0) + 1}
+    _buffer[key] = event
+    stats["enqueued"] += 1
+    if len(_buffer) >= settings.PREFECT_NOTIFY_BATCH_SIZE and _wakeup is not None:
+        _wakeup.set()
+
+
+# ============================================================================
+# DELIVERY
+# ============================================================================
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=10.0, limits=httpx.Limits(max_connections=4, max_keepalive_connections=2)
+        )
+    return _http_client
+
+
+def _batch_body(events: List[Dict], batch_id: str) -> Dict:
+    return {
+        "event": BATCH_EVENT,
+        "event_type": "bhiv_prompt_batch",
+        "batch_id": batch_id,
+        "count": len(events),
+        "sent_at": datetime.now(timezone.utc).isoformat(),
+        "events": events,
+    }
+
+
+async def _post_batch(webhook_url: str, events: List[Dict], batch_id: str) -> None:
+    with start_span("prefect.notify_batch", kind="client", batch_id=batch_id, events=len(events)):
+        resp = await _get_http_client().post(
+            webhook_url, json=_batch_body(events, batch_id), headers=inject({"Content-Type": "application/json"})
+        )
+        resp.raise_for_status()
+
+
+def _spill(events: List[Dict], batch_id: str) -> None:
+    """Durably write an undelivered batch for a later retry"""
+    os.makedirs(settings.PREFECT_NOTIFY_QUEUE_DIR, exist_ok=True)
+    path = _queue_path(f"spill-{time.time_ns()}-{batch_id}.jsonl")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        for event in events:
+            f.write(json.dumps(event, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    stats["spilled_events"] += len(events)
+
+
+def _read_spill(path: str) -> List[Dict]:
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed spilled notification in {path}")
+    return events
+
+
+async def _drain_spilled(webhook_url: str) -> bool:
+    """Resend spilled batches oldest first; returns False if Prefect is still unreachable"""
+    for path in sorted(glob.glob(_queue_path("spill-*.jsonl"))):
+        batch_id = os.path.basename(path)[len("spill-") : -len(".jsonl")].split("-", 1)[-1]
+        events = _read_spill(path)
+        if events:
+            try:
+                await _post_batch(webhook_url, events, batch_id)
+            except Exception as e:
+                logger.warning(f"Prefect still unreachable, keeping spilled batch {batch_id}: {e}")
+                return False
+            stats["sent_events"] += len(events)
+            stats["batches"] += 1
+        os.remove(path)
+    return True
+
+
+async def flush_notifications() -> int:
+    """Send buffered (and previously spilled) events; returns the number of buffered events sent"""
+    global _flush_lock
+
+    webhook_url = settings.PREFECT_WEBHOOK_URL
+    if _flush_lock is None:
+        _flush_lock = asyncio.Lock()
+
+    async with _flush_lock:
+        events = list(_buffer.values())
+        _buffer.clear()
+        if not webhook_url:
+            if events:
+                logger.debug(f"PREFECT_WEBHOOK_URL not configured, dropping {len(events)} notifications")
+            return 0
+
+        reachable = await _drain_spilled(webhook_url)
+        sent = 0
+        size = max(1, settings.PREFECT_NOTIFY_BATCH_SIZE)
+        for start in range(0, len(events), size):
+            chunk = events[start : start + size]
+            batch_id = uuid.uuid4().hex[:12]
+            if reachable:
+                try:
+                    await _post_batch(webhook_url, chunk, batch_id)
+                    sent += len(chunk)
+                    stats["batches"] += 1
+                    continue
+                except Exception as e:
+                    reachable = False
+                    logger.warning(f"Prefect webhook batch failed, spilling to disk: {e}")
+            try:
+                await asyncio.to_thread(_spill, chunk, batch_id)
+            except OSError as e:
+                logger.error(f"Could not spill {len(chunk)} Prefect notifications: {e}")
+
+        stats["sent_events"] += sent
+        stats["last_flush_at"] = datetime.now(timezone.utc).isoformat()
+        if sent:
+            logger.info(f"Sent {sent} BHIV notifications to Prefect")
+        return sent
+
+
+# ============================================================================
+# LIFECYCLE
+# ============================================================================
+
+
+async def _flush_loop() -> None:
+    while True:
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=settings.PREFECT_NOTIFY_FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        _wakeup.clear()
+        try:
+            await flush_notifications()
+        except Exception as e:
+            logger.error(f"Prefect notification flush failed: {e}")
+
+
+def start_notifier() -> None:
+    """Start the background flusher on the running event loop"""
+    global _wakeup, _flusher_task
+
+    if _flusher_task is not None and not _flusher_task.done():
+        return
+    _wakeup = asyncio.Event()
+    _flusher_task = asyncio.get_running_loop().create_task(_flush_loop())
+    logger.info("Prefect notification batcher started")
+
+
+async def stop_notifier() -> None:
+    """Stop the flusher, flush what is buffered (spilling if Prefect is down) and close the client"""
+    global _flusher_task, _http_client
+
+    if _flusher_task is not None:
+        _flusher_task.cancel()
+        try:
+            await _flusher_task
+        except asyncio.CancelledError:
+            pass
+        _flusher_task = None
+    await flush_notifications()
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_notifier_stats() -> Dict:
+    """Buffer depth, spilled backlog and delivery counters"""
+    spilled = glob.glob(_queue_path("spill-*.jsonl")) if os.path.isdir(settings.PREFECT_NOTIFY_QUEUE_DIR) else []
+    return {**stats, "buffered": len(_buffer), "spilled_batches": len(spilled), "running": _flusher_task is not None}
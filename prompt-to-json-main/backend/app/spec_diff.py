@@ -0,0 +1,291 @@
+"""
+Structural diff engine for design spec JSON
+Objects are matched by id (falling back to type + occurrence index) and
+compared field by field, so iterate, switch, history and compliance re-checks
+all share one description of what changed.
+"""
+import copy
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OBJECTS_KEY = "objects"
+
+# Fields whose change can alter a compliance outcome (FSI, height, setbacks, coverage)
+COMPLIANCE_FIELDS = {
+    "dimensions",
+    "width",
+    "length",
+    "height",
+    "depth",
+    "area",
+    "stories",
+    "floors",
+    "position",
+    "site",
+    "plot",
+    "plot_area",
+    "setback",
+    "setbacks",
+    "fsi",
+    "coverage",
+    "parking",
+}
+
+
+# ============================================================================
+# OBJECT MATCHING
+# ============================================================================
+
+
+def object_key(obj: Dict, type_counts: Dict[str, int]) -> str:
+    """Stable key for a spec object: its id, or ``type#n`` when it has none"""
+    obj_id = obj.get("id") if isinstance(obj, dict) else None
+    if obj_id:
+        return str(obj_id)
+
+    obj_type = obj.get("type", "object") if isinstance(obj, dict) else type(obj).__name__
+    index = type_counts.get(obj_type, 0)
+    type_counts[obj_type] = index + 1
+    return f"{obj_type}#{index}"
+
+
+def index_objects(objects: Iterable[Dict]) -> Dict[str, Tuple[int, Dict]]:
+    """Map object key -> (position, object) in a single pass"""
+    indexed: Dict[str, Tuple[int, Dict]] = {}
+    type_counts: Dict[str, int] = {}
+
+    for position, obj in enumerate(objects or []):
+        key = object_key(obj, type_counts)
+        if key in indexed:
+            # Duplicate ids are disambiguated by occurrence so no object is lost
+            suffix = 1
+            while f"{key}#{suffix}" in indexed:
+                suffix += 1
+            key = f"{key}#{suffix}"
+        indexed[key] = (position, obj)
+
+    return indexed
+
+
+# ============================================================================
+# DIFF
+# ============================================================================
+
+
+def _diff_values(old: Any, new: Any, path: str, object_id: Optional[str], operations: List[Dict]) -> None:
+    """Recursively compare two values, appending field-level operations"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        for field, old_value in old.items():
+            field_path = f"{path}.{field}" if path else field
+            if field not in new:
+                operations.append({"op": "remove", "object": object_id, "field": field_path, "old": old_value})
+            else:
+                _diff_values(old_value, new[field], field_path, object_id, operations)
+        for field, new_value in new.items():
+            if field not in old:
+                field_path = f"{path}.{field}" if path else field
+                operations.append({"op": "add", "object": object_id, "field": field_path, "new": new_value})
+        return
+
+    if old != new:
+        operations.append({"op": "change", "object": object_id, "field": path, "old": old, "new": new})
+
+
+def diff_specs(before: Dict, after: Dict) -> Dict:
+    """
+    Compute a structural diff between two spec JSON documents.
+
+    Runs in time linear in the number of objects. Returns::
+
+        {
+            "operations": [{"op": "add|remove|change", "object": key|None, "field": "a.b", "old": .., "new": ..}],
+            "added_objects": [...], "removed_objects": [...], "changed_objects": [...],
+            "summary": {"added": n, "removed": n, "changed": n, "operations": n},
+        }
+
+    Object-level add/remove operations carry ``field=None`` and the full object
+    in ``new``/``old``. Top-level spec fields use ``object=None``.
+    """
+    before = before or {}
+    after = after or {}
+    operations: List[Dict] = []
+
+    # Top-level fields other than the object list
+    top_before = {k: v for k, v in before.items() if k != OBJECTS_KEY}
+    top_after = {k: v for k, v in after.items() if k != OBJECTS_KEY}
+    _diff_values(top_before, top_after, "", None, operations)
+
+    old_objects = index_objects(before.get(OBJECTS_KEY, []))
+    new_objects = index_objects(after.get(OBJECTS_KEY, []))
+
+    added, removed, changed = [], [], []
+
+    for key, (position, old_obj) in old_objects.items():
+        match = new_objects.get(key)
+        if match is None:
+            removed.append(key)
+            operations.append({"op": "remove", "object": key, "field": None, "index": position, "old": old_obj})
+            continue
+
+        count_before = len(operations)
+        _diff_values(old_obj, match[1], "", key, operations)
+        if len(operations) > count_before:
+            changed.append(key)
+
+    for key, (position, new_obj) in new_objects.items():
+        if key not in old_objects:
+            added.append(key)
+            operations.append({"op": "add", "object": key, "field": None, "index": position, "new": new_obj})
+
+    return {
+        "operations": operations,
+        "added_objects": added,
+        "removed_objects": removed,
+        "changed_objects": changed,
+        "summary": {
+            "added": len(added),
+            "removed": len(removed),
+            "changed": len(changed),
+            "operations": len(operations),
+        },
+    }
+
+
+def extend_diff(diff: Dict, before: Dict, after: Dict, fields: Iterable[str]) -> Dict:
+    """Add operations for top-level ``fields`` that changed after ``diff`` was computed"""
+    operations: List[Dict] = []
+    before = before or {}
+    after = after or {}
+    # Drop stale operations for these fields so the diff stays applicable
+    fields = set(fields)
+    diff["operations"] = [
+        op for op in diff["operations"] if not (op.get("object") is None and op["field"].split(".")[0] in fields)
+    ]
+    _diff_values(
+        {k: before[k] for k in fields if k in before},
+        {k: after[k] for k in fields if k in after},
+        "",
+        None,
+        operations,
+    )
+    diff["operations"].extend(operations)
+    diff["summary"]["operations"] = len(diff["operations"])
+    return diff
+
+
+def touched_objects(diff: Dict) -> List[str]:
+    """All object keys affected by a diff, in operation order"""
+    seen = {}
+    for op in diff.get("operations", []):
+        if op.get("object") is not None:
+            seen.setdefault(op["object"], None)
+    return list(seen)
+
+
+# ============================================================================
+# APPLY / REVERT (delta storage)
+# ============================================================================
+
+
+def _set_path(target: Dict, path: str, value: Any) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        target = target.setdefault(part, {})
+    target[parts[-1]] = value
+
+
+def _delete_path(target: Dict, path: str) -> None:
+    parts = path.split(".")
+    for part in parts[:-1]:
+        target = target.get(part, {})
+    target.pop(parts[-1], None)
+
+
+def apply_diff(spec: Dict, diff: Dict) -> Dict:
+    """Apply a diff produced by ``diff_specs`` to ``spec`` and return the new spec"""
+    result = copy.deepcopy(spec or {})
+    indexed = index_objects(result.get(OBJECTS_KEY, []))
+
+    removed_keys = set()
+    additions = []
+
+    for op in diff.get("operations", []):
+        key, field, kind = op.get("object"), op.get("field"), op["op"]
+
+        if key is None:
+            if kind == "remove":
+                _delete_path(result, field)
+            else:
+                _set_path(result, field, copy.deepcopy(op["new"]))
+            continue
+
+        if field is None:
+            if kind == "remove":
+                removed_keys.add(key)
+            else:
+                additions.append((op.get("index", len(indexed)), copy.deepcopy(op["new"])))
+            continue
+
+        match = indexed.get(key)
+        if match is None:
+            logger.warning(f"Diff references unknown object {key}, skipping")
+            continue
+        if kind == "remove":
+            _delete_path(match[1], field)
+        else:
+            _set_path(match[1], field, copy.deepcopy(op["new"]))
+
+    if removed_keys or additions:
+        kept = [obj for key, (_, obj) in indexed.items() if key not in removed_keys]
+        for index, obj in sorted(additions, key=lambda item: item[0]):
+            kept.insert(min(index, len(kept)), obj)
+        result[OBJECTS_KEY] = kept
+
+    return result
+
+
+def invert_diff(diff: Dict) -> Dict:
+    """Return the diff that undoes ``diff``"""
+    inverse_kind = {"add": "remove", "remove": "add", "change": "change"}
+    operations = []
+
+    for op in diff.get("operations", []):
+        inverted = {"op": inverse_kind[op["op"]], "object": op.get("object"), "field": op.get("field")}
+        if "index" in op:
+            inverted["index"] = op["index"]
+        if "new" in op:
+            inverted["old"] = op["new"]
+        if "old" in op:
+            inverted["new"] = op["old"]
+        operations.append(inverted)
+
+    return {
+        "operations": operations,
+        "added_objects": list(diff.get("removed_objects", [])),
+        "removed_objects": list(diff.get("added_objects", [])),
+        "changed_objects": list(diff.get("changed_objects", [])),
+        "summary": dict(diff.get("summary", {})),
+    }
+
+
+def revert_diff(spec: Dict, diff: Dict) -> Dict:
+    """Reconstruct the spec a diff was computed from"""
+    return apply_diff(spec, invert_diff(diff))
+
+
+# ============================================================================
+# COMPLIANCE RE-CHECKS
+# ============================================================================
+
+
+def requires_compliance_recheck(diff: Dict) -> bool:
+    """True if any operation touches geometry or site fields that affect compliance"""
+    for op in diff.get("operations", []):
+        if op.get("field") is None:
+            # Objects added or removed always change the massing
+            return True
+        if set(op["field"].split(".")) & COMPLIANCE_FIELDS:
+            return True
+    return False
@@ -0,0 +1,143 @@
+"""
+Per-stage latency metrics
+Prometheus histograms for the expensive stages inside a request (LM call,
+template fallback, iterate strategy, cost calculation, GLB build, upload,
+DB commit, cache lookups), labelled by provider, design_type and city. Each observation
+carries the request ID as an exemplar, so a slow bucket links back to the
+request that landed in it (exemplars are served on /metrics/openmetrics).
+Stages are recorded as trace spans too.
+"""
+import asyncio
+import functools
+import logging
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from app.config import settings
+from app.cost_engine import BASE_COSTS
+from app.tracing import start_span
+from prometheus_client import Histogram
+
+logger = logging.getLogger(__name__)
+
+STAGE_LABELS = ("stage", "provider", "design_type", "city", "status")
+
+STAGE_SECONDS = Histogram(
+    "design_stage_duration_seconds",
+    "Duration of request stages",
+    STAGE_LABELS,
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# Prometheus rejects exemplars whose label names and values exceed 128 characters
+EXEMPLAR_MAX_CHARS = 128
+# Caller-supplied X-Request-ID values are only reused when short and plain
+_REQUEST_ID_RE = re.compile(r"[A-Za-z0-9._:-]{1,64}")
+
+# Request ID and stage labels for the request being handled
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_request_labels: ContextVar[Dict[str, str]] = ContextVar("stage_labels", default={})
+
+
+def new_request_id() -> str:
+    return f"req_{uuid.uuid4().hex[:16]}"
+
+
+def request_id_from_header(value: Optional[str]) -> str:
+    """The caller's X-Request-ID if it is at most 64 plain characters, else a new ID"""
+    if value and _REQUEST_ID_RE.fullmatch(value):
+        return value
+    return new_request_id()
+
+
+def set_request_labels(**labels: Optional[str]) -> None:
+    """Labels every later stage in this request inherits (e.g. city once the request is parsed)"""
+    _request_labels.set({**_request_labels.get(), **{k: v for k, v in labels.items() if v is not None}})
+
+
+def _normalize(labels: Dict[str, Optional[str]]) -> Dict[str, str]:
+    # Unbounded values would explode series count, so unknown ones collapse to "other"
+    design_type = labels.get("design_type") or "unknown"
+    city = labels.get("city") or "unknown"
+    return {
+        "provider": labels.get("provider") or "none",
+        "design_type": design_type if design_type in BASE_COSTS or design_type == "unknown" else "other",
+        "city": city if city in settings.SUPPORTED_CITIES or city == "unknown" else "other",
+    }
+
+
+class StageTimer:
+    """Handle yielded by ``stage``; labels and status can be set once they are known"""
+
+    def __init__(self, name: str, labels: Dict[str, Optional[str]]):
+        self.name = name
+        self.labels = labels
+        self.status = "ok"
+        self.start = time.perf_counter()
+        self.duration = 0.0
+
+    def set(self, status: Optional[str] = None, **labels: Optional[str]) -> None:
+        if status:
+            self.status = status
+        self.labels.update(labels)
+
+    def observe(self) -> None:
+        self.duration = time.perf_counter() - self.start
+        request_id = request_id_var.get()
+        exemplar = {"request_id": request_id[: EXEMPLAR_MAX_CHARS - len("request_id")]} if request_id else None
+        try:
+            STAGE_SECONDS.labels(stage=self.name, status=self.status, **_normalize(self.labels)).observe(
+                self.duration, exemplar=exemplar
+            )
+        except Exception as e:
+            # Metrics must never break the request path
+            logger.debug("Stage metric %s not recorded: %s", self.name, e)
+
+
+@contextmanager
+def stage(name: str, **labels: Optional[str]) -> Iterator[StageTimer]:
+    """
+    Time a block as a stage::
+
+        with stage("lm_call", city=city) as timer:
+            result = await lm_run(prompt, params)
+            timer.set(provider=result["provider"])
+    """
+    timer = StageTimer(name, {**_request_labels.get(), **labels})
+    # Each stage is also a span in the request's trace
+    with start_span(name) as span:
+        try:
+            yield timer
+        except BaseException:
+            timer.status = "error"
+            raise
+        finally:
+            timer.observe()
+            span.set_attributes(status=timer.status, **timer.labels)
+
+
+def timed_stage(name: str, **labels: Optional[str]):
+    """Decorator form of ``stage`` for sync and async functions"""
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name, **labels):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name, **labels):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
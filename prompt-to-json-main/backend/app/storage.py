@@ -7,6 +7,7 @@ import mimetypes
 from typing import Optional
 
 from app.config import settings
+from app.tracing import traced
 from supabase import Client, create_client
 
 logger = logging.getLogger(__name__)
@@ -87,6 +88,7 @@ def ensure_buckets_exist():
 # ============================================================================
 
 
+@traced("storage.upload_file", kind="client")
 def upload_file(file_path: str, bucket: str, destination_path: str, content_type: Optional[str] = None) -> str:
     """
     Upload file to Supabase storage
@@ -127,6 +129,7 @@ def upload_file(file_path: str, bucket: str, destination_path: str, content_type
         raise
 
 
+@traced("storage.upload_preview", kind="client")
 def upload_preview(spec_id: str, preview_data: bytes, format: str = "png") -> str:
     """
     Upload design preview image
@@ -157,6 +160,7 @@ def upload_preview(spec_id: str, preview_data: bytes, format: str = "png") -> st
         raise
 
 
+@traced("storage.upload_geometry", kind="client")
 def upload_geometry(spec_id: str, glb_data: bytes) -> str:
     """
     Upload .GLB geometry file
@@ -206,6 +210,7 @@ def file_exists(bucket: str, file_path: str) -> bool:
         return False
 
 
+@traced("storage.signed_url", kind="client")
 def generate_signed_url(file_path: str, bucket: Optional[str] = None, expires_in: int = 3600) -> str:
     """
     Generate signed URL for private file access
@@ -247,6 +252,7 @@ def generate_signed_url(file_path: str, bucket: Optional[str] = None, expires_in
 # ============================================================================
 
 
+@traced("storage.delete_file", kind="client")
 def delete_file(file_path: str, bucket: str) -> bool:
     """Delete file from storage"""
     try:
@@ -300,6 +306,7 @@ def get_signed_url(bucket: str, file_path: str, expires: int = 3600) -> str:
     return generate_signed_url(file_path, bucket, expires)
 
 
+@traced("storage.upload_to_bucket", kind="client")
 async def upload_to_bucket(bucket: str, file_path: str, data: bytes) -> str:
     """Upload data to bucket (async wrapper)"""
     try:
@@ -0,0 +1,420 @@
+"""
+Distributed tracing
+Lightweight, OpenTelemetry-compatible spans: 128-bit trace IDs, 64-bit span
+IDs and W3C ``traceparent`` propagation, so traces join up with the agents,
+Prefect and any OTel-instrumented service we call. Finished spans are
+batched on a background thread and exported as OTLP-style JSON lines to a
+local file (size-rotated) or the console; ``scripts/trace_waterfall.py``
+renders them. Tracing is off unless TRACING_ENABLED is set.
+"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class Span:
+    """One timed operation; remote parents (from headers) are non-recording spans"""
+
+    __slots__ = (
+        "name",
+        "kind",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "sampled",
+        "recording",
+        "attributes",
+        "events",
+        "status",
+        "status_message",
+        "start_ns",
+        "end_ns",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: str = "internal",
+        sampled: bool = True,
+        span_id: Optional[str] = None,
+        recording: bool = True,
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = span_id or secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.recording = recording
+        self.attributes: Dict[str, Any] = {}
+        self.events: List[Dict[str, Any]] = []
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def set_status(self, status: str, message: Optional[str] = None) -> None:
+        self.status = status
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.events.append(
+            {
+                "name": "exception",
+                "timeUnixNano": time.time_ns(),
+                "attributes": {"exception.type": type(exc).__name__, "exception.message": str(exc)[:500]},
+            }
+        )
+        self.set_status("ERROR", str(exc)[:200])
+
+    def end(self) -> None:
+        if self.end_ns is not None or not self.recording:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled:
+            tracer.on_end(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP JSON span fields (flattened attributes)"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind.upper(),
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "events": self.events,
+            "status": {"code": self.status, "message": self.status_message},
+        }
+
+
+# ============================================================================
+# EXPORTERS
+# ============================================================================
+
+
+class FileSpanExporter:
+    """Appends spans as JSON lines, rotating the file at ``max_bytes`` and keeping ``backups`` old files"""
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + "\n")
+
+    def _rotate(self) -> None:
+        # traces.jsonl -> traces.jsonl.1 -> ... -> traces.jsonl.<backups> (oldest dropped)
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class ConsoleSpanExporter:
+    """Logs spans through the logging pipeline"""
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        for span in spans:
+            duration_ms = (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e6
+            logger.info(
+                "span %s %s %.1fms %s", span["traceId"], span["name"], duration_ms, json.dumps(span, default=str)
+            )
+
+
+class Tracer:
+    """Owns the sampling decision and the batch export thread"""
+
+    def __init__(self):
+        self.exporter = None
+        self.service_name = "design-engine-api"
+        self.sample_ratio = 1.0
+        self.max_batch = 256
+        self.flush_interval = 2.0
+        self.dropped = 0
+        self.exported = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=10000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def configure(
+        self,
+        exporter: Optional[str] = "file",
+        path: str = "logs/traces.jsonl",
+        sample_ratio: float = 1.0,
+        service_name: str = "design-engine-api",
+        max_queue: int = 10000,
+        max_bytes: int = 50 * 1024 * 1024,
+        backups: int = 5,
+    ) -> None:
+        self.shutdown()
+        if exporter == "file":
+            self.exporter = FileSpanExporter(path, max_bytes=max_bytes, backups=backups)
+        elif exporter == "console":
+            self.exporter = ConsoleSpanExporter()
+        else:
+            self.exporter = None
+        self.sample_ratio = sample_ratio
+        self.service_name = service_name
+        self._queue = queue.Queue(maxsize=max_queue)
+
+    def should_sample(self) -> bool:
+        return self.exporter is not None and (self.sample_ratio >= 1 or random.random() < self.sample_ratio)
+
+    def on_end(self, span: Span) -> None:
+        if self.exporter is None:
+            return
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    span = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if span is None:
+                    stopping = True
+                    break
+                batch.append(span)
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: List[Span]) -> None:
+        resource = {"service.name": self.service_name}
+        try:
+            self.exporter.export([{**span.to_dict(), "resource": resource} for span in batch])
+            self.exported += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.warning("Span export failed: %s", e)
+
+    def shutdown(self) -> None:
+        """Flush queued spans and stop the export thread"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout=5)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "exporter": type(self.exporter).__name__ if self.exporter else None,
+            "queued": self._queue.qsize(),
+            "exported": self.exported,
+            "dropped": self.dropped,
+        }
+
+
+tracer = Tracer()
+
+_active_span: ContextVar[Optional[Span]] = ContextVar("active_span", default=None)
+
+
+# ============================================================================
+# SPAN API
+# ============================================================================
+
+
+def current_span() -> Optional[Span]:
+    return _active_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _active_span.get()
+    return span.trace_id if span else None
+
+
+def new_span(name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes: Any) -> Span:
+    """Start a span without activating it; the caller must call ``end()``"""
+    parent = parent or _active_span.get()
+    if parent is not None:
+        span = Span(name, parent.trace_id, parent.span_id, kind, parent.sampled)
+    else:
+        span = Span(name, secrets.token_hex(16), kind=kind, sampled=tracer.should_sample())
+    span.set_attributes(**attributes)
+    return span
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Run a block inside a child of the active span::
+
+        with start_span("agent.rl", kind="client", city=city) as span:
+            resp = await client.post(url, json=payload, headers=inject(headers))
+            span.set_attribute("http.status_code", resp.status_code)
+    """
+    span = new_span(name, kind, parent, **attributes)
+    token = _active_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_exception(e)
+        raise
+    finally:
+        _active_span.reset(token)
+        span.end()
+
+
+def traced(name: str, kind: str = "internal", **attributes: Any):
+    """Decorator form of ``start_span`` for sync and async functions"""
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(name, kind, **attributes):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name, kind, **attributes):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ============================================================================
+# PROPAGATION
+# ============================================================================
+
+
+def inject(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Add the W3C ``traceparent`` header for the active span"""
+    headers = dict(headers or {})
+    span = _active_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent
+    return headers
+
+
+def extract(headers) -> Optional[Span]:
+    """Remote parent from a ``traceparent`` header, or None"""
+    match = _TRACEPARENT.match((headers.get("traceparent") or "").strip().lower())
+    if not match or match.group(1) == "0" * 32:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return Span("remote", trace_id, kind="server", sampled=int(flags, 16) & 1 == 1, span_id=span_id, recording=False)
+
+
+def remote_parent(trace_id: str) -> Optional[Span]:
+    """
+    Parent for an existing trace/correlation ID (UUIDs and 32-hex IDs), so
+    callers that already pass a ``trace_id`` land in the same trace
+    """
+    trace_id = (trace_id or "").replace("-", "").lower()
+    if not re.fullmatch(r"[0-9a-f]{32}", trace_id):
+        return None
+    return Span("remote", trace_id, sampled=tracer.should_sample(), span_id=trace_id[:16], recording=False)
+
+
+# ============================================================================
+# INSTRUMENTATION
+# ============================================================================
+
+
+def instrument_sqlalchemy(engine) -> None:
+    """Span per statement, only inside an existing sampled trace"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        parent = _active_span.get()
+        # Unsampled or disabled: skip building spans that would never be exported
+        if parent is None or not parent.sampled or tracer.exporter is None:
+            return
+        span = new_span("db.query", kind="client", **{"db.system": engine.dialect.name})
+        span.set_attribute("db.statement", statement[:300])
+        context._trace_span = span
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_trace_span", None)
+        if span is not None:
+            span.set_attribute("db.rows", cursor.rowcount)
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        span = getattr(exception_context.execution_context, "_trace_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+
+def configure_tracing() -> None:
+    """Configure the exporter from settings"""
+    from app.config import settings
+
+    tracer.configure(
+        exporter=settings.TRACING_EXPORTER if settings.TRACING_ENABLED else None,
+        path=settings.TRACING_FILE_PATH,
+        max_bytes=settings.TRACING_FILE_MAX_BYTES,
+        backups=settings.TRACING_FILE_BACKUPS,
+        sample_ratio=settings.TRACING_SAMPLE_RATIO,
+        service_name=settings.TRACING_SERVICE_NAME,
+    )
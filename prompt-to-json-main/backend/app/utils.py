@@ -39,13 +39,17 @@ def verify_token(token: str) -> dict:
 
 # Logging setup
 def setup_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(),  # Console output
-        ],
-        force=True,  # Override any existing configuration
+    from app.log_pipeline import configure_logging
+
+    # Records are queued; console/file output happens on the listener thread
+    configure_logging(
+        level=settings.LOG_LEVEL,
+        log_file=settings.LOG_FILE,
+        rotation=settings.LOG_ROTATION,
+        retention=settings.LOG_RETENTION,
+        json_console=settings.LOG_FORMAT == "json",
+        sample_rates=settings.LOG_SAMPLE_RATES,
+        queue_size=settings.LOG_QUEUE_SIZE,
     )
     # Ensure uvicorn logs are visible
     logging.getLogger("uvicorn.access").setLevel(logging.INFO)
@@ -0,0 +1,27 @@
+"""Add composite indexes for keyset-paginated history
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-01-01 00:00:03.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "004"
+down_revision = "003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (parent, created_at) indexes back history pages and per-spec counts
+    op.create_index("ix_evaluations_spec_created", "evaluations", ["spec_id", "created_at"], if_not_exists=True)
+    op.create_index("ix_iterations_spec_created", "iterations", ["spec_id", "created_at"], if_not_exists=True)
+    op.create_index("ix_specs_user_created", "specs", ["user_id", "created_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_specs_user_created", table_name="specs", if_exists=True)
+    op.drop_index("ix_iterations_spec_created", table_name="iterations", if_exists=True)
+    op.drop_index("ix_evaluations_spec_created", table_name="evaluations", if_exists=True)
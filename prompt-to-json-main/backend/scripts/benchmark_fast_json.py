@@ -0,0 +1,130 @@
+"""
+Benchmark for fast-path JSON responses
+Compares the default FastAPI path (response_model validation + jsonable_encoder
++ json) with orjson, raw passthrough and the serialized spec cache for the
+heaviest payloads: GET /specs/{spec_id} and spec history with spec_json
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.fast_json import _spec_bytes_cache, cached_json, fast_response
+from app.schemas import GenerateResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+MATERIALS = ["wood_oak", "concrete", "steel", "glass_double_pane", "brick_premium", "marble_white"]
+
+
+def build_spec(object_count: int, seed: int = 42) -> dict:
+    """Build a synthetic spec with ``object_count`` objects"""
+    rng = random.Random(seed)
+    return {
+        "design_type": "house",
+        "objects": [
+            {
+                "id": f"obj_{i}",
+                "type": "wall",
+                "material": rng.choice(MATERIALS),
+                "color_hex": f"#{rng.randint(0, 0xFFFFFF):06X}",
+                "dimensions": {"width": rng.uniform(1, 10), "length": rng.uniform(1, 10), "height": 3.0},
+            }
+            for i in range(object_count)
+        ],
+        "metadata": {"estimated_cost": 5000000, "currency": "INR"},
+    }
+
+
+def time_call(func, repeat: int = 50) -> float:
+    """Average wall time of ``func()`` in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def default_path(payload: dict) -> bytes:
+    """What FastAPI does for a response_model endpoint"""
+    model = GenerateResponse(**payload)
+    return JSONResponse(jsonable_encoder(GenerateResponse.model_validate(model))).body
+
+
+def default_history(history: dict) -> bytes:
+    return JSONResponse(jsonable_encoder(history)).body
+
+
+def run_benchmark(object_count: int = 1000, iterations: int = 20) -> bool:
+    spec = build_spec(object_count)
+    fields = {
+        "spec_id": "spec_bench",
+        "spec_json": spec,
+        "preview_url": "https://example.com/spec_bench.glb",
+        "estimated_cost": 5000000.0,
+        "compliance_check_id": "check_spec_bench",
+        "created_at": datetime.now(timezone.utc),
+        "spec_version": 3,
+        "user_id": "bench_user",
+    }
+
+    print("Fast JSON Benchmark")
+    print(f"Spec objects: {object_count}")
+    print("=" * 50)
+
+    size = len(default_path(fields))
+    baseline_ms = time_call(lambda: default_path(fields))
+    orjson_ms = time_call(lambda: fast_response(fields).body)
+
+    def cached_spec():
+        return fast_response({**fields, "spec_json": cached_json(("spec", "spec_bench", 3), spec)}).body
+
+    _spec_bytes_cache.clear()
+    cached_spec()
+    cached_ms = time_call(cached_spec)
+
+    print(f"GET /specs/{{spec_id}} ({size / 1024:.0f} KiB)")
+    print(f"  response_model + json:  {baseline_ms:.2f}ms")
+    print(f"  orjson, no validation:  {orjson_ms:.2f}ms ({baseline_ms / orjson_ms:.1f}x)")
+    print(f"  cached spec bytes:      {cached_ms:.3f}ms ({baseline_ms / cached_ms:.0f}x)")
+
+    history_items = [
+        {
+            "iter_id": f"iter_{i}",
+            "query": "change floor to marble",
+            "timestamp": fields["created_at"],
+            "spec_json": spec,
+        }
+        for i in range(iterations)
+    ]
+    history = {"spec_id": "spec_bench", "iterations": history_items}
+    history_baseline_ms = time_call(lambda: default_history(history), repeat=5)
+
+    def cached_history():
+        items = [
+            {**item, "spec_json": cached_json(("iteration", item["iter_id"]), item["spec_json"])}
+            for item in history_items
+        ]
+        return fast_response({**history, "iterations": items}).body
+
+    cached_history()
+    history_cached_ms = time_call(cached_history, repeat=5)
+
+    print(f"\nGET /history/{{spec_id}}?fields=iteration_spec_json ({iterations} iterations)")
+    print(f"  jsonable_encoder + json: {history_baseline_ms:.2f}ms")
+    print(f"  cached iteration bytes:  {history_cached_ms:.2f}ms ({history_baseline_ms / history_cached_ms:.0f}x)")
+
+    import json
+
+    same = json.loads(cached_spec()) == json.loads(default_path(fields))
+    print(f"\nPayloads match: {'OK' if same else 'MISMATCH'}")
+    return same
+
+
+if __name__ == "__main__":
+    success = run_benchmark()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,75 @@
+"""
+Benchmark for the rate limiter
+Measures the per-request overhead of key extraction (JWT subject) and a
+token take against the in-memory and shared SQLite bucket stores
+"""
+
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+import jwt
+from app.config import settings
+from app.middleware.rate_limit import MemoryBucketStore, RateLimiter, SQLiteBucketStore, client_key
+from starlette.requests import Request
+
+
+def time_call(func, repeat: int) -> float:
+    """Average wall time of ``func(i)`` in microseconds"""
+    start = time.perf_counter()
+    for i in range(repeat):
+        func(i)
+    return (time.perf_counter() - start) * 1_000_000 / repeat
+
+
+def make_request(token: str) -> Request:
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/v1/generate",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("10.0.0.1", 5000),
+    }
+    return Request(scope)
+
+
+def run_benchmark(requests: int = 20000, clients: int = 5000) -> bool:
+    token = jwt.encode(
+        {"sub": "bench_user", "exp": datetime.utcnow() + timedelta(hours=1)},
+        settings.JWT_SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM,
+    )
+    request = make_request(token)
+    routes = {"/api/v1/generate": 5, "/api/v1/rl/train/opt": 10}
+
+    print("Rate Limiter Benchmark")
+    print(f"Requests: {requests}, distinct clients: {clients}")
+    print("=" * 50)
+
+    key_us = time_call(lambda i: client_key(request), requests)
+    print(f"JWT subject key extraction:       {key_us:8.1f} us/request")
+
+    memory = RateLimiter(1000, store=MemoryBucketStore(max_entries=clients // 2), route_costs=routes)
+    memory_us = time_call(lambda i: memory.check(f"user:{i % clients}", memory.cost_for("/api/v1/generate")), requests)
+    print(f"Memory store take (with eviction): {memory_us:7.1f} us/request")
+    print(f"  buckets kept: {memory.active_clients()} (cap {clients // 2})")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = RateLimiter(1000, store=SQLiteBucketStore(str(Path(tmp) / "buckets.db")), route_costs=routes)
+        sqlite_us = time_call(lambda i: shared.check(f"user:{i % clients}", 5), requests // 10)
+        print(f"SQLite shared store take:          {sqlite_us:7.1f} us/request")
+
+    success = memory.active_clients() <= clients // 2
+    print("=" * 50)
+    print(f"Total overhead (memory): {key_us + memory_us:.1f} us, (sqlite): {key_us + sqlite_us:.1f} us")
+    return success
+
+
+if __name__ == "__main__":
+    success = run_benchmark()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,107 @@
+"""
+Benchmark for the structural spec diff engine
+Diffs, applies and reverts 1,000-object specs
+"""
+
+import copy
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.spec_diff import apply_diff, diff_specs, revert_diff
+
+MATERIALS = ["wood_oak", "concrete", "steel", "glass_double_pane", "brick_premium", "marble_white"]
+TYPES = ["wall", "floor", "roof", "window", "door", "furniture"]
+
+
+def build_spec(object_count: int, seed: int = 42) -> dict:
+    """Build a synthetic spec with ``object_count`` objects"""
+    rng = random.Random(seed)
+    objects = []
+    for i in range(object_count):
+        obj_type = TYPES[i % len(TYPES)]
+        objects.append(
+            {
+                "id": f"{obj_type}_{i}",
+                "type": obj_type,
+                "material": rng.choice(MATERIALS),
+                "color_hex": f"#{rng.randint(0, 0xFFFFFF):06X}",
+                "dimensions": {"width": rng.uniform(1, 10), "length": rng.uniform(1, 10), "height": 3.0},
+            }
+        )
+    return {
+        "design_type": "house",
+        "objects": objects,
+        "estimated_cost": {"total": 5000000, "currency": "INR"},
+    }
+
+
+def mutate_spec(spec: dict, fraction: float = 0.1, seed: int = 7) -> dict:
+    """Change, remove and add roughly ``fraction`` of the objects"""
+    rng = random.Random(seed)
+    mutated = copy.deepcopy(spec)
+    objects = mutated["objects"]
+    count = max(1, int(len(objects) * fraction))
+
+    for obj in rng.sample(objects, count):
+        obj["material"] = "premium_" + obj["material"]
+        obj["dimensions"]["width"] += 1
+
+    for obj in rng.sample(objects, count // 2):
+        objects.remove(obj)
+
+    for i in range(count // 2):
+        objects.append({"id": f"extra_{i}", "type": "furniture", "material": "wood_teak"})
+
+    mutated["estimated_cost"]["total"] = int(mutated["estimated_cost"]["total"] * 1.1)
+    return mutated
+
+
+def time_call(func, *args, repeat: int = 20) -> float:
+    """Average wall time of ``func(*args)`` in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run_benchmark(object_count: int = 1000) -> bool:
+    before = build_spec(object_count)
+    after = mutate_spec(before)
+
+    print("Spec Diff Benchmark")
+    print(f"Objects: {object_count}")
+    print("=" * 50)
+
+    diff = diff_specs(before, after)
+    print(f"Operations: {diff['summary']['operations']}")
+    print(f"  Added: {diff['summary']['added']}")
+    print(f"  Removed: {diff['summary']['removed']}")
+    print(f"  Changed: {diff['summary']['changed']}")
+
+    diff_ms = time_call(diff_specs, before, after)
+    apply_ms = time_call(apply_diff, before, diff)
+    revert_ms = time_call(revert_diff, after, diff)
+
+    print(f"\ndiff_specs:  {diff_ms:.2f}ms")
+    print(f"apply_diff:  {apply_ms:.2f}ms")
+    print(f"revert_diff: {revert_ms:.2f}ms")
+
+    # Linear scaling check: 10x objects should cost roughly 10x, not 100x
+    big_before = build_spec(object_count * 10)
+    big_after = mutate_spec(big_before)
+    big_ms = time_call(diff_specs, big_before, big_after, repeat=5)
+    print(f"diff_specs ({object_count * 10} objects): {big_ms:.2f}ms ({big_ms / diff_ms:.1f}x)")
+
+    round_trip_ok = apply_diff(before, diff) == after and revert_diff(after, diff) == before
+    print(f"\nRound trip: {'OK' if round_trip_ok else 'MISMATCH'}")
+    return round_trip_ok
+
+
+if __name__ == "__main__":
+    success = run_benchmark()
+    sys.exit(0 if success else 1)
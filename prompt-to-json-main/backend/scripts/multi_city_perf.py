@@ -0,0 +1,82 @@
+"""
+Nightly multi-city performance regression check
+Runs the multi-city suite in-process, writes it to the configured sinks and
+compares each city's p50/p95 against a baseline report. Exits 1 on a
+regression beyond the tolerance, or when the suite fails.
+
+    python scripts/multi_city_perf.py --output reports/multi_city_perf.json \
+        --baseline reports/multi_city_perf_baseline.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# Add parent directory to path for imports
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.api.multi_city_testing import CITY_TEST_CASES, execute_test_suite, write_suite_sinks
+from app.config import settings
+
+
+def find_regressions(current: Dict, baseline: Dict, tolerance: float, min_delta_ms: int) -> List[str]:
+    """Cities whose p50/p95 grew by more than ``tolerance`` (and ``min_delta_ms``) over the baseline"""
+    regressions = []
+    for city, summary in current.items():
+        previous = baseline.get(city)
+        if not previous:
+            continue
+        for key in ("p50_ms", "p95_ms"):
+            before, after = previous.get(key, 0), summary.get(key, 0)
+            if after - before > min_delta_ms and after > before * (1 + tolerance):
+                regressions.append(f"{city} {key}: {before}ms -> {after}ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Multi-city performance regression check")
+    parser.add_argument("--cities", nargs="*", default=list(CITY_TEST_CASES), help="Cities to run")
+    parser.add_argument("--concurrency", type=int, default=settings.MULTI_CITY_TEST_CONCURRENCY)
+    parser.add_argument("--sinks", nargs="*", default=None, help="Override MULTI_CITY_TEST_SINKS")
+    parser.add_argument("--output", help="Write the latency summary report here")
+    parser.add_argument("--baseline", help="Previous report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown")
+    parser.add_argument("--min-delta-ms", type=int, default=50, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    unknown = [c for c in args.cities if c not in CITY_TEST_CASES]
+    if unknown:
+        print(f"Unknown cities: {unknown}")
+        return 2
+
+    cases = {city: CITY_TEST_CASES[city] for city in args.cities}
+    suite = asyncio.run(execute_test_suite(cases, args.concurrency))
+    write_suite_sinks(suite, args.sinks)
+
+    summary = {city: s.model_dump() for city, s in suite.latency_summary.items()}
+    print(f"{suite.test_suite_id}: {suite.passed_cases}/{suite.total_cases} passed in {suite.execution_time_ms}ms")
+    print(f"{'city':<12}{'cases':>6}{'pass':>6}{'p50':>8}{'p95':>8}{'max':>8}  stages p95")
+    for city, s in summary.items():
+        stages = " ".join(f"{name}={ms}" for name, ms in s["stage_p95_ms"].items())
+        print(f"{city:<12}{s['cases']:>6}{s['passed']:>6}{s['p50_ms']:>8}{s['p95_ms']:>8}{s['max_ms']:>8}  {stages}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        report = {"test_suite_id": suite.test_suite_id, "overall_status": suite.overall_status, "cities": summary}
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    regressions = []
+    if args.baseline and Path(args.baseline).exists():
+        baseline = json.loads(Path(args.baseline).read_text()).get("cities", {})
+        regressions = find_regressions(summary, baseline, args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+
+    return 1 if regressions or suite.overall_status != "passed" else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Trace waterfall viewer
+Renders spans written by the file exporter (logs/traces.jsonl) as a text
+waterfall, one line per span, indented under its parent
+
+Usage:
+    python scripts/trace_waterfall.py                      # most recent trace
+    python scripts/trace_waterfall.py --trace <trace_id>
+    python scripts/trace_waterfall.py --list
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+
+def load_spans(paths: List[str]) -> Dict[str, List[Dict]]:
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    span = json.loads(line)
+                    traces[span["traceId"]].append(span)
+    return traces
+
+
+def render(spans: List[Dict], width: int = 60) -> List[str]:
+    start = min(s["startTimeUnixNano"] for s in spans)
+    end = max(s["endTimeUnixNano"] for s in spans)
+    total = max(end - start, 1)
+    ids = {s["spanId"] for s in spans}
+    children = defaultdict(list)
+    for span in sorted(spans, key=lambda s: s["startTimeUnixNano"]):
+        # Spans whose parent is in another process (or not exported) are roots here
+        parent = span.get("parentSpanId") if span.get("parentSpanId") in ids else None
+        children[parent].append(span)
+
+    lines = []
+
+    def walk(parent, depth):
+        for span in children[parent]:
+            offset = int((span["startTimeUnixNano"] - start) / total * width)
+            length = max(1, int((span["endTimeUnixNano"] - span["startTimeUnixNano"]) / total * width))
+            bar = " " * offset + "█" * min(length, width - offset)
+            duration_ms = (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e6
+            error = " !" if span.get("status", {}).get("code") == "ERROR" else ""
+            service = span.get("resource", {}).get("service.name", "")
+            label = f"{'  ' * depth}{span['name']}"
+            lines.append(f"{label[:40]:<40} {bar:<{width}} {duration_ms:9.1f}ms {service}{error}")
+            walk(span["spanId"], depth + 1)
+
+    walk(None, 0)
+    return lines
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Show a trace waterfall from exported spans")
+    parser.add_argument("files", nargs="*", default=["logs/traces.jsonl"], help="Span JSON-lines files")
+    parser.add_argument("--trace", help="Trace ID (default: most recent)")
+    parser.add_argument("--list", action="store_true", help="List recent traces")
+    parser.add_argument("--width", type=int, default=60)
+    args = parser.parse_args()
+
+    missing = [p for p in args.files if not Path(p).exists()]
+    if missing:
+        print(f"No span file at {', '.join(missing)}")
+        return 1
+
+    traces = load_spans(args.files)
+    if not traces:
+        print("No spans recorded")
+        return 1
+    by_start = sorted(traces, key=lambda t: min(s["startTimeUnixNano"] for s in traces[t]))
+
+    if args.list:
+        for trace_id in by_start[-20:]:
+            spans = traces[trace_id]
+            root = min(spans, key=lambda s: s["startTimeUnixNano"])
+            print(f"{trace_id}  {len(spans):4d} spans  {root['name']}")
+        return 0
+
+    trace_id = args.trace or by_start[-1]
+    if trace_id not in traces:
+        print(f"Trace {trace_id} not found")
+        return 1
+
+    print(f"Trace {trace_id}")
+    print("\n".join(render(traces[trace_id], args.width)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
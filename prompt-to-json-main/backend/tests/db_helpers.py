@@ -0,0 +1,17 @@
+"""
+Shared in-memory SQLite sessions for service and API tests
+"""
+
+from app import models
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+
+def sqlite_session(tables):
+    """Session on a fresh in-memory database holding only ``tables``"""
+    # StaticPool keeps one connection, so TestClient threads see the same database
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    metadata = models.Base.metadata
+    metadata.create_all(engine, tables=[metadata.tables[name] for name in tables])
+    return sessionmaker(bind=engine)()
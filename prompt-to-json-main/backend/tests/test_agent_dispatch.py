@@ -0,0 +1,69 @@
+"""
+Test cases for in-process BHIV agent dispatch
+"""
+import asyncio
+import os
+
+import httpx
+import pytest
+from app.api.geometry_generator import GeometryResponse, glb_generator
+from app.config import settings
+from app.services import agent_dispatch
+from app.services.agent_dispatch import AgentCallError, call_agent
+
+
+def test_in_process_calls_keep_route_contracts(monkeypatch, tmp_path):
+    """Handlers run without HTTP, return the route's JSON body and map HTTPExceptions to status codes"""
+    monkeypatch.setattr(settings, "AGENT_REMOTE_URLS", {})
+    monkeypatch.setattr(glb_generator, "output_dir", str(tmp_path))
+
+    async def run():
+        geometry = await call_agent(
+            "geometry_agent",
+            "/api/v1/geometry/generate",
+            {"spec_json": {"rooms": []}, "request_id": "req_dispatch", "format": "glb"},
+            user="alice",
+        )
+        with pytest.raises(AgentCallError) as exc:
+            await call_agent(
+                "geometry_agent", "/api/v1/geometry/generate", {"spec_json": {}, "request_id": "r", "format": "obj"}
+            )
+        return geometry, exc.value
+
+    geometry, error = asyncio.run(run())
+    assert set(geometry) == set(GeometryResponse.model_fields)
+    assert geometry["geometry_url"] == "/api/v1/geometry/download/req_dispatch.glb"
+    assert os.path.exists(tmp_path / "req_dispatch.glb")
+    assert error.status_code == 500 and "Unsupported format" in error.detail
+
+
+def test_per_agent_timeout_and_remote_agents(monkeypatch):
+    """Slow in-process agents time out with 504; agents with a remote URL are called over HTTP"""
+
+    async def slow(payload, user):
+        await asyncio.sleep(1)
+
+    monkeypatch.setitem(agent_dispatch.IN_PROCESS_ROUTES, "/api/v1/rl/train/opt", slow)
+    monkeypatch.setattr(settings, "AGENT_TIMEOUTS", {"rl_agent": 0.05})
+    monkeypatch.setattr(settings, "AGENT_REMOTE_URLS", {"mcp_compliance": "http://mcp.internal"})
+
+    seen = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen["url"] = str(request.url)
+        seen["auth"] = request.headers.get("authorization")
+        return httpx.Response(200, json={"case_id": "case_1", "compliant": True})
+
+    monkeypatch.setattr(agent_dispatch, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def run():
+        with pytest.raises(AgentCallError) as exc:
+            await call_agent("rl_agent", "/api/v1/rl/train/opt", {"steps": 10})
+        remote = await call_agent("mcp_compliance", "/api/v1/mcp/check", {"city": "Pune"}, auth_token="tok")
+        await agent_dispatch.close_http_client()
+        return exc.value, remote
+
+    error, remote = asyncio.run(run())
+    assert error.status_code == 504
+    assert remote == {"case_id": "case_1", "compliant": True}
+    assert seen == {"url": "http://mcp.internal/api/v1/mcp/check", "auth": "Bearer tok"}
@@ -0,0 +1,79 @@
+"""
+Test cases for the authentication hot-path caches
+"""
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from app import models
+from app.auth_cache import RevocationSet, revocations, token_cache
+from app.config import settings
+from app.database import get_current_user
+from app.models import RefreshToken, User
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+def _bearer(subject: str, issued_at: datetime) -> HTTPAuthorizationCredentials:
+    token = jwt.encode(
+        {"sub": subject, "iat": issued_at, "exp": issued_at + timedelta(hours=1)},
+        settings.JWT_SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM,
+    )
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_verified_tokens_are_cached_and_revocations_apply(monkeypatch):
+    """Repeat requests skip verification; revoking a subject rejects older tokens"""
+    token_cache.clear()
+    monkeypatch.setattr(revocations, "cutoffs", {})
+    credentials = _bearer("alice", datetime.now(timezone.utc) - timedelta(minutes=5))
+
+    def fail_decode(*args, **kwargs):
+        raise AssertionError("token was decoded again")
+
+    assert get_current_user(credentials) == "alice"
+    monkeypatch.setattr(jwt, "decode", fail_decode)
+    assert get_current_user(credentials) == "alice"
+    assert token_cache.get_stats()["hits"] >= 1
+
+    revocations.revoke_subject("alice")
+    with pytest.raises(HTTPException) as exc:
+        get_current_user(credentials)
+    assert exc.value.detail == "Token has been revoked"
+
+
+def test_revocation_sync_from_refresh_tokens():
+    """Sync loads revoked refresh tokens and cutoffs, then only newer rows"""
+    engine = create_engine("sqlite://")
+    tables = models.Base.metadata.tables
+    models.Base.metadata.create_all(engine, tables=[tables["users"], tables["refresh_tokens"]])
+    db = sessionmaker(bind=engine)()
+
+    now = datetime.now(timezone.utc)
+    db.add(User(id="u1", username="alice", email="a@example.com", password_hash="x"))
+    db.add(RefreshToken(token="logout", user_id="u1", expires_at=now + timedelta(days=1)))
+    db.add(RefreshToken(token="live", user_id="u1", expires_at=now + timedelta(days=1)))
+    db.commit()
+    db.query(RefreshToken).filter(RefreshToken.token == "logout").update(
+        {"is_revoked": True, "revoked_at": now - timedelta(minutes=1), "revoked_reason": "user_logout"}
+    )
+    db.commit()
+
+    revoked = RevocationSet()
+    assert revoked.sync(db) == 1
+    assert revoked.is_token_revoked("logout")
+    assert not revoked.is_token_revoked("live")
+    # Logging out ends one session, not the user's other access tokens
+    assert not revoked.is_subject_revoked("u1", int(now.timestamp()) - 3600)
+
+    db.query(RefreshToken).filter(RefreshToken.token == "live").update(
+        {"is_revoked": True, "revoked_at": now, "revoked_reason": "security"}
+    )
+    db.commit()
+    assert revoked.sync(db) == 1
+    assert revoked.is_subject_revoked("u1", int(now.timestamp()) - 3600)
+    assert not revoked.is_subject_revoked("u1", int(now.timestamp()) + 1)
+    db.close()
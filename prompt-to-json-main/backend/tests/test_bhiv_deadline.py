@@ -0,0 +1,76 @@
+"""
+Test cases for the deadline-bound BHIV design flow
+"""
+import asyncio
+import time
+
+import httpx
+from app.api import bhiv_integrated
+from app.api.bhiv_integrated import DesignRequest, create_design
+
+
+def _patch_services(monkeypatch, compliance_delay, rl_delay, timeouts):
+    async def fake_lm(prompt, params):
+        return {"spec_json": {"design_type": "house", "stories": 2}}
+
+    async def fake_compliance(spec_json, city, project_id, timeout=None):
+        timeouts["compliance"] = timeout
+        await asyncio.sleep(compliance_delay)
+        return {"compliant": True, "violations": [], "case_id": "case_1"}
+
+    async def fake_rl(spec_json, city, timeout=None):
+        timeouts["rl_optimization"] = timeout
+        await asyncio.sleep(rl_delay)
+        return {"optimized_layout": {"stories": 2}, "confidence": 0.9, "reward_score": 0.8}
+
+    monkeypatch.setattr(bhiv_integrated, "run_local_lm", fake_lm)
+    monkeypatch.setattr(bhiv_integrated, "call_sohum_compliance", fake_compliance)
+    monkeypatch.setattr(bhiv_integrated, "call_ranjeet_rl", fake_rl)
+
+
+def test_compliance_and_rl_run_concurrently_with_remaining_budget(monkeypatch):
+    """Both calls overlap, receive the remaining budget as timeout and report timings"""
+    timeouts = {}
+    _patch_services(monkeypatch, compliance_delay=0.2, rl_delay=0.2, timeouts=timeouts)
+
+    started = time.monotonic()
+    response = asyncio.run(
+        create_design(DesignRequest(user_id="u1", prompt="2 floor house", city="Mumbai", deadline_s=5))
+    )
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.35
+    assert response.compliance.compliant is True and response.rl_optimization.reward_score == 0.8
+    assert response.stages_cut == []
+    assert set(response.stage_timings_ms) == {"spec_generation", "compliance", "rl_optimization"}
+    assert 4 < timeouts["compliance"] <= 5 and 4 < timeouts["rl_optimization"] <= 5
+
+
+def test_slow_stage_is_cut_at_the_deadline(monkeypatch):
+    """A stage still running at the deadline is abandoned and reported as cut"""
+    _patch_services(monkeypatch, compliance_delay=0.05, rl_delay=5, timeouts={})
+
+    started = time.monotonic()
+    response = asyncio.run(create_design(DesignRequest(user_id="u1", prompt="house", city="Pune", deadline_s=0.3)))
+
+    assert time.monotonic() - started < 1
+    assert response.stages_cut == ["rl_optimization"]
+    assert response.rl_optimization is None
+    assert response.compliance.compliant is True
+
+
+def test_client_timeout_is_reported_as_cut_not_compliant(monkeypatch):
+    """A Sohum client timeout cuts the compliance stage instead of failing the request"""
+    call_sohum_compliance = bhiv_integrated.call_sohum_compliance
+    _patch_services(monkeypatch, compliance_delay=0, rl_delay=0, timeouts={})
+    monkeypatch.setattr(bhiv_integrated, "call_sohum_compliance", call_sohum_compliance)
+
+    async def read_timeout(case_data, timeout=None):
+        raise httpx.ReadTimeout("timed out")
+
+    monkeypatch.setattr(bhiv_integrated.sohum_client, "run_compliance_case", read_timeout)
+    response = asyncio.run(create_design(DesignRequest(user_id="u1", prompt="house", city="Mumbai", deadline_s=5)))
+
+    assert response.stages_cut == ["compliance"]
+    assert response.compliance.compliant is False
+    assert response.rl_optimization.reward_score == 0.8
@@ -0,0 +1,87 @@
+"""
+Test cases for the response compression middleware
+"""
+import gzip
+import json
+import zlib
+
+from app.middleware.compression import CompressionMiddleware, CompressionStats, negotiate_encoding
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+PAYLOAD = {"objects": [{"id": f"wall_{i}", "type": "wall", "material": "brick"} for i in range(200)]}
+
+
+def make_client(stats: CompressionStats) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=500, stats=stats)
+
+    @app.get("/specs/{spec_id}")
+    async def get_spec(spec_id: str):
+        return PAYLOAD
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(50):
+                yield json.dumps({"line": i, "text": "x" * 100}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+def test_negotiation_prefers_supported_encoding():
+    """q-values and server preference decide the encoding"""
+    assert negotiate_encoding("gzip, br", ["zstd", "br", "gzip"]) == "br"
+    assert negotiate_encoding("br;q=0, gzip;q=0.5", ["br", "gzip"]) == "gzip"
+    assert negotiate_encoding("identity", ["gzip"]) is None
+    assert negotiate_encoding("*", ["zstd", "gzip"]) == "zstd"
+    assert negotiate_encoding("gzip;q=0", ["gzip"]) is None
+
+
+def test_buffered_response_compressed_and_cached():
+    """Large bodies are gzipped, small ones skipped, repeats served from cache"""
+    stats = CompressionStats()
+    client = make_client(stats)
+
+    response = client.get("/specs/a", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == PAYLOAD
+
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    plain = client.get("/specs/a", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    client.get("/specs/b", headers={"Accept-Encoding": "gzip"})
+    route = stats.snapshot()["routes"]["/specs/{spec_id}"]
+    assert route["responses"] == 2
+    assert route["cache_hits"] == 1
+    assert route["bytes_saved"] > 0
+
+
+def test_streaming_response_compressed_incrementally():
+    """Streaming bodies are compressed chunk by chunk and decode to the original"""
+    stats = CompressionStats()
+    client = make_client(stats)
+
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert len(lines) == 50
+    assert json.loads(lines[-1])["line"] == 49
+
+    # Each flushed chunk is decodable on its own prefix
+    assert zlib.decompressobj(31).decompress(raw[: len(raw) // 2])
+    assert stats.snapshot()["routes"]["/stream"]["bytes_saved"] > 0
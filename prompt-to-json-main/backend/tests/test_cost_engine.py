@@ -0,0 +1,88 @@
+"""
+Test cases for the incremental cost estimation engine
+"""
+
+import copy
+
+from app.cost_engine import (
+    apply_cost_breakdown,
+    compute_cost_breakdown,
+    estimate_costs_batch,
+    object_cost_lines,
+    update_cost_breakdown,
+)
+from app.spec_diff import apply_diff, diff_specs, extend_diff
+
+
+def _spec():
+    return {
+        "design_type": "house",
+        "dimensions": {"width": 10, "length": 12},
+        "stories": 2,
+        "objects": [
+            {"id": "floor_1", "type": "floor", "material": "marble_white"},
+            {"id": "wall_1", "type": "wall", "material": "brick_premium"},
+            {"id": "garage_1", "type": "garage", "material": "concrete"},
+        ],
+        "estimated_cost": {"total": 0, "currency": "INR"},
+    }
+
+
+def test_full_breakdown():
+    """Base cost times the strongest material plus object premiums"""
+    breakdown = compute_cost_breakdown(_spec())
+
+    # 120 sqm * ₹25k * 2 stories * 1.8 (marble) + ₹2L garage
+    assert breakdown["total"] == 11_000_000
+    assert breakdown["material_premium"] == 1.8
+    assert breakdown["objects"]["garage_1"]["premium"] == 200000
+    assert sum(line["cost"] for line in object_cost_lines(breakdown)) == breakdown["total"]
+
+
+def test_minimum_cost_applies():
+    """Small designs are priced at their design type minimum"""
+    spec = {"design_type": "kitchen", "dimensions": {"width": 2, "length": 2}, "objects": []}
+
+    assert compute_cost_breakdown(spec)["total"] == 300000
+
+
+def test_incremental_update_matches_full_computation():
+    """Re-pricing changed objects gives the same result as a full recompute"""
+    before = _spec()
+    apply_cost_breakdown(before, compute_cost_breakdown(before))
+    after = copy.deepcopy(before)
+    after["objects"][0]["material"] = "granite_black"
+    del after["objects"][2]
+    after["objects"].append({"id": "roof_1", "type": "roof", "material": "leather"})
+    after["stories"] = 3
+
+    diff = diff_specs(before, after)
+    updated = update_cost_breakdown(before["cost_breakdown"], after, diff)
+
+    assert updated == compute_cost_breakdown(after)
+    assert updated["material_premium"] == 2.0
+
+
+def test_cost_fields_extend_diff():
+    """Cost fields written after diffing are recorded so the diff still applies"""
+    before = _spec()
+    apply_cost_breakdown(before, compute_cost_breakdown(before))
+    after = copy.deepcopy(before)
+    after["objects"][0]["material"] = "concrete"
+
+    diff = diff_specs(before, after)
+    apply_cost_breakdown(after, update_cost_breakdown(before["cost_breakdown"], after, diff))
+    extend_diff(diff, before, after, ["cost_breakdown", "estimated_cost"])
+
+    assert after["estimated_cost"]["total"] == 6_800_000
+    assert apply_diff(before, diff) == after
+
+
+def test_batch_matches_single_specs():
+    """Vectorized batch scoring equals per-spec computation"""
+    specs = [_spec(), {"design_type": "car_body", "objects": [{"type": "wheel", "count": 4}]}, {"objects": []}]
+    specs[0]["objects"][0]["material"] = "glass"
+
+    expected = [compute_cost_breakdown(spec)["total"] for spec in specs]
+
+    assert estimate_costs_batch(specs).tolist() == expected
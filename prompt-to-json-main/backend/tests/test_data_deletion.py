@@ -0,0 +1,92 @@
+"""
+Test cases for batched, resumable user-data deletion
+"""
+
+import pytest
+from app.models import Evaluation, Iteration, Spec
+from app.services import data_deletion_service
+
+from tests.db_helpers import sqlite_session
+
+TABLES = ["users", "specs", "iterations", "evaluations", "compliance_checks", "rl_feedback", "vr_renders", "audit_logs"]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_deletion_service, "DELETION_JOB_DIR", str(tmp_path))
+    monkeypatch.setattr(data_deletion_service, "remove_storage_objects", lambda paths: 0)
+
+    session = sqlite_session(TABLES)
+
+    for i in range(12):
+        session.add(Spec(id=f"spec_{i}", user_id="alice", prompt="p", city="Mumbai", design_type="house", spec_json={}))
+        # Every other iteration/evaluation is left on alice's spec by another user
+        author = "bob" if i % 2 else "alice"
+        session.add(Iteration(id=f"iter_{i}", user_id=author, spec_id=f"spec_{i}", query="q", diff={}, spec_json={}))
+        session.add(Evaluation(user_id=author, spec_id=f"spec_{i}", rating=4))
+    session.add(Spec(id="spec_bob", user_id="bob", prompt="p", city="Pune", design_type="house", spec_json={}))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_deletion_removes_user_rows_in_batches(db):
+    """All of the user's rows go, other users' specs stay"""
+    job = data_deletion_service.create_deletion_job("alice", "alice")
+
+    result = data_deletion_service.run_deletion_job(job["job_id"], batch_size=5, db=db)
+
+    assert result["status"] == "completed"
+    assert result["progress"]["specs"]["deleted"] == 12
+    assert result["progress"]["iterations"]["deleted"] == 6
+    assert [spec.id for spec in db.query(Spec).all()] == ["spec_bob"]
+    assert db.query(Iteration).count() == 0
+    assert db.query(Evaluation).count() == 0
+
+
+def test_deletion_resumes_after_failure(db, monkeypatch):
+    """A job interrupted mid-phase finishes on the next run"""
+    job = data_deletion_service.create_deletion_job("alice", "alice")
+    original = data_deletion_service._delete_spec_batch
+    calls = []
+
+    def crash_on_second_batch(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return original(*args)
+
+    monkeypatch.setattr(data_deletion_service, "_delete_spec_batch", crash_on_second_batch)
+    failed = data_deletion_service.run_deletion_job(job["job_id"], batch_size=5, db=db)
+    assert failed["status"] == "failed"
+    assert failed["progress"]["specs"] == {"deleted": 5, "done": False}
+    assert failed["progress"]["iterations"]["done"]
+
+    monkeypatch.setattr(data_deletion_service, "_delete_spec_batch", original)
+    resumed = data_deletion_service.run_deletion_job(job["job_id"], batch_size=5, db=db)
+
+    assert resumed["status"] == "completed"
+    assert resumed["attempts"] == 2
+    assert resumed["progress"]["specs"]["deleted"] == 12
+    assert db.query(Spec).filter(Spec.user_id == "alice").count() == 0
+
+
+def test_job_claimed_by_another_worker_is_not_run(db):
+    """Only the worker holding a job's lock runs it; the claim is released when that worker stops"""
+    job = data_deletion_service.create_deletion_job("alice", "alice")
+    other_worker = data_deletion_service._lock_job_file(job["job_id"])
+    assert other_worker is not None
+
+    try:
+        assert data_deletion_service._lock_job_file(job["job_id"]) is None
+        assert data_deletion_service.resume_deletion_jobs() == 0
+        skipped = data_deletion_service.run_deletion_job(job["job_id"], batch_size=5, db=db)
+        assert skipped["status"] == "queued" and skipped["attempts"] == 0
+        assert db.query(Spec).filter(Spec.user_id == "alice").count() == 12
+    finally:
+        data_deletion_service._unlock_job_file(other_worker)
+
+    result = data_deletion_service.run_deletion_job(job["job_id"], batch_size=5, db=db)
+    assert result["status"] == "completed" and result["attempts"] == 1
+    # A finished job is not run again by a worker that listed it before completion
+    assert data_deletion_service.run_deletion_job(job["job_id"], db=db)["attempts"] == 1
@@ -0,0 +1,143 @@
+"""
+Test cases for the streaming user data export and background archive jobs
+"""
+
+import io
+import json
+import zipfile
+
+import pytest
+from app import database
+from app.api import data_privacy
+from app.database import get_current_user, get_db
+from app.models import Evaluation, Iteration, Spec
+from app.services import data_export_service
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tests.db_helpers import sqlite_session
+
+TABLES = ["users", "specs", "iterations", "evaluations", "rl_feedback", "vr_renders"]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_export_service, "EXPORT_DIR", str(tmp_path))
+
+    session = sqlite_session(TABLES)
+    for i in range(3):
+        session.add(
+            Spec(
+                id=f"spec_{i}",
+                user_id="alice",
+                prompt="p",
+                city="Mumbai",
+                design_type="house",
+                spec_json={"stories": i},
+                preview_url=f"https://cdn.example.com/previews/spec_{i}.png" if i == 0 else None,
+            )
+        )
+        session.add(Iteration(id=f"iter_{i}", user_id="alice", spec_id=f"spec_{i}", query="q", diff={}, spec_json={}))
+    session.add(Evaluation(user_id="alice", spec_id="spec_0", rating=4))
+    session.add(Spec(id="spec_bob", user_id="bob", prompt="p", city="Pune", design_type="house", spec_json={}))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    """data_privacy routes authenticated as alice, with background jobs on the test database"""
+    monkeypatch.setattr(database, "SessionLocal", lambda: db)
+
+    app = FastAPI()
+    app.include_router(data_privacy.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: "alice"
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+def _entries(archive_bytes):
+    archive = zipfile.ZipFile(io.BytesIO(archive_bytes))
+    assert archive.testzip() is None
+    return {name: archive.read(name) for name in archive.namelist()}
+
+
+def test_streamed_zip_holds_only_the_users_rows(db, monkeypatch):
+    """Chunks form a valid archive with one NDJSON entry per table, stored files and a manifest"""
+    monkeypatch.setattr(data_export_service, "_iter_remote_file", lambda client, url: iter([b"PNG", b"DATA"]))
+
+    chunks = list(data_export_service.iter_export_zip(db, "alice"))
+    entries = _entries(b"".join(chunks))
+
+    assert len(chunks) > 1
+    assert set(entries) == {
+        "specs.ndjson",
+        "iterations.ndjson",
+        "evaluations.ndjson",
+        "rl_feedback.ndjson",
+        "vr_renders.ndjson",
+        "files/spec_0/preview.png",
+        "manifest.json",
+    }
+    specs = [json.loads(line) for line in entries["specs.ndjson"].decode().splitlines()]
+    assert [spec["id"] for spec in specs] == ["spec_0", "spec_1", "spec_2"]
+    assert entries["files/spec_0/preview.png"] == b"PNGDATA"
+
+    manifest = json.loads(entries["manifest.json"])
+    assert manifest["record_counts"] == {
+        "specs": 3,
+        "iterations": 3,
+        "evaluations": 1,
+        "rl_feedback": 0,
+        "vr_renders": 0,
+    }
+    assert manifest["files_exported"] == 1
+
+
+def test_zip_export_endpoint_streams_archive(client):
+    """format=zip returns the archive as an attachment; files can be left out"""
+    response = client.get("/api/v1/data/alice/export", params={"format": "zip", "include_files": False})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert "attachment" in response.headers["content-disposition"]
+    entries = _entries(response.content)
+    assert not [name for name in entries if name.startswith("files/")]
+    assert json.loads(entries["manifest.json"])["user_id"] == "alice"
+
+
+def test_export_of_another_user_is_denied(client):
+    """Users can only export their own data"""
+    assert client.get("/api/v1/data/bob/export", params={"format": "zip"}).status_code == 403
+
+
+def test_background_archive_status_and_download(client):
+    """A background job completes, reports its download URL and serves the archive"""
+    started = client.post("/api/v1/data/alice/export/archive", params={"include_files": False})
+    assert started.status_code == 202
+    job_id = started.json()["job_id"]
+
+    status = client.get(started.json()["status_url"]).json()
+    assert status["status"] == "completed"
+    assert status["bytes_written"] > 0
+    assert status["download_url"] == f"/api/v1/data/exports/{job_id}/download"
+
+    download = client.get(status["download_url"])
+    assert download.status_code == 200
+    assert json.loads(_entries(download.content)["manifest.json"])["record_counts"]["specs"] == 3
+
+
+def test_missing_and_unfinished_jobs(client):
+    """Unknown jobs are 404; a queued job has no download URL and cannot be downloaded yet"""
+    assert client.get("/api/v1/data/exports/export_missing").status_code == 404
+    assert client.get("/api/v1/data/exports/export_missing/download").status_code == 404
+
+    job = data_export_service.create_export_job("alice", "alice")
+    status = client.get(f"/api/v1/data/exports/{job['job_id']}").json()
+    assert status["status"] == "queued"
+    assert "download_url" not in status
+
+    download = client.get(f"/api/v1/data/exports/{job['job_id']}/download")
+    assert download.status_code == 409
+    assert download.json()["detail"] == "Export job is queued"
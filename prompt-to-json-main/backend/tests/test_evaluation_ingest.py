@@ -0,0 +1,121 @@
+"""
+Test cases for write-behind evaluation ingestion
+"""
+
+import os
+import time
+
+import pytest
+from app.config import settings
+from app.models import Evaluation, RLFeedback, Spec
+from app.services import evaluation_ingest_service as ingest
+
+from tests.db_helpers import sqlite_session
+
+TABLES = ["users", "specs", "iterations", "evaluations", "rl_feedback"]
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EVAL_QUEUE_DIR", str(tmp_path))
+
+    session = sqlite_session(TABLES)
+    for spec_id in ("spec_a", "spec_b"):
+        session.add(Spec(id=spec_id, user_id="alice", prompt="p", city="Mumbai", design_type="house", spec_json={}))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_enqueue_is_durable_before_flush(db):
+    """Queued evaluations live in the journal until the consumer flushes"""
+    queue_id = ingest.enqueue_evaluation("spec_a", "alice", 4.5, "nice")
+
+    assert queue_id.startswith("eval_")
+    assert os.path.getsize(os.path.join(settings.EVAL_QUEUE_DIR, ingest.pending_file())) > 0
+    assert db.query(Evaluation).count() == 0
+
+
+def test_flush_batches_inserts_and_coalesces_feedback(db):
+    """One flush inserts every queued row and records feedback per spec"""
+    for rating in (4, 5, 3):
+        ingest.enqueue_evaluation("spec_a", "alice", rating)
+    ingest.enqueue_evaluation("spec_b", "bob", 2)
+
+    inserted = ingest.flush_evaluations(db)
+
+    assert inserted == 4
+    assert db.query(Evaluation).count() == 4
+    assert db.query(RLFeedback).count() == 4
+    assert not os.listdir(settings.EVAL_QUEUE_DIR)
+
+
+def test_flush_rejects_invalid_rows(db):
+    """A row that violates a constraint is set aside without blocking the batch"""
+    ingest.enqueue_evaluation("spec_a", "alice", 4)
+    ingest.enqueue_evaluation("spec_a", None, 4)
+
+    inserted = ingest.flush_evaluations(db)
+
+    assert inserted == 1
+    with open(os.path.join(settings.EVAL_QUEUE_DIR, ingest.REJECTED_FILE)) as f:
+        assert len(f.readlines()) == 1
+
+
+def test_concurrent_workers_claim_each_batch_once(db, monkeypatch):
+    """A batch claimed by one worker is skipped by another instead of being inserted twice"""
+    ingest.enqueue_evaluation("spec_a", "alice", 4)
+    ingest._rotate_journal()
+    claimed = ingest._claim_batches()
+
+    # A second worker flushing now finds nothing to insert and nothing to remove
+    assert ingest.flush_evaluations(db) == 0
+
+    ingest._release(claimed)
+    assert ingest.flush_evaluations(db) == 1
+    assert db.query(Evaluation).count() == 1
+    assert not os.listdir(settings.EVAL_QUEUE_DIR)
+
+
+def test_dead_worker_batches_are_recovered(db):
+    """Claimed batches and journals of a dead worker are flushed once their lease expires"""
+    queue = settings.EVAL_QUEUE_DIR
+    line = (
+        '{"queue_id": "q1", "spec_id": "spec_b", "user_id": "bob", "rating": 3, "created_at": "2024-01-01T00:00:00"}\n'
+    )
+    for name in ("claimed-99999-inflight-1-99999.jsonl", "pending-99999.jsonl"):
+        with open(os.path.join(queue, name), "w") as f:
+            f.write(line)
+
+    # Still within the lease: left to its owner
+    assert ingest.flush_evaluations(db) == 0
+
+    expired = time.time() - settings.EVAL_CLAIM_TIMEOUT_SECONDS - 1
+    for name in os.listdir(queue):
+        os.utime(os.path.join(queue, name), (expired, expired))
+    assert ingest.flush_evaluations(db) == 2
+    assert not os.listdir(queue)
+
+
+@pytest.mark.parametrize("write_behind", [False, True])
+def test_evaluate_ids_identify_what_was_stored(db, monkeypatch, write_behind):
+    """saved_id names the stored row inline; a queued evaluation returns only its queue_id"""
+    from app.api import evaluate
+    from app.database import get_current_user, get_db
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(settings, "EVAL_WRITE_BEHIND_ENABLED", write_behind)
+    app = FastAPI()
+    app.include_router(evaluate.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: "alice"
+    app.dependency_overrides[get_db] = lambda: db
+
+    body = TestClient(app).post("/api/v1/evaluate", json={"user_id": "alice", "spec_id": "spec_a", "rating": 4}).json()
+
+    if write_behind:
+        assert body["saved_id"] == "" and body["queue_id"].startswith("eval_")
+        assert db.query(Evaluation).count() == 0
+    else:
+        assert body["queue_id"] is None
+        assert body["saved_id"] == f"eval_{db.query(Evaluation).one().id}"
@@ -0,0 +1,57 @@
+"""
+Test cases for fast-path JSON responses
+"""
+
+import json
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.fast_json import RawJSON, cached_json, dumps_with_raw, fast_response, invalidate_spec_json, is_cached
+from app.schemas import GenerateResponse
+
+
+def _spec():
+    return {"design_type": "house", "objects": [{"id": f"wall_{i}", "material": "brick"} for i in range(20)]}
+
+
+def test_raw_values_are_spliced_verbatim():
+    """Pre-serialized values appear unchanged at any depth"""
+    payload = {"spec": {"spec_json": RawJSON(b'{"a":[1,2]}')}, "items": [RawJSON(b"null"), 3]}
+
+    assert json.loads(dumps_with_raw(payload)) == {"spec": {"spec_json": {"a": [1, 2]}}, "items": [None, 3]}
+
+
+def test_fast_response_matches_response_model():
+    """The fast path produces the same document as GenerateResponse"""
+    fields = {
+        "spec_id": "spec_fast",
+        "spec_json": _spec(),
+        "preview_url": "https://example.com/spec_fast.glb",
+        "estimated_cost": 4500000.0,
+        "compliance_check_id": "check_spec_fast",
+        "created_at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "spec_version": 1,
+        "user_id": "alice",
+    }
+    expected = json.loads(GenerateResponse(**fields).model_dump_json())
+
+    response = fast_response({**fields, "spec_json": cached_json(("spec", "spec_fast", 1), fields["spec_json"])})
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == expected
+
+
+def test_spec_bytes_cache_is_bounded_and_invalidated(monkeypatch):
+    """Cached versions are reused, evicted least recently used first and dropped on invalidation"""
+    monkeypatch.setattr(settings, "SPEC_JSON_CACHE_MAX_ENTRIES", 2)
+
+    first = cached_json(("spec", "spec_a", 1), _spec())
+    assert cached_json(("spec", "spec_a", 1), None).data == first.data
+
+    cached_json(("spec", "spec_b", 1), _spec())
+    cached_json(("spec", "spec_c", 1), _spec())
+    assert not is_cached(("spec", "spec_a", 1))
+
+    invalidate_spec_json("spec_c")
+    assert not is_cached(("spec", "spec_c", 1))
+    assert is_cached(("spec", "spec_b", 1))
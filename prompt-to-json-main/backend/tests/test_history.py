@@ -0,0 +1,116 @@
+"""
+Test cases for the keyset-paginated history endpoints
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from app.api import history
+from app.database import get_current_user, get_db
+from app.models import Evaluation, Iteration, Spec
+from app.pagination import encode_cursor
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tests.db_helpers import sqlite_session
+
+TABLES = ["users", "specs", "iterations", "evaluations", "compliance_checks"]
+
+# Most rows share one timestamp, so pages must break ties on id
+TIED = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+EARLIER = datetime(2024, 1, 1, 11, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db():
+    session = sqlite_session(TABLES)
+    for i in range(5):
+        created_at = EARLIER if i == 0 else TIED
+        session.add(
+            Spec(
+                id=f"spec_{i}",
+                user_id="alice",
+                prompt="p",
+                city="Mumbai",
+                design_type="house",
+                spec_json={},
+                created_at=created_at,
+            )
+        )
+    session.add(Spec(id="spec_bob", user_id="bob", prompt="p", city="Pune", design_type="house", spec_json={}))
+    for i in range(7):
+        session.add(
+            Iteration(
+                id=f"iter_{i}",
+                user_id="alice",
+                spec_id="spec_1",
+                query="q",
+                diff={},
+                spec_json={},
+                created_at=EARLIER if i == 6 else TIED,
+            )
+        )
+    for i in range(3):
+        session.add(Evaluation(user_id="alice", spec_id="spec_1", rating=4, created_at=TIED))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(history.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: "alice"
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+def _pages(client, url, **params):
+    pages, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = pages[-1]["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_spec_history_pages_across_tied_timestamps(client):
+    """Every iteration and evaluation is returned once, newest first, with ties broken by id"""
+    pages = _pages(client, "/api/v1/history/spec_1", limit=2)
+
+    iterations = [item["iter_id"] for page in pages for item in page["iterations"]]
+    evaluations = [item["eval_id"] for page in pages for item in page["evaluations"]]
+    assert iterations == ["iter_5", "iter_4", "iter_3", "iter_2", "iter_1", "iter_0", "iter_6"]
+    assert evaluations == [3, 2, 1]
+    assert len(pages) == 4
+    assert pages[0]["total_iterations"] == 7 and pages[0]["total_evaluations"] == 3
+    # The evaluation stream ran out on page 2, so later pages skip it
+    assert pages[2]["evaluations"] == [] and pages[3]["evaluations"] == []
+
+
+def test_user_history_pages_across_tied_timestamps(client):
+    """Only the user's specs are listed, each exactly once"""
+    pages = _pages(client, "/api/v1/history", limit=2)
+
+    specs = [spec["spec_id"] for page in pages for spec in page["specs"]]
+    assert specs == ["spec_4", "spec_3", "spec_2", "spec_1", "spec_0"]
+    assert pages[0]["specs"][0]["data_integrity"]["iterations_count"] == 0
+    assert next(s for s in pages[1]["specs"] if s["spec_id"] == "spec_1")["data_integrity"]["iterations_count"] == 7
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not-a-cursor",
+        encode_cursor({"iterations": "x"}),
+        encode_cursor({"iterations": ["yesterday", "iter_1"], "evaluations": False}),
+        encode_cursor({"specs": ["2024-01-01T12:00:00", {"id": 1}]}),
+    ],
+)
+def test_bad_cursor_is_400(client, cursor):
+    """Malformed and tampered cursors are client errors on both endpoints"""
+    assert client.get("/api/v1/history/spec_1", params={"cursor": cursor}).status_code == 400
+    assert client.get("/api/v1/history", params={"cursor": cursor}).status_code == 400
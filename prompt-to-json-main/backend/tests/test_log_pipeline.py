@@ -0,0 +1,73 @@
+"""
+Test cases for the queue-based logging pipeline
+"""
+import json
+import logging
+import threading
+
+from app import log_pipeline
+from app.log_pipeline import JSONFormatter, LazyJSON, QueuedHandler, SamplingFilter, add_sink, rotating_file_handler
+from sentry_sdk.integrations.logging import ignore_logger
+
+
+def test_formatting_happens_on_listener_thread(tmp_path, monkeypatch):
+    """Callers only enqueue; the sink formats and writes JSON lines"""
+    # Start from an unwired pipeline even if another test imported app.main (which configures logging)
+    monkeypatch.setattr(log_pipeline, "_root_handler", None)
+    monkeypatch.setattr(log_pipeline, "_sinks", [])
+    monkeypatch.setattr(log_pipeline, "_direct_handlers", {})
+    # Sentry's logging integration (enabled by app.main) formats breadcrumbs on the calling thread
+    ignore_logger("test.pipeline")
+    formatted_on = []
+
+    class Payload:
+        def __str__(self):
+            formatted_on.append(threading.current_thread().name)
+            return "payload"
+
+    handler = rotating_file_handler(str(tmp_path / "events.jsonl"), rotation="1 MB")
+    handler.setFormatter(JSONFormatter())
+    add_sink(handler, "test.pipeline")
+
+    log = logging.getLogger("test.pipeline")
+    log.setLevel(logging.INFO)
+    # Keep pytest's capture handler (which formats on this thread) out of the way
+    log.propagate = False
+    log.info("event %s", Payload(), extra={"spec_id": "spec_1"})
+    log.info("%s", LazyJSON({"event": "generated"}))
+    log_pipeline.stop_logging()
+
+    lines = [json.loads(line) for line in (tmp_path / "events.jsonl").read_text().splitlines()]
+    assert lines[0]["message"] == "event payload"
+    assert lines[0]["spec_id"] == "spec_1"
+    assert json.loads(lines[1]["message"]) == {"event": "generated"}
+    assert formatted_on and threading.current_thread().name not in formatted_on
+
+
+def test_sampling_and_full_queue_drop():
+    """Sampled debug loggers keep a fraction; a full queue drops instead of blocking"""
+    sampler = SamplingFilter({"app.api.generate": 0.0, "app.api": 1.0})
+
+    def record(name, level):
+        return logging.LogRecord(name, level, __file__, 1, "msg", (), None)
+
+    assert not sampler.filter(record("app.api.generate", logging.DEBUG))
+    assert sampler.filter(record("app.api.generate", logging.INFO))
+    assert sampler.filter(record("app.api.evaluate", logging.DEBUG))
+
+    import queue
+
+    handler = QueuedHandler(queue.Queue(maxsize=1))
+    dropped = QueuedHandler.dropped
+    handler.emit(record("app", logging.INFO))
+    handler.emit(record("app", logging.INFO))
+    assert QueuedHandler.dropped == dropped + 1
+
+
+def test_stop_logging_tolerates_closed_streams(tmp_path):
+    """Stopping at exit does not fail when a handler's stream is already closed"""
+    stream = open(tmp_path / "closed.log", "w")
+    add_sink(logging.StreamHandler(stream), "test.closed")
+    stream.close()
+
+    log_pipeline.stop_logging()
@@ -0,0 +1,69 @@
+"""
+Test cases for the concurrent multi-city test suite
+"""
+import asyncio
+import json
+import time
+
+from app.api import multi_city_testing as mct
+from app.config import settings
+
+
+def _patch_pipelines(monkeypatch, active):
+    def pipeline(delay, success=True):
+        async def run(test_case):
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+            await asyncio.sleep(delay)
+            active["now"] -= 1
+            return {"success": success}
+
+        return run
+
+    monkeypatch.setattr(mct, "test_mcp_pipeline", pipeline(0.05))
+    monkeypatch.setattr(mct, "test_rl_pipeline", pipeline(0.02))
+    monkeypatch.setattr(mct, "test_geometry_pipeline", pipeline(0.0))
+
+
+def test_suite_runs_cases_concurrently_with_city_percentiles(monkeypatch):
+    """All 16 cases run under the semaphore bound and each city gets stage-level p50/p95"""
+    active = {"now": 0, "peak": 0}
+    _patch_pipelines(monkeypatch, active)
+
+    started = time.perf_counter()
+    suite = asyncio.run(mct.execute_test_suite(mct.CITY_TEST_CASES, concurrency=4))
+    elapsed = time.perf_counter() - started
+
+    assert active["peak"] == 4
+    # 16 cases x ~70ms serially would take over 1.1s
+    assert elapsed < 0.6
+    assert suite.total_cases == 16 and suite.passed_cases == 16 and suite.overall_status == "passed"
+    assert [r.case_id for r in suite.city_results["Pune"]] == [c.case_id for c in mct.CITY_TEST_CASES["Pune"]]
+
+    mumbai = suite.latency_summary["Mumbai"]
+    assert mumbai.cases == 4 and mumbai.p50_ms <= mumbai.p95_ms <= mumbai.max_ms
+    assert set(mumbai.stage_p95_ms) == {"mcp", "rl", "geometry"}
+    assert mumbai.stage_p50_ms["mcp"] >= 45
+
+
+def test_percentile_and_sinks(monkeypatch, tmp_path):
+    """Nearest-rank percentiles; configured sinks run and failing or unknown sinks are skipped"""
+    assert mct._percentile([], 95) == 0
+    assert mct._percentile([10, 20, 30, 40], 50) == 20
+    assert mct._percentile(list(range(1, 101)), 95) == 95
+
+    _patch_pipelines(monkeypatch, {"now": 0, "peak": 0})
+    suite = asyncio.run(mct.execute_test_suite({"Nashik": mct.CITY_TEST_CASES["Nashik"]}, concurrency=2))
+
+    path = tmp_path / "suite.jsonl"
+    monkeypatch.setattr(settings, "MULTI_CITY_TEST_LOG_PATH", str(path))
+
+    def broken(suite, entry):
+        raise RuntimeError("db down")
+
+    monkeypatch.setitem(mct.SUITE_SINKS, "db", broken)
+    mct.write_suite_sinks(suite, ["db", "jsonl", "bogus"])
+
+    entry = json.loads(path.read_text().strip())
+    assert entry["test_suite_id"] == suite.test_suite_id
+    assert entry["latency_summary"]["Nashik"]["cases"] == 4
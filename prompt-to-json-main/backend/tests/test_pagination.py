@@ -0,0 +1,45 @@
+"""
+Test cases for keyset pagination helpers used by the history endpoints
+"""
+
+import pytest
+from app.pagination import decode_cursor, encode_cursor, parse_fields
+from fastapi import HTTPException
+
+
+def test_cursor_round_trip():
+    """Cursors decode back to the payload they were built from"""
+    payload = {"iterations": ["2024-01-01T00:00:00+00:00", "iter_abc"], "evaluations": False}
+
+    assert decode_cursor(encode_cursor(payload)) == payload
+
+
+def test_invalid_cursor_rejected():
+    """Malformed cursors return 400 instead of a server error"""
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+
+    assert exc.value.status_code == 400
+
+
+def test_parse_fields_projection():
+    """Only known heavy fields can be requested"""
+    assert parse_fields(None, {"spec_json", "diff"}) == set()
+    assert parse_fields("spec_json, diff", {"spec_json", "diff"}) == {"spec_json", "diff"}
+
+    with pytest.raises(HTTPException):
+        parse_fields("password_hash", {"spec_json", "diff"})
+
+
+def test_tampered_cursor_positions_rejected():
+    """Well-formed cursors with unusable positions return 400 instead of failing in the query"""
+    for payload in (
+        {"iterations": "x"},
+        {"iterations": ["not-a-date", "iter_1"]},
+        {"iterations": ["2024-01-01T00:00:00", None]},
+        {"specs": ["2024-01-01T00:00:00"]},
+        {"evaluations": True},
+    ):
+        with pytest.raises(HTTPException) as exc:
+            decode_cursor(encode_cursor(payload))
+        assert exc.value.status_code == 400
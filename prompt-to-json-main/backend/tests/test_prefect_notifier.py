@@ -0,0 +1,74 @@
+"""
+Test cases for batched Prefect webhook notifications
+"""
+import asyncio
+import glob
+import json
+import os
+
+import httpx
+from app.config import settings
+from app.services import prefect_notifier
+
+
+def _event(spec_id, status="success"):
+    return {"event_type": "bhiv_prompt_completed", "spec_id": spec_id, "city": "Mumbai", "status": status}
+
+
+def _configure(monkeypatch, tmp_path, handler):
+    monkeypatch.setattr(settings, "PREFECT_WEBHOOK_URL", "http://prefect.test/hooks/abc")
+    monkeypatch.setattr(settings, "PREFECT_NOTIFY_QUEUE_DIR", str(tmp_path / "queue"))
+    monkeypatch.setattr(settings, "PREFECT_NOTIFY_BATCH_SIZE", 3)
+    monkeypatch.setattr(prefect_notifier, "_flush_lock", None)
+    monkeypatch.setattr(prefect_notifier, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    prefect_notifier._buffer.clear()
+
+
+def test_events_are_collapsed_per_spec_and_sent_in_batches(monkeypatch, tmp_path):
+    """Duplicate spec events collapse to the latest and buffered events go out in size-bounded batches"""
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    _configure(monkeypatch, tmp_path, handler)
+    prefect_notifier.enqueue_notification(_event("spec_1", "failed"))
+    prefect_notifier.enqueue_notification(_event("spec_1", "success"))
+    for i in range(2, 6):
+        prefect_notifier.enqueue_notification(_event(f"spec_{i}"))
+
+    sent = asyncio.run(prefect_notifier.flush_notifications())
+
+    assert sent == 5
+    assert [body["count"] for body in bodies] == [3, 2]
+    assert all(body["event"] == "bhiv.prompt.batch" for body in bodies)
+    first = bodies[0]["events"][0]
+    assert first["spec_id"] == "spec_1" and first["status"] == "success" and first["collapsed"] == 1
+
+
+def test_unreachable_prefect_spills_to_disk_and_replays(monkeypatch, tmp_path):
+    """Failed batches are spilled durably and resent oldest-first once Prefect recovers"""
+    up = {"value": False}
+    received = []
+
+    def handler(request):
+        if not up["value"]:
+            raise httpx.ConnectError("connection refused")
+        received.append(json.loads(request.content))
+        return httpx.Response(202)
+
+    _configure(monkeypatch, tmp_path, handler)
+    prefect_notifier.enqueue_notification(_event("spec_a"))
+    prefect_notifier.enqueue_notification(_event("spec_b"))
+
+    assert asyncio.run(prefect_notifier.flush_notifications()) == 0
+    assert len(glob.glob(os.path.join(str(tmp_path / "queue"), "spill-*.jsonl"))) == 1
+    assert prefect_notifier.get_notifier_stats()["spilled_batches"] == 1
+
+    up["value"] = True
+    prefect_notifier.enqueue_notification(_event("spec_c"))
+    assert asyncio.run(prefect_notifier.flush_notifications()) == 1
+
+    assert [[e["spec_id"] for e in body["events"]] for body in received] == [["spec_a", "spec_b"], ["spec_c"]]
+    assert glob.glob(os.path.join(str(tmp_path / "queue"), "spill-*.jsonl")) == []
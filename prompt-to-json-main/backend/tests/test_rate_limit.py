@@ -0,0 +1,112 @@
+"""
+Test cases for the rate limiter
+"""
+import threading
+
+from app.middleware.rate_limit import MemoryBucketStore, RateLimiter, SQLiteBucketStore
+
+
+def test_route_costs_and_refill():
+    """Expensive routes drain more tokens and buckets refill over time"""
+    store = MemoryBucketStore()
+    limiter = RateLimiter(requests_per_minute=60, store=store, route_costs={"/api/v1/generate": 5, "/api/v1": 2})
+
+    assert limiter.cost_for("/api/v1/generate") == 5
+    assert limiter.cost_for("/api/v1/specs/abc") == 2
+    assert limiter.cost_for("/health") == 1
+
+    now = 1000.0
+    for _ in range(12):
+        assert store.take("user:alice", 5, 60, 1.0, now)[0]
+    allowed, tokens = store.take("user:alice", 5, 60, 1.0, now)
+    assert not allowed
+    assert limiter.retry_after(tokens, 5) == 5
+
+    # Five seconds at one token per second pays for the next call
+    assert store.take("user:alice", 5, 60, 1.0, now + 5)[0]
+    # Other users have their own bucket
+    assert store.take("user:bob", 5, 60, 1.0, now)[0]
+
+
+def test_memory_store_evicts_idle_and_least_recent():
+    """Buckets are capped by count and dropped once idle past the TTL"""
+    store = MemoryBucketStore(max_entries=3, idle_ttl=60)
+    for i in range(5):
+        store.take(f"ip:{i}", 1, 10, 1.0, 100.0 + i)
+    assert len(store) == 3
+    assert store.peek("ip:0", 10, 1.0, 105.0) == 10  # evicted, so a full bucket
+
+    store.take("ip:new", 1, 10, 1.0, 200.0)
+    assert len(store) == 1
+
+
+def test_sqlite_store_enforces_one_limit_across_workers(tmp_path):
+    """Two stores on one file (two workers) share a single budget"""
+    path = str(tmp_path / "buckets.db")
+    workers = [SQLiteBucketStore(path), SQLiteBucketStore(path)]
+    allowed = []
+
+    def hammer(store):
+        for _ in range(20):
+            allowed.append(store.take("user:alice", 1, 10, 0.0, 500.0)[0])
+
+    threads = [threading.Thread(target=hammer, args=(store,)) for store in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(allowed) == 10
+    assert len(workers[0]) == 1
+
+
+def test_client_key_uses_jwt_subject():
+    """Valid tokens key by subject, forged ones fall back to the client IP"""
+    import jwt
+    from app.config import settings
+    from app.middleware.rate_limit import client_key
+    from starlette.requests import Request
+
+    def request_with(token):
+        headers = [(b"authorization", f"Bearer {token}".encode())]
+        return Request({"type": "http", "path": "/", "headers": headers, "client": ("10.0.0.7", 1)})
+
+    valid = jwt.encode({"sub": "alice"}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    forged = jwt.encode({"sub": "alice"}, "not-the-server-secret-key", algorithm="HS256")
+
+    assert client_key(request_with(valid)) == "user:alice"
+    assert client_key(request_with(forged)) == "ip:10.0.0.7"
+
+
+def test_expired_token_is_limited_by_ip_and_not_cached():
+    """Expired tokens get no per-user bucket; verified ones land in auth's token cache"""
+    import time
+
+    import jwt
+    from app.auth_cache import token_cache
+    from app.config import settings
+    from app.middleware.rate_limit import client_key
+    from starlette.requests import Request
+
+    def request_with(token):
+        headers = [(b"authorization", f"Bearer {token}".encode())]
+        return Request({"type": "http", "path": "/", "headers": headers, "client": ("10.0.0.8", 1)})
+
+    now = int(time.time())
+    expired = jwt.encode({"sub": "bob", "exp": now - 60}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    valid = jwt.encode({"sub": "carol", "exp": now + 600}, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+    assert client_key(request_with(expired)) == "ip:10.0.0.8"
+    assert token_cache.get(expired) is None
+    assert client_key(request_with(valid)) == "user:carol"
+    assert token_cache.get(valid)[0] == "carol"
+
+
+def test_exempt_paths():
+    """Health, metrics, docs and static files never consume tokens"""
+    from app.middleware.rate_limit import is_exempt
+
+    for path in ("/health", "/metrics", "/metrics/openmetrics", "/docs", "/openapi.json", "/static/geometry/a.glb"):
+        assert is_exempt(path)
+    assert not is_exempt("/api/v1/generate")
+    assert not is_exempt("/staticfoo")
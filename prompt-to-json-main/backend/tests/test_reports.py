@@ -0,0 +1,128 @@
+"""
+Test cases for the streamed spec report and its per-version cache
+"""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from app.api import reports
+from app.config import settings
+from app.database import get_current_user, get_db
+from app.models import ComplianceCheck, Evaluation, Iteration, Spec
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from tests.db_helpers import sqlite_session
+
+TABLES = ["users", "specs", "iterations", "evaluations", "compliance_checks"]
+
+
+@pytest.fixture
+def db():
+    session = sqlite_session(TABLES)
+    session.add(
+        Spec(
+            id="spec_1",
+            user_id="alice",
+            prompt="p",
+            city="Mumbai",
+            design_type="house",
+            spec_json={"stories": 2},
+            preview_url="https://cdn.example.com/spec_1.png",
+            version=1,
+        )
+    )
+    for i, day in enumerate([2, 5, 3]):
+        session.add(
+            Iteration(
+                id=f"iter_{i}",
+                user_id="alice",
+                spec_id="spec_1",
+                query="q",
+                diff={},
+                spec_json={},
+                preview_url=f"https://cdn.example.com/iter_{i}.png",
+                created_at=datetime(2024, 1, day, tzinfo=timezone.utc),
+            )
+        )
+    session.add(Evaluation(user_id="alice", spec_id="spec_1", rating=4, notes="good"))
+    session.commit()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_CACHE_ENABLED", True)
+    reports._report_cache.clear()
+
+    app = FastAPI()
+    app.include_router(reports.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = lambda: "alice"
+    app.dependency_overrides[get_db] = lambda: db
+    yield TestClient(app)
+    reports._report_cache.clear()
+
+
+def _add_check(db, case_id, compliant):
+    db.add(ComplianceCheck(spec_id="spec_1", case_id=case_id, city="Mumbai", case_type="fsi", compliant=compliant))
+    db.commit()
+
+
+def test_report_streams_complete_json(client):
+    """The streamed body is one valid document with relationships newest first"""
+    response = client.get("/api/v1/reports/spec_1")
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["report_id"] == "spec_1"
+    assert report["spec"] == {"stories": 2}
+    assert [it["id"] for it in report["iterations"]] == ["iter_1", "iter_2", "iter_0"]
+    assert report["evaluations"][0]["notes"] == "good"
+    assert report["compliance_checks"] == []
+    assert report["preview_urls"][0] == "https://cdn.example.com/spec_1.png"
+    assert report["data_integrity"]["has_iterations"] and not report["data_integrity"]["has_compliance"]
+
+
+def test_missing_spec_is_404(client):
+    """Unknown specs are reported with a hint rather than an empty report"""
+    response = client.get("/api/v1/reports/nope")
+
+    assert response.status_code == 404
+    assert response.json()["detail"]["requested_spec_id"] == "nope"
+
+
+def test_report_is_served_from_cache(client, db):
+    """A second request for the same spec version reuses the serialized report"""
+    first = client.get("/api/v1/reports/spec_1").content
+    assert list(reports._report_cache) == [("spec_1", 1)]
+
+    # Bypass the ORM so only the cache can explain an unchanged report
+    db.query(Evaluation).filter(Evaluation.spec_id == "spec_1").update({"notes": "changed"})
+    db.commit()
+    assert client.get("/api/v1/reports/spec_1").content == first
+
+
+def test_compliance_check_writes_invalidate_cache(client, db):
+    """Inserting or updating a check drops the cached report for that spec"""
+    client.get("/api/v1/reports/spec_1")
+
+    _add_check(db, "case_a", compliant=False)
+    assert not reports._report_cache
+    checks = client.get("/api/v1/reports/spec_1").json()["compliance_checks"]
+    assert [(cc["case_id"], cc["compliant"]) for cc in checks] == [("case_a", False)]
+
+    db.query(ComplianceCheck).filter(ComplianceCheck.case_id == "case_a").one().compliant = True
+    db.commit()
+    checks = client.get("/api/v1/reports/spec_1").json()["compliance_checks"]
+    assert checks[0]["compliant"] is True
+
+
+def test_missing_timestamps_sort_last():
+    """Rows without created_at sort after timezone-aware ones instead of raising"""
+    values = [None, datetime(2024, 1, 2, tzinfo=timezone.utc), datetime(2024, 1, 3)]
+
+    ordered = sorted(values, key=reports._sort_time, reverse=True)
+
+    assert ordered == [datetime(2024, 1, 3), datetime(2024, 1, 2, tzinfo=timezone.utc), None]
@@ -0,0 +1,89 @@
+"""
+Test cases for the structural spec diff engine
+"""
+
+from app.spec_diff import apply_diff, diff_specs, requires_compliance_recheck, revert_diff
+
+
+def _spec():
+    return {
+        "design_type": "house",
+        "objects": [
+            {"id": "wall_1", "type": "wall", "material": "concrete", "dimensions": {"width": 10, "height": 3}},
+            {"id": "roof_1", "type": "roof", "material": "shingle_asphalt"},
+            {"type": "window", "material": "glass_double_pane"},
+            {"type": "window", "material": "glass_double_pane"},
+        ],
+        "estimated_cost": {"total": 100000},
+    }
+
+
+def test_diff_matches_objects_by_id():
+    """Reordering objects with ids produces no operations"""
+    before = _spec()
+    after = _spec()
+    after["objects"][0], after["objects"][1] = after["objects"][1], after["objects"][0]
+
+    diff = diff_specs(before, after)
+
+    assert diff["operations"] == []
+
+
+def test_diff_field_level_operations():
+    """Changed, added and removed fields are reported per object"""
+    before = _spec()
+    after = _spec()
+    after["objects"][0]["material"] = "brick_premium"
+    after["objects"][0]["dimensions"]["width"] = 12
+    after["objects"][1]["color_hex"] = "#2C3E50"
+    del after["objects"][1]["material"]
+    after["estimated_cost"]["total"] = 115000
+
+    diff = diff_specs(before, after)
+    ops = {(op["op"], op["object"], op["field"]) for op in diff["operations"]}
+
+    assert ("change", "wall_1", "material") in ops
+    assert ("change", "wall_1", "dimensions.width") in ops
+    assert ("add", "roof_1", "color_hex") in ops
+    assert ("remove", "roof_1", "material") in ops
+    assert ("change", None, "estimated_cost.total") in ops
+    assert diff["changed_objects"] == ["wall_1", "roof_1"]
+
+
+def test_diff_falls_back_to_type_and_index():
+    """Objects without ids are matched by type and occurrence"""
+    before = _spec()
+    after = _spec()
+    after["objects"][3]["material"] = "glass_triple_pane"
+    after["objects"].append({"id": "door_1", "type": "door"})
+
+    diff = diff_specs(before, after)
+
+    assert diff["changed_objects"] == ["window#1"]
+    assert diff["added_objects"] == ["door_1"]
+
+
+def test_apply_and_revert_round_trip():
+    """A diff rebuilds the after spec and its inverse rebuilds the before spec"""
+    before = _spec()
+    after = _spec()
+    after["objects"][0]["material"] = "brick_premium"
+    del after["objects"][1]
+    after["objects"].insert(0, {"id": "garage_1", "type": "garage"})
+
+    diff = diff_specs(before, after)
+
+    assert apply_diff(before, diff) == after
+    assert revert_diff(after, diff) == before
+
+
+def test_requires_compliance_recheck():
+    """Only geometry or structural changes trigger a compliance re-check"""
+    before = _spec()
+    material_only = _spec()
+    material_only["objects"][0]["material"] = "brick_premium"
+    resized = _spec()
+    resized["objects"][0]["dimensions"]["height"] = 6
+
+    assert not requires_compliance_recheck(diff_specs(before, material_only))
+    assert requires_compliance_recheck(diff_specs(before, resized))
@@ -0,0 +1,74 @@
+"""
+Test cases for per-stage latency metrics
+"""
+import asyncio
+import contextvars
+
+import pytest
+from app.stage_metrics import request_id_var, set_request_labels, stage, timed_stage
+from prometheus_client import REGISTRY
+from prometheus_client.openmetrics.exposition import generate_latest
+
+
+def _count(**labels) -> float:
+    return REGISTRY.get_sample_value("design_stage_duration_seconds_count", labels) or 0.0
+
+
+def test_stage_records_labels_status_and_exemplar():
+    """Labels can be set mid-stage, failures are tagged and request IDs become exemplars"""
+    labels = {"stage": "lm_call", "provider": "openai", "design_type": "house", "city": "Pune", "status": "ok"}
+    before = _count(**labels)
+
+    def handle_request():
+        request_id_var.set("req_test_exemplar")
+        set_request_labels(city="Pune")
+        with stage("lm_call") as timer:
+            timer.set(provider="openai", design_type="house")
+
+    # Runs in its own context, like a request task
+    contextvars.copy_context().run(handle_request)
+
+    assert _count(**labels) == before + 1
+    assert 'request_id="req_test_exemplar"' in generate_latest(REGISTRY).decode()
+
+    failed = {**labels, "stage": "db_commit", "provider": "none", "status": "error"}
+    before = _count(**failed)
+    with pytest.raises(ValueError):
+        with stage("db_commit", design_type="house", city="Pune"):
+            raise ValueError("boom")
+    assert _count(**failed) == before + 1
+
+
+def test_timed_stage_decorator_and_label_cardinality():
+    """Decorated coroutines are timed; unknown design types and cities collapse to other"""
+
+    @timed_stage("upload", design_type="spaceship", city="Atlantis")
+    async def upload():
+        return "ok"
+
+    labels = {"stage": "upload", "provider": "none", "design_type": "other", "city": "other", "status": "ok"}
+    before = _count(**labels)
+    assert asyncio.run(upload()) == "ok"
+    assert _count(**labels) == before + 1
+
+
+def test_request_id_header_is_bounded():
+    """Only short, plain X-Request-ID values are reused, so exemplars stay under Prometheus' limit"""
+    from app.stage_metrics import request_id_from_header
+
+    assert request_id_from_header("abc-123_x.y:z") == "abc-123_x.y:z"
+    for value in (None, "", "x" * 65, "has space", 'quote"d'):
+        assert request_id_from_header(value).startswith("req_")
+
+    labels = {"stage": "cost_calc", "provider": "none", "design_type": "unknown", "city": "unknown", "status": "ok"}
+    before = _count(**labels)
+
+    def handle_request():
+        # Set directly (bypassing the header check); the exemplar is still truncated and recorded
+        request_id_var.set("r" * 300)
+        with stage("cost_calc"):
+            pass
+
+    contextvars.copy_context().run(handle_request)
+    assert _count(**labels) == before + 1
+    assert 'request_id="' + "r" * 118 + '"' in generate_latest(REGISTRY).decode()
@@ -0,0 +1,72 @@
+"""
+Test cases for the budget/dimension what-if sweep
+"""
+
+import pytest
+from app.api import sweep
+from app.api.generate import calculate_estimated_cost
+from app.api.sweep import SweepRequest, run_sweep, template_objects
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+
+def test_sweep_grid_size_and_curves():
+    """Every budget x dimension x stories x material combination is evaluated"""
+    request = SweepRequest(
+        budgets=[5000000, 12000000], stories=[1, 2], materials=["brick", "marble"], scales=[0.5, 1.0]
+    )
+
+    result = run_sweep(request)
+
+    assert result["configurations_evaluated"] == 2 * 2 * 2 * 2
+    assert [curve["budget"] for curve in result["cost_curves"]] == [5000000, 12000000]
+    # A larger budget never has fewer feasible configurations here
+    assert result["cost_curves"][0]["feasible"] <= result["cost_curves"][1]["feasible"]
+
+
+def test_sweep_costs_match_cost_engine():
+    """Vectorized estimates equal calculate_estimated_cost on the equivalent spec"""
+    request = SweepRequest(budgets=[20000000], dimensions=[{"width": 12, "length": 15}], stories=[2], scales=[1.0])
+
+    config = run_sweep(request)["feasible_configurations"][0]
+    objects = [
+        {**obj, "material": config["material"]} if obj.get("type") == "wall" else obj for obj in template_objects([])
+    ]
+    spec = {
+        "design_type": "house",
+        "dimensions": {"width": config["width"], "length": config["length"]},
+        "stories": config["stories"],
+        "objects": objects,
+    }
+
+    assert config["estimated_cost"] == calculate_estimated_cost(spec)
+    assert config["estimated_cost"] <= config["budget"]
+
+
+def test_sweep_feasible_configurations_fit_budget():
+    """Only configurations within budget are returned, largest area first"""
+    result = run_sweep(SweepRequest(budgets=[8000000], stories=[1, 2, 3], materials=["brick", "granite"]))
+
+    configs = result["feasible_configurations"]
+    assert configs
+    assert all(config["estimated_cost"] <= config["budget"] for config in configs)
+    assert [config["area"] for config in configs] == sorted((config["area"] for config in configs), reverse=True)
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"budgets": [5000000], "stories": [0]},
+        {"budgets": [5000000], "stories": [-1]},
+        {"budgets": [5000000], "stories": [6]},
+        {"budgets": [5000000], "scales": [0]},
+        {"budgets": [0]},
+        {"budgets": [-100]},
+    ],
+)
+def test_sweep_rejects_non_positive_grid_values(payload):
+    """Zero or negative stories, scales and budgets are 422s, not "feasible" configurations"""
+    app = FastAPI()
+    app.include_router(sweep.router)
+
+    assert TestClient(app).post("/api/v1/sweep", json=payload).status_code == 422
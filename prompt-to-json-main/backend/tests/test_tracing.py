@@ -0,0 +1,99 @@
+"""
+Test cases for distributed tracing
+"""
+import json
+
+from app.tracing import extract, inject, instrument_sqlalchemy, remote_parent, start_span, tracer
+from sqlalchemy import create_engine, text
+
+
+def test_spans_propagate_and_export_as_json_lines(tmp_path):
+    """Child spans share the trace, traceparent round-trips and spans reach the file exporter"""
+    path = tmp_path / "traces.jsonl"
+    tracer.configure(exporter="file", path=str(path))
+    engine = create_engine("sqlite://")
+    instrument_sqlalchemy(engine)
+
+    try:
+        with start_span("POST /bhiv/v1/prompt", kind="server") as root:
+            with start_span("agent.rl", kind="client") as child:
+                headers = inject({"Content-Type": "application/json"})
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        # A downstream service continuing the trace from the header
+        parent = extract(headers)
+        with start_span("POST /api/v1/rl/train/opt", kind="server", parent=parent) as downstream:
+            pass
+        # Work outside a trace does not create DB spans
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 2"))
+    finally:
+        tracer.shutdown()
+
+    assert child.trace_id == root.trace_id and child.parent_id == root.span_id
+    assert headers["traceparent"] == f"00-{root.trace_id}-{child.span_id}-01"
+    assert downstream.trace_id == root.trace_id and downstream.parent_id == child.span_id
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    names = [s["name"] for s in spans]
+    assert sorted(names) == ["POST /api/v1/rl/train/opt", "POST /bhiv/v1/prompt", "agent.rl", "db.query"]
+    query = next(s for s in spans if s["name"] == "db.query")
+    assert query["parentSpanId"] == root.span_id and query["attributes"]["db.statement"] == "SELECT 1"
+    assert all(s["resource"]["service.name"] == "design-engine-api" for s in spans)
+
+
+def test_existing_trace_ids_and_errors():
+    """UUID trace IDs map onto the OTel trace ID and exceptions mark the span as failed"""
+    tracer.configure(exporter=None)
+    parent = remote_parent("3f2c1b9e-8d4a-4c6b-9a1e-0f5d7c3b2a10")
+    assert parent.trace_id == "3f2c1b9e8d4a4c6b9a1e0f5d7c3b2a10"
+    assert remote_parent("run_abc") is None
+    assert extract({"traceparent": "garbage"}) is None
+
+    try:
+        with start_span("compliance_pipeline", parent=parent) as span:
+            raise RuntimeError("rules missing")
+    except RuntimeError:
+        pass
+    assert span.trace_id == parent.trace_id
+    assert span.status == "ERROR" and span.events[0]["attributes"]["exception.type"] == "RuntimeError"
+
+
+def test_file_exporter_rotates_at_max_bytes(tmp_path):
+    """The trace file is bounded: it rotates at max_bytes and keeps only the configured backups"""
+    from app.tracing import FileSpanExporter
+
+    path = tmp_path / "traces.jsonl"
+    exporter = FileSpanExporter(str(path), max_bytes=200, backups=2)
+    for i in range(20):
+        exporter.export([{"name": "db.query", "attributes": {"db.statement": f"SELECT {i}" + " " * 80}}])
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["traces.jsonl", "traces.jsonl.1", "traces.jsonl.2"]
+    assert all(p.stat().st_size < 400 for p in tmp_path.iterdir())
+    assert json.loads(path.read_text().splitlines()[-1])["attributes"]["db.statement"].startswith("SELECT 19")
+
+
+def test_no_db_spans_for_unsampled_or_disabled_traces(monkeypatch):
+    """Statements inside an unsampled trace, or with tracing off, do not build spans"""
+    from app import tracing
+
+    created = []
+    new_span = tracing.new_span
+    monkeypatch.setattr(tracing, "new_span", lambda *a, **kw: created.append(a[0]) or new_span(*a, **kw))
+    engine = create_engine("sqlite://")
+    instrument_sqlalchemy(engine)
+
+    try:
+        tracer.configure(exporter="console", sample_ratio=0.0)
+        with start_span("GET /api/v1/reports"), engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        tracer.configure(exporter=None)
+        with start_span("GET /api/v1/history", parent=extract({"traceparent": f"00-{'a' * 32}-{'b' * 16}-01"})):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 2"))
+    finally:
+        tracer.configure(exporter=None)
+
+    assert "db.query" not in created
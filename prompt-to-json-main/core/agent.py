@@ -2,16 +2,23 @@
 Core Agent Framework
 Production-grade agent interface with versioning, registry, and composability.
 """
+import asyncio
+import contextvars
+import inspect
 import logging
 import json
 import time
 import uuid
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List, Type
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Type, Union, Callable
 from datetime import datetime
 from pydantic import BaseModel, Field
 from enum import Enum
 
+from core.agent_cache import agent_cache, canonical_hash
+from utils.tracing import start_span
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +30,16 @@ class AgentStatus(str, Enum):
     SKIPPED = "skipped"
 
 
+class NodeRun(BaseModel):
+    """Execution record of one node in an AgentDAG run."""
+    name: str
+    status: AgentStatus
+    attempts: int = 0
+    started_at_ms: Optional[float] = None  # offset from the start of the DAG run
+    execution_time_ms: float = 0.0
+    error: Optional[str] = None
+
+
 class AgentOutput(BaseModel):
     """Standard agent output wrapper."""
     agent_name: str
@@ -33,6 +50,8 @@ class AgentOutput(BaseModel):
     warnings: List[str] = Field(default_factory=list)
     execution_time_ms: float
     timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat() + "Z")
+    nodes: List[NodeRun] = Field(default_factory=list)  # per-node timing for DAG runs
+    cached: bool = False  # served from the agent result cache
     
     class Config:
         json_schema_extra = {
@@ -59,7 +78,14 @@ class BaseAgent(ABC):
     3. Support version tracking
     4. Return AgentOutput wrapper
     5. Handle errors gracefully
+
+    Successful results are memoized per (name, version, input) by
+    core.agent_cache. Agents whose output is not a pure function of their
+    input (randomness, clocks, external state) must set ``cacheable = False``;
+    bump ``version`` whenever execute() logic changes.
     """
+
+    cacheable: bool = True
     
     def __init__(self, name: str, version: str = "1.0.0"):
         self.name = name
@@ -110,11 +136,12 @@ class BaseAgent(ABC):
             self.logger.error(f"Output validation failed: {e}")
             return False
     
-    def run(self, input_data: Dict[str, Any], trace_id: Optional[str] = None) -> AgentOutput:
+    def run(self, input_data: Dict[str, Any], trace_id: Optional[str] = None, use_cache: bool = True) -> AgentOutput:
         """
         Public method to run the agent with validation and error handling.
         
-        This wraps execute() with standard logging, timing, and validation.
+        This wraps execute() with standard logging, timing, validation and
+        result caching (``use_cache=False`` forces a fresh execution).
         """
         if not trace_id:
             trace_id = str(uuid.uuid4())
@@ -133,6 +160,18 @@ class BaseAgent(ABC):
                     execution_time_ms=(time.time() - start_time) * 1000,
                 )
             
+            # Serve from cache
+            cache_key = None
+            if use_cache and self.cacheable and agent_cache.enabled:
+                cache_key = canonical_hash(self.name, self.version, input_data)
+                entry = agent_cache.get(self.name, self.version, cache_key)
+                if entry is not None:
+                    result = AgentOutput(**dict(entry, cached=True))
+                    result.timestamp = datetime.utcnow().isoformat() + "Z"
+                    result.execution_time_ms = (time.time() - start_time) * 1000
+                    self.logger.info(f"[{trace_id}] Cache hit for {self.name} v{self.version}")
+                    return result
+            
             # Execute
             self.logger.info(f"[{trace_id}] Starting {self.name} v{self.version}")
             result = self.execute(input_data, trace_id)
@@ -145,6 +184,10 @@ class BaseAgent(ABC):
             result.execution_time_ms = (time.time() - start_time) * 1000
             self.logger.info(f"[{trace_id}] Completed {self.name} in {result.execution_time_ms:.1f}ms")
             
+            # Only clean successes are memoized
+            if cache_key and result.status == AgentStatus.SUCCESS and not result.warnings:
+                agent_cache.put(self.name, self.version, cache_key, result.model_dump(mode="json", exclude={"nodes"}))
+            
             return result
         
         except Exception as e:
@@ -210,8 +253,302 @@ class AgentRegistry:
         """Get all versions of an agent."""
         matching = [k for k in cls._instances.keys() if k.startswith(f"{name}:v")]
         return [k.split(":v")[1] for k in sorted(matching)]
+    
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        """Result-cache hit rates per agent."""
+        return agent_cache.get_stats()
+
+
+# Disk entries of registered versions survive other versions being used
+agent_cache.is_registered = lambda name, version: AgentRegistry.get(name, version) is not None
 
 
 def agent(cls):
     """Decorator to auto-register agents."""
     return AgentRegistry.register(cls)
+
+
+# ============================================================================
+# AGENT DAG
+# ============================================================================
+
+class DAGError(ValueError):
+    """Raised when a DAG's inputs/outputs do not form a valid acyclic graph."""
+
+
+class AgentNode:
+    """
+    One step of an AgentDAG.
+
+    Args:
+        name: Unique node name
+        agent: Registered agent name, BaseAgent instance, or a (sync or async) callable
+            taking the node's inputs as keyword arguments
+        inputs: Context keys the node consumes (DAG inputs or other nodes' outputs)
+        outputs: Context keys the node produces
+        timeout_s: Per-attempt timeout (None = no limit)
+        retries: Extra attempts after a failure or timeout
+        retry_backoff_s: Delay before the first retry, doubled for each further retry
+        critical: When False, a failure skips only the node's dependents and the
+            run returns PARTIAL results instead of FAILED
+    """
+
+    def __init__(
+        self,
+        name: str,
+        agent: Union[str, BaseAgent, Callable[..., Any]],
+        inputs: Optional[List[str]] = None,
+        outputs: Optional[List[str]] = None,
+        timeout_s: Optional[float] = None,
+        retries: int = 0,
+        retry_backoff_s: float = 0.5,
+        critical: bool = True,
+    ):
+        self.name = name
+        self.agent = agent
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        self.timeout_s = timeout_s
+        self.retries = retries
+        self.retry_backoff_s = retry_backoff_s
+        self.critical = critical
+
+    def _resolve(self) -> Union[BaseAgent, Callable[..., Any]]:
+        if isinstance(self.agent, str):
+            resolved = AgentRegistry.get(self.agent)
+            if resolved is None:
+                raise DAGError(f"Agent '{self.agent}' is not registered")
+            return resolved
+        return self.agent
+
+    def _collect(self, result: Any) -> Dict[str, Any]:
+        """Map the agent's return value onto the declared outputs."""
+        if isinstance(result, AgentOutput):
+            if result.status == AgentStatus.FAILED:
+                raise RuntimeError("; ".join(result.errors) or f"{self.name} failed")
+            result = result.output
+        if len(self.outputs) == 1 and not (isinstance(result, dict) and self.outputs[0] in result):
+            return {self.outputs[0]: result}
+        if not isinstance(result, dict):
+            raise TypeError(f"{self.name} must return a dict with keys {self.outputs}")
+        missing = [key for key in self.outputs if key not in result]
+        if missing:
+            raise KeyError(f"{self.name} did not produce {missing}")
+        return {key: result[key] for key in self.outputs}
+
+    async def _attempt(self, kwargs: Dict[str, Any], trace_id: str) -> Dict[str, Any]:
+        agent = self._resolve()
+        if isinstance(agent, BaseAgent):
+            # BaseAgent.run is synchronous; run it on a thread
+            call = asyncio.to_thread(agent.run, kwargs, trace_id)
+        elif inspect.iscoroutinefunction(agent):
+            call = agent(**kwargs)
+        else:
+            call = asyncio.to_thread(agent, **kwargs)
+        if self.timeout_s is not None:
+            result = await asyncio.wait_for(call, timeout=self.timeout_s)
+        else:
+            result = await call
+        return self._collect(result)
+
+
+class AgentDAG:
+    """
+    Dependency-aware executor for agents composed by their inputs and outputs.
+
+    Nodes run as soon as every input is available, so independent branches
+    execute concurrently (async agents as tasks, sync agents and BaseAgents on
+    worker threads). Each node has its own timeout and retry policy. A timed
+    out sync agent cannot be interrupted; its thread finishes in the background
+    and its result is discarded.
+
+    Example:
+        def classify(city, rules_seeded):
+            return classify_rules_incremental(city)["total"]
+
+        dag = AgentDAG("adapter", [
+            AgentNode("seed", seed_rules, inputs=["city"], outputs=["rules_seeded"]),
+            AgentNode("classify", classify, inputs=["city", "rules_seeded"], outputs=["classified"],
+                      critical=False),
+            AgentNode("calculate", calculate, inputs=["city", "subject", "rules_seeded"], outputs=["outcomes"]),
+        ])
+        result = dag.run({"city": "Mumbai", "subject": {...}})
+
+    Classify and calculate both wait for the seeded rules, then run
+    concurrently (see core.pipelines.build_rule_check_dag).
+    """
+
+    def __init__(self, name: str, nodes: List[AgentNode], version: str = "1.0.0"):
+        self.name = name
+        self.version = version
+        self.nodes = {node.name: node for node in nodes}
+        if len(self.nodes) != len(nodes):
+            raise DAGError("Node names must be unique")
+        self.producers: Dict[str, str] = {}
+        for node in nodes:
+            for key in node.outputs:
+                if key in self.producers:
+                    raise DAGError(f"Output '{key}' is produced by both {self.producers[key]} and {node.name}")
+                self.producers[key] = node.name
+        self.dependencies = {
+            node.name: {self.producers[key] for key in node.inputs if key in self.producers}
+            for node in nodes
+        }
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: set(deps) for name, deps in self.dependencies.items()}
+        order = []
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if not deps)
+            if not ready:
+                raise DAGError(f"Cycle between nodes: {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def run(self, inputs: Dict[str, Any], trace_id: Optional[str] = None) -> AgentOutput:
+        """Synchronous entry point; also safe to call from code running in an event loop."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.arun(inputs, trace_id))
+        # asyncio.run() refuses to nest, so give the DAG its own loop on a worker
+        # thread and block the caller as a sync call would (context keeps the active span)
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"dag-{self.name}") as pool:
+            return pool.submit(context.run, asyncio.run, self.arun(inputs, trace_id)).result()
+
+    async def arun(self, inputs: Dict[str, Any], trace_id: Optional[str] = None) -> AgentOutput:
+        """
+        Execute the DAG.
+
+        Args:
+            inputs: Initial context (every input not produced by a node must be here)
+            trace_id: Trace ID passed to BaseAgent nodes
+
+        Returns:
+            AgentOutput whose output holds every produced key, with one NodeRun per node.
+            Status is SUCCESS, PARTIAL (non-critical nodes failed or were skipped) or
+            FAILED (a critical node failed; nodes not yet started are skipped).
+        """
+        trace_id = trace_id or str(uuid.uuid4())
+        missing = sorted(
+            {key for node in self.nodes.values() for key in node.inputs} - set(self.producers) - set(inputs)
+        )
+        if missing:
+            raise DAGError(f"Missing DAG inputs: {missing}")
+
+        start = time.perf_counter()
+        context = dict(inputs)
+        runs = {name: NodeRun(name=name, status=AgentStatus.SKIPPED) for name in self.order}
+        done, failed = set(), set()
+        running: Dict[asyncio.Task, str] = {}
+        errors: List[str] = []
+        aborted = False
+
+        def launch_ready():
+            for name in self.order:
+                if name in done or name in running.values():
+                    continue
+                deps = self.dependencies[name]
+                if deps & failed:
+                    # Dependents of a failed node never run
+                    done.add(name)
+                    failed.add(name)
+                    runs[name].error = f"Skipped: upstream {sorted(deps & failed)} failed"
+                elif deps <= done:
+                    task = asyncio.create_task(self._run_node(self.nodes[name], context, runs[name], start, trace_id))
+                    running[task] = name
+
+        launch_ready()
+        while running:
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                name = running.pop(task)
+                done.add(name)
+                produced = task.result()
+                if produced is None:
+                    failed.add(name)
+                    errors.append(f"{name}: {runs[name].error}")
+                    if self.nodes[name].critical:
+                        aborted = True
+                else:
+                    context.update(produced)
+            if aborted:
+                # Let nodes already running finish, but start nothing new
+                if running:
+                    await asyncio.wait(running)
+                    for task, name in running.items():
+                        produced = task.result()
+                        if produced is not None:
+                            context.update(produced)
+                    running.clear()
+                break
+            launch_ready()
+
+        for run in runs.values():
+            if run.status == AgentStatus.SKIPPED and run.error is None:
+                run.error = "Not started: a critical node failed"
+        if any(node.critical and runs[name].status != AgentStatus.SUCCESS for name, node in self.nodes.items()):
+            status = AgentStatus.FAILED
+        elif failed:
+            status = AgentStatus.PARTIAL
+        else:
+            status = AgentStatus.SUCCESS
+
+        output = {key: context[key] for key in self.producers if key in context}
+        warnings = [f"{run.name}: {run.error}" for run in runs.values() if run.status == AgentStatus.SKIPPED]
+        result = AgentOutput(
+            agent_name=self.name,
+            agent_version=self.version,
+            status=status,
+            output=output,
+            errors=errors,
+            warnings=warnings,
+            execution_time_ms=(time.perf_counter() - start) * 1000,
+            nodes=[runs[name] for name in self.order],
+        )
+        logger.info(f"[{trace_id}] DAG {self.name} finished {status.value} in {result.execution_time_ms:.1f}ms")
+        return result
+
+    async def _run_node(
+        self, node: AgentNode, context: Dict[str, Any], record: NodeRun, dag_start: float, trace_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """Run one node with retries; returns its outputs, or None if it failed."""
+        kwargs = {key: context[key] for key in node.inputs}
+        node_start = time.perf_counter()
+        record.started_at_ms = (node_start - dag_start) * 1000
+        with start_span(f"agent.{node.name}", critical=node.critical) as span:
+            produced = await self._attempts(node, kwargs, record, trace_id)
+            span.set_attribute("attempts", record.attempts)
+            if produced is None:
+                span.set_status("ERROR", record.error)
+        record.execution_time_ms = (time.perf_counter() - node_start) * 1000
+        return produced
+
+    async def _attempts(
+        self, node: AgentNode, kwargs: Dict[str, Any], record: NodeRun, trace_id: str
+    ) -> Optional[Dict[str, Any]]:
+        delay = node.retry_backoff_s
+        for attempt in range(node.retries + 1):
+            record.attempts = attempt + 1
+            try:
+                produced = await node._attempt(kwargs, trace_id)
+                record.status = AgentStatus.SUCCESS
+                record.error = None
+                return produced
+            except asyncio.TimeoutError:
+                record.error = f"Timed out after {node.timeout_s}s"
+            except Exception as e:
+                record.error = f"{type(e).__name__}: {e}"
+            logger.warning(f"[{trace_id}] {node.name} attempt {attempt + 1} failed: {record.error}")
+            if attempt < node.retries:
+                await asyncio.sleep(delay)
+                delay *= 2
+        record.status = AgentStatus.FAILED
+        return None
@@ -0,0 +1,202 @@
+"""
+Agent Result Cache
+Memoizes successful BaseAgent.run results keyed by a canonical hash of
+(agent name, agent version, input). Two tiers: a bounded in-memory LRU and,
+when AGENT_CACHE_DIR is set, JSON files under AGENT_CACHE_DIR/<agent>/<version>/.
+Both tiers hold serialized JSON, decoded on every hit, so callers never share
+(or mutate) cached containers. Each version has its
+own namespace, so several live versions of an agent never evict each other;
+on first use of a version, the files of versions that are neither in use in
+this process nor registered (AgentRegistry) are dropped.
+
+Environment:
+    AGENT_CACHE_ENABLED      1 | 0 (default 1)
+    AGENT_CACHE_DIR          disk tier directory (default empty: memory only)
+    AGENT_CACHE_MAX_ENTRIES  in-memory LRU size (default 512)
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_hash(name: str, version: str, input_data: Dict[str, Any]) -> str:
+    """Stable key: key order, whitespace and tuple/list differences do not matter."""
+    payload = json.dumps(input_data, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return hashlib.sha256(f"{name}\x00{version}\x00{payload}".encode("utf-8")).hexdigest()
+
+
+class AgentResultCache:
+    """Two-tier (memory LRU + disk) store of serialized AgentOutput dicts."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 512, enabled: bool = True):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.enabled = enabled
+        # (name, version) -> registered? Set by core.agent to consult AgentRegistry
+        self.is_registered: Optional[Callable[[str, str], bool]] = None
+        self._memory: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._versions: Dict[str, Set[str]] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None,
+                  enabled: Optional[bool] = None) -> None:
+        """Reconfigure (tests, CLI overrides); clears the memory tier and stats."""
+        with self._lock:
+            if cache_dir is not None:
+                self.cache_dir = cache_dir or None
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if enabled is not None:
+                self.enabled = enabled
+            self._memory.clear()
+            self._versions.clear()
+            self._stats.clear()
+
+    # ------------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------------
+
+    def get(self, name: str, version: str, key: str) -> Optional[Dict[str, Any]]:
+        """Cached AgentOutput dict for ``key``, or None (counted as a miss)."""
+        with self._lock:
+            self._check_version(name, version)
+            stats = self._agent_stats(name)
+            payload = self._memory.get((name, version, key))
+            if payload is not None:
+                self._memory.move_to_end((name, version, key))
+                stats["memory_hits"] += 1
+                return json.loads(payload)
+        payload = self._read_disk(name, version, key)
+        with self._lock:
+            if payload is None:
+                stats["misses"] += 1
+                return None
+            stats["disk_hits"] += 1
+            self._remember(name, version, key, payload)
+        return json.loads(payload)
+
+    def put(self, name: str, version: str, key: str, entry: Dict[str, Any]) -> None:
+        try:
+            payload = json.dumps(entry, default=str)
+        except (TypeError, ValueError) as exc:
+            logger.warning("Could not serialize agent cache entry %s/%s: %s", name, key, exc)
+            return
+        with self._lock:
+            self._check_version(name, version)
+            self._remember(name, version, key, payload)
+            self._agent_stats(name)["stores"] += 1
+        self._write_disk(name, version, key, payload)
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Drop cached results for one agent (or all agents) from both tiers."""
+        with self._lock:
+            for cached in [k for k in self._memory if name is None or k[0] == name]:
+                del self._memory[cached]
+        if self.cache_dir:
+            target = os.path.join(self.cache_dir, name) if name else self.cache_dir
+            shutil.rmtree(target, ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-agent hit/miss counts and hit rate."""
+        with self._lock:
+            agents = {}
+            for name, stats in self._stats.items():
+                hits = stats["memory_hits"] + stats["disk_hits"]
+                lookups = hits + stats["misses"]
+                agents[name] = dict(stats, versions=sorted(self._versions.get(name, ())),
+                                    hit_rate=round(hits / lookups, 4) if lookups else 0.0)
+            return {
+                "enabled": self.enabled,
+                "memory_entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "cache_dir": self.cache_dir,
+                "agents": agents,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals (memory helpers expect the lock to be held)
+    # ------------------------------------------------------------------
+
+    def _agent_stats(self, name: str) -> Dict[str, int]:
+        return self._stats.setdefault(name, {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0})
+
+    def _remember(self, name: str, version: str, key: str, payload: str) -> None:
+        self._memory[(name, version, key)] = payload
+        self._memory.move_to_end((name, version, key))
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _check_version(self, name: str, version: str) -> None:
+        """
+        First use of ``version`` in this process drops the disk entries of
+        versions of ``name`` that are neither in use here nor registered.
+        """
+        in_use = self._versions.setdefault(name, set())
+        if version in in_use:
+            return
+        in_use.add(version)
+        if not self.cache_dir:
+            return
+        agent_dir = os.path.join(self.cache_dir, name)
+        try:
+            stale = [d for d in os.listdir(agent_dir) if d not in in_use and not self._registered(name, d)]
+        except OSError:
+            return
+        for old in stale:
+            shutil.rmtree(os.path.join(agent_dir, old), ignore_errors=True)
+            logger.info("Dropped cached results for %s v%s", name, old)
+
+    def _registered(self, name: str, version: str) -> bool:
+        if self.is_registered is None:
+            return False
+        try:
+            return self.is_registered(name, version)
+        except Exception:
+            # Never drop entries because the registry could not be consulted
+            return True
+
+    def _path(self, name: str, version: str, key: str) -> str:
+        return os.path.join(self.cache_dir, name, version, key[:2], f"{key}.json")
+
+    def _read_disk(self, name: str, version: str, key: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(name, version, key), encoding="utf-8") as fh:
+                payload = fh.read()
+            json.loads(payload)
+            return payload
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning("Unreadable agent cache entry %s/%s: %s", name, key, exc)
+            return None
+
+    def _write_disk(self, name: str, version: str, key: str, payload: str) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path(name, version, key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.write(payload)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning("Could not persist agent cache entry %s/%s: %s", name, key, exc)
+
+
+agent_cache = AgentResultCache(
+    # No production agent subclasses BaseAgent yet, so the disk tier is opt-in
+    cache_dir=os.environ.get("AGENT_CACHE_DIR", "") or None,
+    max_entries=int(os.environ.get("AGENT_CACHE_MAX_ENTRIES", "512")),
+    enabled=os.environ.get("AGENT_CACHE_ENABLED", "1").lower() in ("1", "true", "yes"),
+)
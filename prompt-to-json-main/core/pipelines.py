@@ -0,0 +1,55 @@
+"""
+Standard agent pipelines built on AgentDAG.
+
+rule_check: seed rules -> (classify rules || calculator). Classification and
+the calculator both only need the seeded rules, so they run concurrently;
+classification is non-critical, so its failure yields PARTIAL results with
+the calculator outcomes intact.
+"""
+from typing import Any, Dict, List
+
+from core.agent import AgentDAG, AgentNode
+
+
+def _seed_rules(city: str) -> bool:
+    from scripts.seed_rules import ensure_seed_rules
+
+    ensure_seed_rules(city)
+    return True
+
+
+def _classify_rules(city: str, rules_seeded: bool) -> int:
+    from agents.rule_classification_agent import classify_rules_incremental
+
+    return classify_rules_incremental(city)["total"]
+
+
+def _calculate(city: str, subject: Dict[str, Any], rules_seeded: bool) -> List[Dict[str, Any]]:
+    from agents.calculator_agent import calculator_agent
+
+    return calculator_agent(city, subject)
+
+
+def build_rule_check_dag(
+    seed_timeout_s: float = 30.0,
+    classify_timeout_s: float = 60.0,
+    calculator_timeout_s: float = 120.0,
+) -> AgentDAG:
+    """
+    DAG used by platform_adapter.run_adapter and /orchestrate/run.
+
+    Inputs: city, subject. Outputs: rules_seeded, classified_rules (count), outcomes.
+    Seeding is idempotent and retried once; classification and the calculator
+    write records, so they are not retried.
+    """
+    return AgentDAG(
+        "rule_check",
+        [
+            AgentNode("seed_rules", _seed_rules, inputs=["city"], outputs=["rules_seeded"],
+                      timeout_s=seed_timeout_s, retries=1),
+            AgentNode("classify_rules", _classify_rules, inputs=["city", "rules_seeded"],
+                      outputs=["classified_rules"], timeout_s=classify_timeout_s, critical=False),
+            AgentNode("calculator", _calculate, inputs=["city", "subject", "rules_seeded"],
+                      outputs=["outcomes"], timeout_s=calculator_timeout_s),
+        ],
+    )
@@ -16,6 +16,8 @@ from uuid import uuid4
 import requests
 from requests.adapters import HTTPAdapter, Retry
 
+from utils.tracing import current_span, inject, traced
+
 logger = logging.getLogger('core_bridge.core_api')
 
 # Core API configuration - points to MCP server
@@ -34,6 +36,11 @@ def _attach_ids(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not body.get('run_id'):
         body['run_id'] = f"run_{uuid4().hex[:10]}"
     body.setdefault('trace_id', body.get('run_id'))
+    span = current_span()
+    if span is not None:
+        # Lets Core correlate the log with the OpenTelemetry trace that produced it
+        body.setdefault('otel_trace_id', span.trace_id)
+        body.setdefault('otel_span_id', span.span_id)
     body.setdefault('timestamp', datetime.utcnow().isoformat() + 'Z')
     return body
 
@@ -61,6 +68,7 @@ def _get_session() -> requests.Session:
     return _session
 
 
+@traced('core_bridge.post_run_log', kind='client')
 def post_run_log(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Send a run log payload to the Core bridge.
     
@@ -77,7 +85,7 @@ def post_run_log(payload: Dict[str, Any]) -> Dict[str, Any]:
     body = _attach_ids(payload)
     
     try:
-        response = session.post(CORE_LOG_ENDPOINT, json=body, timeout=5)
+        response = session.post(CORE_LOG_ENDPOINT, json=body, headers=inject(), timeout=5)
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
@@ -87,6 +95,7 @@ def post_run_log(payload: Dict[str, Any]) -> Dict[str, Any]:
         raise
 
 
+@traced('core_bridge.get_core_status', kind='client')
 def get_core_status() -> Dict[str, Any]:
     """Fetch the Core service health status.
     
@@ -98,7 +107,7 @@ def get_core_status() -> Dict[str, Any]:
     """
     session = _get_session()
     try:
-        response = session.get(CORE_STATUS_ENDPOINT, timeout=5)
+        response = session.get(CORE_STATUS_ENDPOINT, headers=inject(), timeout=5)
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
@@ -110,6 +119,7 @@ def get_core_status() -> Dict[str, Any]:
         }
 
 
+@traced('core_bridge.post_core_feedback', kind='client')
 def post_core_feedback(payload: Dict[str, Any]) -> Dict[str, Any]:
     """Send feedback to Core API.
     
@@ -126,7 +136,7 @@ def post_core_feedback(payload: Dict[str, Any]) -> Dict[str, Any]:
     body = _attach_ids(payload)
     
     try:
-        response = session.post(CORE_FEEDBACK_ENDPOINT, json=body, timeout=5)
+        response = session.post(CORE_FEEDBACK_ENDPOINT, json=body, headers=inject(), timeout=5)
         response.raise_for_status()
         logger.info(f"Successfully posted feedback to Core: {payload.get('case_id')}")
         return response.json()
@@ -137,6 +147,7 @@ def post_core_feedback(payload: Dict[str, Any]) -> Dict[str, Any]:
         raise
 
 
+@traced('core_bridge.get_core_context', kind='client')
 def get_core_context(session_id: str, limit: int = 10) -> Dict[str, Any]:
     """Retrieve historical context from Core API.
     
@@ -150,7 +161,7 @@ def get_core_context(session_id: str, limit: int = 10) -> Dict[str, Any]:
     session = _get_session()
     try:
         params = {'session_id': session_id, 'limit': limit}
-        response = session.get(CORE_CONTEXT_ENDPOINT, params=params, timeout=5)
+        response = session.get(CORE_CONTEXT_ENDPOINT, params=params, headers=inject(), timeout=5)
         response.raise_for_status()
         logger.info(f"Retrieved context for session {session_id}")
         return response.json()
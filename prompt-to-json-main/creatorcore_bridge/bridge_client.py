@@ -17,6 +17,8 @@ from typing import Any, Dict, List, Optional, Union
 import requests
 from requests.adapters import HTTPAdapter, Retry
 
+from utils.tracing import start_span, inject
+
 logger = logging.getLogger('creatorcore_bridge.bridge_client')
 
 # Local fallback paths
@@ -84,15 +86,22 @@ class CreatorCoreBridge:
         Returns:
             Response data or error information
         """
+        with start_span(f"creatorcore {method} {url.replace(self.base_url, '')}", kind="client") as span:
+            span.set_attribute("http.url", url)
+            return self._send(span, method, url, **kwargs)
+
+    def _send(self, span, method: str, url: str, **kwargs) -> Dict[str, Any]:
         try:
             # Set default timeout if not provided
             kwargs.setdefault('timeout', self.timeout)
+            kwargs['headers'] = inject(kwargs.get('headers'))
 
             logger.debug(f"Making {method} request to {url}")
             response = self._session.request(method, url, **kwargs)
+            span.set_attribute("http.status_code", response.status_code)
 
             # Log the request
-            self._log_request(method, url, response.status_code, kwargs.get('json'))
+            self._log_request(method, url, response.status_code, kwargs.get('json'), span.trace_id)
 
             if response.status_code >= 200 and response.status_code < 300:
                 try:
@@ -112,20 +121,23 @@ class CreatorCoreBridge:
         except requests.RequestException as e:
             error_msg = f"Request exception: {str(e)}"
             logger.warning(error_msg)
+            span.set_status("ERROR", error_msg)
             return {
                 "success": False,
                 "error": error_msg,
                 "exception_type": type(e).__name__
             }
 
-    def _log_request(self, method: str, url: str, status_code: int, payload: Any = None) -> None:
+    def _log_request(self, method: str, url: str, status_code: int, payload: Any = None,
+                     trace_id: Optional[str] = None) -> None:
         """Log bridge requests for debugging and monitoring."""
         log_entry = {
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "method": method,
             "url": url,
             "status_code": status_code,
-            "payload": payload
+            "payload": payload,
+            "trace_id": trace_id
         }
 
         try:
@@ -14,6 +14,7 @@ from components.glb_viewer import render_glb_viewer, show_geometry_gallery
 from utils.io_helpers import save_prompt, save_spec, load_prompts, load_logs
 from agents.design_agent import prompt_to_spec
 from agents.compliance_pipeline import run_compliance_pipeline
+from agents.rule_index import load_rules_file
 from utils.rule_explanation import format_rule_outcome
 from utils.geometry_converter import json_to_glb, create_building_geometry
 from core_bridge import sync_run_log
@@ -189,8 +190,7 @@ with comp_col2:
                     loaded_rules = []
                     if os.path.exists(rules_file):
                         try:
-                            with open(rules_file, 'r') as f:
-                                all_rules_by_city = json.load(f)
+                            all_rules_by_city = load_rules_file(rules_file)
                             loaded_rules = all_rules_by_city.get(selected_city, [])
                             st.sidebar.info(f"Loaded {len(loaded_rules)} rules for {selected_city}")
                         except Exception as e:
@@ -7,7 +7,8 @@ import logging
 from typing import Optional
 from pymongo import MongoClient
 from pymongo.database import Database
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure, ServerSelectionTimeoutError
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
 
@@ -118,11 +119,40 @@ def _create_indexes(db: Database):
         
         # geometry_outputs collection indexes
         db.geometry_outputs.create_index("case_id")
-        
+
         logger.info("Database indexes created successfully")
     except Exception as e:
         logger.warning(f"Index creation warning: {e}")
 
+    # Separate so legacy duplicates only postpone this index, not the others
+    ensure_classified_rules_index(db.classified_rules)
+
+
+CLASSIFIED_RULES_INDEX = "city_1_source_rule_id_1"
+
+
+def ensure_classified_rules_index(collection: Collection) -> bool:
+    """
+    Unique (city, source_rule_id) index on classified_rules, so concurrent
+    upserts of one rule cannot insert two documents.
+
+    Replaces the earlier non-unique index of the same name. Fails (returns
+    False) while per-run duplicates written before classifications were
+    upserted remain; the first incremental classification run of each city
+    removes them and calls this again.
+    """
+    try:
+        existing = collection.index_information().get(CLASSIFIED_RULES_INDEX)
+        if existing and not existing.get("unique"):
+            collection.drop_index(CLASSIFIED_RULES_INDEX)
+        collection.create_index(
+            [("city", 1), ("source_rule_id", 1)], unique=True, name=CLASSIFIED_RULES_INDEX
+        )
+        return True
+    except OperationFailure as e:
+        logger.warning(f"classified_rules unique index not created yet: {e}")
+        return False
+
 
 def close_database():
     """Close MongoDB connection gracefully."""
@@ -161,5 +191,6 @@ class Collections:
     CORE_LOGS = "core_logs"
     OUTPUT_SUMMARIES = "output_summaries"
     CLASSIFIED_RULES = "classified_rules"
+    CLASSIFICATION_STATE = "classification_state"
     PROJECTS = "projects"
     EVALUATIONS = "evaluations"
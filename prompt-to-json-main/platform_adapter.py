@@ -21,9 +21,8 @@ from uuid import uuid4
 import jsonschema
 
 # Core imports (safe, non-invasive)
-from agents.calculator_agent import calculator_agent
-from agents.rule_classification_agent import classify_rules_for_city
-from scripts.seed_rules import ensure_seed_rules
+from core.agent import AgentStatus
+from core.pipelines import build_rule_check_dag
 
 LOG = logging.getLogger("platform_adapter")
 
@@ -165,6 +164,9 @@ def _transform_to_contract(output: Dict[str, Any], prompt: str, city: str, trace
         "duration_ms": duration_ms,
         "agent_versions": {},
     }
+    # Per-node timings vary run to run, so they are left out in DEMO_MODE
+    if output.get("nodes") and not is_demo:
+        telemetry["nodes"] = output["nodes"]
 
     resp = {
         "success": True,
@@ -176,7 +178,7 @@ def _transform_to_contract(output: Dict[str, Any], prompt: str, city: str, trace
         "compliance_status": compliance_status,
         "geometry": geometry,
         "telemetry": telemetry,
-        "errors": [],
+        "errors": list(output.get("errors") or []),
     }
 
     # Validate before returning
@@ -267,16 +269,25 @@ def run_adapter(input_payload: Dict[str, Any]) -> Dict[str, Any]:
         session_id = session_id or f"sess_{uuid4().hex[:8]}"
 
     try:
-        # Seed rules and classification
-        ensure_seed_rules(city)
-        classify_rules_for_city(city)
-
+        # Seeding, then classification and calculator concurrently
         subject = _merge_subject(input_payload.get("subject", {}))
-        outcomes = calculator_agent(city, subject)
+        dag_result = build_rule_check_dag().run({"city": city, "subject": subject}, trace_id=trace_id)
+        if dag_result.status == AgentStatus.FAILED:
+            raise AdapterError("PIPELINE_FAILED", "; ".join(dag_result.errors), agent=dag_result.agent_name)
 
         duration_ms = int((time.time() - start) * 1000)
 
-        core_output = {"outcomes": outcomes, "duration_ms": duration_ms}
+        core_output = {
+            "outcomes": dag_result.output.get("outcomes"),
+            "duration_ms": duration_ms,
+            "nodes": [node.model_dump(mode="json") for node in dag_result.nodes],
+            # Non-critical nodes that failed or were skipped (PARTIAL run)
+            "errors": [
+                {"agent": node.name, "code": "AGENT_" + node.status.value.upper(), "message": node.error or "", "severity": "warning"}
+                for node in dag_result.nodes
+                if node.status != AgentStatus.SUCCESS
+            ],
+        }
 
         response = _transform_to_contract(core_output, prompt, city, trace_id, case_id, is_demo=DEMO_MODE)
 
@@ -0,0 +1,110 @@
+"""
+Benchmark vectorized batch evaluation against the per-project evaluator.
+- Synthetic projects x classified rules (default 10k x 500)
+- Checks the batch path agrees with evaluate_project on a sample, then times
+  the per-project loop (on the sample, extrapolated) and the batch path
+- No database writes; MONGO_URI only needs to be parseable
+
+Usage:
+  python -m scripts.benchmark_batch_evaluator
+  python -m scripts.benchmark_batch_evaluator --projects 2000 --rules 200 --sample 200
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+from typing import Any, Dict, List
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+
+from agents.evaluator_agent import compile_rules, evaluate_matrix, evaluate_project, evaluate_projects_batch, project_matrix
+
+CATEGORIES = ["height", "fsi", "setback", "floors", "parking", "coverage", "fire_safety"]
+PARSED_KEYS = {
+    "height": "height_m",
+    "fsi": "fsi",
+    "setback": "setback_m",
+    "floors": "floors",
+    "parking": "parking_required",
+    "coverage": "coverage_percent",
+    "fire_safety": "value",
+}
+LIMITS = {"height": (12, 70), "fsi": (1.0, 4.0), "setback": (1.5, 9), "floors": (3, 20), "parking": (5, 80), "coverage": (30, 70), "fire_safety": (0, 1)}
+
+
+def make_rules(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    rules = []
+    for i in range(count):
+        category = rng.choice(CATEGORIES)
+        low, high = LIMITS[category]
+        rules.append({
+            "_id": f"rule_{i}",
+            "city": "Mumbai",
+            "category": category,
+            "details": {PARSED_KEYS[category]: round(rng.uniform(low, high), 2)},
+            "original_text": f"Clause {i}: {category} limit",
+        })
+    return rules
+
+
+def make_projects(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    projects = []
+    for i in range(count):
+        params = {
+            "height_m": round(rng.uniform(9, 80), 1),
+            "fsi": round(rng.uniform(0.8, 4.5), 2),
+            "setback_m": round(rng.uniform(1, 10), 1),
+            "floors": rng.randint(2, 24),
+            "parking_spaces": rng.choice([None, rng.randint(0, 100)]),
+            "coverage_percent": rng.choice([None, round(rng.uniform(25, 75), 1)]),
+        }
+        projects.append({"_id": f"proj_{i}", "city": "Mumbai", "project_name": f"Project {i}", "parameters": params})
+    return projects
+
+
+def strip_timestamps(docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [{k: v for k, v in doc.items() if k != "evaluated_at"} for doc in docs]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark vectorized batch evaluation")
+    parser.add_argument("--projects", type=int, default=10_000)
+    parser.add_argument("--rules", type=int, default=500)
+    parser.add_argument("--sample", type=int, default=500, help="Projects run through the per-project loop")
+    parser.add_argument("--seed", type=int, default=48)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = make_rules(args.rules, rng)
+    projects = make_projects(args.projects, rng)
+    sample = projects[:args.sample]
+
+    started = time.perf_counter()
+    expected = [evaluate_project(p, rules) for p in sample]
+    loop_s = (time.perf_counter() - started) * len(projects) / len(sample)
+
+    if strip_timestamps(evaluate_projects_batch(sample, rules)) != strip_timestamps(expected):
+        raise SystemExit("Batch results differ from evaluate_project")
+
+    started = time.perf_counter()
+    compiled = compile_rules(rules)
+    matrix = project_matrix(projects)
+    evaluate_matrix(matrix, compiled)
+    matrix_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    docs = evaluate_projects_batch(projects, rules)
+    batch_s = time.perf_counter() - started
+
+    pairs = len(projects) * len(rules)
+    print(f"projects={len(projects)} rules={len(rules)} pairs={pairs:,}")
+    print(f"per-project loop (extrapolated): {loop_s:8.2f} s")
+    print(f"vectorized statuses + scores:    {matrix_s:8.2f} s")
+    print(f"batch incl. result documents:    {batch_s:8.2f} s  ({loop_s / batch_s:.1f}x)")
+    print(f"documents: {len(docs)}")
+
+
+if __name__ == "__main__":
+    main()
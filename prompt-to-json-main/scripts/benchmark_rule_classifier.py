@@ -0,0 +1,207 @@
+"""
+Benchmark the single-pass rule classifier against the per-category regex classifiers.
+- Clauses come from a DCR PDF (needs PyMuPDF or pdfplumber), a text file, or a
+  synthetic DCR-like document (mostly procedural prose, with roughly the
+  keyword density of the SDCR PDF)
+- Times the previous classify_rule_text of the classification and parsing
+  agents (one search per category + findall) against RuleClassifier per clause
+  and as one batch over the whole document
+
+Usage:
+  python -m scripts.benchmark_rule_classifier
+  python -m scripts.benchmark_rule_classifier --pdf "../prompt runner/SDCR_under_section_26.pdf"
+  python -m scripts.benchmark_rule_classifier --text data/dcr.txt --repeat 5
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import re
+import time
+from typing import Callable, List
+
+from agents.rule_classifier import (
+    classified_rule_classifier,
+    classified_rule_info,
+    parsed_rule_classifier,
+    parsed_rule_fields,
+)
+
+# ----------------------------------------------------------------------------
+# Previous classifiers (baseline)
+# ----------------------------------------------------------------------------
+LEGACY_PATTERNS = {
+    "fsi": re.compile(r"\b(FSI|floor space index|F\.S\.I)\b[:\s]*([\d\.]+)?", re.IGNORECASE),
+    "height": re.compile(r"\b(height|storey|storeys|floor height|maximum height)\b.*?(\d+(?:\.\d+)?)(?:\s*m|meter|metre)?", re.IGNORECASE),
+    "setback": re.compile(r"\b(setback|set back|distance from boundary)\b.*?(\d+(?:\.\d+)?)(?:\s*m|meter|metre)?", re.IGNORECASE),
+    "parking": re.compile(r"\b(parking|car park|vehicle space|parking area|stilt)\b", re.IGNORECASE),
+    "land_use": re.compile(r"\b(residential|commercial|industrial|institutional|mixed use|green zone)\b", re.IGNORECASE),
+    "density": re.compile(r"\b(population density|tenements|units per hectare|plinth area)\b", re.IGNORECASE),
+    "coverage": re.compile(r"\b(site coverage|ground coverage|building coverage)\b", re.IGNORECASE),
+}
+METER_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:m|meter|metre|meters|metres)\b", re.IGNORECASE)
+FSI_RE = re.compile(r"(?:FSI|F\.S\.I|floor space index)\s*(?:[:=]|\s)?\s*([\d\.]+)", re.IGNORECASE)
+SETBACK_RE = re.compile(r"setback[s]?\s*(?:[:=]|\s)?\s*(\d+(?:\.\d+)?)\s*(?:m|meter|metre)?", re.IGNORECASE)
+FLOOR_RE = re.compile(r"(\d+)\s*(?:floors|storeys|stories|storey|floor)\b", re.IGNORECASE)
+
+
+def legacy_classified(text: str) -> dict:
+    rule_info = {"category": "other", "details": {}}
+    for cat, pattern in LEGACY_PATTERNS.items():
+        m = pattern.search(text)
+        if m:
+            rule_info["category"] = cat
+            nums = re.findall(r"[\d\.]+", text)
+            if nums:
+                try:
+                    rule_info["details"]["value"] = float(nums[0])
+                except ValueError:
+                    pass
+            rule_info["details"]["matched"] = m.group(0)
+            break
+    return rule_info
+
+
+def legacy_parsed(text: str):
+    lc = text.lower()
+    fsi_m = FSI_RE.search(text)
+    if fsi_m:
+        try:
+            return "fsi", {"fsi": float(fsi_m.group(1))}
+        except ValueError:
+            return "fsi", {}
+    if "height" in lc:
+        m = METER_RE.search(text)
+        if m:
+            return "height", {"height_m": float(m.group(1))}
+    if "setback" in lc:
+        m = SETBACK_RE.search(text)
+        if m:
+            return "setback", {"setback_m": float(m.group(1))}
+    if FLOOR_RE.search(text):
+        return "floors", {"floors": int(FLOOR_RE.search(text).group(1))}
+    if any(w in lc for w in ["allowed", "permitted", "entitlement", "may be permitted", "shall be permitted"]):
+        return "entitlement", {"note": text[:200]}
+    return "other", {}
+
+
+# ----------------------------------------------------------------------------
+# Input
+# ----------------------------------------------------------------------------
+def pdf_text(path: str) -> str:
+    try:
+        import fitz  # PyMuPDF
+
+        with fitz.open(path) as doc:
+            return "\n\n".join(page.get_text("text") or "" for page in doc)
+    except ImportError:
+        pass
+    try:
+        import pdfplumber
+
+        with pdfplumber.open(path) as pdf:
+            return "\n\n".join(page.extract_text() or "" for page in pdf.pages)
+    except ImportError:
+        raise SystemExit("Reading PDFs needs PyMuPDF (fitz) or pdfplumber")
+
+
+def synthetic_text(clauses: int, rng: random.Random) -> str:
+    rules = [
+        "The maximum height of buildings shall be {a} m measured from the average ground level",
+        "Permissible FSI for residential development shall be {b} on plots exceeding {c} sq m",
+        "A front setback of {d} m from the road boundary shall be provided",
+        "Parking shall be provided at the rate of one car park per {e} sq m of built up area",
+        "Site coverage shall not exceed {f} percent of the net plot area in commercial zones",
+        "Buildings up to {g} floors may be permitted subject to fire NOC",
+        "Population density of {h} tenements per hectare shall be maintained",
+        "Stilt parking of height not less than {i} m shall not be counted in FSI",
+        "Distance from boundary for plots abutting roads of width {j} m and above",
+    ]
+    prose = [
+        "The Commissioner may relax the provisions in special cases with reasons recorded in writing",
+        "Every application shall be accompanied by documents as specified in Appendix {k}",
+        "The owner shall give notice to the Authority of the intention to commence the work",
+        "Where the Authority is satisfied that the development is in accordance with these Regulations it shall issue the certificate",
+        "Any person aggrieved by the order may prefer an appeal within {k} days from the date of the order",
+        "The plans shall be signed by the owner and by a licensed architect or engineer",
+        "Nothing in this regulation shall apply to works carried out by the Government",
+        "The fees specified in Schedule {k} shall be paid before the permission is granted",
+    ]
+    paragraphs = []
+    for n in range(clauses):
+        sentences = [rng.choice(rules if rng.random() < 0.08 else prose) for _ in range(rng.randint(2, 6))]
+        body = ". ".join(p.format(
+            a=rng.choice([15, 24, 32, 45, 70]), b=rng.choice([1.0, 1.5, 2.5, 3.0]), c=rng.choice([300, 1000, 4000]),
+            d=rng.choice([3, 4.5, 6, 9]), e=rng.choice([50, 75, 100]), f=rng.choice([33, 40, 50]),
+            g=rng.randint(3, 20), h=rng.choice([250, 450]), i=rng.choice([2.4, 3]), j=rng.choice([9, 12, 18]),
+            k=rng.randint(1, 30),
+        ) for p in sentences)
+        paragraphs.append(f"Regulation {n // 10 + 1}.{n % 10 + 1}: {body}.")
+    return "\n\n".join(paragraphs)
+
+
+def split_clauses(text: str) -> List[str]:
+    clauses = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    if len(clauses) < 10:
+        clauses = [line.strip() for line in text.splitlines() if line.strip()]
+    return clauses
+
+
+# ----------------------------------------------------------------------------
+# Benchmark
+# ----------------------------------------------------------------------------
+def category_of(result) -> str:
+    return result[0] if isinstance(result, tuple) else result["category"]
+
+
+def best_of(repeat: int, fn: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass rule classifier")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--pdf", help="DCR PDF to extract clauses from")
+    source.add_argument("--text", help="Plain-text DCR document")
+    parser.add_argument("--clauses", type=int, default=5000, help="Synthetic clauses when no input is given")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.pdf:
+        text = pdf_text(args.pdf)
+    elif args.text:
+        with open(args.text, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = synthetic_text(args.clauses, random.Random(args.seed))
+    clauses = split_clauses(text)
+    print(f"clauses={len(clauses)} chars={sum(map(len, clauses)):,}")
+
+    for label, legacy, classifier, adapt in [
+        ("classification agent", legacy_classified, classified_rule_classifier, lambda m, t: classified_rule_info(m)),
+        ("parsing agent", legacy_parsed, parsed_rule_classifier, parsed_rule_fields),
+    ]:
+        legacy_ms = best_of(args.repeat, lambda: [legacy(t) for t in clauses])
+        single_ms = best_of(args.repeat, lambda: [adapt(classifier.classify(t), t) for t in clauses])
+        batch_ms = best_of(args.repeat, lambda: [adapt(m, t) for m, t in zip(classifier.classify_many(clauses), clauses)])
+
+        before = sum(1 for t in clauses if category_of(legacy(t)) != "other")
+        matches = classifier.classify_many(clauses)
+        after = sum(1 for m in matches if m)
+        extra = sum(max(0, len(m) - 1) for m in matches)
+
+        print(f"\n{label}")
+        print(f"  previous (per category):  {legacy_ms:9.1f} ms")
+        print(f"  single pass per clause:   {single_ms:9.1f} ms  ({legacy_ms / single_ms:.1f}x)")
+        print(f"  single pass batch:        {batch_ms:9.1f} ms  ({legacy_ms / batch_ms:.1f}x)")
+        print(f"  classified clauses: {before} -> {after}, additional categories found: {extra}")
+
+
+if __name__ == "__main__":
+    main()
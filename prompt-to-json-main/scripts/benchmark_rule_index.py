@@ -0,0 +1,128 @@
+"""
+Benchmark the compiled rule index against the linear rule scan.
+- Builds a synthetic rule set (default 10k rules across 4 cities)
+- Checks both paths return the same rules, then times build and per-spec match
+
+Usage:
+  python -m scripts.benchmark_rule_index
+  python -m scripts.benchmark_rule_index --rules 50000 --specs 500
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from agents.rule_index import RuleIndex, conditions_match, get_rule_index, invalidate_rule_indexes
+
+CITIES = ["Mumbai", "Pune", "Nashik", "Ahmedabad"]
+ZONES = ["R1", "R2", "C1", "C2", "I1", "S1"]
+USES = ["residential", "commercial", "industrial", "mixed"]
+FIELDS = ["land_use_zone", "plot_area_sq_m", "abutting_road_width_m", "building_use", "height_m", "fsi", "setback_m"]
+
+
+def linear_filter(rules: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per-rule scan used by filter_applicable_rules before the index."""
+    applicable = []
+    seen_clauses = set()
+    for rule in rules:
+        clause_no = rule.get("clause_no") or rule.get("id")
+        rule_city = (rule.get("city") or spec.get("city") or "").lower()
+        if rule_city and rule_city != (spec.get("city") or "").lower():
+            continue
+        if clause_no in seen_clauses:
+            continue
+        required_fields = rule.get("required_fields") or []
+        if not required_fields:
+            continue
+        if not all(spec.get(f) is not None for f in required_fields):
+            continue
+        if not conditions_match(rule.get("conditions", {}), spec):
+            continue
+        applicable.append(rule)
+        seen_clauses.add(clause_no)
+    return applicable
+
+
+def make_rules(count: int, rng: random.Random) -> List[Dict[str, Any]]:
+    rules = []
+    for i in range(count):
+        low = rng.choice([None, 50, 100, 250, 500, 1000, 2000])
+        conditions: Dict[str, Any] = {
+            "plot_area_sq_m": {"min": low, "max": rng.choice([None, low * 4 if low else 400])},
+            "land_use_zone": rng.sample(ZONES, rng.randint(1, 2)),
+        }
+        if rng.random() < 0.5:
+            conditions["building_use"] = rng.choice(USES)
+        if rng.random() < 0.4:
+            conditions["abutting_road_width_m"] = {"min": rng.choice([6, 9, 12, 18, 24, 30])}
+        rules.append({
+            "clause_no": f"{rng.randint(1, 40)}.{i}",
+            "city": rng.choice(CITIES + [None]),
+            "category": rng.choice(["height", "fsi", "setback", "parking"]),
+            "required_fields": rng.sample(FIELDS[:4], rng.randint(1, 3)),
+            "conditions": conditions,
+        })
+    return rules
+
+
+def make_spec(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "city": rng.choice(CITIES),
+        "land_use_zone": rng.choice(ZONES),
+        "plot_area_sq_m": rng.choice([80, 180, 450, 900, 3000]),
+        "abutting_road_width_m": rng.choice([6, 12, 18, 30]),
+        "building_use": rng.choice(USES),
+        "height_m": rng.choice([None, 12.0, 24.0]),
+        "fsi": None,
+        "setback_m": None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the compiled rule index")
+    parser.add_argument("--rules", type=int, default=10_000, help="Number of synthetic rules")
+    parser.add_argument("--specs", type=int, default=200, help="Number of specs to match")
+    parser.add_argument("--seed", type=int, default=47)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rules = make_rules(args.rules, rng)
+    specs = [make_spec(rng) for _ in range(args.specs)]
+
+    invalidate_rule_indexes()
+    started = time.perf_counter()
+    index = get_rule_index(rules)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    get_rule_index(rules)
+    cached_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    get_rule_index([dict(rule) for rule in rules])
+    reloaded_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    expected = [linear_filter(rules, spec) for spec in specs]
+    linear_ms = (time.perf_counter() - started) * 1000 / len(specs)
+
+    started = time.perf_counter()
+    actual = [index.match(spec) for spec in specs]
+    indexed_ms = (time.perf_counter() - started) * 1000 / len(specs)
+
+    if actual != expected:
+        raise SystemExit("Index results differ from the linear scan")
+
+    matched = sum(len(result) for result in actual) / len(specs)
+    print(f"rules={len(rules)} specs={len(specs)} avg_applicable={matched:.1f}")
+    print(f"index build:        {build_ms:9.2f} ms")
+    print(f"cache hit (same):   {cached_ms:9.2f} ms")
+    print(f"cache hit (equal):  {reloaded_ms:9.2f} ms")
+    print(f"linear scan/spec:   {linear_ms:9.3f} ms")
+    print(f"index match/spec:   {indexed_ms:9.3f} ms  ({linear_ms / indexed_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
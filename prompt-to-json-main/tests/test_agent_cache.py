@@ -0,0 +1,127 @@
+# tests/test_agent_cache.py
+"""
+Tests for BaseAgent result memoization (core/agent_cache.py)
+"""
+import pytest
+from pydantic import BaseModel
+
+from core.agent import AgentOutput, AgentStatus, BaseAgent
+from core.agent_cache import agent_cache, canonical_hash
+
+
+class EchoInput(BaseModel):
+    text: str
+    options: dict = {}
+
+
+class EchoOutput(BaseModel):
+    text: str
+
+
+class EchoAgent(BaseAgent):
+    """Deterministic test agent that counts its executions"""
+
+    def __init__(self, version="1.0.0"):
+        super().__init__(name="echo_agent", version=version)
+        self.calls = 0
+
+    @property
+    def input_schema(self):
+        return EchoInput
+
+    @property
+    def output_schema(self):
+        return EchoOutput
+
+    def execute(self, input_data, trace_id=None):
+        self.calls += 1
+        return AgentOutput(agent_name=self.name, agent_version=self.version, status=AgentStatus.SUCCESS,
+                           output={"text": input_data["text"].upper()}, execution_time_ms=0)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path):
+    """Fresh cache with its disk tier under tmp_path"""
+    previous = (agent_cache.cache_dir or "", agent_cache.max_entries, agent_cache.enabled)
+    agent_cache.configure(cache_dir=str(tmp_path / "agents"), max_entries=8, enabled=True)
+    yield
+    agent_cache.configure(*previous)
+
+
+class TestAgentCache:
+    """Test hashing, tiers, invalidation and opt-out"""
+
+    def test_canonical_hash_ignores_key_order(self):
+        """Equal inputs hash equally regardless of dict order; versions differ"""
+        a = canonical_hash("x", "1.0.0", {"a": 1, "b": {"c": 2, "d": 3}})
+        b = canonical_hash("x", "1.0.0", {"b": {"d": 3, "c": 2}, "a": 1})
+        assert a == b
+        assert a != canonical_hash("x", "1.1.0", {"a": 1, "b": {"c": 2, "d": 3}})
+
+    def test_memory_then_disk_hits(self):
+        """Second run hits memory; a new process (cleared memory) hits disk"""
+        agent = EchoAgent()
+        first = agent.run({"text": "mumbai", "options": {"b": 1, "a": 2}})
+        second = agent.run({"options": {"a": 2, "b": 1}, "text": "mumbai"})
+        assert agent.calls == 1
+        assert not first.cached and second.cached
+        assert second.output == {"text": "MUMBAI"}
+
+        agent_cache._memory.clear()
+        third = agent.run({"text": "mumbai", "options": {"a": 2, "b": 1}})
+        assert agent.calls == 1 and third.cached
+
+        stats = agent_cache.get_stats()["agents"]["echo_agent"]
+        assert stats["memory_hits"] == 1 and stats["disk_hits"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-3)
+
+    def test_hits_do_not_share_containers(self):
+        """Mutating a stored entry or a returned hit never changes the next hit"""
+        entry = {"output": {"items": [1]}}
+        agent_cache.put("lists", "1.0.0", "k", entry)
+        entry["output"]["items"].append("after put")
+
+        hit = agent_cache.get("lists", "1.0.0", "k")
+        hit["output"]["items"].append("after hit")
+
+        assert agent_cache.get("lists", "1.0.0", "k") == {"output": {"items": [1]}}
+
+    def test_version_bump_invalidates(self, tmp_path):
+        """A new version never sees the old one's entries; a later process drops unregistered versions"""
+        EchoAgent("1.0.0").run({"text": "pune"})
+        assert (tmp_path / "agents" / "echo_agent" / "1.0.0").exists()
+
+        bumped = EchoAgent("1.1.0")
+        result = bumped.run({"text": "pune"})
+        assert bumped.calls == 1 and not result.cached
+
+        # Restart: 1.0.0 is neither in use nor registered, so its files go
+        agent_cache.configure()
+        EchoAgent("1.1.0").run({"text": "pune"})
+        assert not (tmp_path / "agents" / "echo_agent" / "1.0.0").exists()
+        assert (tmp_path / "agents" / "echo_agent" / "1.1.0").exists()
+
+    def test_alternating_versions_keep_their_entries(self, tmp_path, monkeypatch):
+        """Two live versions do not evict each other; registered versions survive a restart"""
+        agent_cache.put("echo_agent", "1", "k1", {"output": 1})
+        agent_cache.put("echo_agent", "2", "k2", {"output": 2})
+        assert agent_cache.get("echo_agent", "1", "k1") == {"output": 1}
+        assert agent_cache.get("echo_agent", "2", "k2") == {"output": 2}
+
+        monkeypatch.setattr(agent_cache, "is_registered", lambda name, version: version == "1")
+        agent_cache.configure()
+        agent_cache.put("echo_agent", "3", "k3", {"output": 3})
+        assert agent_cache.get("echo_agent", "1", "k1") == {"output": 1}
+        assert agent_cache.get("echo_agent", "2", "k2") is None
+
+    def test_opt_out(self):
+        """cacheable=False agents and use_cache=False calls always execute"""
+        agent = EchoAgent()
+        agent.run({"text": "a"})
+        agent.run({"text": "a"}, use_cache=False)
+        assert agent.calls == 2
+
+        agent.cacheable = False
+        agent.run({"text": "b"})
+        agent.run({"text": "b"})
+        assert agent.calls == 4
@@ -0,0 +1,135 @@
+# tests/test_agent_dag.py
+"""
+Tests for the AgentDAG executor in core/agent.py
+"""
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from core.agent import AgentDAG, AgentNode, AgentStatus, DAGError
+
+
+@pytest.fixture(autouse=True)
+def no_span_export(monkeypatch):
+    """Keep DAG spans out of data/logs during tests"""
+    monkeypatch.setattr("utils.tracing.tracer.exporter", None)
+
+
+class TestAgentDAG:
+    """Test dependency ordering, concurrency, retries and partial results"""
+
+    def test_independent_branches_run_concurrently(self):
+        """Sync nodes sharing an upstream run on parallel threads"""
+        barrier = threading.Barrier(2, timeout=2)
+
+        def left(seed):
+            barrier.wait()
+            return seed + 1
+
+        def right(seed):
+            barrier.wait()
+            return seed + 2
+
+        async def join(a, b):
+            return a * b
+
+        dag = AgentDAG("diamond", [
+            AgentNode("seed", lambda x: x, inputs=["x"], outputs=["seed"]),
+            AgentNode("left", left, inputs=["seed"], outputs=["a"]),
+            AgentNode("right", right, inputs=["seed"], outputs=["b"]),
+            AgentNode("join", join, inputs=["a", "b"], outputs=["product"]),
+        ])
+        result = dag.run({"x": 1})
+
+        assert result.status == AgentStatus.SUCCESS
+        assert result.output == {"seed": 1, "a": 2, "b": 3, "product": 6}
+        assert [n.name for n in result.nodes] == ["seed", "left", "right", "join"]
+        assert all(n.status == AgentStatus.SUCCESS and n.execution_time_ms >= 0 for n in result.nodes)
+
+    def test_sync_run_inside_an_event_loop(self):
+        """dag.run() called from a coroutine runs the DAG instead of failing on asyncio.run()"""
+        async def double(x):
+            return x * 2
+
+        dag = AgentDAG("nested", [AgentNode("double", double, inputs=["x"], outputs=["y"])])
+
+        async def caller():
+            return dag.run({"x": 21})
+
+        result = asyncio.run(caller())
+        assert result.status == AgentStatus.SUCCESS and result.output == {"y": 42}
+
+    def test_timeout_and_retry(self):
+        """A flaky node is retried; a slow one times out"""
+        calls = {"n": 0}
+
+        def flaky(x):
+            calls["n"] += 1
+            if calls["n"] == 1:
+                raise ConnectionError("transient")
+            return x
+
+        async def slow(x):
+            await asyncio.sleep(1)
+            return x
+
+        dag = AgentDAG("retry", [
+            AgentNode("flaky", flaky, inputs=["x"], outputs=["y"], retries=1, retry_backoff_s=0),
+            AgentNode("slow", slow, inputs=["x"], outputs=["z"], timeout_s=0.05, critical=False),
+        ])
+        result = dag.run({"x": 5})
+
+        flaky_run, slow_run = result.nodes
+        assert flaky_run.status == AgentStatus.SUCCESS and flaky_run.attempts == 2
+        assert slow_run.status == AgentStatus.FAILED and "Timed out" in slow_run.error
+        assert result.status == AgentStatus.PARTIAL
+        assert result.output == {"y": 5}
+
+    def test_non_critical_failure_returns_partial_results(self):
+        """Dependents of a failed optional node are skipped, other branches complete"""
+        def classify(city):
+            raise RuntimeError("classifier down")
+
+        dag = AgentDAG("partial", [
+            AgentNode("classify", classify, inputs=["city"], outputs=["classified"], critical=False),
+            AgentNode("report", lambda classified: len(classified), inputs=["classified"],
+                      outputs=["report"], critical=False),
+            AgentNode("calculate", lambda city: [city], inputs=["city"], outputs=["outcomes"]),
+        ])
+        result = dag.run({"city": "Mumbai"})
+
+        assert result.status == AgentStatus.PARTIAL
+        assert result.output == {"outcomes": ["Mumbai"]}
+        runs = {n.name: n for n in result.nodes}
+        assert runs["classify"].status == AgentStatus.FAILED
+        assert runs["report"].status == AgentStatus.SKIPPED
+        assert any("report" in w for w in result.warnings)
+
+    def test_critical_failure_fails_run(self):
+        """A critical failure marks the run FAILED and skips downstream nodes"""
+        def seed(city):
+            raise ValueError("no rules")
+
+        dag = AgentDAG("failed", [
+            AgentNode("seed", seed, inputs=["city"], outputs=["seeded"]),
+            AgentNode("calculate", lambda seeded: 1, inputs=["seeded"], outputs=["outcomes"]),
+        ])
+        result = dag.run({"city": "Pune"})
+
+        assert result.status == AgentStatus.FAILED
+        assert result.errors == ["seed: ValueError: no rules"]
+        assert result.nodes[1].status == AgentStatus.SKIPPED
+
+    def test_invalid_graphs_are_rejected(self):
+        """Cycles and missing inputs raise DAGError"""
+        with pytest.raises(DAGError):
+            AgentDAG("cycle", [
+                AgentNode("a", lambda b: b, inputs=["b"], outputs=["a"]),
+                AgentNode("b", lambda a: a, inputs=["a"], outputs=["b"]),
+            ])
+        dag = AgentDAG("missing", [AgentNode("a", lambda x: x, inputs=["x"], outputs=["a"])])
+        with pytest.raises(DAGError):
+            dag.run({})
@@ -0,0 +1,129 @@
+# tests/test_evaluator_batch.py
+"""
+Tests for vectorized batch evaluation in agents/evaluator_agent.py
+"""
+import random
+from unittest.mock import MagicMock
+
+import pytest
+
+CATEGORIES = ["height", "FSI", "setbacks", "storeys", "parking", "ground_coverage", "fire_safety", "far"]
+
+
+@pytest.fixture
+def evaluator():
+    # Imported lazily: the module reads MONGO_URI at import (set by conftest)
+    from agents import evaluator_agent
+    return evaluator_agent
+
+
+def random_rule(rng, i):
+    parsed_key = rng.choice(["value", "height_m", "fsi", "setback_m", "floors", "parking_spaces", "allowed_coverage"])
+    parsed = {parsed_key: rng.choice([None, "n/a", 1.5, 3, "12.5", 24, 40, 60])}
+    return {
+        "_id": f"rule_{i}",
+        "category": rng.choice(CATEGORIES),
+        "details": parsed,
+        "original_text": f"Clause {i}",
+    }
+
+
+def random_project(rng, i):
+    params = {
+        "height_m": rng.choice([None, 10, 24, 26, 40, "abc"]),
+        "fsi": rng.choice([None, 1.0, 1.6, 3.2]),
+        "setback_m": rng.choice([None, 3, "13"]),
+        "floors": rng.choice([None, 4, 12]),
+        "parking_spaces": rng.choice([None, 0, 30]),
+        "coverage": rng.choice([None, 35, 44, 66]),
+    }
+    return {"_id": f"proj_{i}", "city": "Mumbai", "project_name": f"P{i}", "parameters": params}
+
+
+def strip_timestamps(docs):
+    return [{k: v for k, v in doc.items() if k != "evaluated_at"} for doc in docs]
+
+
+class TestBatchEvaluation:
+    """The vectorized batch path matches evaluate_project exactly"""
+
+    def test_batch_matches_per_project_evaluation(self, evaluator, monkeypatch):
+        """Every status, allowed/proposed value and overall score agrees for random projects and rules"""
+        monkeypatch.setattr(evaluator, "EVAL_BATCH_SIZE", 7)
+        rng = random.Random(48)
+        rules = [random_rule(rng, i) for i in range(60)]
+        projects = [random_project(rng, i) for i in range(40)]
+
+        batch = evaluator.evaluate_projects_batch(projects, rules)
+        single = [evaluator.evaluate_project(p, rules) for p in projects]
+
+        assert strip_timestamps(batch) == strip_timestamps(single)
+        assert {doc["overall_status"] for doc in batch} > {"COMPLIANT"}
+
+    def test_partial_tolerance_boundaries(self, evaluator):
+        """Within the tolerance is PARTIAL, beyond it NON_COMPLIANT, missing values NOT_APPLICABLE"""
+        rules = [{"_id": "r", "category": "height", "details": {"height_m": 24}}]
+        projects = [
+            {"_id": 1, "parameters": {"height_m": 24}},
+            {"_id": 2, "parameters": {"height_m": 26}},
+            {"_id": 3, "parameters": {"height_m": 30}},
+            {"_id": 4, "parameters": {}},
+        ]
+        docs = evaluator.evaluate_projects_batch(projects, rules)
+        assert [d["results"][0]["status"] for d in docs] == ["COMPLIANT", "PARTIAL", "NON_COMPLIANT", "NOT_APPLICABLE"]
+        assert [d["overall_score"] for d in docs] == [1.0, 0.5, 0.0, 0.0]
+
+    def test_pending_projects_are_bulk_written_per_city(self, evaluator, monkeypatch):
+        """Rules load once per city and results go out with insert_many / update_many"""
+        rng = random.Random(1)
+        projects = [random_project(rng, i) for i in range(5)]
+        projects[0]["city"] = "Pune"
+        projects_col, eval_col = MagicMock(), MagicMock()
+        projects_col.find.return_value.limit.return_value = projects
+        monkeypatch.setattr(evaluator, "PROJECTS_COL", projects_col)
+        monkeypatch.setattr(evaluator, "EVAL_COL", eval_col)
+        loader = MagicMock(return_value=[random_rule(rng, i) for i in range(10)])
+        monkeypatch.setattr(evaluator, "load_classified_rules_for_city", loader)
+
+        evals = evaluator.evaluate_pending_projects()
+
+        assert len(evals) == 5
+        assert sorted(call.args[0] for call in loader.call_args_list) == ["Mumbai", "Pune"]
+        assert eval_col.insert_many.call_count == 2
+        eval_col.insert_one.assert_not_called()
+        assert projects_col.update_many.call_count == 2
+
+    def test_non_finite_values_are_not_applicable_in_both_paths(self, evaluator):
+        """"nan" and "inf" parameters or limits are NOT_APPLICABLE per project and in the batch"""
+        rules = [
+            {"_id": "r1", "category": "height", "details": {"height_m": 24}},
+            {"_id": "r2", "category": "FSI", "details": {"fsi": "inf"}},
+        ]
+        projects = [{"_id": 1, "parameters": {"height_m": "nan", "fsi": 1.0}}]
+
+        batch = evaluator.evaluate_projects_batch(projects, rules)
+        single = [evaluator.evaluate_project(p, rules) for p in projects]
+
+        assert strip_timestamps(batch) == strip_timestamps(single)
+        assert [r["status"] for r in batch[0]["results"]] == ["NOT_APPLICABLE", "NOT_APPLICABLE"]
+
+    def test_write_errors_only_keep_the_failed_projects_pending(self, evaluator, monkeypatch):
+        """Inserted evaluations mark their projects evaluated; a bad document does not fail its city"""
+        from pymongo.errors import BulkWriteError
+
+        rng = random.Random(2)
+        projects = [random_project(rng, i) for i in range(4)]
+        projects[3]["parameters"] = "corrupt"
+        projects_col, eval_col = MagicMock(), MagicMock()
+        projects_col.find.return_value.limit.return_value = projects
+        eval_col.insert_many.side_effect = BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "duplicate key"}]})
+        monkeypatch.setattr(evaluator, "PROJECTS_COL", projects_col)
+        monkeypatch.setattr(evaluator, "EVAL_COL", eval_col)
+        monkeypatch.setattr(evaluator, "load_classified_rules_for_city",
+                            MagicMock(return_value=[random_rule(rng, i) for i in range(10)]))
+
+        evals = evaluator.evaluate_pending_projects()
+
+        assert [e["project_id"] for e in evals] == ["proj_0", "proj_2"]
+        updated = projects_col.update_many.call_args.args[0]["_id"]["$in"]
+        assert updated == ["proj_0", "proj_2"]
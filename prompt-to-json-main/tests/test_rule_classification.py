@@ -0,0 +1,133 @@
+# tests/test_rule_classification.py
+"""
+Tests for incremental rule classification (agents/rule_classification_agent.py)
+"""
+import time
+
+import mongomock
+import mongomock.collection
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from agents import rule_classification_agent as rca
+from mcp.db import ensure_classified_rules_index
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    # pymongo >= 4.11 passes sort= to bulk updates, which mongomock 4.x does not accept
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, "add_update", add_update_without_sort)
+
+    db = mongomock.MongoClient()["classification_test"]
+    monkeypatch.setattr(rca, "_rules", db.rules)
+    monkeypatch.setattr(rca, "_classified", db.classified_rules)
+    monkeypatch.setattr(rca, "_state", db.classification_state)
+    db.rules.insert_many([
+        {"_id": "r1", "city": "Pune", "clause_no": "1", "full_text": "Maximum FSI 1.5 for residential plots"},
+        {"_id": "r2", "city": "Pune", "clause_no": "2", "full_text": "Front setback of 3 m from road"},
+        {"_id": "r3", "city": "Pune", "clause_no": "3", "summary": "Parking for 2 cars per unit"},
+        {"_id": "m1", "city": "Mumbai", "clause_no": "1", "full_text": "Maximum height 24 m"},
+    ])
+    return db
+
+
+@pytest.fixture
+def classify_calls(monkeypatch):
+    calls = []
+    original = rca.classify_rule_texts
+
+    def counting(texts):
+        calls.extend(texts)
+        return original(texts)
+
+    monkeypatch.setattr(rca, "classify_rule_texts", counting)
+    return calls
+
+
+class TestIncrementalClassification:
+    """Only new or changed rules are reclassified; unchanged cities are skipped"""
+
+    def test_first_run_replaces_legacy_duplicates(self, collections, classify_calls):
+        """Per-run duplicates from earlier versions are dropped and each rule is stored once"""
+        collections.classified_rules.insert_many([
+            {"source_rule_id": "r1", "city": "Pune", "category": "fsi"} for _ in range(3)
+        ])
+        summary = rca.classify_rules_incremental("Pune")
+
+        assert summary["classified"] == 3 and not summary["skipped"]
+        assert collections.classified_rules.count_documents({"city": "Pune"}) == 3
+        fsi = collections.classified_rules.find_one({"source_rule_id": "r1"})
+        assert fsi["category"] == "fsi" and fsi["text_hash"] == rca.text_hash(fsi["original_text"])
+        assert collections.classified_rules.count_documents({"city": "Mumbai"}) == 0
+
+    def test_unchanged_city_is_skipped(self, collections, classify_calls):
+        """A second run with the same rules classifies nothing and writes nothing"""
+        rca.classify_rules_incremental("Pune")
+        classify_calls.clear()
+        created = collections.classified_rules.find_one({"source_rule_id": "r2"})["updated_at"]
+
+        summary = rca.classify_rules_incremental("Pune")
+
+        assert summary["skipped"] and summary["total"] == 3
+        assert classify_calls == []
+        assert collections.classified_rules.find_one({"source_rule_id": "r2"})["updated_at"] == created
+
+    def test_only_changed_added_and_removed_rules_are_written(self, collections, classify_calls):
+        """Edited and new rules are reclassified, deleted rules lose their classification"""
+        rca.classify_rules_incremental("Pune")
+        version = collections.classification_state.find_one({"_id": "Pune"})["version"]
+        classify_calls.clear()
+
+        collections.rules.update_one({"_id": "r2"}, {"$set": {"full_text": "Side setback of 4.5 m"}})
+        collections.rules.insert_one({"_id": "r4", "city": "Pune", "clause_no": "4", "full_text": "Site coverage 40"})
+        collections.rules.delete_one({"_id": "r3"})
+
+        summary = rca.classify_rules_incremental("Pune")
+
+        assert classify_calls == ["Side setback of 4.5 m", "Site coverage 40"]
+        assert (summary["classified"], summary["removed"], summary["total"]) == (2, 1, 3)
+        assert collections.classification_state.find_one({"_id": "Pune"})["version"] != version
+        stored = {d["source_rule_id"]: d for d in rca.classify_rules_for_city("Pune")}
+        assert set(stored) == {"r1", "r2", "r4"}
+        assert stored["r2"]["details"]["value"] == 4.5
+
+    def test_force_reclassifies_everything(self, collections, classify_calls):
+        """force=True ignores stored hashes and the city version"""
+        rca.classify_rules_incremental("Pune")
+        classify_calls.clear()
+        assert rca.classify_rules_incremental("Pune", force=True)["classified"] == 3
+        assert len(classify_calls) == 3
+
+    def test_first_run_claimed_elsewhere_is_skipped(self, collections, classify_calls):
+        """A concurrent first run does not DeleteMany again; a stale claim is taken over"""
+        collections.classified_rules.insert_one({"source_rule_id": "r1", "city": "Pune", "category": "fsi"})
+        collections.classification_state.insert_one({"_id": "Pune", "version": None, "claimed_at": time.time()})
+
+        assert rca.classify_rules_incremental("Pune")["skipped"]
+        assert classify_calls == []
+        assert collections.classified_rules.count_documents({"city": "Pune"}) == 1
+
+        collections.classification_state.update_one(
+            {"_id": "Pune"}, {"$set": {"claimed_at": time.time() - rca.FIRST_RUN_CLAIM_SECONDS - 1}}
+        )
+        summary = rca.classify_rules_incremental("Pune")
+
+        assert summary["classified"] == 3 and not summary["skipped"]
+        state = collections.classification_state.find_one({"_id": "Pune"})
+        assert state["version"] == summary["version"] and "claimed_at" not in state
+
+    def test_first_run_makes_source_rule_index_unique(self, collections, classify_calls):
+        """Once duplicates are gone, a second document for the same rule is rejected"""
+        collections.classified_rules.insert_many([{"source_rule_id": "r1", "city": "Pune"} for _ in range(2)])
+        collections.classified_rules.create_index([("city", 1), ("source_rule_id", 1)])
+        assert not ensure_classified_rules_index(collections.classified_rules)
+
+        rca.classify_rules_incremental("Pune")
+
+        with pytest.raises(DuplicateKeyError):
+            collections.classified_rules.insert_one({"source_rule_id": "r1", "city": "Pune"})
@@ -0,0 +1,61 @@
+# tests/test_rule_classifier.py
+"""
+Tests for the single-pass multi-category rule classifier (agents/rule_classifier.py)
+"""
+from agents.rule_classifier import (
+    Category,
+    RuleClassifier,
+    classified_rule_classifier,
+    classified_rule_info,
+    parsed_rule_classifier,
+    parsed_rule_fields,
+)
+
+
+class TestRuleClassifier:
+    """One pass returns every category with the number nearest its keyword"""
+
+    def test_every_category_gets_its_nearest_number(self):
+        """Values come from next to each keyword, not from the first number in the clause"""
+        text = "Clause 12.3: For plots of 500 sq m, maximum height 24 m, FSI 1.5 and front setback 4.5 m"
+        matches = {m.category: m.value for m in classified_rule_classifier.classify(text)}
+        assert matches == {"fsi": 1.5, "height": 24.0, "setback": 4.5}
+
+        info = classified_rule_info(classified_rule_classifier.classify(text))
+        assert info["category"] == "fsi" and info["details"]["value"] == 1.5
+        assert info["details"]["categories"]["height"] == 24.0
+
+    def test_unit_and_required_value_constraints(self):
+        """Metre-only categories skip bare numbers; categories needing a value drop without one"""
+        classifier = RuleClassifier([
+            Category("height", r"height", unit="m", requires_value=True),
+            Category("parking", r"parking"),
+        ])
+        assert [(m.category, m.value) for m in classifier.classify("height of 3 floors, 12 m")] == [("height", 12.0)]
+        assert classifier.classify("height as per table") == []
+        assert [(m.category, m.value) for m in classifier.classify("parking as per table")] == [("parking", None)]
+
+    def test_batch_matches_single_and_keeps_texts_apart(self):
+        """classify_many equals per-text classify; numbers never leak across texts"""
+        texts = ["Height 15 m", "", "Setback as required", "No. of floors 4; FSI 2", "setback 3 m"]
+        assert parsed_rule_classifier.classify_many(texts) == [parsed_rule_classifier.classify(t) for t in texts]
+        assert parsed_rule_classifier.classify_many(texts)[2] == []
+
+    def test_parsed_rule_fields_merge_all_categories(self):
+        """Parsing agent shape: primary rule_type plus parsed fields of every matched category"""
+        text = "Construction permitted up to 4 floors with height 15 m and FSI: 2"
+        rule_type, fields = parsed_rule_fields(parsed_rule_classifier.classify(text), text)
+        assert rule_type == "fsi"
+        assert fields == {"fsi": 2.0, "height_m": 15.0, "floors": 4, "note": text}
+        assert parsed_rule_fields([], "anything") == ("other", {})
+
+    def test_floors_need_a_count_before_the_keyword(self):
+        """Only "<int> floors" sets floors; numbers after "floor" or decimals do not"""
+        text = "Floor height shall be minimum 3.5 m"
+        assert parsed_rule_fields(parsed_rule_classifier.classify(text), text) == ("height", {"height_m": 3.5})
+
+        text = "The ground floor may be used for parking of 20 vehicles"
+        assert parsed_rule_fields(parsed_rule_classifier.classify(text), text) == ("other", {})
+
+        text = "Not more than 2.5 floors or 3 storeys"
+        assert parsed_rule_fields(parsed_rule_classifier.classify(text), text) == ("floors", {"floors": 3})
@@ -0,0 +1,130 @@
+# tests/test_rule_index.py
+"""
+Tests for the compiled rule index behind filter_applicable_rules (agents/rule_index.py)
+"""
+import random
+
+import pytest
+
+from agents import rule_index
+from agents.compliance_pipeline import filter_applicable_rules
+from agents.rule_index import RuleIndex, conditions_match, get_rule_index, invalidate_rule_indexes
+
+CITIES = ["Mumbai", "Pune", "Nashik", "Ahmedabad"]
+ZONES = ["R1", "R2", "C1", "I1"]
+FIELDS = ["land_use_zone", "plot_area_sq_m", "abutting_road_width_m", "building_use", "height_m", "fsi"]
+
+
+def linear_filter(rules, spec):
+    """The original per-rule scan the index must reproduce"""
+    applicable = []
+    seen_clauses = set()
+    for rule in rules:
+        clause_no = rule.get("clause_no") or rule.get("id")
+        rule_city = (rule.get("city") or spec.get("city") or "").lower()
+        if rule_city and rule_city != (spec.get("city") or "").lower():
+            continue
+        if clause_no in seen_clauses:
+            continue
+        required_fields = rule.get("required_fields") or []
+        if not required_fields:
+            continue
+        if not all(spec.get(f) is not None for f in required_fields):
+            continue
+        if not conditions_match(rule.get("conditions", {}), spec):
+            continue
+        applicable.append(rule)
+        seen_clauses.add(clause_no)
+    return applicable
+
+
+def random_rule(rng, i):
+    conditions = {}
+    if rng.random() < 0.5:
+        low = rng.choice([None, 100, 250, 500])
+        high = rng.choice([None, 400, 1000])
+        conditions["plot_area_sq_m"] = {"min": low, "max": high}
+    if rng.random() < 0.4:
+        conditions["land_use_zone"] = rng.sample(ZONES, rng.randint(1, 2))
+    if rng.random() < 0.3:
+        conditions["building_use"] = rng.choice(["residential", "commercial", {"equals": "residential"}])
+    if rng.random() < 0.2:
+        conditions["abutting_road_width_m"] = {"min": rng.choice([6, 9, 12, 18])}
+    return {
+        "clause_no": f"DCPR-{rng.randint(0, i // 2 + 1)}",
+        "city": rng.choice(CITIES + [None, "mumbai"]),
+        "required_fields": rng.sample(FIELDS, rng.randint(0, 3)),
+        "conditions": conditions,
+    }
+
+
+def random_spec(rng):
+    return {
+        "city": rng.choice(CITIES + [None]),
+        "land_use_zone": rng.choice(ZONES + [None]),
+        "plot_area_sq_m": rng.choice([None, 90, 250, 400, 650, 1200]),
+        "abutting_road_width_m": rng.choice([None, 6, 12, 24]),
+        "building_use": rng.choice([None, "residential", "commercial"]),
+        "height_m": rng.choice([None, 15.0]),
+        "fsi": None,
+    }
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes():
+    invalidate_rule_indexes()
+    yield
+    invalidate_rule_indexes()
+
+
+class TestRuleIndexMatching:
+    """The index returns exactly what the linear scan returns"""
+
+    def test_randomized_equivalence_with_linear_scan(self):
+        """Random rule sets and specs give identical results in identical order"""
+        rng = random.Random(47)
+        rules = [random_rule(rng, i) for i in range(400)]
+        index = RuleIndex(rules)
+        for _ in range(300):
+            spec = random_spec(rng)
+            assert index.match(spec) == linear_filter(rules, spec)
+
+    def test_first_applicable_rule_wins_per_clause(self):
+        """Duplicate clauses resolve to the first rule that actually applies"""
+        rules = [
+            {"clause_no": "7", "city": "Pune", "required_fields": ["height_m"]},
+            {"clause_no": "7", "city": "Mumbai", "required_fields": ["height_m"], "conditions": {"height_m": {"min": 30}}},
+            {"clause_no": "7", "required_fields": ["height_m"], "conditions": {"height_m": {"max": 20}}},
+            {"clause_no": "7", "required_fields": ["height_m"]},
+        ]
+        assert get_rule_index(rules).match({"city": "Mumbai", "height_m": 15}) == [rules[2]]
+
+    def test_uncompilable_conditions_fall_back_to_matcher(self):
+        """Unhashable conditions are checked per rule; a None scalar condition never matches"""
+        rules = [
+            {"clause_no": "a", "required_fields": ["tags"], "conditions": {"tags": [["x", "y"]]}},
+            {"clause_no": "b", "required_fields": ["zone"], "conditions": {"zone": None}},
+        ]
+        spec = {"city": "Mumbai", "tags": ["x", "y"], "zone": "R1"}
+        assert RuleIndex(rules).match(spec) == linear_filter(rules, spec) == rules[:1]
+
+
+class TestRuleIndexCache:
+    """Indexes are rebuilt only when the rule set changes"""
+
+    def test_same_or_equal_rules_reuse_the_index(self):
+        """Repeat calls and reloaded-but-equal rules hit the cache; appending a rule rebuilds"""
+        rng = random.Random(1)
+        rules = [random_rule(rng, i) for i in range(50)]
+        builds = rule_index.stats["builds"]
+
+        spec = random_spec(rng)
+        filter_applicable_rules(rules, spec)
+        filter_applicable_rules(rules, spec)
+        # Reloaded from disk: new objects, same content
+        assert get_rule_index([dict(r) for r in rules]) is get_rule_index(rules)
+        assert rule_index.stats["builds"] == builds + 1
+
+        rules.append({"clause_no": "new", "required_fields": ["city"]})
+        assert filter_applicable_rules(rules, {"city": "Pune"})[-1]["clause_no"] == "new"
+        assert rule_index.stats["builds"] == builds + 2
@@ -0,0 +1,50 @@
+# tests/test_runner_tracing.py
+"""
+Tests for runner-side span export (utils/tracing.py)
+"""
+import json
+
+import pytest
+
+from utils import tracing
+
+
+@pytest.fixture
+def restore_tracer():
+    yield
+    tracing.configure()
+
+
+class TestRunnerTracing:
+    """Spans are exported only when enabled, batched and size-rotated"""
+
+    def test_disabled_by_default_writes_nothing(self, tmp_path, restore_tracer):
+        """Without TRACING_ENABLED spans are dropped without touching the file"""
+        path = tmp_path / "traces.jsonl"
+        tracing.configure(enabled=False, path=str(path))
+
+        with tracing.start_span("pipeline.run"):
+            pass
+        tracing.tracer.shutdown()
+
+        assert tracing.tracer.exporter is None
+        assert not path.exists()
+
+    def test_enabled_spans_are_batched_and_rotated(self, tmp_path, restore_tracer):
+        """The export thread writes spans as JSON lines and rotates at max_bytes"""
+        path = tmp_path / "traces.jsonl"
+        tracing.configure(enabled=True, exporter="file", path=str(path), max_bytes=1, backups=1)
+
+        with tracing.start_span("pipeline.run") as parent:
+            with tracing.start_span("agent.classify"):
+                pass
+        tracing.tracer.shutdown()
+        with tracing.start_span("pipeline.second"):
+            pass
+        tracing.tracer.shutdown()
+
+        rotated = [json.loads(line) for line in (tmp_path / "traces.jsonl.1").read_text().splitlines()]
+        assert [span["name"] for span in rotated] == ["agent.classify", "pipeline.run"]
+        assert rotated[0]["parentSpanId"] == parent.span_id
+        assert rotated[0]["resource"] == {"service.name": tracing.SERVICE_NAME}
+        assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["pipeline.second"]
@@ -0,0 +1,189 @@
+"""OpenTelemetry-compatible tracing for the prompt runner.
+
+Same span format and W3C ``traceparent`` propagation as the backend
+(``backend/app/tracing.py``), so pipeline runs, bridge calls and backend
+requests land in one trace. Finished spans go through the backend's batching
+``Tracer`` (export thread, size-rotated file) as OTLP-style JSON lines to
+``TRACING_FILE_PATH`` (default ``data/logs/traces.jsonl``) or the console;
+render them with ``backend/scripts/trace_waterfall.py``. Tracing is off
+unless TRACING_ENABLED is set.
+
+Environment:
+    TRACING_ENABLED        1/true to export spans (default off)
+    TRACING_EXPORTER       file | console | none (default file)
+    TRACING_FILE_PATH      JSON-lines output for the file exporter
+    TRACING_FILE_MAX_BYTES rotate the file at this size (default 50 MB)
+    TRACING_FILE_BACKUPS   rotated files to keep (default 5)
+    TRACING_SERVICE_NAME   service.name resource attribute
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import importlib.util
+import logging
+import os
+import re
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger("utils.tracing")
+
+ENABLED = os.environ.get("TRACING_ENABLED", "").lower() in ("1", "true", "yes")
+EXPORTER = os.environ.get("TRACING_EXPORTER", "file").lower()
+FILE_PATH = os.environ.get("TRACING_FILE_PATH", os.path.join("data", "logs", "traces.jsonl"))
+FILE_MAX_BYTES = int(os.environ.get("TRACING_FILE_MAX_BYTES", 50 * 1024 * 1024))
+FILE_BACKUPS = int(os.environ.get("TRACING_FILE_BACKUPS", 5))
+SERVICE_NAME = os.environ.get("TRACING_SERVICE_NAME", "prompt-runner")
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_active_span: ContextVar[Optional["Span"]] = ContextVar("active_span", default=None)
+
+
+class Span:
+    """One timed operation; remote parents are non-recording."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, kind: str = "internal",
+                 span_id: Optional[str] = None, recording: bool = True):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = span_id or secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.recording = recording
+        self.attributes: Dict[str, Any] = {}
+        self.status = {"code": "UNSET", "message": None}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_status(self, code: str, message: Optional[str] = None) -> None:
+        self.status = {"code": code, "message": message}
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def end(self) -> None:
+        if self.end_ns is not None or not self.recording:
+            return
+        self.end_ns = time.time_ns()
+        _export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind.upper(),
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "attributes": self.attributes,
+            "status": self.status,
+            "resource": {"service.name": SERVICE_NAME},
+        }
+
+
+def _load_backend_tracing():
+    # backend/app/tracing.py only needs the stdlib at import; load it by path so
+    # the runner does not put the backend's ``app`` package on sys.path
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend", "app", "tracing.py")
+    spec = importlib.util.spec_from_file_location("utils._backend_tracing", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+tracer = _load_backend_tracing().Tracer()
+
+
+def configure(enabled: bool = ENABLED, exporter: str = EXPORTER, path: str = FILE_PATH,
+              max_bytes: int = FILE_MAX_BYTES, backups: int = FILE_BACKUPS) -> None:
+    """(Re)configure span export; disabled or ``none`` drops spans without any I/O."""
+    tracer.configure(
+        exporter=exporter if enabled and exporter != "none" else None,
+        path=path,
+        max_bytes=max_bytes,
+        backups=backups,
+        service_name=SERVICE_NAME,
+    )
+
+
+configure()
+atexit.register(tracer.shutdown)
+
+
+def _export(span: Span) -> None:
+    # Queued for the export thread; a no-op while tracing is disabled
+    tracer.on_end(span)
+
+
+def current_span() -> Optional[Span]:
+    return _active_span.get()
+
+
+@contextmanager
+def start_span(name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes: Any) -> Iterator[Span]:
+    """Run a block inside a child of ``parent`` (default: the active span)."""
+    parent = parent or _active_span.get()
+    if parent is not None:
+        span = Span(name, parent.trace_id, parent.span_id, kind)
+    else:
+        span = Span(name, secrets.token_hex(16), kind=kind)
+    for key, value in attributes.items():
+        span.set_attribute(key, value)
+    token = _active_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.set_status("ERROR", str(exc)[:200])
+        raise
+    finally:
+        _active_span.reset(token)
+        span.end()
+
+
+def traced(name: str, kind: str = "internal"):
+    """Decorator form of ``start_span``."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(name, kind):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def inject(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Copy of ``headers`` with ``traceparent`` for the active span."""
+    headers = dict(headers or {})
+    span = _active_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent
+    return headers
+
+
+def extract(headers) -> Optional[Span]:
+    """Remote parent from a ``traceparent`` header, or None."""
+    match = _TRACEPARENT.match((headers.get("traceparent") or "").strip().lower())
+    if not match or match.group(1) == "0" * 32:
+        return None
+    return Span("remote", match.group(1), span_id=match.group(2), kind="server", recording=False)
+
+
+def remote_parent(trace_id: Optional[str]) -> Optional[Span]:
+    """Parent for an existing pipeline ``trace_id`` (UUID or 32-hex) so it becomes the OTel trace ID."""
+    normalized = (trace_id or "").replace("-", "").lower()
+    if not re.fullmatch(r"[0-9a-f]{32}", normalized):
+        return None
+    return Span("remote", normalized, span_id=normalized[:16], recording=False)